@@ -11,6 +11,7 @@
    is_linux(). The set of functions defined here should make it clearer what is going
    on when they are used.
 """
+import os as _os
 import platform as _platform
 import sys as _sys
 
@@ -53,4 +54,23 @@ def is_64bit():
         return _sys.maxsize > 2**32
     else:
         bits = _platform.architecture()[0]
-        return bits == '64bit'
\ No newline at end of file
+        return bits == '64bit'
+
+def python_interpreter():
+    """
+        Returns the path of the python interpreter to start python subprocesses with or
+        None if it is not known, e.g. within MantidPlot, where sys.executable is MantidPlot itself
+    """
+    executable = _sys.executable
+    if not executable or not _os.path.basename(executable).lower().startswith("python"):
+        return None
+    return executable
+
+def python_subprocess_environment():
+    """
+        Returns a copy of the environment with PYTHONPATH set to the current sys.path, so a python
+        subprocess can import the same modules as this interpreter
+    """
+    env = _os.environ.copy()
+    env["PYTHONPATH"] = _os.pathsep.join(path for path in _sys.path if path)
+    return env
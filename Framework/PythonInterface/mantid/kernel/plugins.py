@@ -13,8 +13,8 @@ algorithms, fit functions etc.
 from __future__ import (absolute_import, division,
                         print_function)
 
+import json as _json
 import os as _os
-import sys as _sys
 from traceback import format_exc
 try:
     from importlib.machinery import SourceFileLoader
@@ -38,6 +38,16 @@ from . import logger, Logger, config
 
 # String that separates paths (should be in the ConfigService)
 PATH_SEPARATOR=";"
+# Config key switching on lazy loading of the Python plugins by the simple API
+LAZY_LOADING_KEY = "python.plugins.lazy"
+# Name of the file, within the application data directory, caching the algorithms defined by each plugin
+MANIFEST_FILENAME = "python_plugins_manifest.json"
+# Name of the file, within the application data directory, caching which plugin files register algorithms
+INDEX_FILENAME = "python_plugins_index.json"
+# The line registering an algorithm
+SUBSCRIBE_LINE = b"AlgorithmFactory.subscribe"
+# Number of bytes at the end of a plugin file searched first for the registration line
+TAIL_SIZE = 4096
 
 class PluginLoader(object):
 
@@ -99,24 +109,36 @@ def check_for_plugins(top_dir):
     return False
 
 
-def find_plugins(top_dir):
+def find_plugins(top_dir, index=None):
     """
        Searches recursively from the given directory to find the list of plugins that should be loaded
        @param top_dir :: A string containing a path to a directory. Throws ValueError if it is not valid
+       @param index :: An optional dictionary mapping plugin files to their signature and whether they
+       register an algorithm. Only files whose signature has changed are inspected and the index is
+       updated with them
+    """
+    all_plugins = find_plugin_files(top_dir)
+    if index is None:
+        algs = [filename for filename in all_plugins if contains_algorithm(filename)]
+    else:
+        algs = [filename for filename in all_plugins if contains_algorithm_indexed(filename, index)]
+
+    return all_plugins, algs
+
+def find_plugin_files(top_dir):
+    """
+       Searches recursively from the given directory to find the plugin files without inspecting their content
+       @param top_dir :: A string containing a path to a directory. Throws ValueError if it is not valid
     """
     if not _os.path.isdir(top_dir):
         raise ValueError("Cannot search given path for plugins, path is not a directory: '%s' " % str(top_dir))
     all_plugins = []
-    algs = []
     for root, dirs, files in _os.walk(top_dir):
         for f in files:
             if f.endswith(PluginLoader.extension):
-                filename = _os.path.join(root, f)
-                all_plugins.append(filename)
-                if contains_algorithm(filename):
-                    algs.append(filename)
+                all_plugins.append(_os.path.join(root, f))
 
-    return all_plugins, algs
+    return all_plugins
 
 #======================================================================================================================
 
@@ -237,26 +259,167 @@ def sync_attrs(source, attrs, clients):
 
 def contains_algorithm(filename):
     """
-        Inspects the file to look for an algorithm registration line
+        Inspects the file to look for an algorithm registration line. The registration
+        is usually at the end of the file so only its tail is read unless the line is not there.
     """
-    if _sys.version_info[0] < 3:
-        def readlines_reversed(f):
-            return reversed(f.readlines())
-    else:
-        def readlines_reversed(f):
-            return reversed(list(f.readlines()))
-    #endif
-    alg_found = True
     try:
-        from io import open
-        with open(filename,'r', encoding='UTF-8') as plugin_file:
-            for line in readlines_reversed(plugin_file):
-                if 'AlgorithmFactory.subscribe' in line:
-                    alg_found = True
-                    break
+        with open(filename, 'rb') as plugin_file:
+            plugin_file.seek(0, _os.SEEK_END)
+            size = plugin_file.tell()
+            plugin_file.seek(max(0, size - TAIL_SIZE))
+            if SUBSCRIBE_LINE in plugin_file.read():
+                return True
+            if size <= TAIL_SIZE:
+                return False
+            plugin_file.seek(0)
+            return SUBSCRIBE_LINE in plugin_file.read()
     except Exception as exc:
         # something wrong with reading the file
         logger.warning("Error checking plugin content in '{0}'\n{1}".format(filename,str(exc)))
-        alg_found = False
+        return False
+
+def contains_algorithm_indexed(filename, index):
+    """
+        Looks up whether the file registers an algorithm in the index. The file is only
+        inspected, and the index updated, if its modification time or size has changed.
+
+        @param filename :: A path to the plugin file
+        @param index :: A dictionary mapping plugin files to a list of their signature
+        and whether they register an algorithm
+    """
+    try:
+        signature = get_file_signature(filename)
+    except OSError:
+        return contains_algorithm(filename)
+    entry = index.get(filename)
+    if entry is None or entry[0] != signature:
+        entry = [signature, contains_algorithm(filename)]
+        index[filename] = entry
+    return entry[1]
+
+def get_index_path():
+    """
+        Returns the full path to the file with the index of the Python plugins
+    """
+    return _os.path.join(config.getAppDataDirectory(), INDEX_FILENAME)
+
+#======================================================================================================================
+# Manifest of the algorithms defined by each plugin file
+#======================================================================================================================
+
+def lazy_loading_enabled():
+    """
+        Returns True if the Python plugins should only be loaded when one of their
+        algorithms is first requested from the simple API
+    """
+    return config[LAZY_LOADING_KEY].strip().lower() in ("1", "on", "true")
+
+def get_manifest_path():
+    """
+        Returns the full path to the file with the manifest of the Python plugins
+    """
+    return _os.path.join(config.getAppDataDirectory(), MANIFEST_FILENAME)
+
+def read_plugin_cache(filename):
+    """
+        Reads a cache file of the Python plugins, i.e. the manifest or the index.
+        A missing or unreadable file gives an empty cache.
+
+        @param filename :: A path to the cache file
+        @returns A dictionary mapping the plugin files to their entries
+    """
+    try:
+        with open(filename, 'r') as cache_file:
+            cache = _json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def write_plugin_cache(filename, cache):
+    """
+        Writes a cache file of the Python plugins, i.e. the manifest or the index.
+        Failures are only logged as the files can always be rebuilt.
+
+        @param filename :: A path to the cache file
+        @param cache :: A dictionary mapping the plugin files to their entries
+    """
+    try:
+        with open(filename, 'w') as cache_file:
+            _json.dump(cache, cache_file)
+    except (IOError, OSError) as exc:
+        logger.debug("Unable to write the cache of Python plugins '{0}': {1}".format(filename, str(exc)))
+
+def get_file_signature(filepath):
+    """
+        Returns the modification time and size of the given file. A plugin
+        whose signature has changed has to be inspected again.
+
+        @param filepath :: A path to a file
+    """
+    stat = _os.stat(filepath)
+    return [stat.st_mtime, stat.st_size]
+
+def is_manifest_entry_valid(entry, filepath):
+    """
+        Returns True if the manifest entry still describes the given plugin file
+
+        @param entry :: The manifest entry of the plugin, None if there is none
+        @param filepath :: A path to the plugin file
+    """
+    if entry is None or "methods" not in entry:
+        return False
+    try:
+        return entry.get("signature") == get_file_signature(filepath)
+    except OSError:
+        return False
+
+def get_workspace_methods(algorithms):
+    """
+        Returns the workspace methods defined by the highest version of the given algorithms.
+        The simple API attaches them to the workspace types without creating the algorithm functions.
+
+        @param algorithms :: A dictionary mapping the names of the algorithms to their versions
+        @returns A dictionary mapping the names of the algorithms defining a method to a list of
+        the method name, the name of the input workspace property and the workspace types
+    """
+    from mantid.api import AlgorithmManager
+
+    methods = {}
+    for name, versions in algorithms.items():
+        try:
+            algorithm = AlgorithmManager.createUnmanaged(name, max(versions))
+            algorithm.initialize()
+        except Exception:
+            # reported when the algorithm function is created
+            continue
+        method_name = algorithm.workspaceMethodName()
+        if len(method_name) > 0:
+            methods[name] = [method_name, algorithm.workspaceMethodInputProperty(),
+                             list(algorithm.workspaceMethodOn())]
+    return methods
+
+def load_and_inspect(filepath):
+    """
+        Loads the plugin file and returns its manifest entry, which records the
+        signature of the file, the algorithms it registers with the AlgorithmFactory
+        and their workspace methods
+
+        @param filepath :: A path that must point to a file
+        @returns A dictionary with the signature of the file, a dictionary mapping
+        the names of the new algorithms to their versions and one mapping them to their
+        workspace methods, as returned by get_workspace_methods
+    """
+    from mantid.api import AlgorithmFactory
+
+    signature = get_file_signature(filepath)
+    before = AlgorithmFactory.getRegisteredAlgorithms(True)
+    load_from_file(filepath)
+    after = AlgorithmFactory.getRegisteredAlgorithms(True)
+
+    algorithms = {}
+    for name, versions in after.items():
+        new_versions = sorted(set(versions) - set(before.get(name, [])))
+        if len(new_versions) > 0:
+            algorithms[name] = new_versions
 
-    return alg_found
+    return {"signature": signature, "algorithms": algorithms, "methods": get_workspace_methods(algorithms)}
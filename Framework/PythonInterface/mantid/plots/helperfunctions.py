@@ -363,6 +363,31 @@ def get_matrix_2d_data(workspace, distribution, histogram2D=False):
     return x, y, z
 
 
+def get_common_bins_2d_data(workspace, distribution):
+    '''
+    Get all data from a Matrix workspace that has the same bins in every
+    spectrum. Unlike :func:`get_matrix_2d_data`, the bin boundaries are
+    returned once instead of being repeated for every spectrum.
+
+    :param workspace: Matrix workspace to extract the data from
+    :param distribution: if False, and the workspace contains histogram data,
+        the intensity will be divided by the x bin width
+
+    Returns the x and y bin boundaries as 1D arrays and the intensities as a 2D array
+    '''
+    x = numpy.array(workspace.readX(0))
+    y = workspace.getAxis(1).extractValues()
+    z = workspace.extractY()
+    if workspace.isHistogramData():
+        if not distribution:
+            z /= x[1:] - x[:-1]
+    else:
+        x = boundaries_from_points(x)
+    if len(y) == z.shape[0]:
+        y = boundaries_from_points(y)
+    return x, y, z
+
+
 def get_uneven_data(workspace, distribution):
     '''
     Function to get data for uneven workspace2Ds, such as
@@ -398,6 +423,73 @@ def get_uneven_data(workspace, distribution):
     return x, y, z
 
 
+def get_uneven_data_rectangles(workspace, distribution):
+    '''
+    Vectorised counterpart of :func:`get_uneven_data`. The bins of all the spectra
+    are stored in flat arrays, with one entry per bin, so that they can be
+    plotted as a single collection of axis aligned rectangles. X and Y are extracted
+    in bulk if all the spectra have the same number of bins. extractX and extractY
+    cannot be used if the number of bins varies, the spectra are then read one by one.
+
+    :param workspace: a workspace2d
+    :param distribution: if False, and the workspace contains histogram data,
+        the intensity will be divided by the x bin width
+
+    Returns five 1D arrays: the left and right boundaries of each bin, the lower
+    and upper extents of the spectrum it belongs to and the masked intensities
+    '''
+    nhist = workspace.getNumberHistograms()
+    yvals = workspace.getAxis(1).extractValues()
+    if len(yvals) == nhist:
+        yvals = boundaries_from_points(yvals)
+    try:
+        _ = workspace.blocksize()
+        xvals = workspace.extractX()
+        zvals = workspace.extractY().ravel()
+        x_lengths = numpy.full(nhist, xvals.shape[1], dtype=int)
+        xvals = xvals.ravel()
+    except RuntimeError:
+        xvals = [workspace.readX(index) for index in range(nhist)]
+        x_lengths = numpy.array([len(xi) for xi in xvals], dtype=int)
+        xvals = numpy.concatenate(xvals)
+        zvals = numpy.concatenate([workspace.readY(index) for index in range(nhist)])
+
+    # positions of the first and last x value of each spectrum in the flat array
+    x_ends = numpy.cumsum(x_lengths)
+    x_starts = x_ends - x_lengths
+    not_empty = x_lengths > 0
+    first = numpy.zeros(xvals.size, dtype=bool)
+    first[x_starts[not_empty]] = True
+    last = numpy.zeros(xvals.size, dtype=bool)
+    last[x_ends[not_empty] - 1] = True
+
+    if workspace.isHistogramData():
+        left = xvals[~last]
+        right = xvals[~first]
+        if not distribution:
+            zvals = zvals / (right - left)
+        n_bins = numpy.maximum(x_lengths - 1, 0)
+    else:
+        # same boundaries as boundaries_from_points applied to each spectrum
+        diffs = numpy.diff(xvals)
+        step_before = numpy.ones(xvals.size)
+        step_after = numpy.ones(xvals.size)
+        step_before[1:] = diffs
+        step_after[:-1] = diffs
+        single = first & last
+        step_before[first] = step_after[first]
+        step_after[last] = step_before[last]
+        step_before[single] = 1.
+        step_after[single] = 1.
+        left = xvals - 0.5 * step_before
+        right = xvals + 0.5 * step_after
+        n_bins = x_lengths
+    bottom = numpy.repeat(yvals[:nhist], n_bins)
+    top = numpy.repeat(yvals[1:nhist + 1], n_bins)
+    zvals = numpy.ma.masked_invalid(zvals)
+    return left, right, bottom, top, zvals
+
+
 def get_data_uneven_flag(workspace, **kwargs):
     '''
     Helper function that allows :meth:`matplotlib.axes.Axes.pcolor`,
@@ -418,6 +510,24 @@ def get_data_uneven_flag(workspace, **kwargs):
     return aligned, kwargs
 
 
+def get_level_of_detail_flag(workspace, **kwargs):
+    '''
+    Helper function that allows 2D plots of large matrix workspaces to draw only
+    the visible part of the data, rebinned to the resolution of the axes.
+
+    :param workspace: a workspace2d
+
+    if lod keyword is available and True, and the workspace has the same bins
+    in every spectrum, it will return true, otherwise false
+    '''
+    lod = kwargs.pop('lod', False)
+    if lod and not workspace.isCommonBins():
+        mantid.kernel.logger.warning('The level of detail mode needs the same bins in every spectrum. '
+                                     'All the data will be plotted')
+        lod = False
+    return lod, kwargs
+
+
 # ====================================================
 # extract logs
 # ====================================================
@@ -0,0 +1,335 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantid package
+#
+#
+"""
+Level of detail support for 2D plots of large matrix workspaces.
+
+Instead of giving every bin of a workspace to matplotlib, only the part that is
+visible in the axes is drawn, rebinned so that it has no more bins than the axes
+has pixels. The rebinned data is cached per workspace until the workspace is
+replaced, renamed or deleted in the analysis data service, and the plot is refined
+whenever the limits of the axes change.
+"""
+from __future__ import (absolute_import, division, print_function)
+
+from collections import OrderedDict
+
+import numpy
+from matplotlib.image import PcolorImage
+
+from mantid.api import AnalysisDataServiceObserver
+from mantid.plots.helperfunctions import get_common_bins_2d_data
+
+# Number of workspaces for which the rebinned data is kept
+MAX_CACHED_WORKSPACES = 4
+# Fraction of the visible range that is also drawn on each side of it, so that
+# panning does not need a refinement straight away
+MARGIN = 0.5
+
+_cache = OrderedDict()
+_cache_observer = None
+
+
+def _rebin_edges(edges, factor):
+    '''
+    Bin boundaries after merging groups of factor bins. The last group may be incomplete
+
+    :param edges: 1D array of bin boundaries
+    :param factor: number of bins to merge
+    '''
+    rebinned = edges[::factor]
+    if (len(edges) - 1) % factor:
+        rebinned = numpy.append(rebinned, edges[-1])
+    return rebinned
+
+
+def _rebin_values(values, factor, axis):
+    '''
+    Average groups of factor bins along an axis, ignoring values that are not
+    finite. The last group may be incomplete.
+
+    :param values: 2D array of intensities
+    :param factor: number of bins to merge
+    :param axis: axis along which the bins are merged
+    '''
+    nbins = values.shape[axis]
+    ngroups = -(-nbins // factor)
+    padding = ngroups * factor - nbins
+    if padding:
+        pad_width = [(0, 0), (0, 0)]
+        pad_width[axis] = (0, padding)
+        values = numpy.pad(values, pad_width, mode='constant', constant_values=numpy.nan)
+    shape = list(values.shape)
+    shape[axis:axis + 1] = [ngroups, factor]
+    values = values.reshape(shape)
+    finite = numpy.isfinite(values)
+    total = numpy.where(finite, values, 0.).sum(axis=axis + 1)
+    count = finite.sum(axis=axis + 1)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+def _visible_range(edges, lim):
+    '''
+    Indices of the first and one past the last bin overlapping the limits
+
+    :param edges: increasing 1D array of bin boundaries
+    :param lim: tuple with the limits of the axis
+    '''
+    nbins = len(edges) - 1
+    start = numpy.searchsorted(edges, min(lim), side='right') - 1
+    end = numpy.searchsorted(edges, max(lim), side='left')
+    start = int(min(max(start, 0), nbins - 1))
+    end = int(min(max(end, start + 1), nbins))
+    return start, end
+
+
+def _level(nbins, pixels):
+    '''
+    Smallest number of halvings of the resolution needed to show nbins in the pixels
+    '''
+    if nbins <= pixels:
+        return 0
+    return int(numpy.ceil(numpy.log2(nbins / pixels)))
+
+
+class LevelOfDetailData(object):
+    '''
+    The data of a matrix workspace with the same bins in every spectrum, and
+    versions of it with the resolution halved one or more times along each axis.
+    The rebinned versions are created when they are first requested.
+    '''
+
+    def __init__(self, x, y, z):
+        '''
+        :param x: 1D array of the bin boundaries along the horizontal axis
+        :param y: 1D array of the bin boundaries along the vertical axis
+        :param z: 2D array of the intensities, one row per spectrum
+        '''
+        if x[0] > x[-1]:
+            x = x[::-1]
+            z = z[:, ::-1]
+        if y[0] > y[-1]:
+            y = y[::-1]
+            z = z[::-1, :]
+        self.x = x
+        self.y = y
+        self._levels = {(0, 0): z}
+
+    def level(self, x_level, y_level):
+        '''
+        The intensities with the resolution halved x_level times horizontally
+        and y_level times vertically
+        '''
+        key = (x_level, y_level)
+        if key not in self._levels:
+            if x_level > 0:
+                self._levels[key] = _rebin_values(self.level(x_level - 1, y_level), 2, 1)
+            else:
+                self._levels[key] = _rebin_values(self.level(0, y_level - 1), 2, 0)
+        return self._levels[key]
+
+    def autoscale(self, norm):
+        '''
+        Set the limits of the norm that are not set yet from the full resolution data,
+        so that the colors do not change when the plot is refined
+
+        :param norm: a :class:`matplotlib.colors.Normalize`
+        '''
+        norm.autoscale_None(numpy.ma.masked_invalid(self.level(0, 0), copy=False))
+
+    def region(self, x_level, y_level, x_range, y_range):
+        '''
+        Get the part of the data covering a range of bins, extended by the margin on each side
+
+        :param x_level: number of halvings of the horizontal resolution
+        :param y_level: number of halvings of the vertical resolution
+        :param x_range: first and one past the last full resolution bin along the horizontal axis
+        :param y_range: first and one past the last full resolution bin along the vertical axis
+
+        Returns the x and y boundaries, the intensities and the range of full
+        resolution bins that they cover along each axis
+        '''
+        x_first, x_last = self._bins(x_range, len(self.x) - 1, 2 ** x_level)
+        y_first, y_last = self._bins(y_range, len(self.y) - 1, 2 ** y_level)
+        x = _rebin_edges(self.x, 2 ** x_level)[x_first:x_last + 1]
+        y = _rebin_edges(self.y, 2 ** y_level)[y_first:y_last + 1]
+        z = self.level(x_level, y_level)[y_first:y_last, x_first:x_last]
+        x_covered = (x_first * 2 ** x_level, min(x_last * 2 ** x_level, len(self.x) - 1))
+        y_covered = (y_first * 2 ** y_level, min(y_last * 2 ** y_level, len(self.y) - 1))
+        return x, y, z, (x_covered, y_covered)
+
+    @staticmethod
+    def _bins(bin_range, nbins, factor):
+        margin = int(MARGIN * (bin_range[1] - bin_range[0]))
+        start = max(bin_range[0] - margin, 0)
+        end = min(bin_range[1] + margin, nbins)
+        return start // factor, -(-end // factor)
+
+
+class _CacheObserver(AnalysisDataServiceObserver):
+    '''
+    Removes the cached data of the workspaces that are replaced, renamed or deleted in the
+    analysis data service. Algorithms run in place replace their output workspace.
+    '''
+
+    def __init__(self):
+        super(_CacheObserver, self).__init__()
+        self.observeReplace(True)
+        self.observeRename(True)
+        self.observeDelete(True)
+        self.observeClear(True)
+
+    def replaceHandle(self, name, workspace):
+        _remove_from_cache(name)
+
+    def renameHandle(self, name, new_name):
+        _remove_from_cache(name)
+
+    def deleteHandle(self, name, workspace):
+        _remove_from_cache(name)
+
+    def clearHandle(self):
+        clear_cache()
+
+
+def _remove_from_cache(name):
+    for distribution in (False, True):
+        _cache.pop((name, distribution), None)
+
+
+def get_level_of_detail_data(workspace, distribution):
+    '''
+    Get the :class:`LevelOfDetailData` of a workspace. The data of the last few workspaces in
+    the analysis data service is cached, so that the workspace is only read again after it has
+    been replaced, e.g. by an algorithm, renamed or deleted. Changes made through setY or dataY
+    are not noticed, :func:`clear_cache` has to be called after them.
+
+    :param workspace: Matrix workspace with the same bins in every spectrum
+    :param distribution: if False, and the workspace contains histogram data,
+        the intensity will be divided by the x bin width
+    '''
+    name = workspace.name()
+    key = (name, distribution)
+    global _cache_observer
+    if name and key in _cache:
+        data = _cache.pop(key)
+        _cache[key] = data
+        return data
+    data = LevelOfDetailData(*get_common_bins_2d_data(workspace, distribution))
+    if name:
+        if _cache_observer is None:
+            _cache_observer = _CacheObserver()
+        _cache[key] = data
+        while len(_cache) > MAX_CACHED_WORKSPACES:
+            _cache.popitem(last=False)
+    return data
+
+
+def clear_cache():
+    '''
+    Remove the data of all the workspaces from the cache
+    '''
+    _cache.clear()
+
+
+class LevelOfDetail(object):
+    '''
+    Keeps an image showing the visible part of a :class:`LevelOfDetailData` at the
+    resolution of the axes. The image is refined when the limits of the axes change
+    or the figure is resized.
+    '''
+
+    def __init__(self, axes, data):
+        self.axes = axes
+        self.data = data
+        self.image = None
+        self._drawn = None
+        self._updating = False
+        self._callback_ids = []
+        self._resize_id = None
+
+    def extent(self):
+        '''
+        The limits of the data as xmin, xmax, ymin, ymax
+        '''
+        return [self.data.x[0], self.data.x[-1], self.data.y[0], self.data.y[-1]]
+
+    def region(self, xlim, ylim):
+        '''
+        The x and y boundaries and the intensities to draw for the limits, or None if the
+        data already drawn covers the limits at the right resolution
+        '''
+        bbox = self.axes.get_window_extent()
+        x_range = _visible_range(self.data.x, xlim)
+        y_range = _visible_range(self.data.y, ylim)
+        levels = (_level(x_range[1] - x_range[0], max(int(round(bbox.width)), 1)),
+                  _level(y_range[1] - y_range[0], max(int(round(bbox.height)), 1)))
+        if self._drawn is not None:
+            drawn_levels, (x_covered, y_covered) = self._drawn
+            if (drawn_levels == levels and x_covered[0] <= x_range[0] and x_range[1] <= x_covered[1]
+                    and y_covered[0] <= y_range[0] and y_range[1] <= y_covered[1]):
+                return None
+        x, y, z, covered = self.data.region(levels[0], levels[1], x_range, y_range)
+        self._drawn = (levels, covered)
+        return x, y, z
+
+    def connect(self, image):
+        '''
+        Start refining the image when the limits of the axes change
+
+        :param image: the :class:`matplotlib.image.AxesImage` or :class:`matplotlib.image.PcolorImage`
+            showing the data. It keeps a reference to this object as its level_of_detail attribute
+        '''
+        self.image = image
+        image.level_of_detail = self
+        self._callback_ids = [self.axes.callbacks.connect('xlim_changed', self.update),
+                              self.axes.callbacks.connect('ylim_changed', self.update)]
+        self._resize_id = self.axes.figure.canvas.mpl_connect('resize_event', self.update)
+
+    def disconnect(self):
+        '''
+        Stop refining the image
+        '''
+        for callback_id in self._callback_ids:
+            self.axes.callbacks.disconnect(callback_id)
+        self._callback_ids = []
+        if self._resize_id is not None:
+            self.axes.figure.canvas.mpl_disconnect(self._resize_id)
+            self._resize_id = None
+
+    def update(self, *args):
+        '''
+        Draw the data for the current limits of the axes if needed
+        '''
+        if self._updating:
+            return
+        if self.image not in self.axes.images:
+            self.disconnect()
+            return
+        region = self.region(self.axes.get_xlim(), self.axes.get_ylim())
+        if region is None:
+            return
+        x, y, z = region
+        self._updating = True
+        try:
+            if isinstance(self.image, PcolorImage):
+                self.image.set_data(x, y, z)
+            else:
+                # set_extent changes the limits of the axes if they are autoscaled
+                autoscale = (self.axes.get_autoscalex_on(), self.axes.get_autoscaley_on())
+                self.axes.set_autoscale_on(False)
+                self.image.set_data(z)
+                self.image.set_extent([x[0], x[-1], y[0], y[-1]])
+                self.image.sticky_edges.x[:] = self.extent()[:2]
+                self.image.sticky_edges.y[:] = self.extent()[2:]
+                self.axes.set_autoscalex_on(autoscale[0])
+                self.axes.set_autoscaley_on(autoscale[1])
+        finally:
+            self._updating = False
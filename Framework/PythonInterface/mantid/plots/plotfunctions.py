@@ -15,9 +15,11 @@ import mantid.kernel
 import mantid.api
 from mantid.plots.helperfunctions import *
 import matplotlib
+import matplotlib.collections
 import matplotlib.colors
 import matplotlib.dates as mdates
 import matplotlib.image as mimage
+from mantid.plots.levelofdetail import LevelOfDetail, get_level_of_detail_data
 
 # ================================================
 # Private 2D Helper functions
@@ -242,25 +244,24 @@ def contourf(axes, workspace, *args, **kwargs):
 def _pcolorpieces(axes, workspace, distribution, *args, **kwargs):
     '''
     Helper function for pcolor, pcolorfast, and pcolormesh that will
-    plot a 2d representation of each spectra. The polycollections or meshes
-    will be normalized to the same intensity limits.
+    plot a 2d representation of each spectra. The bins of all the spectra are
+    drawn as axis aligned rectangles in a single polygon collection, normalized
+    to the same intensity limits.
     :param axes: :class:`matplotlib.axes.Axes` object that will do the plotting
     :param workspace: :class:`mantid.api.MatrixWorkspace` to extract the data from
     :param distribution: ``None`` (default) asks the workspace. ``False`` means
                          divide by bin width. ``True`` means do not divide by bin width.
                          Applies only when the the matrix workspace is a histogram.
-    :param pcolortype: this keyword allows the plotting to be one of pcolormesh or
-        pcolorfast if there is "mesh" or "fast" in the value of the keyword, or
-        pcolor by default
-    Note: the return is the pcolor, pcolormesh, or pcolorfast of the last spectrum
-    '''
-    (x, y, z) = get_uneven_data(workspace, distribution)
-    mini = numpy.min([numpy.min(i) for i in z])
-    maxi = numpy.max([numpy.max(i) for i in z])
+    Note: the return is the :class:`matplotlib.collections.PolyCollection` of all spectra,
+    whichever of pcolor, pcolorfast and pcolormesh is called
+    '''
+    (left, right, bottom, top, z) = get_uneven_data_rectangles(workspace, distribution)
+    mini = numpy.min(z)
+    maxi = numpy.max(z)
     if 'vmin' in kwargs:
-        mini = kwargs['vmin']
+        mini = kwargs.pop('vmin')
     if 'vmax' in kwargs:
-        maxi = kwargs['vmax']
+        maxi = kwargs.pop('vmax')
     if 'norm' not in kwargs:
         kwargs['norm'] = matplotlib.colors.Normalize(vmin=mini, vmax=maxi)
     else:
@@ -268,21 +269,74 @@ def _pcolorpieces(axes, workspace, distribution, *args, **kwargs):
             kwargs['norm'].vmin = mini
         if kwargs['norm'].vmax is None:
             kwargs['norm'].vmax = maxi
-
-    # setup the particular pcolor to use
-    pcolortype = kwargs.pop('pcolortype', '').lower()
-    if 'mesh' in pcolortype:
-        pcolor = axes.pcolormesh
-    elif 'fast' in pcolortype:
-        pcolor = axes.pcolorfast
-    else:
-        pcolor = axes.pcolor
-
-    for xi, yi, zi in zip(x, y, z):
-        XX, YY = numpy.meshgrid(xi, yi, indexing='ij')
-        cm = pcolor(XX, YY, zi.reshape(-1, 1), **kwargs)
-
-    return cm
+    kwargs.pop('shading', None)
+    kwargs.setdefault('edgecolors', 'none')
+    kwargs.setdefault('antialiaseds', False)
+
+    # vertices of the rectangles: shape (number of bins, 4 corners, x and y)
+    verts = numpy.empty((left.size, 4, 2))
+    verts[:, 0, 0] = verts[:, 1, 0] = left
+    verts[:, 2, 0] = verts[:, 3, 0] = right
+    verts[:, 0, 1] = verts[:, 3, 1] = bottom
+    verts[:, 1, 1] = verts[:, 2, 1] = top
+
+    collection = matplotlib.collections.PolyCollection(verts, array=z, **kwargs)
+    axes.add_collection(collection, autolim=False)
+    if left.size > 0:
+        minx, maxx = numpy.min(left), numpy.max(right)
+        miny, maxy = numpy.min(bottom), numpy.max(top)
+        collection.sticky_edges.x[:] = [minx, maxx]
+        collection.sticky_edges.y[:] = [miny, maxy]
+        axes.update_datalim([(minx, miny), (maxx, maxy)])
+    axes.autoscale_view()
+    return collection
+
+
+def _level_of_detail_norm(level_of_detail, kwargs):
+    '''
+    Helper function for the level of detail mode. The color limits that are not given
+    are taken from the full resolution data, so that they do not change when zooming.
+    '''
+    norm = kwargs.pop('norm', None)
+    if norm is None:
+        norm = matplotlib.colors.Normalize()
+    vmin = kwargs.pop('vmin', None)
+    vmax = kwargs.pop('vmax', None)
+    if vmin is not None:
+        norm.vmin = vmin
+    if vmax is not None:
+        norm.vmax = vmax
+    level_of_detail.data.autoscale(norm)
+    return norm
+
+
+def _pcolorlod(axes, workspace, distribution, *args, **kwargs):
+    '''
+    Helper function for pcolor, pcolorfast, and pcolormesh in the level of detail
+    mode. Only the visible part of the data is drawn, rebinned to the resolution
+    of the axes, and it is refined when the limits of the axes change.
+    :param axes: :class:`matplotlib.axes.Axes` object that will do the plotting
+    :param workspace: :class:`mantid.api.MatrixWorkspace` to extract the data from
+    :param distribution: ``None`` (default) asks the workspace. ``False`` means
+                         divide by bin width. ``True`` means do not divide by bin width.
+                         Applies only when the the matrix workspace is a histogram.
+    Note: the return is a :class:`matplotlib.image.PcolorImage`
+    '''
+    level_of_detail = LevelOfDetail(axes, get_level_of_detail_data(workspace, distribution))
+    norm = _level_of_detail_norm(level_of_detail, kwargs)
+    for keyword in ('shading', 'edgecolors', 'antialiased', 'antialiaseds'):
+        kwargs.pop(keyword, None)
+
+    extent = level_of_detail.extent()
+    (x, y, z) = level_of_detail.region(extent[:2], extent[2:])
+    image = mimage.PcolorImage(axes, x, y, z, norm=norm, **kwargs)
+    axes.add_image(image)
+    image.sticky_edges.x[:] = extent[:2]
+    image.sticky_edges.y[:] = extent[2:]
+    axes.update_datalim([(extent[0], extent[2]), (extent[1], extent[3])])
+    axes.autoscale_view(tight=True)
+    level_of_detail.connect(image)
+    return image
 
 
 def pcolor(axes, workspace, *args, **kwargs):
@@ -299,17 +353,25 @@ def pcolor(axes, workspace, *args, **kwargs):
                           the value from displayNormalizationHisto. It checks only if
                           the normalization is mantid.api.MDNormalization.NumEventsNormalization
     :param axisaligned: ``False`` (default). If ``True``, or if the workspace has a variable
-                        number of bins, the polygons will be aligned with the axes
+                        number of bins, the polygons will be aligned with the axes. The bins
+                        of all the spectra are then drawn as one
+                        :class:`matplotlib.collections.PolyCollection`, which is returned
+    :param lod: ``False`` (default). If ``True``, and the workspace has the same bins in every
+                spectrum, only the visible part of the data is drawn, at the resolution of the
+                axes, and it is refined when zooming or panning. The return is then a
+                :class:`matplotlib.image.PcolorImage`
     '''
     _setLabels2D(axes, workspace)
     if isinstance(workspace, mantid.dataobjects.MDHistoWorkspace):
         (normalization, kwargs) = get_normalization(workspace, **kwargs)
         x, y, z = get_md_data2d_bin_bounds(workspace, normalization)
     else:
+        (lod, kwargs) = get_level_of_detail_flag(workspace, **kwargs)
         (aligned, kwargs) = get_data_uneven_flag(workspace, **kwargs)
         (distribution, kwargs) = get_distribution(workspace, **kwargs)
-        if aligned:
-            kwargs['pcolortype'] = ''
+        if lod:
+            return _pcolorlod(axes, workspace, distribution, *args, **kwargs)
+        elif aligned:
             return _pcolorpieces(axes, workspace, distribution, *args, **kwargs)
         else:
             (x, y, z) = get_matrix_2d_data(workspace, distribution, histogram2D=True)
@@ -330,17 +392,25 @@ def pcolorfast(axes, workspace, *args, **kwargs):
                           the value from displayNormalizationHisto. It checks only if
                           the normalization is mantid.api.MDNormalization.NumEventsNormalization
     :param axisaligned: ``False`` (default). If ``True``, or if the workspace has a variable
-                        number of bins, the polygons will be aligned with the axes
+                        number of bins, the polygons will be aligned with the axes. The bins
+                        of all the spectra are then drawn as one
+                        :class:`matplotlib.collections.PolyCollection`, which is returned
+    :param lod: ``False`` (default). If ``True``, and the workspace has the same bins in every
+                spectrum, only the visible part of the data is drawn, at the resolution of the
+                axes, and it is refined when zooming or panning. The return is then a
+                :class:`matplotlib.image.PcolorImage`
     '''
     _setLabels2D(axes, workspace)
     if isinstance(workspace, mantid.dataobjects.MDHistoWorkspace):
         (normalization, kwargs) = get_normalization(workspace, **kwargs)
         x, y, z = get_md_data2d_bin_bounds(workspace, normalization)
     else:
+        (lod, kwargs) = get_level_of_detail_flag(workspace, **kwargs)
         (aligned, kwargs) = get_data_uneven_flag(workspace, **kwargs)
         (distribution, kwargs) = get_distribution(workspace, **kwargs)
-        if aligned:
-            kwargs['pcolortype'] = 'fast'
+        if lod:
+            return _pcolorlod(axes, workspace, distribution, *args, **kwargs)
+        elif aligned:
             return _pcolorpieces(axes, workspace, distribution, *args, **kwargs)
         else:
             (x, y, z) = get_matrix_2d_data(workspace, distribution, histogram2D=True)
@@ -361,17 +431,25 @@ def pcolormesh(axes, workspace, *args, **kwargs):
                           the value from displayNormalizationHisto. It checks only if
                           the normalization is mantid.api.MDNormalization.NumEventsNormalization
     :param axisaligned: ``False`` (default). If ``True``, or if the workspace has a variable
-                        number of bins, the polygons will be aligned with the axes
+                        number of bins, the polygons will be aligned with the axes. The bins
+                        of all the spectra are then drawn as one
+                        :class:`matplotlib.collections.PolyCollection`, which is returned
+    :param lod: ``False`` (default). If ``True``, and the workspace has the same bins in every
+                spectrum, only the visible part of the data is drawn, at the resolution of the
+                axes, and it is refined when zooming or panning. The return is then a
+                :class:`matplotlib.image.PcolorImage`
     '''
     _setLabels2D(axes, workspace)
     if isinstance(workspace, mantid.dataobjects.MDHistoWorkspace):
         (normalization, kwargs) = get_normalization(workspace, **kwargs)
         x, y, z = get_md_data2d_bin_bounds(workspace, normalization)
     else:
+        (lod, kwargs) = get_level_of_detail_flag(workspace, **kwargs)
         (aligned, kwargs) = get_data_uneven_flag(workspace, **kwargs)
         (distribution, kwargs) = get_distribution(workspace, **kwargs)
-        if aligned:
-            kwargs['pcolortype'] = 'mesh'
+        if lod:
+            return _pcolorlod(axes, workspace, distribution, *args, **kwargs)
+        elif aligned:
             return _pcolorpieces(axes, workspace, distribution, *args, **kwargs)
         else:
             (x, y, z) = get_matrix_2d_data(workspace, distribution, histogram2D=True)
@@ -452,7 +530,7 @@ def _imshow(axes, z, cmap=None, norm=None, aspect=None,
 
     Use :meth:`matplotlib.axes.Axes.imshow` documentation for individual arguments.
     """
-    if norm is not None and not isinstance(norm, mcolors.Normalize):
+    if norm is not None and not isinstance(norm, matplotlib.colors.Normalize):
         raise ValueError(
             "'norm' must be an instance of 'mcolors.Normalize'")
     if aspect is None:
@@ -480,6 +558,25 @@ def _imshow(axes, z, cmap=None, norm=None, aspect=None,
     return im
 
 
+def _imshowlod(axes, workspace, distribution, *args, **kwargs):
+    '''
+    Helper function for imshow in the level of detail mode. Only the visible part
+    of the data is drawn, rebinned to the resolution of the axes, and it is refined
+    when the limits of the axes change.
+    '''
+    level_of_detail = LevelOfDetail(axes, get_level_of_detail_data(workspace, distribution))
+    for edges in (level_of_detail.data.x, level_of_detail.data.y):
+        diffs = numpy.diff(edges)
+        if not numpy.alltrue(diffs == diffs[0]):
+            raise Exception('Unevenly spaced bins are not supported by imshow')
+    kwargs['norm'] = _level_of_detail_norm(level_of_detail, kwargs)
+    kwargs['extent'] = level_of_detail.extent()
+    (x, y, z) = level_of_detail.region(kwargs['extent'][:2], kwargs['extent'][2:])
+    image = _imshow(axes, z, *args, **kwargs)
+    level_of_detail.connect(image)
+    return image
+
+
 def imshow(axes, workspace, *args, **kwargs):
     '''
     Essentially the same as :meth:`matplotlib.axes.Axes.imshow`.
@@ -495,6 +592,8 @@ def imshow(axes, workspace, *args, **kwargs):
                           the normalization is mantid.api.MDNormalization.NumEventsNormalization
     :param axisaligned: ``False`` (default). If ``True``, or if the workspace has a variable
                         number of bins, the polygons will be aligned with the axes
+    :param lod: ``False`` (default). If ``True``, only the visible part of the data is drawn,
+                at the resolution of the axes, and it is refined when zooming or panning
     '''
     _setLabels2D(axes, workspace)
     if isinstance(workspace, mantid.dataobjects.MDHistoWorkspace):
@@ -505,6 +604,9 @@ def imshow(axes, workspace, *args, **kwargs):
         (distribution, kwargs) = get_distribution(workspace, **kwargs)
         if uneven_bins:
             raise Exception('Variable number of bins is not supported by imshow.')
+        (lod, kwargs) = get_level_of_detail_flag(workspace, **kwargs)
+        if lod:
+            return _imshowlod(axes, workspace, distribution, *args, **kwargs)
         else:
             (x, y, z) = get_matrix_2d_data(workspace, distribution, histogram2D=True)
 
@@ -31,10 +31,12 @@ from __future__ import (absolute_import, division,
 
 # stdlib imports
 from collections import OrderedDict, namedtuple
+import inspect as _inspect
 import os
 import six
-from six import iteritems
+from six import iteritems, itervalues
 import sys
+import types
 
 import mantid
 from . import api as _api
@@ -1350,7 +1352,7 @@ def _translate():
         for each of them
         :returns: a list of the name of new function calls
     """
-    from mantid.api import AlgorithmFactory, AlgorithmManager
+    from mantid.api import AlgorithmFactory
 
     new_func_attrs = []
     # Method names mapped to their algorithm names. Used to detect multiple copies of same method name
@@ -1358,37 +1360,51 @@ def _translate():
     new_methods = {}
 
     algs = AlgorithmFactory.getRegisteredAlgorithms(True)
-    algorithm_mgr = AlgorithmManager
     for name, versions in iteritems(algs):
-        if specialization_exists(name):
-            continue
-        try:
-            # Create the algorithm object
-            algm_object = algorithm_mgr.createUnmanaged(name, max(versions))
-            algm_object.initialize()
-        except Exception as exc:
-            logger.warning("Error initializing {0} on registration: '{1}'".format(name, str(exc)))
-            continue
-
-        algorithm_wrapper = _create_algorithm_function(name, max(versions), algm_object)
-        method_name = algm_object.workspaceMethodName()
-        if len(method_name) > 0:
-            if method_name in new_methods:
-                other_alg = new_methods[method_name]
-                raise RuntimeError("simpleapi: Trying to attach '%s' as method to point to '%s' algorithm but "
-                                   "it has already been attached to point to the '%s' algorithm.\n"
-                                   "Does one inherit from the other? "
-                                   "Please check and update one of the algorithms accordingly."
-                                   % (method_name, algm_object.name(), other_alg))
-            _attach_algorithm_func_as_method(method_name, algorithm_wrapper, algm_object)
-            new_methods[method_name] = algm_object.name()
-        new_func_attrs.append(name)
-
-        # Dialog variant
-        _create_algorithm_dialog(name, max(versions), algm_object)
+        if _create_algorithm_functions(name, versions, new_methods):
+            new_func_attrs.append(name)
 
     return new_func_attrs
 
+
+def _create_algorithm_functions(name, versions, new_methods):
+    """
+        Registers the function call, its dialog variant and any workspace method
+        for the highest version of the given algorithm
+        :param name: The name of the algorithm
+        :param versions: A list of the registered versions of the algorithm
+        :param new_methods: A dictionary of the workspace method names already attached, mapped to their algorithm names
+        :returns: True if the functions have been created, otherwise False
+    """
+    from mantid.api import AlgorithmManager
+
+    if specialization_exists(name):
+        return False
+    try:
+        # Create the algorithm object
+        algm_object = AlgorithmManager.createUnmanaged(name, max(versions))
+        algm_object.initialize()
+    except Exception as exc:
+        logger.warning("Error initializing {0} on registration: '{1}'".format(name, str(exc)))
+        return False
+
+    algorithm_wrapper = _create_algorithm_function(name, max(versions), algm_object)
+    method_name = algm_object.workspaceMethodName()
+    if len(method_name) > 0:
+        if method_name in new_methods:
+            other_alg = new_methods[method_name]
+            raise RuntimeError("simpleapi: Trying to attach '%s' as method to point to '%s' algorithm but "
+                               "it has already been attached to point to the '%s' algorithm.\n"
+                               "Does one inherit from the other? "
+                               "Please check and update one of the algorithms accordingly."
+                               % (method_name, algm_object.name(), other_alg))
+        _attach_algorithm_func_as_method(method_name, algorithm_wrapper, algm_object)
+        new_methods[method_name] = algm_object.name()
+
+    # Dialog variant
+    _create_algorithm_dialog(name, max(versions), algm_object)
+    return True
+
 # -------------------------------------------------------------------------------------------------------------
 
 
@@ -1414,14 +1430,271 @@ def _attach_algorithm_func_as_method(method_name, algorithm_wrapper, algm_object
                                              algm_object.workspaceMethodOn())
 
 
+# -------------------------------------------------------------------------------------------------------------
+# Lazy mode: with python.plugins.lazy switched on the algorithm functions are only created when first accessed
+# and a Python plugin is only loaded when one of its algorithms is first requested. The algorithms defined by
+# each plugin are read from a manifest, which is validated against the modification time and size of the files.
+
+# Registered algorithms mapped to their versions
+_lazy_algorithms = {}
+# Algorithms mapped to the plugin files, which have not been loaded yet, defining them
+_lazy_plugin_files = {}
+# Names guessed from the plugin files not inspected yet, mapped to the files. As in _mockup a plugin is expected to
+# define the algorithm named after it but the name is only resolved on explicit access and never exported
+_lazy_guessed_files = {}
+# Plugin files mapped to their manifest entries
+_lazy_manifest = {}
+# Plugin files in the order they have been loaded
+_lazy_loaded = []
+# Method names mapped to their algorithm names, as in _translate
+_lazy_methods = {}
+# Manifest key of the workspace methods of the algorithms registered before the plugins are loaded
+_LAZY_FRAMEWORK_KEY = "__framework__"
+
+
+class _LazyModule(types.ModuleType):
+    """
+        Stands in for this module in lazy mode. Every known algorithm is represented by a
+        proxy created by _create_lazy_proxy, which is replaced by the algorithm function on
+        first use. Other attributes which are not defined yet are created on first access
+        by _create_lazy_function.
+    """
+
+    def __init__(self, module):
+        super(_LazyModule, self).__init__(module.__name__, module.__doc__)
+        # keep a reference to the module so that its globals are not cleared
+        self.__dict__['_module'] = module
+
+    def __getattr__(self, name):
+        module_globals = self.__dict__['_module'].__dict__
+        if name == '__all__':
+            return _lazy_public_names()
+        if name not in module_globals and not _create_lazy_function(name):
+            raise AttributeError("module '{0}' has no attribute '{1}'".format(self.__name__, name))
+        return module_globals[name]
+
+    def __dir__(self):
+        return sorted(self.__dict__['_module'].__dict__)
+
+
+def _lazy_public_names():
+    """
+        :returns: A list of the public names of this module. These include the proxies
+        of the algorithms not created yet, so a star import loads no plugin.
+    """
+    return sorted(name for name in globals() if not name.startswith('_'))
+
+
+def _is_lazy_proxy(attr):
+    """
+        :param attr: An attribute of this module
+        :returns: True if the attribute is a proxy created by _create_lazy_proxy
+    """
+    return getattr(attr, '_lazy_proxy', False)
+
+
+def _create_lazy_proxy(name, dialog=False):
+    """
+        Creates a proxy for the function of an algorithm or its dialog variant, which is
+        replaced by the function when first called.
+        :param name: The name of the algorithm function or of its dialog variant
+        :param dialog: True if the proxy stands for the dialog variant
+    """
+    def lazy_proxy(*args, **kwargs):
+        if not dialog:
+            # the output workspace names are taken from the caller of the proxy
+            kwargs.setdefault("__LHS_FRAME_OBJECT__", _inspect.currentframe().f_back)
+        if _is_lazy_proxy(globals()[name]) and not _create_lazy_function(name):
+            raise RuntimeError("simpleapi: Unable to create the function '{}'. "
+                               "Check the log for errors loading its algorithm.".format(name))
+        return globals()[name](*args, **kwargs)
+
+    lazy_proxy.__name__ = str(name)
+    lazy_proxy.__doc__ = "Runs {} on first use. The documentation is available once it has run.".format(name)
+    lazy_proxy._lazy_proxy = True
+    globals()[name] = lazy_proxy
+
+
+def _create_lazy_proxies(names):
+    """
+        Creates the proxies of the given algorithms and of their dialog variants
+        :param names: The names of the algorithms
+        :returns: A list of the names of the new proxies
+    """
+    module_attrs = globals()
+    new_attrs = []
+    for name in names:
+        if specialization_exists(name):
+            continue
+        for attr, dialog in ((name, False), ("{}Dialog".format(name), True)):
+            if attr not in module_attrs:
+                _create_lazy_proxy(attr, dialog)
+                new_attrs.append(attr)
+    return new_attrs
+
+
+def _attach_lazy_methods(methods):
+    """
+        Attaches the workspace methods recorded in the manifest to their proxies
+        :param methods: A dictionary mapping the algorithm names to a list of the method name,
+        the name of the input workspace property and the workspace types
+    """
+    module_attrs = globals()
+    for name, (method_name, input_prop, workspace_types) in iteritems(methods):
+        if _is_lazy_proxy(module_attrs.get(name)):
+            _api._workspaceops.attach_func_as_method(method_name, module_attrs[name], input_prop, workspace_types)
+
+
+def _sync_lazy_proxies(new_attrs, probe):
+    """
+        Adds the given proxies to the modules which have star imported this module
+        while their algorithms were still unknown.
+        :param new_attrs: The names of the new proxies
+        :param probe: The name of a proxy which existed before the star imports
+    """
+    module_attrs = globals()
+    proxy = module_attrs.get(probe)
+    if proxy is None:
+        return
+    for module in list(sys.modules.values()):
+        client_attrs = getattr(module, '__dict__', {})
+        if client_attrs is module_attrs or client_attrs.get(probe) is not proxy:
+            continue
+        for attr in new_attrs:
+            client_attrs.setdefault(attr, module_attrs[attr])
+
+
+def _load_lazy_plugin(filepath):
+    """
+        Loads a plugin file in lazy mode. The algorithms defined by a plugin without
+        an up to date manifest entry are recorded in the manifest.
+        :param filepath: A path to the plugin file
+    """
+    from mantid.api import AlgorithmFactory
+
+    for name in [name for name, path in iteritems(_lazy_plugin_files) if path == filepath]:
+        del _lazy_plugin_files[name]
+    for name in [name for name, path in iteritems(_lazy_guessed_files) if path == filepath]:
+        del _lazy_guessed_files[name]
+    _lazy_loaded.append(filepath)
+    first_nested = len(_lazy_loaded)
+
+    if _plugin_helper.is_manifest_entry_valid(_lazy_manifest.get(filepath), filepath):
+        _plugin_helper.load_from_file(filepath)
+    else:
+        entry = _plugin_helper.load_and_inspect(filepath)
+        # algorithms of the plugins loaded while importing this one do not belong to it
+        for nested in _lazy_loaded[first_nested:]:
+            for name in _lazy_manifest[nested]["algorithms"]:
+                entry["algorithms"].pop(name, None)
+                entry["methods"].pop(name, None)
+        _lazy_manifest[filepath] = entry
+
+    _lazy_algorithms.update(AlgorithmFactory.getRegisteredAlgorithms(True))
+
+
+def _create_lazy_function(name):
+    """
+        Creates the functions of an algorithm on its first access in lazy mode.
+        The plugin defining the algorithm is loaded first if necessary.
+        :param name: The name of the algorithm function or of its dialog variant
+        :returns: True if the requested function has been created, otherwise False
+    """
+    algorithm_name = name
+    known_names = (_lazy_algorithms, _lazy_plugin_files, _lazy_guessed_files)
+    if name.endswith("Dialog") and not any(name in known for known in known_names):
+        algorithm_name = name[:-len("Dialog")]
+
+    plugin_file = _lazy_plugin_files.get(algorithm_name, _lazy_guessed_files.get(algorithm_name))
+    if plugin_file is not None:
+        _load_lazy_plugin(plugin_file)
+    if algorithm_name not in _lazy_algorithms:
+        return False
+
+    _create_algorithm_functions(algorithm_name, _lazy_algorithms[algorithm_name], _lazy_methods)
+    return name in globals() and not _is_lazy_proxy(globals()[name])
+
+
+def _framework_manifest_entry(manifest, algorithms):
+    """
+        Returns the manifest entry holding the workspace methods of the algorithms registered
+        before the plugins are loaded. The entry is recreated if the algorithms or the version
+        of mantid have changed.
+        :param manifest: The manifest read from the disk
+        :param algorithms: A dictionary mapping the registered algorithms to their versions
+    """
+    algorithms = dict((name, list(versions)) for name, versions in iteritems(algorithms))
+    entry = manifest.get(_LAZY_FRAMEWORK_KEY)
+    if entry is None or entry.get("signature") != mantid.__version__ or entry.get("algorithms") != algorithms:
+        entry = {"signature": mantid.__version__, "algorithms": algorithms,
+                 "methods": _plugin_helper.get_workspace_methods(algorithms)}
+    return entry
+
+
+def _setup_lazy_mode(plugin_files):
+    """
+        Replaces this module by its lazy stand-in, creating the proxies of the known algorithms and
+        attaching their workspace methods. Only the plugins which have no up to date manifest entry
+        or which define no algorithms are loaded here.
+        :param plugin_files: A list of paths to the plugin files
+    """
+    from mantid.api import AlgorithmFactory
+
+    _lazy_algorithms.update(AlgorithmFactory.getRegisteredAlgorithms(True))
+    manifest_path = _plugin_helper.get_manifest_path()
+    manifest = _plugin_helper.read_plugin_cache(manifest_path)
+    _lazy_manifest[_LAZY_FRAMEWORK_KEY] = _framework_manifest_entry(manifest, _lazy_algorithms)
+    to_load = []
+    for filepath in plugin_files:
+        entry = manifest.get(filepath)
+        if _plugin_helper.is_manifest_entry_valid(entry, filepath):
+            _lazy_manifest[filepath] = entry
+            if len(entry["algorithms"]) == 0:
+                to_load.append(filepath)
+            for name in entry["algorithms"]:
+                _lazy_plugin_files[name] = filepath
+        else:
+            to_load.append(filepath)
+            name = os.path.splitext(os.path.basename(filepath))[0]
+            if not specialization_exists(name):
+                _lazy_guessed_files.setdefault(name, filepath)
+
+    known_attrs = _create_lazy_proxies(list(_lazy_algorithms) + list(_lazy_plugin_files))
+    for entry in itervalues(_lazy_manifest):
+        _attach_lazy_methods(entry["methods"])
+
+    lazy_module = _LazyModule(sys.modules[__name__])
+    sys.modules[__name__] = lazy_module
+    setattr(mantid, MODULE_NAME, lazy_module)
+
+    cold_loaded = len(_lazy_loaded)
+    for filepath in to_load:
+        if filepath not in _lazy_loaded:
+            _load_lazy_plugin(filepath)
+
+    # the algorithms of the plugins inspected above are only known now
+    new_attrs = _create_lazy_proxies(_lazy_algorithms)
+    for filepath in _lazy_loaded[cold_loaded:]:
+        _attach_lazy_methods(_lazy_manifest[filepath]["methods"])
+    if len(new_attrs) > 0 and len(known_attrs) > 0:
+        _sync_lazy_proxies(new_attrs, known_attrs[0])
+
+    if _lazy_manifest != manifest:
+        _plugin_helper.write_plugin_cache(manifest_path, _lazy_manifest)
+
+# -------------------------------------------------------------------------------------------------------------
+
+
 # Initialization:
 #   - start FrameworkManager (if necessary). The check is necessary as
 #    _FrameworkManagerImpl.Instance() will import this module and deadlock if it
 #    calls Instance again while importing this module
-#   - loads the python plugins and create new algorithm functions
+#   - loads the python plugins and create new algorithm functions, unless in lazy mode
 if not _api.FrameworkManagerImpl.hasInstance():
     _api.FrameworkManagerImpl.Instance()
-_translate()
+_lazy_mode = _plugin_helper.lazy_loading_enabled()
+if not _lazy_mode:
+    _translate()
 
 # Load the Python plugins
 # The exported C++ plugins
@@ -1451,23 +1724,37 @@ try:
     # Load
     plugin_files = []
     alg_files = []
+    # The index records which plugin files register algorithms, so unchanged files are not read again
+    _index_path = _plugin_helper.get_index_path()
+    _stored_index = {} if _lazy_mode else _plugin_helper.read_plugin_cache(_index_path)
+    _index = dict(_stored_index)
     for directory in plugin_dirs:
         try:
-            all_plugins, algs = _plugin_helper.find_plugins(directory)
-            plugin_files += all_plugins
-            alg_files += algs
+            if _lazy_mode:
+                plugin_files += _plugin_helper.find_plugin_files(directory)
+            else:
+                all_plugins, algs = _plugin_helper.find_plugins(directory, _index)
+                plugin_files += all_plugins
+                alg_files += algs
         except ValueError as exc:
             logger.warning('Exception encountered during plugin discovery: {0}'.format(str(exc)))
             continue
+    if not _lazy_mode:
+        _updated_index = dict((filename, _index[filename]) for filename in plugin_files if filename in _index)
+        if _updated_index != _stored_index:
+            _plugin_helper.write_plugin_cache(_index_path, _updated_index)
 
-    # Mock out the expected functions
-    _mockup(alg_files)
-    # Load the plugins.
-    _plugin_modules = _plugin_helper.load(plugin_files)
-    # Create the final proper algorithm definitions for the plugins
-    _plugin_attrs = _translate()
-    # Finally, overwrite the mocked function definitions in the loaded modules with the real ones
-    _plugin_helper.sync_attrs(globals(), _plugin_attrs, _plugin_modules)
+    if _lazy_mode:
+        _setup_lazy_mode(plugin_files)
+    else:
+        # Mock out the expected functions
+        _mockup(alg_files)
+        # Load the plugins.
+        _plugin_modules = _plugin_helper.load(plugin_files)
+        # Create the final proper algorithm definitions for the plugins
+        _plugin_attrs = _translate()
+        # Finally, overwrite the mocked function definitions in the loaded modules with the real ones
+        _plugin_helper.sync_attrs(globals(), _plugin_attrs, _plugin_modules)
 
     # Attach fit function wrappers
     from .fitfunctions import _wrappers
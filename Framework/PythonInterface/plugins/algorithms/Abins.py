@@ -42,6 +42,7 @@ class Abins(PythonAlgorithm):
     _calc_partial = None
     _out_ws_name = None
     _num_quantum_order_events = None
+    _engine = None
     _extracted_ab_initio_data = None
 
     def category(self):
@@ -116,6 +117,11 @@ class Abins(PythonAlgorithm):
                                  "2nd order combinations, 3-> FUNDAMENTALS + first overtone + second overtone + 2nd "
                                  "order combinations + 3rd order combinations etc...)")
 
+        self.declareProperty(name="CalculationEngine", defaultValue="PerAtom",
+                             validator=StringListValidator(AbinsModules.AbinsConstants.ALL_S_ENGINES),
+                             doc="Engine used to calculate S. PerAtom evaluates S atom by atom (optionally in "
+                                 "parallel), AllAtoms evaluates S for all atoms at once with array operations.")
+
         self.declareProperty(WorkspaceProperty("OutputWorkspace", '', Direction.Output),
                              doc="Name to give the output workspace.")
 
@@ -192,7 +198,7 @@ class Abins(PythonAlgorithm):
                                                     sample_form=self._sample_form, abins_data=ab_initio_data,
                                                     instrument=self._instrument,
                                                     quantum_order_num=self._num_quantum_order_events,
-                                                    bin_width=self._bin_width)
+                                                    bin_width=self._bin_width, engine=self._engine)
         s_data = s_calculator.get_formatted_data()
         prog_reporter.report("Dynamical structure factors have been determined.")
 
@@ -548,6 +554,7 @@ class Abins(PythonAlgorithm):
         self._check_threshold(message)
         self._check_chunk_size(message)
         self._check_threads(message)
+        self._check_cache_size(message)
 
     def _check_general_resolution(self, message_end=None):
         """
@@ -681,6 +688,15 @@ class Abins(PythonAlgorithm):
             if not (isinstance(threads, six.integer_types) and 1 <= threads <= mp.cpu_count()):
                 raise RuntimeError("Invalid number of threads for parallelisation over atoms" + message_end)
 
+    def _check_cache_size(self, message_end=None):
+        """
+        Checks maximum size of the cache
+        :param message_end: closing part of the error message.
+        """
+        max_cache_size = AbinsModules.AbinsParameters.max_cache_size
+        if not (isinstance(max_cache_size, float) and max_cache_size > 0.0):
+            raise RuntimeError("Invalid value of max_cache_size" + message_end)
+
     def _validate_ab_initio_file_extension(self, filename_full_path=None, expected_file_extension=None):
         """
         Checks consistency between name of ab initio program and extension.
@@ -822,6 +838,7 @@ class Abins(PythonAlgorithm):
 
         # conversion from str to int
         self._num_quantum_order_events = int(self.getProperty("QuantumOrderEventsNumber").value)
+        self._engine = self.getProperty("CalculationEngine").value
 
         self._scale_by_cross_section = self.getPropertyValue('ScaleByCrossSection')
         self._out_ws_name = self.getPropertyValue('OutputWorkspace')
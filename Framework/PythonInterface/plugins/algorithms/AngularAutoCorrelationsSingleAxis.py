@@ -14,6 +14,7 @@ from scipy.io import netcdf
 import numpy as np
 import re
 import time
+import trajectory_correlations
 
 
 class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
@@ -34,6 +35,10 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
         self.declareProperty("SpeciesOne",'',direction=Direction.Input,doc="Specify the first species, e.g. H, He, Li...")
         self.declareProperty("SpeciesTwo",'',direction=Direction.Input,doc="Specify the second species, e.g. H, He, Li...")
 
+        self.declareProperty("MaxChunkSize",1.0,FloatBoundedValidator(lower=0.0),direction=Direction.Input,
+                             doc="Maximum memory in Gbytes used for the particles read from the trajectory at once. "
+                             "0 reads all particles at once.")
+
         self.declareProperty(WorkspaceProperty('OutputWorkspace','',direction=Direction.Output),doc="Output workspace name")
         self.declareProperty(WorkspaceProperty('OutputWorkspaceFT','',direction=Direction.Output),
                              doc="Fourier Transform output workspace name")
@@ -125,8 +130,6 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
         # Extract useful simulation parameters
         # Number of species present in the simulation
         # n_species=len(elements)
-        # Number of particles present in the simulation
-        n_particles=len(p_atoms)
         # Number of molecules present in the simulation
         n_molecules=len(molecules)
         # Number of timesteps in the simulation
@@ -144,83 +147,66 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
 
         # Reshape the paralellepipeds into 3x3 tensors for coordinate transformations.
         # Shape: (# of timesteps) x (3-vectors) x (# of spatial dimensions)
-        box_size_tensors=10.0*np.array([box_size[j].reshape((3,3)) for j in range(n_timesteps)])
+        box_size_tensors=10.0*np.array(box_size[:n_timesteps]).reshape((n_timesteps,3,3))
 
         # Extract box dimensions (assuming orthorhombic simulation cell, diagonal matrix)
-        box_size_x=np.array([box_size_tensors[i,0,0] for i in range(n_timesteps)])
-        box_size_y=np.array([box_size_tensors[i,1,1] for i in range(n_timesteps)])
-        box_size_z=np.array([box_size_tensors[i,2,2] for i in range(n_timesteps)])
-
-        # Copy the configuration object into a numpy array
-        configuration_copy=np.array([configuration[i] for i in range(n_timesteps)])
-
-        # Swap the time and particle axes
-        configuration_copy=np.swapaxes(configuration_copy,0,1)
+        box_size_diagonal=np.diagonal(box_size_tensors,axis1=1,axis2=2)
 
-        # Transform particle trajectories (configuration array) to Cartesian coordinates at each time step.
-        cartesian_configuration=np.array([[np.dot(box_size_tensors[j],np.transpose(configuration_copy[i,j]))
-                                           for j in range(n_timesteps)] for i in range(n_particles)])
+        # Memory budget for the blocks of molecules read from the trajectory
+        memory_budget=trajectory_correlations.memory_budget_from_chunk_size(self.getProperty("MaxChunkSize").value)
 
         logger.information(str(time.time()-start_time) + " s")
 
-        logger.information("Calculating orientation vectors...")
+        logger.information("Calculating orientation vectors and angular auto-correlations...")
         start_time=time.time()
 
-        # Initialise orientation vector array. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
-        orientation_vectors=np.zeros((n_molecules,n_timesteps,n_dimensions))
-
-        for i in range(n_molecules):
-            # Retrieve constituents of the ith molecule
-            temp=molecules_to_atoms[i]
-            # Find which constituents belong to species one and which belong to species two
-            species_one=[]
-            species_two=[]
-            for j in temp:
-                if atoms_to_species[j]==type1.lower():
-                    species_one.append(j)
-                if atoms_to_species[j]==type2.lower():
-                    species_two.append(j)
-            # Find the average positions and the orientation vector
-            sum_position_species_one=np.zeros((n_timesteps,n_dimensions))
-            sum_position_species_two=np.zeros((n_timesteps,n_dimensions))
-
-            for k in species_one:
-                sum_position_species_one+=cartesian_configuration[k]
-            for l in species_two:
-                sum_position_species_two+=cartesian_configuration[l]
-            avg_position_species_one=1.0*sum_position_species_one/len(species_one)
-            avg_position_species_two=1.0*sum_position_species_two/len(species_two)
-
-            # Find the vectors connecting the two atoms
-            vectors=avg_position_species_two-avg_position_species_one
-
-            # Scaled coordinates
-            diffX=np.divide(vectors[:,0],box_size_x)
-            diffY=np.divide(vectors[:,1],box_size_y)
-            diffZ=np.divide(vectors[:,2],box_size_z)
-
-            # Wrapping the vectors
-            vectorX=np.array([(diffX[k]-round(diffX[k]))*box_size_x[k] for k in range(n_timesteps)])
-            vectorY=np.array([(diffY[k]-round(diffY[k]))*box_size_y[k] for k in range(n_timesteps)])
-            vectorZ=np.array([(diffZ[k]-round(diffZ[k]))*box_size_z[k] for k in range(n_timesteps)])
-
-            # Normalisation
-            norm=np.sqrt(vectorX*vectorX+vectorY*vectorY+vectorZ*vectorZ)
-            vectorX=np.divide(vectorX,norm)
-            vectorY=np.divide(vectorY,norm)
-            vectorZ=np.divide(vectorZ,norm)
-
-            # Store calculations in the orientation_vectors array
-            orientation_vectors[i]=np.swapaxes(np.array([vectorX,vectorY,vectorZ]),0,1)
-
-        logger.information(str(time.time()-start_time) + " s")
-
-        logger.information("Calculating angular auto-correlations...")
-        start_time=time.time()
-
-        R_avg=np.zeros(n_timesteps)
-        for i in range(n_molecules):
-            R_avg+=self.auto_correlation(orientation_vectors[i])
+        # Sums of the angular auto-correlations of all molecules
+        correlation_sums=trajectory_correlations.AutoCorrelationSums(n_timesteps,1)
+
+        molecule_atoms=[molecules_to_atoms[i] for i in range(n_molecules)]
+        for block in trajectory_correlations.molecule_blocks(molecule_atoms,n_timesteps,memory_budget):
+            # Read the atoms of the block of molecules from the trajectory file and transform them to Cartesian
+            # coordinates at each time step. Shape: (# of timesteps) x (# of atoms) x (# of spatial dimensions)
+            atoms=sorted(set(atom for i in block for atom in molecules_to_atoms[i]))
+            atom_index=dict((atom,index) for index,atom in enumerate(atoms))
+            configuration_block=trajectory_correlations.read_atoms(configuration,atoms)
+            cartesian_configuration=trajectory_correlations.cartesian_coordinates(configuration_block,box_size_tensors)
+
+            # Initialise orientation vector array. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
+            orientation_vectors=np.zeros((len(block),n_timesteps,n_dimensions))
+
+            for index,i in enumerate(block):
+                # Retrieve constituents of the ith molecule
+                temp=molecules_to_atoms[i]
+                # Find which constituents belong to species one and which belong to species two
+                species_one=[]
+                species_two=[]
+                for j in temp:
+                    if atoms_to_species[j]==type1.lower():
+                        species_one.append(j)
+                    if atoms_to_species[j]==type2.lower():
+                        species_two.append(j)
+                # Find the average positions and the orientation vector
+                sum_position_species_one=np.zeros((n_timesteps,n_dimensions))
+                sum_position_species_two=np.zeros((n_timesteps,n_dimensions))
+
+                for k in species_one:
+                    sum_position_species_one+=cartesian_configuration[:,atom_index[k]]
+                for l in species_two:
+                    sum_position_species_two+=cartesian_configuration[:,atom_index[l]]
+                avg_position_species_one=1.0*sum_position_species_one/len(species_one)
+                avg_position_species_two=1.0*sum_position_species_two/len(species_two)
+
+                # Find the vectors connecting the two atoms
+                vectors=avg_position_species_two-avg_position_species_one
+
+                # Wrapping and normalisation of the vectors.
+                # Store calculations in the orientation_vectors array
+                orientation_vectors[index]=trajectory_correlations.wrap_and_normalise(vectors,box_size_diagonal)
+
+            correlation_sums.add(orientation_vectors,np.zeros(len(block),dtype=int))
+
+        R_avg=correlation_sums.correlations()[0]/trajectory_correlations.lag_counts(n_timesteps)
 
         R_avg=1.0*R_avg/n_molecules
 
@@ -253,21 +239,6 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
                                      DataY=yvals,DataE=evals,NSpec=nrows,VerticalAxisUnit="Text",VerticalAxisValues=["FT Axis 1"])
         self.setProperty("OutputWorkspaceFT",FT_output_ws)
 
-    def auto_correlation(self, vector):
-        # Returns angular auto-correlation of a normalised time-dependent 3-vector
-        num=np.shape(vector)[0]
-        norm=np.arange(np.ceil(num/2.0),num+1)
-        norm=np.append(norm,(np.arange(int(num/2)+1,num)[::-1]))
-
-        # x dimension
-        autoCorr=np.divide(np.correlate(vector[:,0],vector[:,0],"same"),norm)
-        # y dimension
-        autoCorr+=np.divide(np.correlate(vector[:,1],vector[:,1],"same"),norm)
-        # z dimension
-        autoCorr+=np.divide(np.correlate(vector[:,2],vector[:,2],"same"),norm)
-
-        return autoCorr
-
     def fold_correlation(self,omega):
         # Folds an array with symmetrical values into half by averaging values around the centre
         right_half=omega[int(len(omega)/2):]
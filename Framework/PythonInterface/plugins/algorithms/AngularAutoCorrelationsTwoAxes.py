@@ -14,6 +14,7 @@ from scipy.io import netcdf
 import numpy as np
 import re
 import time
+import trajectory_correlations
 
 
 class AngularAutoCorrelationsTwoAxes(PythonAlgorithm):
@@ -37,6 +38,10 @@ class AngularAutoCorrelationsTwoAxes(PythonAlgorithm):
         self.declareProperty("SpeciesTwo",'',direction=Direction.Input,doc="Specify the second species, e.g. H, He, Li...")
         self.declareProperty("SpeciesThree",'',direction=Direction.Input,doc="Specify the third species, e.g. H, He, Li...")
 
+        self.declareProperty("MaxChunkSize",1.0,FloatBoundedValidator(lower=0.0),direction=Direction.Input,
+                             doc="Maximum memory in Gbytes used for the particles read from the trajectory at once. "
+                             "0 reads all particles at once.")
+
         self.declareProperty(WorkspaceProperty('OutputWorkspace','',direction=Direction.Output),doc="Output workspace name")
         self.declareProperty(WorkspaceProperty('OutputWorkspaceFT','FT',direction=Direction.Output),doc="FT Output workspace name")
 
@@ -127,8 +132,6 @@ class AngularAutoCorrelationsTwoAxes(PythonAlgorithm):
         # Extract useful simulation parameters
         # Number of species present in the simulation
         # n_species=len(elements)
-        # Number of particles present in the simulation
-        n_particles=len(p_atoms)
         # Number of molecules present in the simulation
         n_molecules=len(molecules)
         # Number of timesteps in the simulation
@@ -146,128 +149,96 @@ class AngularAutoCorrelationsTwoAxes(PythonAlgorithm):
 
         # Reshape the paralellepipeds into 3x3 tensors for coordinate transformations.
         # Shape: (# of timesteps) x (3-vectors) x (# of spatial dimensions)
-        box_size_tensors=10.0*np.array([box_size[j].reshape((3,3)) for j in range(n_timesteps)])
+        box_size_tensors=10.0*np.array(box_size[:n_timesteps]).reshape((n_timesteps,3,3))
 
         # Extract box dimensions (assuming orthorhombic simulation cell, diagonal matrix)
-        box_size_x=np.array([box_size_tensors[i,0,0] for i in range(n_timesteps)])
-        box_size_y=np.array([box_size_tensors[i,1,1] for i in range(n_timesteps)])
-        box_size_z=np.array([box_size_tensors[i,2,2] for i in range(n_timesteps)])
-
-        # Copy the configuration object into a numpy array
-        configuration_copy=np.array([configuration[i] for i in range(n_timesteps)])
-
-        # Swap the time and particle axes
-        configuration_copy=np.swapaxes(configuration_copy,0,1)
+        box_size_diagonal=np.diagonal(box_size_tensors,axis1=1,axis2=2)
 
-        # Transform particle trajectories (configuration array) to Cartesian coordinates at each time step.
-        cartesian_configuration=np.array([[np.dot(box_size_tensors[j],np.transpose(configuration_copy[i,j]))
-                                           for j in range(n_timesteps)] for i in range(n_particles)])
+        # Memory budget for the blocks of molecules read from the trajectory
+        memory_budget=trajectory_correlations.memory_budget_from_chunk_size(self.getProperty("MaxChunkSize").value)
 
         logger.information(str(time.time()-start_time) + " s")
 
-        logger.information("Calculating orientation vectors...")
+        logger.information("Calculating orientation vectors and angular auto-correlations...")
         start_time=time.time()
 
-        # Initialise orientation vector array. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
-        orientation_vectors1=np.zeros((n_molecules,n_timesteps,n_dimensions))
-        orientation_vectors2=np.zeros((n_molecules,n_timesteps,n_dimensions))
-
-        for i in range(n_molecules):
-            # Retrieve constituents of the ith molecule
-            temp=molecules_to_atoms[i]
-            # Find which constituents belong to species one, species two and species three
-            species_one=[]
-            species_two=[]
-            species_three=[]
-            for j in temp:
-                if atoms_to_species[j]==types[0]:
-                    species_one.append(j)
-                if atoms_to_species[j]==types[1]:
-                    species_two.append(j)
-                if atoms_to_species[j]==types[2]:
-                    species_three.append(j)
-            # Find the average positions of species one and two
-            sum_position_species_one=np.zeros((n_timesteps,n_dimensions))
-            sum_position_species_two=np.zeros((n_timesteps,n_dimensions))
-            for k in species_one:
-                sum_position_species_one+=cartesian_configuration[k]
-            for l in species_two:
-                sum_position_species_two+=cartesian_configuration[l]
-            avg_position_species_one=1.0*sum_position_species_one/float(len(species_one))
-            avg_position_species_two=1.0*sum_position_species_two/float(len(species_two))
-            # Choose the 1st element of species_three to build the 2nd vector
-            position_species_three=1.0*cartesian_configuration[species_three[0]]
-
-            # Find the vectors connecting average positions of species one and species two
-            vectors1=avg_position_species_two-avg_position_species_one
-
-            # Find the vector to the third atom
-            vectors2=position_species_three-avg_position_species_two
-
-            diffX1=np.divide(vectors1[:,0],box_size_x)
-            diffY1=np.divide(vectors1[:,1],box_size_y)
-            diffZ1=np.divide(vectors1[:,2],box_size_z)
-
-            diffX2=np.divide(vectors2[:,0],box_size_x)
-            diffY2=np.divide(vectors2[:,1],box_size_y)
-            diffZ2=np.divide(vectors2[:,2],box_size_z)
-
-            # Wrapping the vectors
-            vectorX1=np.array([(diffX1[k]-round(diffX1[k]))*box_size_x[k] for k in range(n_timesteps)])
-            vectorY1=np.array([(diffY1[k]-round(diffY1[k]))*box_size_y[k] for k in range(n_timesteps)])
-            vectorZ1=np.array([(diffZ1[k]-round(diffZ1[k]))*box_size_z[k] for k in range(n_timesteps)])
-
-            vectorX2=np.array([(diffX2[k]-round(diffX2[k]))*box_size_x[k] for k in range(n_timesteps)])
-            vectorY2=np.array([(diffY2[k]-round(diffY2[k]))*box_size_y[k] for k in range(n_timesteps)])
-            vectorZ2=np.array([(diffZ2[k]-round(diffZ2[k]))*box_size_z[k] for k in range(n_timesteps)])
-
-            # Normalisation
-            norm1=np.sqrt(vectorX1*vectorX1+vectorY1*vectorY1+vectorZ1*vectorZ1)
-            vectorX1=np.divide(vectorX1,norm1)
-            vectorY1=np.divide(vectorY1,norm1)
-            vectorZ1=np.divide(vectorZ1,norm1)
-
-            norm2=np.sqrt(vectorX2*vectorX2+vectorY2*vectorY2+vectorZ2*vectorZ2)
-            vectorX2=np.divide(vectorX2,norm2)
-            vectorY2=np.divide(vectorY2,norm2)
-            vectorZ2=np.divide(vectorZ2,norm2)
-
-            # Dot product
-            cosine=np.multiply(vectorX1,vectorX2)+np.multiply(vectorY1,vectorY2)+np.multiply(vectorZ1,vectorZ2)
-
-            # Gram-Schmidt orthogonalisation process
-            vectorX2=vectorX2-np.divide(vectorX1,cosine)
-            vectorY2=vectorY2-np.divide(vectorY1,cosine)
-            vectorZ2=vectorZ2-np.divide(vectorZ1,cosine)
-
-            # Renormalisation of the 2nd vector
-            norm2=np.sqrt(vectorX2*vectorX2+vectorY2*vectorY2+vectorZ2*vectorZ2)
-            vectorX2=np.divide(vectorX2,norm2)
-            vectorY2=np.divide(vectorY2,norm2)
-            vectorZ2=np.divide(vectorZ2,norm2)
-
-            # Store calculations in the orientation_vectors1 and orientation_vectors2 arrays
-            orientation_vectors1[i]=np.swapaxes(np.array([vectorX1,vectorY1,vectorZ1]),0,1)
-            orientation_vectors2[i]=np.swapaxes(np.array([vectorX2,vectorY2,vectorZ2]),0,1)
-
-        logger.information(str(time.time()-start_time) + " s")
-
-        logger.information("Calculating angular auto-correlations...")
-        start_time=time.time()
+        # Sums of the angular auto-correlations of all molecules about the first and the second axis
+        correlation_sums=trajectory_correlations.AutoCorrelationSums(n_timesteps,2)
+
+        molecule_atoms=[molecules_to_atoms[i] for i in range(n_molecules)]
+        for block in trajectory_correlations.molecule_blocks(molecule_atoms,n_timesteps,memory_budget):
+            # Read the atoms of the block of molecules from the trajectory file and transform them to Cartesian
+            # coordinates at each time step. Shape: (# of timesteps) x (# of atoms) x (# of spatial dimensions)
+            atoms=sorted(set(atom for i in block for atom in molecules_to_atoms[i]))
+            atom_index=dict((atom,index) for index,atom in enumerate(atoms))
+            configuration_block=trajectory_correlations.read_atoms(configuration,atoms)
+            cartesian_configuration=trajectory_correlations.cartesian_coordinates(configuration_block,box_size_tensors)
+
+            # Initialise orientation vector arrays. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
+            orientation_vectors1=np.zeros((len(block),n_timesteps,n_dimensions))
+            orientation_vectors2=np.zeros((len(block),n_timesteps,n_dimensions))
+
+            for index,i in enumerate(block):
+                # Retrieve constituents of the ith molecule
+                temp=molecules_to_atoms[i]
+                # Find which constituents belong to species one, species two and species three
+                species_one=[]
+                species_two=[]
+                species_three=[]
+                for j in temp:
+                    if atoms_to_species[j]==types[0]:
+                        species_one.append(j)
+                    if atoms_to_species[j]==types[1]:
+                        species_two.append(j)
+                    if atoms_to_species[j]==types[2]:
+                        species_three.append(j)
+                # Find the average positions of species one and two
+                sum_position_species_one=np.zeros((n_timesteps,n_dimensions))
+                sum_position_species_two=np.zeros((n_timesteps,n_dimensions))
+                for k in species_one:
+                    sum_position_species_one+=cartesian_configuration[:,atom_index[k]]
+                for l in species_two:
+                    sum_position_species_two+=cartesian_configuration[:,atom_index[l]]
+                avg_position_species_one=1.0*sum_position_species_one/float(len(species_one))
+                avg_position_species_two=1.0*sum_position_species_two/float(len(species_two))
+                # Choose the 1st element of species_three to build the 2nd vector
+                position_species_three=1.0*cartesian_configuration[:,atom_index[species_three[0]]]
+
+                # Find the vectors connecting average positions of species one and species two
+                vectors1=avg_position_species_two-avg_position_species_one
+
+                # Find the vector to the third atom
+                vectors2=position_species_three-avg_position_species_two
+
+                # Wrapping and normalisation of the vectors
+                vectors1=trajectory_correlations.wrap_and_normalise(vectors1,box_size_diagonal)
+                vectors2=trajectory_correlations.wrap_and_normalise(vectors2,box_size_diagonal)
+
+                # Dot product
+                cosine=np.multiply(vectors1[:,0],vectors2[:,0])+np.multiply(vectors1[:,1],vectors2[:,1])+\
+                    np.multiply(vectors1[:,2],vectors2[:,2])
+
+                # Gram-Schmidt orthogonalisation process
+                vectors2=vectors2-np.divide(vectors1,cosine[:,np.newaxis])
+
+                # Renormalisation of the 2nd vector
+                norm2=np.sqrt(vectors2[:,0]*vectors2[:,0]+vectors2[:,1]*vectors2[:,1]+vectors2[:,2]*vectors2[:,2])
+                vectors2=np.divide(vectors2,norm2[:,np.newaxis])
+
+                # Store calculations in the orientation_vectors1 and orientation_vectors2 arrays
+                orientation_vectors1[index]=vectors1
+                orientation_vectors2[index]=vectors2
+
+            correlation_sums.add(orientation_vectors1,np.zeros(len(block),dtype=int))
+            correlation_sums.add(orientation_vectors2,np.ones(len(block),dtype=int))
+
+        R_avg=correlation_sums.correlations()/trajectory_correlations.lag_counts(n_timesteps)
 
         # First axis
-        R_avg_axis1=np.zeros(n_timesteps)
-        for i in range(n_molecules):
-            R_avg_axis1+=self.auto_correlation(orientation_vectors1[i])
-
-        R_avg_axis1=1.0*R_avg_axis1/n_molecules
+        R_avg_axis1=1.0*R_avg[0]/n_molecules
 
         # Second axis
-        R_avg_axis2=np.zeros(n_timesteps)
-        for i in range(n_molecules):
-            R_avg_axis2+=self.auto_correlation(orientation_vectors2[i])
-
-        R_avg_axis2=1.0*R_avg_axis2/n_molecules
+        R_avg_axis2=1.0*R_avg[1]/n_molecules
 
         logger.information(str(time.time()-start_time)+" s")
 
@@ -299,21 +270,6 @@ class AngularAutoCorrelationsTwoAxes(PythonAlgorithm):
                                      DataE=evals,NSpec=nrows,VerticalAxisUnit="Text",VerticalAxisValues=["FT Axis 1","FT Axis 2"])
         self.setProperty("OutputWorkspaceFT",FT_output_ws)
 
-    def auto_correlation(self, vector):
-        # Returns angular auto-correlation of a normalised time-dependent 3-vector
-        num=np.shape(vector)[0]
-        norm=np.arange(np.ceil(num/2.0),num+1)
-        norm=np.append(norm,(np.arange(int(num/2)+1,num)[::-1]))
-
-        # x dimension
-        autoCorr=np.divide(np.correlate(vector[:,0],vector[:,0],"same"),norm)
-        # y dimension
-        autoCorr+=np.divide(np.correlate(vector[:,1],vector[:,1],"same"),norm)
-        # z dimension
-        autoCorr+=np.divide(np.correlate(vector[:,2],vector[:,2],"same"),norm)
-
-        return autoCorr
-
     def fold_correlation(self,omega):
         # Folds an array with symmetrical values into half by averaging values around the centre
         right_half=omega[int(len(omega))//2:]
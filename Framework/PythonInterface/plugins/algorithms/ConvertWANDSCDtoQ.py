@@ -8,10 +8,15 @@ from __future__ import (absolute_import, division, print_function)
 from mantid.api import (PythonAlgorithm, AlgorithmFactory,
                         PropertyMode, WorkspaceProperty, Progress,
                         IMDHistoWorkspaceProperty, mtd)
-from mantid.kernel import Direction, FloatArrayProperty, FloatArrayLengthValidator, StringListValidator, FloatBoundedValidator
+from mantid.kernel import (Direction, FloatArrayProperty, FloatArrayLengthValidator, StringListValidator,
+                           FloatBoundedValidator, IntBoundedValidator)
 from mantid import logger
+from multiprocessing.pool import ThreadPool
 import numpy as np
 
+# Number of (pixel, rotation step) pairs projected and histogrammed at once
+BLOCK_SIZE = 2**24
+
 
 class ConvertWANDSCDtoQ(PythonAlgorithm):
 
@@ -64,6 +69,9 @@ class ConvertWANDSCDtoQ(PythonAlgorithm):
                              "Binning parameters for the 2nd dimension. Enter it as a"
                              "comma-separated list of values with the"
                              "format: 'minimum,maximum,number_of_bins'.")
+        self.declareProperty('NumberOfThreads', 1, IntBoundedValidator(lower=1),
+                             "Number of threads the rotation steps are split between. Each thread holds its own "
+                             "histograms of the Q volume")
         self.declareProperty('KeepTemporaryWorkspaces', False,
                              "If True the normalization and data workspaces in addition to the normalized data will be outputted")
         self.declareProperty(WorkspaceProperty("OutputWorkspace", "",
@@ -138,6 +146,87 @@ class ConvertWANDSCDtoQ(PythonAlgorithm):
 
         return issues
 
+    def _bin_runs(self, first_run, end_run, inv_RUBW, qlab, bin_size, offset, shape, data_array, scale, norm_flat, progress):
+        """Histogram the pixels of the rotation steps first_run to end_run-1 in blocks of steps
+
+        Returns the data, the scale, the normalisation and the normalisation scale histograms,
+        the last two are None without normalisation.
+        """
+        size = np.prod(shape)
+        number_of_pixels = qlab.shape[1]
+        block_size = max(1, BLOCK_SIZE // number_of_pixels)
+        q_index = np.empty((min(block_size, end_run-first_run), number_of_pixels), dtype=np.intp)
+
+        output = np.zeros(size)
+        output_scale = np.zeros(size)
+        if norm_flat is not None:
+            output_norm = np.zeros(size)
+            output_norm_scale = np.zeros(size)
+
+        for start in range(first_run, end_run, block_size):
+            stop = min(start + block_size, end_run)
+            for i, n in enumerate(range(start, stop)):
+                q = np.round(np.dot(inv_RUBW[n], qlab)/bin_size-offset).astype(int)
+                q_index[i] = np.ravel_multi_index(q, shape, mode='clip')
+            # one histogram of all the pixels of the block instead of one per rotation step
+            block_index = q_index[:stop-start].ravel()
+            output += np.bincount(block_index, data_array[:,:,start:stop].ravel('F'), minlength=size)
+            output_scale += np.bincount(block_index, np.repeat(scale[start:stop], number_of_pixels), minlength=size)
+            if norm_flat is not None:
+                output_norm += np.bincount(block_index, np.tile(norm_flat, stop-start), minlength=size)
+                output_norm_scale += np.bincount(block_index, minlength=size)
+            progress.reportIncrement(stop-start, 'Calculating Q volume')
+
+        if norm_flat is None:
+            return output.reshape(shape), output_scale.reshape(shape), None, None
+        return (output.reshape(shape), output_scale.reshape(shape),
+                output_norm.reshape(shape), output_norm_scale.reshape(shape))
+
+    @staticmethod
+    def _inverse_transforms(s1, UBW):
+        """Inverse transforms of all rotation steps, so each step only projects the pixels"""
+        R = np.zeros((len(s1), 3, 3))
+        R[:,0,0] = np.cos(s1)
+        R[:,0,2] = np.sin(s1)
+        R[:,1,1] = 1
+        R[:,2,0] = -np.sin(s1)
+        R[:,2,2] = np.cos(s1)
+        return np.linalg.inv(np.array([np.dot(r, UBW) for r in R]))
+
+    def _bin_all_runs(self, inv_RUBW, qlab, bin_size, offset, shape, data_array, scale, norm_flat, progress):
+        """Histogram all rotation steps, split in NumberOfThreads ranges binned concurrently
+
+        Returns the summed histograms of the ranges, as _bin_runs.
+        """
+        number_of_runs = data_array.shape[2]
+        number_of_threads = min(self.getProperty('NumberOfThreads').value, number_of_runs)
+        run_ranges = [(number_of_runs*i//number_of_threads, number_of_runs*(i+1)//number_of_threads)
+                      for i in range(number_of_threads)]
+
+        def bin_run_range(run_range):
+            return self._bin_runs(run_range[0], run_range[1], inv_RUBW, qlab, bin_size, offset, shape,
+                                  data_array, scale, norm_flat, progress)
+
+        if number_of_threads > 1:
+            pool = ThreadPool(number_of_threads)
+            try:
+                histograms = pool.map(bin_run_range, run_ranges)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            histograms = [bin_run_range(run_ranges[0])]
+
+        # Sum the histograms of the run ranges
+        output, output_scale, output_norm, output_norm_scale = histograms[0]
+        for histogram in histograms[1:]:
+            output += histogram[0]
+            output_scale += histogram[1]
+            if norm_flat is not None:
+                output_norm += histogram[2]
+                output_norm_scale += histogram[3]
+        return output, output_scale, output_norm, output_norm_scale
+
     def PyExec(self):
         inWS = self.getProperty("InputWorkspace").value
         normWS = self.getProperty("NormalisationWorkspace").value
@@ -221,17 +310,7 @@ class ConvertWANDSCDtoQ(PythonAlgorithm):
 
         progress.report('Calculating Q volume')
 
-        output = np.zeros((dim0_bins+2, dim1_bins+2, dim2_bins+2))
-        outputr = output.ravel()
-
-        output_scale = np.zeros_like(output)
-        output_scaler = output_scale.ravel()
-
-        if _norm:
-            output_norm = np.zeros_like(output)
-            output_normr = output_norm.ravel()
-            output_norm_scale = np.zeros_like(output)
-            output_norm_scaler = output_norm_scale.ravel()
+        shape = (dim0_bins+2, dim1_bins+2, dim2_bins+2)
 
         bin_size = np.array([[dim0_bin_size],
                              [dim1_bin_size],
@@ -245,21 +324,10 @@ class ConvertWANDSCDtoQ(PythonAlgorithm):
         assert not data_array[:,:,0].ravel('F').flags.owndata
         assert data_array[:,:,0].flags.fnc
 
-        for n in range(number_of_runs):
-            R = np.array([[ np.cos(s1[n]), 0, np.sin(s1[n])],
-                          [             0, 1,             0],
-                          [-np.sin(s1[n]), 0, np.cos(s1[n])]])
-            RUBW = np.dot(R,UBW)
-            q = np.round(np.dot(np.linalg.inv(RUBW),qlab.T)/bin_size-offset).astype(np.int)
-            q_index = np.ravel_multi_index(q, (dim0_bins+2, dim1_bins+2, dim2_bins+2), mode='clip')
-            q_uniq, inverse = np.unique(q_index, return_inverse=True)
-            outputr[q_uniq] += np.bincount(inverse, data_array[:,:,n].ravel('F'))
-            output_scaler[q_uniq] += np.bincount(inverse)*scale[n]
-            if _norm:
-                output_normr[q_uniq] += np.bincount(inverse, norm_array.ravel('F'))
-                output_norm_scaler[q_uniq] += np.bincount(inverse)
-
-            progress.report()
+        inv_RUBW = self._inverse_transforms(s1, UBW)
+        norm_flat = norm_array.ravel('F') if _norm else None
+        output, output_scale, output_norm, output_norm_scale = self._bin_all_runs(inv_RUBW, qlab.T, bin_size, offset, shape,
+                                                                                  data_array, scale, norm_flat, progress)
 
         if _norm:
             output *= output_norm_scale*norm_scale
@@ -182,26 +182,30 @@ class DeltaPDF3D(PythonAlgorithm):
             else:
                 check_space_group = False
 
+            # Integer HKL's within the workspace and which of them are allowed reflections
+            H = np.arange(int(np.ceil(Xmin)), int(Xmax)+1)
+            K = np.arange(int(np.ceil(Ymin)), int(Ymax)+1)
+            L = np.arange(int(np.ceil(Zmin)), int(Zmax)+1)
+            if check_space_group:
+                allowed = np.array([[[sg.isAllowedReflection([h,k,l]) for l in L] for k in K] for h in H],
+                                   dtype=bool).reshape((len(H), len(K), len(L)))
+            else:
+                allowed = np.ones((len(H), len(K), len(L)), dtype=bool)
+
             if cut_shape == 'cube':
-                for h in range(int(np.ceil(Xmin)), int(Xmax)+1):
-                    for k in range(int(np.ceil(Ymin)), int(Ymax)+1):
-                        for l in range(int(np.ceil(Zmin)), int(Zmax)+1):
-                            if not check_space_group or sg.isAllowedReflection([h,k,l]):
-                                signal[int((h-size[0]-Xmin)/Xwidth+1):int((h+size[0]-Xmin)/Xwidth),
-                                       int((k-size[1]-Ymin)/Ywidth+1):int((k+size[1]-Ymin)/Ywidth),
-                                       int((l-size[2]-Zmin)/Zwidth+1):int((l+size[2]-Zmin)/Zwidth)]=np.nan
+                boxes = [self._hkl_boxes(H, size[0], Xmin, Xwidth, Xbins),
+                         self._hkl_boxes(K, size[1], Ymin, Ywidth, Ybins),
+                         self._hkl_boxes(L, size[2], Zmin, Zwidth, Zbins)]
+                signal[self._reflection_mask(allowed, boxes)]=np.nan
             else:  # sphere
                 mask=((X-np.round(X))**2/size[0]**2 + (Y-np.round(Y))**2/size[1]**2 + (Z-np.round(Z))**2/size[2]**2 < 1)
 
                 # Unmask invalid reflections
                 if check_space_group:
-                    for h in range(int(np.ceil(Xmin)), int(Xmax)+1):
-                        for k in range(int(np.ceil(Ymin)), int(Ymax)+1):
-                            for l in range(int(np.ceil(Zmin)), int(Zmax)+1):
-                                if not sg.isAllowedReflection([h,k,l]):
-                                    mask[int((h-0.5-Xmin)/Xwidth+1):int((h+0.5-Xmin)/Xwidth),
-                                         int((k-0.5-Ymin)/Ywidth+1):int((k+0.5-Ymin)/Ywidth),
-                                         int((l-0.5-Zmin)/Zwidth+1):int((l+0.5-Zmin)/Zwidth)]=False
+                    boxes = [self._hkl_boxes(H, 0.5, Xmin, Xwidth, Xbins),
+                             self._hkl_boxes(K, 0.5, Ymin, Ywidth, Ybins),
+                             self._hkl_boxes(L, 0.5, Zmin, Zwidth, Zbins)]
+                    mask[self._reflection_mask(~allowed, boxes)]=False
 
                 signal[mask]=np.nan
 
@@ -244,15 +248,12 @@ class DeltaPDF3D(PythonAlgorithm):
         signal[np.isnan(signal)]=0
         signal[np.isinf(signal)]=0
 
-        signal=np.fft.fftshift(np.fft.fftn(np.fft.ifftshift(signal)))
+        deconvolution = self.getProperty("Convolution").value and self.getProperty("Deconvolution").value
+        signal = self._fft(signal, deconvolution)
         number_of_bins = signal.shape
 
-        # Do deconvolution
-        if self.getProperty("Convolution").value and self.getProperty("Deconvolution").value:
-            signal /= self._deconvolution(np.array(signal.shape))
-
-        # CreateMDHistoWorkspace expects Fortan `column-major` ordering
-        signal = signal.real.flatten('F')
+        # CreateMDHistoWorkspace expects Fortan `column-major` ordering, the transform is stored in it
+        signal = signal.ravel('F')
 
         createWS_alg = self.createChildAlgorithm("CreateMDHistoWorkspace", enableLogging=False)
         createWS_alg.setProperty("SignalInput", signal)
@@ -284,17 +285,69 @@ class DeltaPDF3D(PythonAlgorithm):
             logger.debug('Using astropy.convolution.convolve for convolution')
             return convolve(signal, G3D)
 
-    def _deconvolution(self, shape):
+    def _deconvolution(self, number_of_bins):
+        """Shifted fourier transform of the 1D convolution kernel padded or cropped to number_of_bins
+
+        The 3D kernel is the outer product of three 1D kernels, so its transform is the product of their transforms.
+        """
         from astropy.convolution import Gaussian1DKernel
         G1D = Gaussian1DKernel(self.getProperty("ConvolutionWidth").value).array
-        G3D = G1D * G1D.reshape((-1,1)) * G1D.reshape((-1,1,1))
-        G3D_shape = np.array(G3D.shape)
-        G3D = np.pad(G3D,pad_width=np.array([np.maximum(np.floor((shape-G3D_shape)/2),np.zeros(len(shape))),
-                                             np.maximum(np.ceil((shape-G3D_shape)/2),np.zeros(len(shape)))],
-                                            dtype=np.int).transpose(),mode='constant')
-        deconv = np.fft.fftshift(np.fft.fftn(np.fft.ifftshift(G3D)))
-        iarr = (deconv.shape-shape)//2
-        return deconv[iarr[0]:shape[0]+iarr[0],iarr[1]:shape[1]+iarr[1],iarr[2]:shape[2]+iarr[2]]
+        padding = max(number_of_bins-len(G1D), 0)
+        G1D = np.pad(G1D, (padding//2, padding-padding//2), mode='constant')
+        deconv = np.fft.fftshift(np.fft.fft(np.fft.ifftshift(G1D)))
+        iarr = (len(deconv)-number_of_bins)//2
+        return deconv[iarr:number_of_bins+iarr]
+
+    def _fft(self, signal, deconvolution):
+        """Real part of the shifted fourier transform of the real signal, optionally deconvoluted
+
+        Only half of the last dimension is transformed with rfftn, the other half follows from the
+        hermitian symmetry of the transform. The output is assembled one plane at a time, so neither
+        the full complex transform nor its shifted copies are stored.
+        """
+        shape = signal.shape
+        half_transform = np.fft.rfftn(np.fft.ifftshift(signal))
+        half = half_transform.shape[2]
+        if deconvolution:
+            # Unshifted transforms of the kernel, to match the order of the transform of the signal
+            kernels = [np.fft.ifftshift(self._deconvolution(n)) for n in shape]
+            kernel_plane = np.outer(kernels[1], kernels[2])
+        # The transform at -k1,-k2 gives the missing half of the last dimension
+        mirror_y = -np.arange(shape[1]) % shape[1]
+        mirror_z = shape[2] - np.arange(half, shape[2])
+        output = np.empty(shape, order='F')
+        plane = np.empty(shape[1:], dtype=half_transform.dtype)
+        for i in range(shape[0]):
+            plane[:,:half] = half_transform[i]
+            plane[:,half:] = np.conj(half_transform[-i % shape[0]][mirror_y][:,mirror_z])
+            if deconvolution:
+                plane /= kernels[0][i]*kernel_plane
+            output[(i+shape[0]//2) % shape[0]] = np.fft.fftshift(plane.real)
+        return output
+
+    @staticmethod
+    def _hkl_boxes(hkl, half_width, minimum, bin_width, number_of_bins):
+        """Bins of one dimension within half_width of each of the integer indices hkl, as hkl x bins array"""
+        boxes = np.zeros((len(hkl), number_of_bins), dtype=bool)
+        for n, index in enumerate(hkl):
+            boxes[n,int((index-half_width-minimum)/bin_width+1):int((index+half_width-minimum)/bin_width)] = True
+        return boxes
+
+    @staticmethod
+    def _reflection_mask(selected, boxes):
+        """Mask of the bins in the boxes of the selected HKL's
+
+        The boxes are products of the boxes of each dimension, so the number of boxes a bin is in
+        is the product of the selected HKL's with the boxes of each dimension in turn. The last
+        product is done one plane at a time to keep only the boolean mask of the whole volume.
+        """
+        boxes = [box.astype(np.float32) for box in boxes] # counts are exact and products use BLAS
+        counts = np.tensordot(boxes[0].T, selected.astype(np.float32), axes=1) # x, k, l
+        counts = np.tensordot(counts, boxes[1], axes=([1], [0]))               # x, l, y
+        mask = np.empty((boxes[0].shape[1], boxes[1].shape[1], boxes[2].shape[1]), dtype=bool)
+        for i in range(mask.shape[0]):
+            mask[i] = np.dot(counts[i].T, boxes[2]) > 0
+        return mask
 
     def _calc_new_extents(self, inWS):
         # Calculate new extents for fft space
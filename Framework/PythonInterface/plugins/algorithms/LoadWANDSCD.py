@@ -6,12 +6,37 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import (absolute_import, division, print_function)
 from mantid.api import PythonAlgorithm, AlgorithmFactory, PropertyMode, WorkspaceProperty, Progress, MultipleFileProperty, FileAction, mtd
-from mantid.kernel import Direction, Property, IntArrayProperty, StringListValidator
+from mantid.kernel import Direction, Property, IntArrayProperty, StringListValidator, IntBoundedValidator
 from mantid.simpleapi import LoadEventNexus, RemoveLogs, DeleteWorkspace, ConvertToMD, Rebin, CreateGroupingWorkspace, GroupDetectors, SetUB
+import multiprocessing
 import numpy as np
 import h5py
 import re
 
+# Maximum number of events read from a bank at once
+EVENT_CHUNK_SIZE = 2**22
+
+
+def _load_run(args):
+    """Histogram the events of one run by detector pixel and read its logs
+
+    Module level, so it can be run in a process pool. Returns the pixel counts and
+    the s1, duration, run number and monitor count logs.
+    """
+    run, grouping = args
+    with h5py.File(run, 'r') as f:
+        bc = np.zeros((512*480*8),dtype=np.int64)
+        for b in range(8):
+            event_id = f['/entry/bank'+str(b+1)+'_events/event_id']
+            for start in range(0, event_id.shape[0], EVENT_CHUNK_SIZE):
+                bc += np.bincount(event_id[start:start+EVENT_CHUNK_SIZE],minlength=512*480*8)
+        bc = bc.reshape((480*8//grouping, grouping, 512//grouping, grouping)).sum(axis=(1, 3))
+        logs = (f['/entry/DASlogs/HB2C:Mot:s1.RBV/average_value'][0],
+                float(f['/entry/duration'][0]),
+                float(f['/entry/run_number'][0]),
+                float(f['/entry/monitor1/total_counts'][0]))
+    return bc, logs
+
 
 class LoadWANDSCD(PythonAlgorithm):
 
@@ -34,6 +59,8 @@ class LoadWANDSCD(PythonAlgorithm):
         self.declareProperty('IPTS', Property.EMPTY_INT, "IPTS number to load from")
         self.declareProperty(IntArrayProperty("RunNumbers", []), 'Run numbers to load')
         self.declareProperty("Grouping", 'None', StringListValidator(['None', '2x2', '4x4']), "Group pixels")
+        self.declareProperty("NumberOfProcesses", 1, IntBoundedValidator(lower=1),
+                             "Number of processes the runs are loaded in concurrently")
         self.declareProperty(WorkspaceProperty("OutputWorkspace", "",
                                                optional=PropertyMode.Mandatory,
                                                direction=Direction.Output),
@@ -75,25 +102,27 @@ class LoadWANDSCD(PythonAlgorithm):
 
         progress = Progress(self, 0.0, 1.0, number_of_runs+3)
 
-        for n, run in enumerate(runs):
-            progress.report('Loading: '+run)
-            with h5py.File(run, 'r') as f:
-                bc = np.zeros((512*480*8),dtype=np.int64)
-                for b in range(8):
-                    bc += np.bincount(f['/entry/bank'+str(b+1)+'_events/event_id'].value,minlength=512*480*8)
-                bc = bc.reshape((480*8, 512))
-                if grouping == 2:
-                    bc = bc[::2,::2]+bc[1::2,::2]+bc[::2,1::2]+bc[1::2,1::2]
-                elif grouping == 4:
-                    bc = (bc[::4,::4]    + bc[1::4,::4]  + bc[2::4,::4]  + bc[3::4,::4]
-                          + bc[::4,1::4] + bc[1::4,1::4] + bc[2::4,1::4] + bc[3::4,1::4]
-                          + bc[::4,2::4] + bc[1::4,2::4] + bc[2::4,2::4] + bc[3::4,2::4]
-                          + bc[::4,3::4] + bc[1::4,3::4] + bc[2::4,3::4] + bc[3::4,3::4])
+        number_of_processes = min(self.getProperty("NumberOfProcesses").value, number_of_runs)
+        if number_of_processes > 1:
+            pool = multiprocessing.Pool(number_of_processes)
+            loaded_runs = pool.imap(_load_run, [(run, grouping) for run in runs])
+        else:
+            pool = None
+            loaded_runs = (_load_run((run, grouping)) for run in runs)
+
+        try:
+            for n, run in enumerate(runs):
+                bc, logs = next(loaded_runs)
+                progress.report('Loaded: '+run)
                 data_array[n] = bc
-                s1_array.append(f['/entry/DASlogs/HB2C:Mot:s1.RBV/average_value'].value[0])
-                duration_array.append(float(f['/entry/duration'].value[0]))
-                run_number_array.append(float(f['/entry/run_number'].value[0]))
-                monitor_count_array.append(float(f['/entry/monitor1/total_counts'].value[0]))
+                s1_array.append(logs[0])
+                duration_array.append(logs[1])
+                run_number_array.append(logs[2])
+                monitor_count_array.append(logs[3])
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
 
         progress.report('Creating MDHistoWorkspace')
         createWS_alg = self.createChildAlgorithm("CreateMDHistoWorkspace", enableLogging=False)
@@ -52,6 +52,42 @@ class MuonMaxent(PythonAlgorithm):
                               direction=Direction.Input,
                               validator=RawCountValidator(True)),
             doc="Raw muon workspace to process")
+        self.declareSettings()
+        self.declareProperty(
+            WorkspaceProperty("OutputWorkspace",
+                              "",
+                              direction=Direction.Output),
+            doc="Output Spectrum (combined) versus field")
+        self.declareProperty(
+            ITableWorkspaceProperty(
+                "OutputPhaseTable",
+                "",
+                direction=Direction.Output,
+                optional=PropertyMode.Optional),
+            doc="Output phase table (optional)")
+        self.declareProperty(
+            ITableWorkspaceProperty(
+                "OutputDeadTimeTable",
+                "",
+                direction=Direction.Output,
+                optional=PropertyMode.Optional),
+            doc="Output dead time table (optional)")
+        self.declareProperty(
+            WorkspaceProperty("ReconstructedSpectra",
+                              "",
+                              direction=Direction.Output,
+                              optional=PropertyMode.Optional),
+            doc="Reconstructed time spectra (optional)")
+        self.declareProperty(
+            WorkspaceProperty(
+                "PhaseConvergenceTable",
+                "",
+                direction=Direction.Output,
+                optional=PropertyMode.Optional),
+            doc="Convergence of phases (optional)")
+
+    # properties shared with MuonMaxentSeries
+    def declareSettings(self):
         self.declareProperty(
             ITableWorkspaceProperty("InputPhaseTable",
                                     "",
@@ -111,38 +147,6 @@ class MuonMaxent(PythonAlgorithm):
             1.04,
             doc="Used to control the value chi-squared converge to",
             direction=Direction.InOut)
-        self.declareProperty(
-            WorkspaceProperty("OutputWorkspace",
-                              "",
-                              direction=Direction.Output),
-            doc="Output Spectrum (combined) versus field")
-        self.declareProperty(
-            ITableWorkspaceProperty(
-                "OutputPhaseTable",
-                "",
-                direction=Direction.Output,
-                optional=PropertyMode.Optional),
-            doc="Output phase table (optional)")
-        self.declareProperty(
-            ITableWorkspaceProperty(
-                "OutputDeadTimeTable",
-                "",
-                direction=Direction.Output,
-                optional=PropertyMode.Optional),
-            doc="Output dead time table (optional)")
-        self.declareProperty(
-            WorkspaceProperty("ReconstructedSpectra",
-                              "",
-                              direction=Direction.Output,
-                              optional=PropertyMode.Optional),
-            doc="Reconstructed time spectra (optional)")
-        self.declareProperty(
-            WorkspaceProperty(
-                "PhaseConvergenceTable",
-                "",
-                direction=Direction.Output,
-                optional=PropertyMode.Optional),
-            doc="Convergence of phases (optional)")
 
     def checkRValues(self, rg9, rg0, xv, mylog):
         if(rg9 - rg0 < 4):
@@ -191,7 +195,6 @@ class MuonMaxent(PythonAlgorithm):
           ws,
           FLAGS_fitdead,
           mylog):
-        RUNDATA_frames = None
         SENSE_taud = np.zeros([POINTS_ngroups])  # default zero if not provided
         tmpTaud = [[] for i in range(POINTS_ngroups)]
         if(not self.getProperty("InputDeadTimeTable").isDefault):
@@ -202,6 +205,10 @@ class MuonMaxent(PythonAlgorithm):
                         r["dead-time"])
             for g in range(POINTS_ngroups):
                 SENSE_taud[g] = np.mean(tmpTaud[g])
+        RUNDATA_frames = self.getFrames(ws, FLAGS_fitdead, mylog)
+        return SENSE_taud, RUNDATA_frames
+
+    def getFrames(self, ws, FLAGS_fitdead, mylog):
         try:
             RUNDATA_frames = ws.getRun().getProperty(
                 "goodfrm").value  # need frames for dead time calc
@@ -213,7 +220,7 @@ class MuonMaxent(PythonAlgorithm):
                 mylog.notice(
                     "No dead time fitting, assuming arbitrary number of frames")
                 RUNDATA_frames = 1000000
-        return SENSE_taud, RUNDATA_frames
+        return RUNDATA_frames
 
     def getPhase(self, FLAGS_fixphase, POINTS_ngroups, POINTS_nhists, mylog):
         filePHASE = None
@@ -289,13 +296,7 @@ class MuonMaxent(PythonAlgorithm):
             phaseconvWS = None
         return phaseconvWS
 
-    def PyExec(self):
-        # logging
-        mylog = self.log()
-        #
-        originalWS = self.getProperty("InputWorkspace").value
-        ws, deadDetectors = removeDeadDetectors(originalWS)
-
+    def getChannels(self, ws, mylog):
         # crop off odd sized bins at start and end (if present)
         xv = ws.readX(0)
         rg0 = 0
@@ -320,39 +321,13 @@ class MuonMaxent(PythonAlgorithm):
         CHANNELS_i1stgood = rg0 + max(
             int(math.floor((t1stgood - ws.readX(0)[rg0]) / RUNDATA_res + 1.0)),
             0)  # was 1.0. i1stgood is first bin with purely good data in it (and good sized)
-        FLAGS_fixphase = self.getProperty("FixPhases").value
-        FLAGS_fitdead = self.getProperty("FitDeadTime").value
-        OuterIter = self.getProperty("OuterIterations").value
-        InnerIter = self.getProperty("InnerIterations").value
-        # progress
-        prog = Progress(
-            self,
-            start=0.0,
-            end=1.0,
-            nreports=OuterIter *
-            InnerIter)
-        #
         tlast = self.getProperty("LastGoodTime").value
         ilast = min(
             rg0 + int(math.floor((tlast - ws.readX(0)[rg0]) / RUNDATA_res)),
             rg9 - 1)  # first bin with some bad data in it, or end (excluding bad sized bins)
-        nhisto = ws.getNumberHistograms()
-        POINTS_nhists = nhisto
-        histlen = ilast  # -CHANNELS_itzero # actual data points to process, including before i1stgood
-        # fill rdata with raw counts
-        CHANNELS_itotal = histlen
-        mylog.notice(
-            "channels t0={0} tgood={1} to {2}".format(
-                CHANNELS_itzero,
-                CHANNELS_i1stgood,
-                CHANNELS_itotal))
-        DATALL_rdata = np.zeros([nhisto, ilast])
-        for i in range(nhisto):
-            DATALL_rdata[i, :] = ws.readY(i)[:ilast]
-        PULSES_npulse = self.getPulse()
-        PULSES_def = self.getProperty("DefaultLevel").value
-        FAC_factor = self.getProperty("Factor").value
-        #
+        return RUNDATA_res, CHANNELS_itzero, TZERO_fine, CHANNELS_i1stgood, ilast
+
+    def getTransformSizes(self, CHANNELS_itotal, RUNDATA_res, mylog):
         # note on lengths of transforms, etc:
         # input data has CHANNELS_itotal data points with time spacing RUNDATA_res
         # Frequency spectrum has MAXPAGE_n data points with frequency spacing fperchan
@@ -390,6 +365,97 @@ class MuonMaxent(PythonAlgorithm):
             MAXPAGE_n = 256
         if(MAXPAGE_n > POINTS_npts):
             MAXPAGE_n = POINTS_npts
+        return POINTS_npts, CHANNELS_itotal, SAVETIME_i2, MAXPAGE_n
+
+    def frequencySpectrum(self, MAXPAGE_f, RUNDATA_res, POINTS_npts, MAXPAGE_n):
+        fperchan = 1. / (RUNDATA_res * float(POINTS_npts) * 2.)
+        fchan = np.linspace(
+            0.0,
+            MAXPAGE_n *
+            fperchan /
+            135.5e-4,
+            MAXPAGE_n,
+            endpoint=False)
+        # write results! Frequency spectra
+        outSpec = WorkspaceFactory.create(
+            "Workspace2D",
+            NVectors=1,
+            XLength=MAXPAGE_n,
+            YLength=MAXPAGE_n)
+        outSpec.dataX(0)[:] = fchan
+        outSpec.dataY(0)[:] = MAXPAGE_f
+        return outSpec
+
+    def deadTimeTable(self, POINTS_ngroups, deadDetectors, SENSE_taud):
+        outTaud = WorkspaceFactory.createTable()
+        outTaud.addColumn("int", "spectrum", 1)
+        outTaud.addColumn("double", "dead-time", 2)
+        offset = 0
+        for i in range(POINTS_ngroups + len(deadDetectors)):
+            if i + 1 in deadDetectors:
+                outTaud.addRow([i + 1, 0.0])
+                offset += 1
+            else:
+                outTaud.addRow([i + 1, SENSE_taud[i - offset]])
+        return outTaud
+
+    def phaseTable(self, POINTS_ngroups, deadDetectors, AMPS_amp, SENSE_phi):
+        outPhase = WorkspaceFactory.createTable()
+        outPhase.addColumn("int", "Spectrum number", 1)
+        outPhase.addColumn("double", "Asymmetry", 2)
+        outPhase.addColumn("double", "Phase", 2)
+        offset = 0
+        for i in range(POINTS_ngroups + len(deadDetectors)):
+            if i + 1 in deadDetectors:
+                outPhase.addRow([i + 1, 999, 0.0])
+                offset += 1
+            else:
+                outPhase.addRow(
+                    [i + 1,
+                     AMPS_amp[i - offset],
+                        SENSE_phi[i - offset]])
+                            # sign of phase now OK for Mantid 3.12 onwards
+        return outPhase
+
+    def PyExec(self):
+        # logging
+        mylog = self.log()
+        #
+        originalWS = self.getProperty("InputWorkspace").value
+        ws, deadDetectors = removeDeadDetectors(originalWS)
+
+        RUNDATA_res, CHANNELS_itzero, TZERO_fine, CHANNELS_i1stgood, ilast = self.getChannels(ws, mylog)
+        FLAGS_fixphase = self.getProperty("FixPhases").value
+        FLAGS_fitdead = self.getProperty("FitDeadTime").value
+        OuterIter = self.getProperty("OuterIterations").value
+        InnerIter = self.getProperty("InnerIterations").value
+        # progress
+        prog = Progress(
+            self,
+            start=0.0,
+            end=1.0,
+            nreports=OuterIter *
+            InnerIter)
+        #
+        nhisto = ws.getNumberHistograms()
+        POINTS_nhists = nhisto
+        histlen = ilast  # -CHANNELS_itzero # actual data points to process, including before i1stgood
+        # fill rdata with raw counts
+        CHANNELS_itotal = histlen
+        mylog.notice(
+            "channels t0={0} tgood={1} to {2}".format(
+                CHANNELS_itzero,
+                CHANNELS_i1stgood,
+                CHANNELS_itotal))
+        DATALL_rdata = np.zeros([nhisto, ilast])
+        for i in range(nhisto):
+            DATALL_rdata[i, :] = ws.readY(i)[:ilast]
+        PULSES_npulse = self.getPulse()
+        PULSES_def = self.getProperty("DefaultLevel").value
+        FAC_factor = self.getProperty("Factor").value
+        #
+        POINTS_npts, CHANNELS_itotal, SAVETIME_i2, MAXPAGE_n = self.getTransformSizes(
+            CHANNELS_itotal, RUNDATA_res, mylog)
         # load grouping. Mantid group table is different: one row per group, 1
         # column "detectors" with list of values
         RUNDATA_hists = np.zeros(nhisto)  # not necessary?
@@ -422,54 +488,13 @@ class MuonMaxent(PythonAlgorithm):
             FLAGS_fitdead, FLAGS_fixphase, SAVETIME_i2,
             OuterIter, InnerIter, mylog, prog, phaseconvWS, TZERO_fine, deadDetectors)
         #
-        fperchan = 1. / (RUNDATA_res * float(POINTS_npts) * 2.)
-        fchan = np.linspace(
-            0.0,
-            MAXPAGE_n *
-            fperchan /
-            135.5e-4,
-            MAXPAGE_n,
-            endpoint=False)
-        # write results! Frequency spectra
-        outSpec = WorkspaceFactory.create(
-            "Workspace2D",
-            NVectors=1,
-            XLength=MAXPAGE_n,
-            YLength=MAXPAGE_n)
-        outSpec.dataX(0)[:] = fchan
-        outSpec.dataY(0)[:] = MAXPAGE_f
-        self.setProperty("OutputWorkspace", outSpec)
+        self.setProperty("OutputWorkspace", self.frequencySpectrum(MAXPAGE_f, RUNDATA_res, POINTS_npts, MAXPAGE_n))
         # revised dead times
         if(not self.getProperty("OutputDeadTimeTable").isDefault):
-            outTaud = WorkspaceFactory.createTable()
-            outTaud.addColumn("int", "spectrum", 1)
-            outTaud.addColumn("double", "dead-time", 2)
-            offset = 0
-            for i in range(POINTS_ngroups + len(deadDetectors)):
-                if i + 1 in deadDetectors:
-                    outTaud.addRow([i + 1, 0.0])
-                    offset += 1
-                else:
-                    outTaud.addRow([i + 1, SENSE_taud[i - offset]])
-            self.setProperty("OutputDeadTimeTable", outTaud)
+            self.setProperty("OutputDeadTimeTable", self.deadTimeTable(POINTS_ngroups, deadDetectors, SENSE_taud))
         # revised phases (and amplitudes since they're in the table too)
         if(not self.getProperty("OutputPhaseTable").isDefault):
-            outPhase = WorkspaceFactory.createTable()
-            outPhase.addColumn("int", "Spectrum number", 1)
-            outPhase.addColumn("double", "Asymmetry", 2)
-            outPhase.addColumn("double", "Phase", 2)
-            offset = 0
-            for i in range(POINTS_ngroups + len(deadDetectors)):
-                if i + 1 in deadDetectors:
-                    outPhase.addRow([i + 1, 999, 0.0])
-                    offset += 1
-                else:
-                    outPhase.addRow(
-                        [i + 1,
-                         AMPS_amp[i - offset],
-                            SENSE_phi[i - offset]])
-                                # sign of phase now OK for Mantid 3.12 onwards
-            self.setProperty("OutputPhaseTable", outPhase)
+            self.setProperty("OutputPhaseTable", self.phaseTable(POINTS_ngroups, deadDetectors, AMPS_amp, SENSE_phi))
         # reconstructed spectra passed back from OUTSPEC
         if(not self.getProperty("ReconstructedSpectra").isDefault):
             k2 = CHANNELS_itotal  # channel range in source workspace accounting for instrumental t0
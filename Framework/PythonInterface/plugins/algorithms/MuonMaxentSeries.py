@@ -0,0 +1,164 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+import numpy as np
+from Muon.MaxentTools.series import MULTIMAX_SERIES
+from Muon.MaxentTools.dead_detector_handler import removeDeadDetectors
+from mantid.api import *
+from mantid.kernel import *
+
+from MuonMaxent import MuonMaxent
+
+
+class MuonMaxentSeries(MuonMaxent):
+
+    def summary(self):
+        return "Calculates the MaxEnt frequency spectra of a series of muon runs sharing the same grouping and phases."
+
+    def seeAlso(self):
+        return ["MuonMaxent"]
+
+    def PyInit(self):
+        self.declareProperty(
+            StringArrayProperty("InputWorkspaces",
+                                direction=Direction.Input,
+                                validator=StringArrayMandatoryValidator()),
+            doc="Raw muon workspaces to process, or groups of them. They must have the same "
+                "spectra and time bins")
+        self.declareSettings()
+        self.declareProperty(
+            "NumberOfProcesses",
+            1,
+            validator=IntBoundedValidator(lower=1),
+            doc="Number of processes solving the runs in parallel")
+        self.declareProperty(
+            "RunsPerBatch",
+            4,
+            validator=IntBoundedValidator(lower=1),
+            doc="Number of runs whose spectra are iterated together")
+        self.declareProperty(
+            WorkspaceGroupProperty("OutputWorkspace",
+                                   "",
+                                   direction=Direction.Output),
+            doc="Output spectra versus field, one per input workspace")
+        self.declareProperty(
+            WorkspaceGroupProperty(
+                "OutputPhaseTable",
+                "",
+                direction=Direction.Output,
+                optional=PropertyMode.Optional),
+            doc="Output phase tables, one per input workspace (optional)")
+        self.declareProperty(
+            WorkspaceGroupProperty(
+                "OutputDeadTimeTable",
+                "",
+                direction=Direction.Output,
+                optional=PropertyMode.Optional),
+            doc="Output dead time tables, one per input workspace (optional)")
+
+    def getInputNames(self):
+        names = []
+        for name in self.getProperty("InputWorkspaces").value:
+            ws = mtd[name]
+            if isinstance(ws, WorkspaceGroup):
+                names.extend(ws.getNames())
+            else:
+                names.append(name)
+        return names
+
+    def validateInputs(self):
+        issues = dict()
+        try:
+            names = self.getInputNames()
+        except KeyError as error:
+            issues["InputWorkspaces"] = str(error)
+            return issues
+        for name in names:
+            ws = mtd[name]
+            if not isinstance(ws, MatrixWorkspace):
+                issues["InputWorkspaces"] = "{0} is not a matrix workspace".format(name)
+            elif ws.isDistribution():
+                issues["InputWorkspaces"] = "{0} does not contain raw counts".format(name)
+            elif ws.getNumberHistograms() != mtd[names[0]].getNumberHistograms() or \
+                    not np.array_equal(ws.readX(0), mtd[names[0]].readX(0)):
+                issues["InputWorkspaces"] = "{0} does not have the same spectra and time bins as {1}".format(
+                    name, names[0])
+        return issues
+
+    def groupOutputs(self, propertyName, names, outputs):
+        group = WorkspaceGroup()
+        for name, output in zip(names, outputs):
+            outName = self.getPropertyValue(propertyName) + "_" + name
+            mtd.addOrReplace(outName, output)
+            group.addWorkspace(output)
+        self.setProperty(propertyName, group)
+
+    def PyExec(self):
+        # logging
+        mylog = self.log()
+        #
+        names = self.getInputNames()
+        runs = [removeDeadDetectors(mtd[name]) for name in names]
+        deadDetectors = runs[0][1]
+        for name, (ws, runDeadDetectors) in zip(names, runs):
+            if runDeadDetectors != deadDetectors:
+                raise ValueError("{0} has different dead detectors from {1}".format(name, names[0]))
+        # the time bins, grouping, phases and transform sizes are worked out once for all the runs
+        ws = runs[0][0]
+        RUNDATA_res, CHANNELS_itzero, TZERO_fine, CHANNELS_i1stgood, ilast = self.getChannels(ws, mylog)
+        FLAGS_fixphase = self.getProperty("FixPhases").value
+        FLAGS_fitdead = self.getProperty("FitDeadTime").value
+        nhisto = ws.getNumberHistograms()
+        CHANNELS_itotal = ilast
+        POINTS_npts, CHANNELS_itotal, SAVETIME_i2, MAXPAGE_n = self.getTransformSizes(
+            CHANNELS_itotal, RUNDATA_res, mylog)
+        GROUPING_group, POINTS_ngroups = self.doGrouping(nhisto, nhisto)
+        SENSE_taud = self.doDeadTimes(
+            POINTS_ngroups, GROUPING_group, ws, FLAGS_fitdead, mylog)[0]
+        filePHASE = self.getPhase(
+            FLAGS_fixphase,
+            POINTS_ngroups,
+            nhisto,
+            mylog)
+        settings = dict(
+            POINTS_nhists=nhisto, POINTS_ngroups=POINTS_ngroups, POINTS_npts=POINTS_npts,
+            CHANNELS_itzero=CHANNELS_itzero, CHANNELS_i1stgood=CHANNELS_i1stgood, CHANNELS_itotal=CHANNELS_itotal,
+            RUNDATA_res=RUNDATA_res, GROUPING_group=GROUPING_group, MAXPAGE_n=MAXPAGE_n, filePHASE=filePHASE,
+            PULSES_def=self.getProperty("DefaultLevel").value, PULSES_npulse=self.getPulse(),
+            FLAGS_fitdead=FLAGS_fitdead, FLAGS_fixphase=FLAGS_fixphase, SAVETIME_i2=SAVETIME_i2,
+            OuterIter=self.getProperty("OuterIterations").value, InnerIter=self.getProperty("InnerIterations").value,
+            TZERO_fine=TZERO_fine, deadDetectors=deadDetectors)
+        # only the counts and the number of frames differ between the runs
+        DATALL_rdata = []
+        RUNDATA_frames = []
+        for ws, runDeadDetectors in runs:
+            DATALL_rdata.append(np.array([ws.readY(i)[:ilast] for i in range(nhisto)]))
+            RUNDATA_frames.append(self.getFrames(ws, FLAGS_fitdead, mylog))
+        chunksize = self.getProperty("RunsPerBatch").value
+        prog = Progress(
+            self,
+            start=0.0,
+            end=1.0,
+            nreports=-(-len(runs) // chunksize))
+        results = MULTIMAX_SERIES(
+            settings, RUNDATA_frames, DATALL_rdata, [self.getProperty("Factor").value] * len(runs),
+            [np.array(SENSE_taud) for run in runs], self.getProperty("NumberOfProcesses").value, chunksize,
+            mylog, prog)
+        #
+        self.groupOutputs("OutputWorkspace", names,
+                          [self.frequencySpectrum(result[3], RUNDATA_res, POINTS_npts, MAXPAGE_n)
+                           for result in results])
+        if(not self.getProperty("OutputDeadTimeTable").isDefault):
+            self.groupOutputs("OutputDeadTimeTable", names,
+                              [self.deadTimeTable(POINTS_ngroups, deadDetectors, result[13]) for result in results])
+        if(not self.getProperty("OutputPhaseTable").isDefault):
+            self.groupOutputs("OutputPhaseTable", names,
+                              [self.phaseTable(POINTS_ngroups, deadDetectors, result[16], result[17])
+                               for result in results])
+
+
+AlgorithmFactory.subscribe(MuonMaxentSeries)
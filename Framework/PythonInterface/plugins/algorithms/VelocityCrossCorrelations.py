@@ -14,6 +14,7 @@ from scipy.io import netcdf
 import numpy as np
 import re
 import time
+import trajectory_correlations
 
 
 class VelocityCrossCorrelations(PythonAlgorithm):
@@ -34,6 +35,10 @@ class VelocityCrossCorrelations(PythonAlgorithm):
         self.declareProperty("Timestep", "1.0", direction = Direction.Input,
                              doc="Specify the timestep between trajectory points in the simulation, fs")
 
+        self.declareProperty("MaxChunkSize",1.0,FloatBoundedValidator(lower=0.0),direction=Direction.Input,
+                             doc="Maximum memory in Gbytes used for the particles read from the trajectory at once. "
+                             "0 reads all particles at once.")
+
         self.declareProperty(WorkspaceProperty('OutputWorkspace','',direction=Direction.Output),doc="Output workspace name")
 
     def PyExec(self):
@@ -93,8 +98,6 @@ class VelocityCrossCorrelations(PythonAlgorithm):
         n_particles=len(atoms_to_species)
         # Number of timesteps in the simulation
         n_timesteps=int(configuration.shape[0])
-        # Number of spatial dimensions
-        n_dimensions=int(configuration.shape[2])
 
         logger.information(str(time.time()-start_time) + " s")
 
@@ -106,65 +109,30 @@ class VelocityCrossCorrelations(PythonAlgorithm):
 
         # Reshape the paralellepipeds into 3x3 tensors for coordinate transformations.
         # Shape: timesteps x 3 vectors x (# of spatial dimensions)
-        box_size_tensors=np.array([box_size[j].reshape((3,3)) for j in range(n_timesteps)])
-
-        # Copy the configuration object into a numpy array
-        configuration_copy=np.array([configuration[i] for i in range(n_timesteps)])
-
-        # Swap the time and particle axes
-        configuration_copy=np.swapaxes(configuration_copy,0,1)#/1.12484770
-
-        # Get scaled coordinates (assumes orthogonal simulation box)
-        scaled_coords=np.zeros(np.shape(configuration_copy))
-        for i in range(n_particles):
-            for j in range(n_timesteps):
-                for k in range(n_dimensions):
-                    scaled_coords[i,j,k]=configuration_copy[i,j,k]/box_size_tensors[j,k,k]
-
-        # # Transform particle trajectories (configuration array) to Cartesian coordinates at each time step
+        box_size_tensors=trajectory_correlations.box_tensors(box_size[:])
 
         logger.information(str(time.time()-start_time) + " s")
 
-        logger.information("Calculating velocities...")
-        start_time=time.time()
+        # Memory budget for the blocks of particles read from the trajectory
+        memory_budget=trajectory_correlations.memory_budget_from_chunk_size(self.getProperty("MaxChunkSize").value)
 
-        # Initialise velocity arrray. Note that the first dimension is 2 elements shorter than the coordinate array.
-        # Use finite difference methods to evaluate the time-derivative to 1st order
-        # Shape: (# of particles) x (timesteps-2) x (# of spatial dimensions)
-
-        velocities=np.zeros((n_particles,n_timesteps-1,n_dimensions))
-        v1=scaled_coords[:,1:-1,:]-scaled_coords[:,:-2,:]-np.round(scaled_coords[:,1:-1,:]-scaled_coords[:,:-2,:])
-        v2=scaled_coords[:,2:,:]-scaled_coords[:,1:-1,:]-np.round(scaled_coords[:,2:,:]-scaled_coords[:,1:-1,:])
-        velocities[:,:-1,:]=(v1+v2)/2.
-
-        # Transform velocities (configuration array) back to Cartesian coordinates at each time step
-        velocities=np.array([[np.dot(box_size_tensors[j+1],np.transpose(velocities[i,j]))
-                              for j in range(n_timesteps-1)] for i in range(n_particles)])
-        logger.information(str(time.time()-start_time) + " s")
-
-        logger.information("Calculating velocity cross-correlations (resource intensive calculation)...")
+        logger.information("Calculating velocities and velocity cross-correlations (resource intensive calculation)...")
         start_time=time.time()
         correlation_length=n_timesteps-1
-        correlations=np.zeros((n_species,n_species,correlation_length))
+        # Species index of each particle
+        particle_species=[elements.index(atoms_to_species[i]) for i in range(n_particles)]
         # Array for counting particle pairings
-        correlation_count=np.zeros((n_species,n_species))
-
-        # Compute cross-correlations for each pair of particles in each spatial coordinate
-        for i in range(n_particles):
-            for j in range(i+1,n_particles):
-                # Retrieve particle indices from the 'particles' dictionary and
-                # determine the relevant position in the 'correlations' matrices
-                k=elements.index(atoms_to_species[i])
-                l=elements.index(atoms_to_species[j])
-                # Check for the order of elements (ensures upper triangular matrix form & consistent order of operations)
-                if k<=l:
-                    correlation_temp=self.cross_correlation(velocities[i],velocities[j])
-                    correlations[k,l]+=correlation_temp
-                    correlation_count[k,l]+=1
-                else:
-                    correlation_temp=self.cross_correlation(velocities[j],velocities[i])
-                    correlations[l,k]+=correlation_temp
-                    correlation_count[l,k]+=1
+        correlation_count=trajectory_correlations.pair_counts(particle_species,n_species)
+
+        # Read the trajectory in blocks of particles. Scale the coordinates by the box size (assumes orthogonal
+        # simulation box), evaluate the time-derivative of the unwrapped coordinates to 1st order and transform the
+        # velocities back to Cartesian coordinates. Shape: (# of particles) x (timesteps-1) x (# of spatial dimensions)
+        # Compute cross-correlations of each pair of particles, summed for each pair of species
+        # (upper triangular matrix form)
+        correlation_sums=trajectory_correlations.CrossCorrelationSums(correlation_length,n_species)
+        for start,velocities in trajectory_correlations.velocity_blocks(configuration,box_size_tensors,memory_budget):
+            correlation_sums.add(velocities,particle_species[start:start+len(velocities)])
+        correlations=correlation_sums.correlations()/trajectory_correlations.correlation_norm(correlation_length)
 
         logger.information(str(time.time()-start_time) + " s")
 
@@ -292,7 +260,7 @@ class VelocityCrossCorrelations(PythonAlgorithm):
         for i in range(n_species):
             for j in range(i,n_species):
                 # Add folded correlations to the array passed to the workspace
-                yvals=np.append(yvals,self.fold_correlation(correlations[i,j]))
+                yvals=np.append(yvals,trajectory_correlations.fold_correlation(correlations[i,j]))
 
         # Timesteps between coordinate positions
         step=float(self.getPropertyValue("Timestep"))
@@ -308,27 +276,6 @@ class VelocityCrossCorrelations(PythonAlgorithm):
         # Set output workspace to output_ws
         self.setProperty('OutputWorkspace',output_ws)
 
-    def cross_correlation(self,u,v):
-        # Returns cross-correlation of two 3-vectors
-        n=np.shape(v)[0]
-        norm=np.arange(np.ceil(n/2.0),n+1)
-        norm=np.append(norm,(np.arange(n/2+1,n)[::-1]))
-        # Correlation in x
-        C=np.divide(np.correlate(u[:,0],v[:,0],"same"),norm)
-        # Correlation in y
-        C+=np.divide(np.correlate(u[:,1],v[:,1],"same"),norm)
-        # Correlation in z
-        C+=np.divide(np.correlate(u[:,2],v[:,2],"same"),norm)
-
-        return C
-
-    def fold_correlation(self,w):
-        # Folds an array with symmetrical values into half by averaging values around the centre
-        right_half=w[int(len(w)/2):]
-        left_half=w[:int(np.ceil(len(w)/2.0))][::-1]
-
-        return (left_half+right_half)/2.0
-
 
 # Subscribe algorithm to Mantid software
 AlgorithmFactory.subscribe(VelocityCrossCorrelations)
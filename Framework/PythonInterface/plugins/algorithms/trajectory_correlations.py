@@ -0,0 +1,299 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+import numpy as np
+
+'''
+This file contains the vectorised calculation of the velocities, orientation
+vectors and correlations of MMTK trajectories used by the algorithms
+VelocityAutoCorrelations, VelocityCrossCorrelations and AngularAutoCorrelations*.
+
+The trajectories are read from the netCDF file in blocks of particles, whose
+size is limited by a memory budget. The correlations are computed with fast
+Fourier transforms. The transforms of the blocks are summed per species before
+they are transformed back, so that the cross-correlations of all pairs of
+particles cost about as much as their auto-correlations.
+'''
+
+# Default memory in bytes which the calculations for a block of particles may take up
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+# Number of arrays of float64 3-vectors per timestep held for each particle of a block
+_COPIES_PER_PARTICLE = 6
+
+
+def memory_budget_from_chunk_size(max_chunk_size):
+    """Convert a MaxChunkSize property in Gbytes to a memory budget in bytes. 0 means no limit"""
+    if max_chunk_size <= 0:
+        return None
+    return int(max_chunk_size * 1024 * 1024 * 1024)
+
+
+def box_tensors(box_size):
+    """Reshape the simulation box of each timestep into a 3x3 tensor
+
+    :param box_size: timesteps x 9 array of 3 consecutive 3-vectors
+    :return: timesteps x 3 x 3 array
+    """
+    return np.asarray(box_size, dtype=np.float64).reshape((-1, 3, 3))
+
+
+def calculate_velocities(configuration, tensors):
+    """Calculate the particle velocities by finite differences of the unwrapped coordinates
+
+    The coordinates are scaled by the box size (assuming an orthogonal simulation box),
+    differenced with the minimum image convention and transformed back to Cartesian
+    coordinates. The velocity of the last timestep is zero.
+
+    :param configuration: timesteps x particles x 3 array of coordinates
+    :param tensors: timesteps x 3 x 3 array of box tensors
+    :return: particles x (timesteps-1) x 3 array of velocities
+    """
+    configuration = np.asarray(configuration, dtype=np.float64)
+    n_timesteps, n_particles, n_dimensions = configuration.shape
+    scaled_coords = configuration / np.diagonal(tensors, axis1=1, axis2=2)[:, np.newaxis, :]
+    steps = np.diff(scaled_coords, axis=0)
+    steps -= np.round(steps)
+    scaled_velocities = np.zeros((n_timesteps - 1, n_particles, n_dimensions))
+    scaled_velocities[:-1] = (steps[:-1] + steps[1:]) / 2.0
+    velocities = np.einsum('tab,tpb->pta', tensors[1:], scaled_velocities)
+    return np.ascontiguousarray(velocities)
+
+
+def block_size(n_timesteps, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Number of particles whose coordinates, velocities and transforms fit into the memory budget
+
+    :param n_timesteps: the number of timesteps of the trajectory
+    :param memory_budget: the memory budget in bytes or None for no limit
+    :return: the number of particles, at least 1, or None for no limit
+    """
+    if memory_budget is None:
+        return None
+    fft_length = _fft_length(n_timesteps)
+    particle_bytes = 3 * (8 * _COPIES_PER_PARTICLE * n_timesteps + 2 * 16 * (fft_length // 2 + 1))
+    return max(1, int(memory_budget // particle_bytes))
+
+
+def velocity_blocks(configuration, tensors, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Read the trajectory in blocks of particles and calculate their velocities
+
+    Only the coordinates of one block are read from the (memory-mapped) netCDF variable at a time.
+
+    :param configuration: timesteps x particles x 3 coordinate array or netCDF variable
+    :param tensors: timesteps x 3 x 3 array of box tensors
+    :param memory_budget: the memory budget in bytes or None to process all particles at once
+    :return: generator of (first particle index, particles x (timesteps-1) x 3 array of velocities)
+    """
+    n_timesteps, n_particles = configuration.shape[0], configuration.shape[1]
+    size = block_size(n_timesteps, memory_budget) or n_particles
+    for start in range(0, n_particles, size):
+        stop = min(start + size, n_particles)
+        yield start, calculate_velocities(configuration[:, start:stop, :], tensors)
+
+
+def molecule_blocks(molecules_to_atoms, n_timesteps, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Split the molecules into consecutive blocks whose atoms fit into the memory budget
+
+    :param molecules_to_atoms: list of the atom indices of each molecule
+    :param n_timesteps: the number of timesteps of the trajectory
+    :param memory_budget: the memory budget in bytes or None to process all molecules at once
+    :return: generator of ranges of molecule indices
+    """
+    size = block_size(n_timesteps, memory_budget)
+    start = 0
+    n_atoms = 0
+    for index, atoms in enumerate(molecules_to_atoms):
+        if size is not None and n_atoms > 0 and n_atoms + len(atoms) > size:
+            yield range(start, index)
+            start = index
+            n_atoms = 0
+        n_atoms += len(atoms)
+    if start < len(molecules_to_atoms):
+        yield range(start, len(molecules_to_atoms))
+
+
+def read_atoms(configuration, atoms):
+    """Read the coordinates of the atoms provided from the (memory-mapped) netCDF variable
+
+    :param configuration: timesteps x particles x 3 coordinate array or netCDF variable
+    :param atoms: sorted list of atom indices
+    :return: timesteps x atoms x 3 array in the precision of the file
+    """
+    if len(atoms) > 0 and atoms[-1] - atoms[0] + 1 == len(atoms):
+        return np.array(configuration[:, atoms[0]:atoms[-1] + 1, :])
+    return np.array(configuration[:, atoms, :])
+
+
+def cartesian_coordinates(configuration, tensors):
+    """Transform the coordinates to Cartesian coordinates at each timestep
+
+    The transformation is done in the precision of the arguments.
+
+    :param configuration: timesteps x particles x 3 array of coordinates
+    :param tensors: timesteps x 3 x 3 array of box tensors
+    :return: timesteps x particles x 3 array of Cartesian coordinates
+    """
+    return np.einsum('tab,tpb->tpa', tensors, configuration)
+
+
+def wrap_and_normalise(vectors, box_diagonal):
+    """Apply the minimum image convention to vectors between atoms and normalise them
+
+    :param vectors: timesteps x 3 array of vectors
+    :param box_diagonal: timesteps x 3 array of the box size (assuming an orthorhombic simulation cell)
+    :return: timesteps x 3 array of unit vectors
+    """
+    scaled = np.divide(vectors, box_diagonal)
+    vectors = (scaled - np.round(scaled)) * box_diagonal
+    norm = np.sqrt(vectors[:, 0] * vectors[:, 0] + vectors[:, 1] * vectors[:, 1] + vectors[:, 2] * vectors[:, 2])
+    return np.divide(vectors, norm[:, np.newaxis])
+
+
+def correlation_norm(n):
+    """Number of terms summed at each time lag of a correlation of length n"""
+    norm = np.arange(np.ceil(n / 2.0), n + 1)
+    return np.append(norm, (np.arange(n / 2 + 1, n)[::-1]))
+
+
+def lag_counts(n):
+    """Number of terms of np.correlate(u, v, 'same') at each time lag for arrays of length n"""
+    return n - np.abs(np.arange(n) - n // 2)
+
+
+def fold_correlation(w):
+    """Fold an array with symmetrical values into half by averaging values around the centre"""
+    right_half = w[len(w) // 2:]
+    left_half = w[:int(np.ceil(len(w) / 2.0))][::-1]
+    return (left_half + right_half) / 2.0
+
+
+def _fft_length(n):
+    # The correlations at all lags need a transform of at least 2n-1 points to avoid wrapping around
+    return 1 << int(2 * n - 2).bit_length()
+
+
+def _from_spectrum(spectrum, n, fft_length):
+    """Transform the spectra of correlations back and keep the time lags of np.correlate(..., 'same')"""
+    correlation = np.fft.irfft(spectrum, n=fft_length, axis=-1)
+    lags = (np.arange(n) - n // 2) % fft_length
+    return correlation[..., lags]
+
+
+class AutoCorrelationSums(object):
+    """Accumulate the sums of the auto-correlations of 3-vector time series of each species
+
+    The sums are the sums of np.correlate(v[:, k], v[:, k], 'same') over the particles of
+    a species and the 3 dimensions k, not divided by the number of terms at each lag.
+    """
+
+    def __init__(self, n_timesteps, n_species):
+        self._n_timesteps = n_timesteps
+        self._fft_length = _fft_length(n_timesteps)
+        self._spectra = np.zeros((n_species, self._fft_length // 2 + 1))
+
+    def add(self, vectors, species):
+        """Add a block of particles
+
+        :param vectors: particles x timesteps x 3 array
+        :param species: the species index of each particle
+        """
+        transforms = np.fft.rfft(vectors, n=self._fft_length, axis=1)
+        power = np.sum(transforms.real ** 2 + transforms.imag ** 2, axis=2)
+        np.add.at(self._spectra, np.asarray(species), power)
+
+    def correlations(self):
+        """Return the n_species x timesteps array of the sums"""
+        return _from_spectrum(self._spectra, self._n_timesteps, self._fft_length)
+
+
+class CrossCorrelationSums(object):
+    """Accumulate the sums of the cross-correlations of all pairs of particles for each pair of species
+
+    For particles i < j of species k and l, np.correlate(v_i, v_j, 'same') is added to
+    the sum of the species pair (k, l) if k <= l and np.correlate(v_j, v_i, 'same') is
+    added to the sum of the pair (l, k) otherwise, summed over the 3 dimensions. The sums
+    over pairs of different species are the correlations of the summed velocities of both
+    species. The sums over pairs of the same species use the running sums of the velocities
+    of the preceding particles of the species, so the blocks have to be added in the order
+    of the particles.
+    """
+
+    def __init__(self, n_timesteps, n_species, n_dimensions=3):
+        self._n_timesteps = n_timesteps
+        self._n_species = n_species
+        self._fft_length = _fft_length(n_timesteps)
+        n_frequencies = self._fft_length // 2 + 1
+        # Transforms of the summed velocities of each species
+        self._species_sums = np.zeros((n_species, n_frequencies, n_dimensions), dtype=np.complex128)
+        # Spectra of the sums over pairs of particles of the same species
+        self._spectra = np.zeros((n_species, n_frequencies), dtype=np.complex128)
+
+    def add(self, vectors, species):
+        """Add a block of particles following the particles added before
+
+        :param vectors: particles x timesteps x 3 array
+        :param species: the species index of each particle
+        """
+        transforms = np.fft.rfft(vectors, n=self._fft_length, axis=1)
+        species = np.asarray(species)
+        for k in np.unique(species):
+            species_transforms = transforms[species == k]
+            preceding = np.cumsum(species_transforms, axis=0) - species_transforms + self._species_sums[k]
+            self._spectra[k] += np.sum(preceding * np.conj(species_transforms), axis=(0, 2))
+            self._species_sums[k] += np.sum(species_transforms, axis=0)
+
+    def correlations(self):
+        """Return the n_species x n_species x timesteps array of the sums, with zeros below the diagonal"""
+        spectra = np.zeros((self._n_species, self._n_species, self._fft_length // 2 + 1), dtype=np.complex128)
+        for k in range(self._n_species):
+            spectra[k, k] = self._spectra[k]
+            for l in range(k + 1, self._n_species):
+                spectra[k, l] = np.sum(self._species_sums[k] * np.conj(self._species_sums[l]), axis=1)
+        return _from_spectrum(spectra, self._n_timesteps, self._fft_length)
+
+
+def _add_in_blocks(sums, velocities, species, memory_budget):
+    size = block_size(velocities.shape[1], memory_budget) or velocities.shape[0]
+    for start in range(0, velocities.shape[0], size):
+        sums.add(velocities[start:start + size], species[start:start + size])
+
+
+def auto_correlation_sums(velocities, species, n_species, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Sum the velocity auto-correlations of the particles of each species
+
+    :param velocities: particles x timesteps x 3 array of velocities
+    :param species: the species index of each particle
+    :param n_species: the number of species
+    :param memory_budget: the memory budget in bytes for the transforms of a block of particles
+    :return: n_species x timesteps array of the summed correlations divided by the
+             number of terms at each lag, as np.correlate(v, v, 'same') / correlation_norm
+    """
+    sums = AutoCorrelationSums(velocities.shape[1], n_species)
+    _add_in_blocks(sums, velocities, np.asarray(species), memory_budget)
+    return sums.correlations() / correlation_norm(velocities.shape[1])
+
+
+def cross_correlation_sums(velocities, species, n_species, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Sum the velocity cross-correlations of all pairs of particles for each pair of species
+
+    :param velocities: particles x timesteps x 3 array of velocities
+    :param species: the species index of each particle
+    :param n_species: the number of species
+    :param memory_budget: the memory budget in bytes for the transforms of a block of particles
+    :return: n_species x n_species x timesteps array of the summed correlations divided
+             by the number of terms at each lag, with zeros below the diagonal
+    """
+    sums = CrossCorrelationSums(velocities.shape[1], n_species)
+    _add_in_blocks(sums, velocities, np.asarray(species), memory_budget)
+    return sums.correlations() / correlation_norm(velocities.shape[1])
+
+
+def pair_counts(species, n_species):
+    """Number of pairs of particles for each pair of species, with zeros below the diagonal"""
+    particles = np.bincount(np.asarray(species), minlength=n_species).astype(np.float64)
+    counts = np.triu(np.outer(particles, particles), 1)
+    counts[np.diag_indices(n_species)] = particles * (particles - 1) / 2
+    return counts
@@ -0,0 +1,110 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+__STARIMPORTALG__ = \
+"""from mantid.api import PythonAlgorithm, AlgorithmFactory, MatrixWorkspaceProperty, PropertyMode
+from mantid.kernel import Direction
+from mantid.simpleapi import *
+from lazysimpleapihelper import VALUE
+
+class LazyStarImportAlg(PythonAlgorithm):
+
+    def workspaceMethodName(self):
+        return "lazyStarImportMethod"
+
+    def workspaceMethodOn(self):
+        return ["MatrixWorkspace"]
+
+    def workspaceMethodInputProperty(self):
+        return "InputWorkspace"
+
+    def PyInit(self):
+        self.declareProperty(MatrixWorkspaceProperty("InputWorkspace", "", direction=Direction.Input,
+                                                     optional=PropertyMode.Optional))
+        self.declareProperty("Result", 0, direction=Direction.Output)
+
+    def PyExec(self):
+        self.setProperty("Result", VALUE)
+
+AlgorithmFactory.subscribe(LazyStarImportAlg)
+"""
+
+__HELPER__ = "VALUE = 42\n"
+
+# Run in a separate interpreter as the lazy mode is chosen when the simple API is first imported
+__SCRIPT__ = \
+"""import json
+import sys
+from mantid.kernel import config
+config['python.plugins.lazy'] = '1'
+config['user.python.plugins.directories'] = sys.argv[1]
+import mantid.simpleapi as simpleapi
+from mantid.api import MatrixWorkspace
+
+result = {'loaded_on_import': 'LazyStarImportAlg' in sys.modules,
+          'helper_exported': 'lazysimpleapihelper' in simpleapi.__all__,
+          'method_attached': hasattr(MatrixWorkspace, 'lazyStarImportMethod')}
+namespace = {}
+exec('from mantid.simpleapi import *', namespace)
+result['star_imported'] = 'LazyStarImportAlg' in namespace and 'LazyStarImportAlgDialog' in namespace
+result['loaded_by_star_import'] = 'LazyStarImportAlg' in sys.modules
+result['plugin_star_imported'] = hasattr(sys.modules.get('LazyStarImportAlg'), 'LazyStarImportAlgDialog')
+result['value'] = namespace['LazyStarImportAlg']()
+workspace = simpleapi.CreateSingleValuedWorkspace(1.)
+result['method_value'] = workspace.lazyStarImportMethod()
+print(json.dumps(result))
+"""
+
+
+class SimpleAPILazyTest(unittest.TestCase):
+
+    def setUp(self):
+        self._testdir = tempfile.mkdtemp(prefix='SimpleAPILazyTest')
+        with open(os.path.join(self._testdir, 'LazyStarImportAlg.py'), 'w') as plugin:
+            plugin.write(__STARIMPORTALG__)
+        with open(os.path.join(self._testdir, 'lazysimpleapihelper.py'), 'w') as helper:
+            helper.write(__HELPER__)
+
+    def tearDown(self):
+        shutil.rmtree(self._testdir, ignore_errors=True)
+
+    def _run_lazy_import(self):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        output = subprocess.check_output([sys.executable, '-c', __SCRIPT__, self._testdir], env=env)
+        return json.loads(output.decode().strip().splitlines()[-1])
+
+    def test_star_import_and_first_call_with_a_cold_then_warm_manifest(self):
+        cold = self._run_lazy_import()
+        # the plugin has no manifest entry yet so it is loaded and inspected on import
+        self.assertTrue(cold['loaded_on_import'])
+        self.assertTrue(cold['plugin_star_imported'])
+
+        warm = self._run_lazy_import()
+        # the manifest entry is up to date so neither importing nor a star import loads the plugin
+        self.assertFalse(warm['loaded_on_import'])
+        self.assertFalse(warm['loaded_by_star_import'])
+
+        for result in (cold, warm):
+            self.assertFalse(result['helper_exported'])
+            self.assertTrue(result['star_imported'])
+            self.assertTrue(result['method_attached'])
+            self.assertEquals(42, result['value'])
+            self.assertEquals(42, result['method_value'])
+
+
+if __name__ == '__main__':
+    unittest.main()
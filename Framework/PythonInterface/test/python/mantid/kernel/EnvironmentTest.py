@@ -0,0 +1,39 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+
+import os
+import sys
+import unittest
+from mantid.kernel.environment import python_interpreter, python_subprocess_environment
+
+
+class EnvironmentTest(unittest.TestCase):
+
+    def test_python_interpreter_is_sys_executable_if_it_is_python(self):
+        executable = sys.executable
+        try:
+            sys.executable = os.path.join("bin", "python3")
+            self.assertEqual(python_interpreter(), sys.executable)
+            sys.executable = os.path.join("bin", "MantidPlot")
+            self.assertTrue(python_interpreter() is None)
+            sys.executable = ""
+            self.assertTrue(python_interpreter() is None)
+        finally:
+            sys.executable = executable
+
+    def test_python_subprocess_environment_has_sys_path(self):
+        env = python_subprocess_environment()
+        paths = env["PYTHONPATH"].split(os.pathsep)
+        for path in sys.path:
+            if path:
+                self.assertTrue(path in paths)
+        self.assertEqual(env.get("PATH"), os.environ.get("PATH"))
+
+
+if __name__ == '__main__':
+    unittest.main()
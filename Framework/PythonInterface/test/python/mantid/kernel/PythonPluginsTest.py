@@ -66,6 +66,65 @@ class PythonPluginsTest(unittest.TestCase):
         except RuntimeError as exc:
             self.fail("Failed to create plugin algorithm from the manager: '%s' " %s)
 
+    def test_load_and_inspect_records_the_registered_algorithms(self):
+        filename = os.path.join(self._testdir, 'TestPyAlgInspected.py')
+        with open(filename, 'w') as plugin:
+            plugin.write(__TESTALG__.replace('TestPyAlg', 'TestPyAlgInspected'))
+
+        entry = plugins.load_and_inspect(filename)
+        self.assertEquals({'TestPyAlgInspected': [1]}, entry['algorithms'])
+        self.assertEquals({}, entry['methods'])
+        self.assertTrue(plugins.is_manifest_entry_valid(entry, filename))
+        # entries written before the workspace methods were recorded are out of date
+        self.assertFalse(plugins.is_manifest_entry_valid({'signature': entry['signature'],
+                                                          'algorithms': entry['algorithms']}, filename))
+
+        # a modified file invalidates its entry
+        with open(filename, 'a') as plugin:
+            plugin.write("\n")
+        self.assertFalse(plugins.is_manifest_entry_valid(entry, filename))
+        self.assertFalse(plugins.is_manifest_entry_valid(None, filename))
+
+    def test_manifest_can_be_written_and_read(self):
+        filename = os.path.join(self._testdir, 'manifest.json')
+        manifest = {os.path.join(self._testdir, 'TestPyAlg.py'): {'signature': [1.5, 10],
+                                                                  'algorithms': {'TestPyAlg': [1]}}}
+        plugins.write_plugin_cache(filename, manifest)
+        self.assertEquals(manifest, plugins.read_plugin_cache(filename))
+
+    def test_contains_algorithm_finds_registration_outside_the_tail(self):
+        filename = os.path.join(self._testdir, 'TestPyAlgLong.py')
+        with open(filename, 'w') as plugin:
+            plugin.write(__TESTALG__ + "#" * (2 * plugins.TAIL_SIZE) + "\n")
+        self.assertTrue(plugins.contains_algorithm(filename))
+
+        with open(filename, 'w') as plugin:
+            plugin.write("# no algorithm here\n")
+        self.assertFalse(plugins.contains_algorithm(filename))
+
+    def test_find_plugins_with_index_only_inspects_changed_files(self):
+        index = {}
+        all_plugins, algs = plugins.find_plugins(self._testdir, index)
+        self.assertEquals(algs, plugins.find_plugins(self._testdir)[1])
+        filename = os.path.join(self._testdir, 'TestPyAlg.py')
+        self.assertTrue(index[filename][1])
+
+        # a stale entry with the right signature is trusted
+        index[filename][1] = False
+        self.assertEquals([], plugins.find_plugins(self._testdir, index)[1])
+
+        # a changed signature makes the file be inspected again
+        index[filename][0] = [0.0, 0]
+        self.assertEquals([filename], plugins.find_plugins(self._testdir, index)[1])
+
+    def test_missing_manifest_is_empty(self):
+        self.assertEquals({}, plugins.read_plugin_cache(os.path.join(self._testdir, 'missing.json')))
+
+    def test_find_plugin_files_does_not_inspect_content(self):
+        all_plugins, algs = plugins.find_plugins(self._testdir)
+        self.assertEquals(all_plugins, plugins.find_plugin_files(self._testdir))
+        self.assertRaises(ValueError, plugins.find_plugin_files, os.path.join(self._testdir, 'missing'))
+
 
 if __name__ == '__main__':
     unittest.main()
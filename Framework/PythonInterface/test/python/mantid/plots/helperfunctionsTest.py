@@ -142,6 +142,17 @@ class HelperFunctionsTest(unittest.TestCase):
         self.assertTrue(flag)
         self.assertEquals(kwargs, {'other_kwarg': 3})
 
+    def test_get_level_of_detail_flag(self):
+        flag, kwargs = funcs.get_level_of_detail_flag(self.ws2d_histo, lod=True, other_kwarg=1)
+        self.assertTrue(flag)
+        self.assertEquals(kwargs, {'other_kwarg': 1})
+        flag, kwargs = funcs.get_level_of_detail_flag(self.ws2d_histo, other_kwarg=2)
+        self.assertFalse(flag)
+        self.assertEquals(kwargs, {'other_kwarg': 2})
+        flag, kwargs = funcs.get_level_of_detail_flag(self.ws2d_histo_rag, lod=True, other_kwarg=3)
+        self.assertFalse(flag)
+        self.assertEquals(kwargs, {'other_kwarg': 3})
+
     def test_boundaries_from_points(self):
         centers = np.array([1., 2., 4., 8.])
         bounds = funcs.boundaries_from_points(centers)
@@ -207,6 +218,20 @@ class HelperFunctionsTest(unittest.TestCase):
         np.testing.assert_allclose(x, np.array([[10, 20, 30], [10, 20, 30], [10, 20, 30]]))
         np.testing.assert_allclose(y, np.array([[4, 4, 4], [6, 6, 6], [8, 8, 8]]))
 
+    def test_get_common_bins_2d_data(self):
+        # histo data
+        x, y, z = funcs.get_common_bins_2d_data(self.ws2d_histo, True)
+        np.testing.assert_allclose(x, np.array([10, 20, 30]))
+        np.testing.assert_allclose(y, np.array([4, 6, 8]))
+        np.testing.assert_allclose(z, np.array([[2, 3], [4, 5]]))
+        x, y, z = funcs.get_common_bins_2d_data(self.ws2d_histo, False)
+        np.testing.assert_allclose(z, np.array([[0.2, 0.3], [0.4, 0.5]]))
+        # point data
+        x, y, z = funcs.get_common_bins_2d_data(self.ws2d_point, True)
+        np.testing.assert_allclose(x, np.array([0.5, 1.5, 2.5, 3.5, 4.5]))
+        np.testing.assert_allclose(y, np.array([0.5, 1.5, 2.5, 3.5]))
+        np.testing.assert_allclose(z, np.array([[2, 2, 2, 2]] * 3))
+
     def test_get_matrix_2d_data_rag(self):
         # contour from ragged point data
         x, y, z = funcs.get_matrix_2d_data(self.ws2d_point_rag, True, histogram2D=False)
@@ -262,6 +287,36 @@ class HelperFunctionsTest(unittest.TestCase):
         np.testing.assert_allclose(z[0], np.array([1, 2, 3]))
         np.testing.assert_allclose(z[1], np.array([1, 2, 3, 4]))
 
+    def test_get_uneven_data_rectangles(self):
+        # even points
+        left, right, bottom, top, z = funcs.get_uneven_data_rectangles(self.ws2d_point_rag, True)
+        np.testing.assert_allclose(left, np.array([0.5, 1.5, 2.5, 3.5, 1, 3, 5, 7]))
+        np.testing.assert_allclose(right, np.array([1.5, 2.5, 3.5, 4.5, 3, 5, 7, 9]))
+        np.testing.assert_allclose(bottom, np.array([0.5] * 4 + [1.5] * 4))
+        np.testing.assert_allclose(top, np.array([1.5] * 4 + [2.5] * 4))
+        np.testing.assert_allclose(z, np.array([2] * 8))
+        # even histo
+        left, right, bottom, top, z = funcs.get_uneven_data_rectangles(self.ws2d_histo_rag, True)
+        np.testing.assert_allclose(left, np.array([1, 2, 3, 4, 2, 4, 6, 8]))
+        np.testing.assert_allclose(right, np.array([2, 3, 4, 5, 4, 6, 8, 10]))
+        np.testing.assert_allclose(bottom, np.array([5] * 4 + [7] * 4))
+        np.testing.assert_allclose(top, np.array([7] * 4 + [9] * 4))
+        np.testing.assert_allclose(z, np.array([2] * 8))
+        # uneven points
+        left, right, bottom, top, z = funcs.get_uneven_data_rectangles(self.ws2d_point_uneven, True)
+        np.testing.assert_allclose(left, np.array([5, 15, 25, 10, 20, 30, 40]))
+        np.testing.assert_allclose(right, np.array([15, 25, 35, 20, 30, 40, 50]))
+        np.testing.assert_allclose(bottom, np.array([0.5] * 3 + [1.5] * 4))
+        np.testing.assert_allclose(top, np.array([1.5] * 3 + [2.5] * 4))
+        np.testing.assert_allclose(z, np.array([1, 2, 3, 1, 2, 3, 4]))
+        # uneven histo
+        left, right, bottom, top, z = funcs.get_uneven_data_rectangles(self.ws2d_histo_uneven, True)
+        np.testing.assert_allclose(left, np.array([10, 20, 30, 15, 25, 35, 45]))
+        np.testing.assert_allclose(right, np.array([20, 30, 40, 25, 35, 45, 55]))
+        np.testing.assert_allclose(bottom, np.array([10] * 3 + [15] * 4))
+        np.testing.assert_allclose(top, np.array([15] * 3 + [25] * 4))
+        np.testing.assert_allclose(z, np.array([1, 2, 3, 1, 2, 3, 4]))
+
     def test_get_sample_logs(self):
         x, y, FullTime, LogName, units, kwargs = funcs.get_sample_log(self.ws2d_histo,LogName='my_log', FullTime=True)
         self.assertEquals(x[0],datetime.datetime(2010,1,1,0,0,0))
@@ -0,0 +1,116 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+
+import unittest
+import matplotlib
+matplotlib.use('AGG')
+import matplotlib.pyplot as plt
+import numpy as np
+import mantid.plots.levelofdetail as lod
+import mantid.plots.plotfunctions as funcs
+from mantid.api import AnalysisDataService
+from mantid.simpleapi import CreateWorkspace, DeleteWorkspace, RenameWorkspace, Scale
+
+
+class LevelOfDetailTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nhist, cls.nbins = 400, 300
+        cls.ws_large = CreateWorkspace(DataX=np.tile(np.arange(cls.nbins + 1.), cls.nhist),
+                                       DataY=np.tile(np.arange(cls.nbins, dtype=float), cls.nhist),
+                                       NSpec=cls.nhist,
+                                       Distribution=True,
+                                       OutputWorkspace='ws_large')
+
+    @classmethod
+    def tearDownClass(cls):
+        DeleteWorkspace('ws_large')
+
+    def setUp(self):
+        lod.clear_cache()
+
+    def test_level_halves_the_resolution(self):
+        data = lod.LevelOfDetailData(np.arange(6.), np.arange(4.), np.arange(15.).reshape(3, 5))
+        np.testing.assert_allclose(data.level(1, 0), [[0.5, 2.5, 4], [5.5, 7.5, 9], [10.5, 12.5, 14]])
+        np.testing.assert_allclose(data.level(1, 1), [[3, 5, 6.5], [10.5, 12.5, 14]])
+
+    def test_level_ignores_values_which_are_not_finite(self):
+        data = lod.LevelOfDetailData(np.arange(5.), np.arange(2.), np.array([[1, np.nan, np.nan, np.nan]]))
+        np.testing.assert_allclose(data.level(1, 0), [[1, np.nan]])
+
+    def test_decreasing_boundaries_are_reversed(self):
+        data = lod.LevelOfDetailData(np.arange(3.)[::-1], np.arange(3.)[::-1], np.arange(4.).reshape(2, 2))
+        np.testing.assert_allclose(data.x, [0, 1, 2])
+        np.testing.assert_allclose(data.y, [0, 1, 2])
+        np.testing.assert_allclose(data.level(0, 0), [[3, 2], [1, 0]])
+
+    def test_region_includes_margin(self):
+        data = lod.LevelOfDetailData(np.arange(11.), np.arange(3.), np.tile(np.arange(10.), (2, 1)))
+        x, y, z, covered = data.region(0, 0, (4, 6), (0, 2))
+        np.testing.assert_allclose(x, [3, 4, 5, 6, 7])
+        np.testing.assert_allclose(y, [0, 1, 2])
+        np.testing.assert_allclose(z, [[3, 4, 5, 6]] * 2)
+        self.assertEqual(((3, 7), (0, 2)), covered)
+        x, y, z, covered = data.region(2, 0, (0, 10), (0, 2))
+        np.testing.assert_allclose(x, [0, 4, 8, 10])
+        np.testing.assert_allclose(z, [[1.5, 5.5, 8.5]] * 2)
+        self.assertEqual(((0, 10), (0, 2)), covered)
+
+    def test_data_is_cached_per_workspace(self):
+        data = lod.get_level_of_detail_data(self.ws_large, True)
+        self.assertTrue(data is lod.get_level_of_detail_data(self.ws_large, True))
+        self.assertFalse(data is lod.get_level_of_detail_data(self.ws_large, False))
+
+    def test_cached_data_is_refreshed_if_workspace_changes(self):
+        CreateWorkspace(DataX=[0, 1, 2], DataY=[1, 2], OutputWorkspace='ws_modified')
+        data = lod.get_level_of_detail_data(Scale('ws_modified', Factor=2, OutputWorkspace='ws_modified'), True)
+        np.testing.assert_allclose(data.level(0, 0), [[2, 4]])
+        data = lod.get_level_of_detail_data(Scale('ws_modified', Factor=2, OutputWorkspace='ws_modified'), True)
+        np.testing.assert_allclose(data.level(0, 0), [[4, 8]])
+        DeleteWorkspace('ws_modified')
+
+    def test_cached_data_is_refreshed_if_workspace_is_replaced_renamed_or_deleted(self):
+        ws = CreateWorkspace(DataX=[0, 1, 2], DataY=[1, np.nan, 1, 2], NSpec=2, OutputWorkspace='ws_modified')
+        data = lod.get_level_of_detail_data(ws, True)
+        self.assertTrue(data is lod.get_level_of_detail_data(ws, True))
+        # setY is only noticed once the workspace is replaced
+        ws.setY(1, np.array([3., 4.]))
+        AnalysisDataService.addOrReplace('ws_modified', ws)
+        data = lod.get_level_of_detail_data(ws, True)
+        np.testing.assert_allclose(data.level(0, 0), [[1, np.nan], [3, 4]])
+        ws = RenameWorkspace(ws, OutputWorkspace='ws_renamed')
+        self.assertFalse(('ws_modified', True) in lod._cache)
+        lod.get_level_of_detail_data(ws, True)
+        DeleteWorkspace('ws_renamed')
+        self.assertFalse(('ws_renamed', True) in lod._cache)
+
+    def test_plot_is_refined_when_zooming(self):
+        fig, ax = plt.subplots(figsize=(2, 2), dpi=100)
+        image = funcs.pcolormesh(ax, self.ws_large, lod=True)
+        width, height = image.get_array().shape[1], image.get_array().shape[0]
+        self.assertTrue(width < self.nbins)
+        self.assertTrue(height < self.nhist)
+        self.assertEqual((0, self.nbins), ax.get_xlim())
+        ax.set_xlim(100, 120)
+        ax.set_ylim(10, 30)
+        np.testing.assert_allclose(image.get_array()[0], np.arange(90., 130.))
+        self.assertEqual((0, self.nbins), tuple(image.sticky_edges.x))
+        plt.close(fig)
+
+    def test_removed_plot_is_not_refined(self):
+        fig, ax = plt.subplots()
+        image = funcs.imshow(ax, self.ws_large, lod=True)
+        image.remove()
+        ax.set_xlim(100, 120)
+        self.assertEqual([], image.level_of_detail._callback_ids)
+        plt.close(fig)
+
+
+if __name__ == '__main__':
+    unittest.main()
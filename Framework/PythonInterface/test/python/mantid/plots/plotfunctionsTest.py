@@ -9,6 +9,7 @@ from __future__ import (absolute_import, division, print_function)
 import numpy as np
 import matplotlib
 matplotlib.use('AGG')
+import matplotlib.image
 import matplotlib.pyplot as plt
 import unittest
 
@@ -123,6 +124,27 @@ class PlotFunctionsTest(unittest.TestCase):
         funcs.pcolorfast(ax, self.ws2d_point_uneven, vmin=-1)
         funcs.imshow(ax, self.ws2d_histo)
 
+    def test_2d_pcolors_uneven_data_is_a_single_collection(self):
+        fig, ax = plt.subplots()
+        for pcolor in (funcs.pcolor, funcs.pcolorfast, funcs.pcolormesh):
+            collection = pcolor(ax, self.ws2d_point_uneven, axisaligned=True)
+            self.assertTrue(isinstance(collection, matplotlib.collections.PolyCollection))
+            self.assertEqual(7, len(collection.get_paths()))
+            np.testing.assert_allclose(collection.get_array(), [1, 2, 3, 1, 2, 3, 4])
+
+    def test_2d_pcolors_level_of_detail(self):
+        fig, ax = plt.subplots()
+        image = funcs.pcolormesh(ax, self.ws2d_histo, lod=True)
+        self.assertTrue(isinstance(image, matplotlib.image.PcolorImage))
+        np.testing.assert_allclose(image.get_array(), [[2, 3], [4, 5]])
+        self.assertEqual((10, 30), ax.get_xlim())
+        self.assertEqual((4, 8), ax.get_ylim())
+        funcs.pcolor(ax, self.ws2d_histo, lod=True, vmin=0)
+        funcs.pcolorfast(ax, self.ws2d_histo, lod=True)
+        funcs.imshow(ax, self.ws2d_histo, lod=True)
+        # level of detail is ignored if the bins are not the same in every spectrum
+        funcs.pcolormesh(ax, self.ws2d_histo_rag, lod=True)
+
     def test_1d_plots_with_unplottable_type_raises_attributeerror(self):
         table = CreateEmptyTableWorkspace()
         _, ax = plt.subplots()
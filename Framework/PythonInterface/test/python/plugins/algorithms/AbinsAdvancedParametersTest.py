@@ -45,6 +45,7 @@ class AbinsAdvancedParametersTest(unittest.TestCase):
         AbinsParameters.s_absolute_threshold = 10e-8
         AbinsParameters.optimal_size = 5000000
         AbinsParameters.threads = 1
+        AbinsParameters.max_cache_size = 1000.0
 
     def tearDown(self):
         AbinsTestHelpers.remove_output_files(list_of_names=["AbinsAdvanced"])
@@ -264,6 +265,17 @@ class AbinsAdvancedParametersTest(unittest.TestCase):
             self.assertRaises(RuntimeError, Abins, VibrationalOrPhononFile=self._Si2 + ".phonon",
                               OutputWorkspace=self._wrk_name)
 
+    def test_wrong_max_cache_size(self):
+        # max_cache_size should be positive
+        AbinsParameters.max_cache_size = -1.0
+        self.assertRaises(RuntimeError, Abins, VibrationalOrPhononFile=self._Si2 + ".phonon",
+                          OutputWorkspace=self._wrk_name)
+
+        # max_cache_size should be float
+        AbinsParameters.max_cache_size = 1000
+        self.assertRaises(RuntimeError, Abins, VibrationalOrPhononFile=self._Si2 + ".phonon",
+                          OutputWorkspace=self._wrk_name)
+
     def test_good_case(self):
 
         good_names = [self._wrk_name, self._wrk_name + "_Si", self._wrk_name + "_Si_total"]
@@ -99,6 +99,17 @@ class ConvertWANDSCDtoQTest(unittest.TestCase):
 
         ConvertWANDSCDtoQTest_out.delete()
 
+    def test_Q_norm_threads(self):
+        ConvertWANDSCDtoQTest_out = ConvertWANDSCDtoQ('ConvertWANDSCDtoQTest_data',NormalisationWorkspace='ConvertWANDSCDtoQTest_norm',
+                                                      BinningDim0='-8.08,8.08,101',BinningDim1='-0.88,0.88,11',BinningDim2='-8.08,8.08,101',
+                                                      NumberOfThreads=3)
+
+        s = ConvertWANDSCDtoQTest_out.getSignalArray()
+        self.assertAlmostEqual(np.nanmax(s), 7.476944426780101)
+        self.assertAlmostEqual(np.nanargmax(s), 22780)
+
+        ConvertWANDSCDtoQTest_out.delete()
+
     def test_HKL_norm_and_KeepTemporary(self):
         ConvertWANDSCDtoQTest_out = ConvertWANDSCDtoQ('ConvertWANDSCDtoQTest_data',NormalisationWorkspace='ConvertWANDSCDtoQTest_norm',
                                                       Frame='HKL',KeepTemporaryWorkspaces=True,BinningDim0='-8.08,8.08,101',
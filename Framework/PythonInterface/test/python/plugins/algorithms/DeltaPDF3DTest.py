@@ -10,6 +10,12 @@ import unittest
 from mantid.simpleapi import DeltaPDF3D, CreateMDWorkspace, FakeMDEventData, BinMD, mtd
 import numpy as np
 
+try:
+    from astropy.convolution import Gaussian1DKernel
+    have_astropy = True
+except ImportError:
+    have_astropy = False
+
 
 class DeltaPDF3DTest(unittest.TestCase):
 
@@ -130,6 +136,66 @@ class DeltaPDF3DTest(unittest.TestCase):
         self.assertAlmostEqual(fft.signalAt(1866), -562.30106845) # [1,0,0]
         self.assertAlmostEqual(fft.signalAt(2232), 577.15758916) # [1,1,0]
 
+    def test_3D_RemoveReflections_SpaceGroup(self):
+        # All integer HKL's are allowed in a primitive space group, so all reflections are removed
+        DeltaPDF3D(InputWorkspace='DeltaPDF3DTest_MDH',OutputWorkspace='fft',
+                   RemoveReflections=True,Size=0.4,SpaceGroup='P m -3 m',CropSphere=False,Convolution=False)
+        fft=mtd['fft']
+        self.assertAlmostEqual(fft.signalAt(113490), 4320.0) # [0,0,0]
+        self.assertAlmostEqual(fft.signalAt(113496), -3899.411112565) # [1,0,0]
+        self.assertAlmostEqual(fft.signalAt(113862), 3994.2768284083) # [1,1,0]
+
+        DeltaPDF3D(InputWorkspace='DeltaPDF3DTest_MDH',OutputWorkspace='fft',IntermediateWorkspace='int',
+                   RemoveReflections=True,Size=0.4,SpaceGroup='F m -3 m',CropSphere=False,Convolution=False)
+        self._check_face_centred_reflections(mtd['int'].getSignalArray())
+
+    def test_RemoveReflections_sphere_SpaceGroup(self):
+        DeltaPDF3D(InputWorkspace='DeltaPDF3DTest_MDH_2',OutputWorkspace='fft',
+                   RemoveReflections=True,Shape='sphere',Size=0.3,SpaceGroup='P m -3 m',CropSphere=False,
+                   Convolution=False)
+        fft=mtd['fft']
+        self.assertAlmostEqual(fft.signalAt(1860), 720.0) # [0,0,0]
+        self.assertAlmostEqual(fft.signalAt(1866), -649.90185209) # [1,0,0]
+        self.assertAlmostEqual(fft.signalAt(2232), 665.71280473) # [1,1,0]
+
+        # Space group given by its number
+        DeltaPDF3D(InputWorkspace='DeltaPDF3DTest_MDH',OutputWorkspace='fft',IntermediateWorkspace='int',
+                   RemoveReflections=True,Shape='sphere',Size=0.3,SpaceGroup='225',CropSphere=False,
+                   Convolution=False)
+        self._check_face_centred_reflections(mtd['int'].getSignalArray())
+
+    def _check_face_centred_reflections(self, signal):
+        # Bins at HKL h,k,l are at index 30+10*h,30+10*k,30+10*l
+        self.assertTrue(np.isnan(signal[30,30,30])) # [0,0,0]
+        self.assertTrue(np.isnan(signal[50,30,30])) # [2,0,0]
+        self.assertTrue(np.isnan(signal[40,40,40])) # [1,1,1]
+        self.assertTrue(np.isnan(signal[10,50,30])) # [-2,2,0]
+        self.assertFalse(np.isnan(signal[40,30,30])) # [1,0,0]
+        self.assertFalse(np.isnan(signal[40,40,30])) # [1,1,0]
+        self.assertFalse(np.isnan(signal[20,30,40])) # [-1,0,1]
+        self.assertFalse(np.isnan(signal[35,30,30])) # [0.5,0,0]
+
+    @unittest.skipIf(not have_astropy, 'python-astropy required to do convolution')
+    def test_2D_Deconvolution(self):
+        DeltaPDF3D(InputWorkspace='DeltaPDF3DTest_MDH_2',OutputWorkspace='fft',IntermediateWorkspace='int',
+                   RemoveReflections=True,Size=0.4,CropSphere=False,Convolution=True,ConvolutionWidth=2.0,
+                   Deconvolution=True)
+        signal = mtd['int'].getSignalArray().copy()
+        signal[np.isnan(signal)] = 0
+        kernels = [self._kernel_transform(n, 2.0) for n in signal.shape]
+        expected = np.fft.fftshift(np.fft.fftn(np.fft.ifftshift(signal)))
+        expected = (expected/np.einsum('i,j,k->ijk', *kernels)).real
+        np.testing.assert_allclose(mtd['fft'].getSignalArray(), expected, rtol=0, atol=1e-9*np.abs(expected).max())
+
+    def _kernel_transform(self, number_of_bins, width):
+        # Shifted transform of the 1D gaussian kernel padded or cropped to number_of_bins
+        kernel = Gaussian1DKernel(width).array
+        padding = max(number_of_bins-len(kernel), 0)
+        kernel = np.pad(kernel, (padding//2, padding-padding//2), mode='constant')
+        transform = np.fft.fftshift(np.fft.fft(np.fft.ifftshift(kernel)))
+        start = (len(transform)-number_of_bins)//2
+        return transform[start:start+number_of_bins]
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,7 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import absolute_import, division, print_function
 from mantid.simpleapi import LoadWANDSCD
+import numpy as np
 import unittest
 
 
@@ -59,6 +60,33 @@ class LoadWANDTest(unittest.TestCase):
 
         LoadWANDTest_ws.delete()
 
+    def test_processes_and_grouping(self):
+        LoadWANDTest_ws = LoadWANDSCD('HB2C_7000.nxs.h5,HB2C_7001.nxs.h5', Grouping='2x2')
+        LoadWANDTest_ws_processes = LoadWANDSCD('HB2C_7000.nxs.h5,HB2C_7001.nxs.h5', Grouping='2x2',
+                                                NumberOfProcesses=2)
+        self.assertEquals(LoadWANDTest_ws_processes.getNPoints(), 1966080//2)
+        np.testing.assert_array_equal(LoadWANDTest_ws_processes.getSignalArray(), LoadWANDTest_ws.getSignalArray())
+        np.testing.assert_array_equal(LoadWANDTest_ws_processes.getExperimentInfo(0).run().getProperty('s1').value,
+                                      [-142.6, -142.5])
+
+        LoadWANDTest_ws.delete()
+        LoadWANDTest_ws_processes.delete()
+
+    def test_processes_match_serial_load(self):
+        LoadWANDTest_ws = LoadWANDSCD('HB2C_7000.nxs.h5,HB2C_7001.nxs.h5')
+        LoadWANDTest_ws_processes = LoadWANDSCD('HB2C_7000.nxs.h5,HB2C_7001.nxs.h5', NumberOfProcesses=2)
+        self.assertEquals(LoadWANDTest_ws_processes.getNPoints(), LoadWANDTest_ws.getNPoints())
+        np.testing.assert_array_equal(LoadWANDTest_ws_processes.getSignalArray(), LoadWANDTest_ws.getSignalArray())
+        np.testing.assert_array_equal(LoadWANDTest_ws_processes.getErrorSquaredArray(),
+                                      LoadWANDTest_ws.getErrorSquaredArray())
+        run = LoadWANDTest_ws.getExperimentInfo(0).run()
+        run_processes = LoadWANDTest_ws_processes.getExperimentInfo(0).run()
+        for log in ['s1', 'duration', 'run_number', 'monitor_count']:
+            np.testing.assert_array_equal(run_processes.getProperty(log).value, run.getProperty(log).value)
+
+        LoadWANDTest_ws.delete()
+        LoadWANDTest_ws_processes.delete()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,87 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, print_function)
+
+import numpy as np
+import unittest
+from mantid.simpleapi import *
+from mantid.api import *
+
+
+class MuonMaxentSeriesTest(unittest.TestCase):
+
+    def genData(self, name, frequency):
+        x_data = np.linspace(0, 30., 100)
+        y_data = []
+        e_data = []
+        for phase in [0.1, 0.1 + np.pi]:
+            y_data.extend(np.sin(frequency * x_data + phase) * np.exp(-x_data / 2.19703))
+            e_data.extend(np.cos(0.2 * x_data))
+        return CreateWorkspace(
+            DataX=x_data,
+            DataY=y_data,
+            DataE=e_data,
+            NSpec=2,
+            UnitX='Time',
+            OutputWorkspace=name)
+
+    def tearDown(self):
+        AnalysisDataService.clear()
+
+    def runMaxent(self, **kwargs):
+        return dict(Npts=32768, FitDeadTime=False, FixPhases=True, OuterIterations=1, InnerIterations=1, **kwargs)
+
+    def test_output_is_group_with_one_spectrum_per_run(self):
+        self.genData("run1", 2.3)
+        self.genData("run2", 4.3)
+        GroupWorkspaces(InputWorkspaces="run1,run2", OutputWorkspace="runs")
+        MuonMaxentSeries(**self.runMaxent(InputWorkspaces="runs", OutputWorkspace="freq", OutputPhaseTable="phase"))
+        freq = AnalysisDataService.retrieve("freq")
+        phase = AnalysisDataService.retrieve("phase")
+        self.assertEqual(freq.getNames(), ["freq_run1", "freq_run2"])
+        self.assertEqual(phase.getNames(), ["phase_run1", "phase_run2"])
+        for ws in freq:
+            self.assertEqual(ws.getNumberHistograms(), 1)
+        for table in phase:
+            self.assertEqual(table.rowCount(), 2)
+
+    def test_matches_separate_runs(self):
+        self.genData("run1", 2.3)
+        self.genData("run2", 4.3)
+        MuonMaxentSeries(**self.runMaxent(InputWorkspaces=["run1", "run2"], OutputWorkspace="freq",
+                                          NumberOfProcesses=2, RunsPerBatch=1))
+        for name in ["run1", "run2"]:
+            MuonMaxent(**self.runMaxent(InputWorkspace=name, OutputWorkspace="single"))
+            single = AnalysisDataService.retrieve("single")
+            series = AnalysisDataService.retrieve("freq_" + name)
+            np.testing.assert_allclose(single.readX(0), series.readX(0))
+            np.testing.assert_allclose(single.readY(0), series.readY(0), rtol=1e-8, atol=1e-12)
+
+    def test_processes_match_serial(self):
+        self.genData("run1", 2.3)
+        self.genData("run2", 4.3)
+        self.genData("run3", 3.1)
+        runs = ["run1", "run2", "run3"]
+        MuonMaxentSeries(**self.runMaxent(InputWorkspaces=runs, OutputWorkspace="serial", RunsPerBatch=1))
+        MuonMaxentSeries(**self.runMaxent(InputWorkspaces=runs, OutputWorkspace="freq", NumberOfProcesses=2,
+                                          RunsPerBatch=1))
+        for name in runs:
+            serial = AnalysisDataService.retrieve("serial_" + name)
+            ws = AnalysisDataService.retrieve("freq_" + name)
+            np.testing.assert_array_equal(ws.readX(0), serial.readX(0))
+            np.testing.assert_array_equal(ws.readY(0), serial.readY(0))
+
+    def test_runs_with_different_bins_are_rejected(self):
+        self.genData("run1", 2.3)
+        CreateWorkspace(DataX=np.linspace(0, 20., 100), DataY=np.ones(198), NSpec=2, UnitX='Time',
+                        OutputWorkspace="run2")
+        self.assertRaises(RuntimeError, MuonMaxentSeries,
+                          **self.runMaxent(InputWorkspaces=["run1", "run2"], OutputWorkspace="freq"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+import trajectory_correlations
+
+
+class TrajectoryCorrelationsTest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(10)
+        self.species = np.array([0, 1, 0, 2, 1, 0, 1])
+        self.n_species = 3
+
+    def _correlate(self, u, v):
+        n = u.shape[0]
+        correlation = sum(np.correlate(u[:, k], v[:, k], "same") for k in range(3))
+        return correlation / trajectory_correlations.correlation_norm(n)
+
+    def _check_correlation_sums(self, n_timesteps):
+        velocities = np.random.rand(len(self.species), n_timesteps, 3) - 0.5
+        auto_correlations = np.zeros((self.n_species, n_timesteps))
+        cross_correlations = np.zeros((self.n_species, self.n_species, n_timesteps))
+        for i in range(len(self.species)):
+            auto_correlations[self.species[i]] += self._correlate(velocities[i], velocities[i])
+            for j in range(i + 1, len(self.species)):
+                k, l = self.species[i], self.species[j]
+                if k <= l:
+                    cross_correlations[k, l] += self._correlate(velocities[i], velocities[j])
+                else:
+                    cross_correlations[l, k] += self._correlate(velocities[j], velocities[i])
+
+        npt.assert_allclose(trajectory_correlations.auto_correlation_sums(velocities, self.species, self.n_species),
+                            auto_correlations, atol=1e-12)
+        npt.assert_allclose(trajectory_correlations.cross_correlation_sums(velocities, self.species, self.n_species),
+                            cross_correlations, atol=1e-12)
+
+    def test_correlation_sums_match_direct_correlations_for_even_length(self):
+        self._check_correlation_sums(12)
+
+    def test_correlation_sums_match_direct_correlations_for_odd_length(self):
+        self._check_correlation_sums(13)
+
+    def test_correlation_sums_do_not_depend_on_memory_budget(self):
+        velocities = np.random.rand(len(self.species), 20, 3)
+        expected = trajectory_correlations.cross_correlation_sums(velocities, self.species, self.n_species,
+                                                                  memory_budget=None)
+
+        npt.assert_allclose(trajectory_correlations.cross_correlation_sums(velocities, self.species, self.n_species,
+                                                                           memory_budget=1), expected, atol=1e-12)
+
+    def test_velocity_blocks_cover_all_particles(self):
+        configuration = np.random.rand(6, 5, 3)
+        tensors = np.array([np.eye(3)] * 6)
+        expected = trajectory_correlations.calculate_velocities(configuration, tensors)
+
+        blocks = list(trajectory_correlations.velocity_blocks(configuration, tensors, memory_budget=1))
+
+        self.assertEqual([start for start, _ in blocks], [0, 1, 2, 3, 4])
+        npt.assert_allclose(np.concatenate([velocities for _, velocities in blocks]), expected)
+
+    def test_molecule_blocks_do_not_split_molecules(self):
+        molecules_to_atoms = [[0, 1, 2], [3, 4], [5, 6, 7], [8]]
+
+        # A budget smaller than one atom still keeps the atoms of each molecule together
+        blocks = trajectory_correlations.molecule_blocks(molecules_to_atoms, 10, memory_budget=1)
+        self.assertEqual([list(block) for block in blocks], [[0], [1], [2], [3]])
+
+        blocks = trajectory_correlations.molecule_blocks(molecules_to_atoms, 10, memory_budget=None)
+        self.assertEqual([list(block) for block in blocks], [[0, 1, 2, 3]])
+
+    def test_lag_counts(self):
+        npt.assert_equal(trajectory_correlations.lag_counts(5), [3, 4, 5, 4, 3])
+        npt.assert_equal(trajectory_correlations.lag_counts(4), [2, 3, 4, 3])
+
+    def test_pair_counts(self):
+        counts = trajectory_correlations.pair_counts(self.species, self.n_species)
+
+        npt.assert_equal(counts, [[3, 9, 3], [0, 3, 3], [0, 0, 0]])
+
+    def test_velocities_are_unwrapped_and_transformed_to_cartesian_coordinates(self):
+        box = np.diag([2.0, 4.0, 5.0])
+        tensors = np.array([box] * 4)
+        # One particle moving by 0.5 in x per timestep, crossing the periodic boundary
+        configuration = np.array([[[1.0, 1.0, 1.0]], [[1.5, 1.0, 1.0]], [[0.0, 1.0, 1.0]], [[0.5, 1.0, 1.0]]])
+
+        velocities = trajectory_correlations.calculate_velocities(configuration, tensors)
+
+        npt.assert_allclose(velocities, [[[0.5, 0.0, 0.0], [0.5, 0.0, 0.0], [0.0, 0.0, 0.0]]], atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -104,6 +104,43 @@ class FocusTest(systemtesting.MantidSystemTest):
             mantid.mtd.clear()
 
 
+class FocusInProcessesTest(systemtesting.MantidSystemTest):
+
+    focus_results = None
+    existing_config = config['datasearch.directories']
+    tolerance = 1e-11
+    run_numbers = ["98532", "98533"]
+
+    def requiredFiles(self):
+        return _gen_required_files()
+
+    def runTest(self):
+        setup_mantid_paths()
+        # Focus the runs one by one first, the output files are then overwritten by the processes
+        self.focus_results = run_focus(run_number="98532-98533")
+        _load_focused_files(self.run_numbers, "serial_")
+        self.focus_results = run_focus(run_number="98532-98533", focus_processes=2)
+        _load_focused_files(self.run_numbers, "processes_")
+
+    def validate(self):
+        for ws in self.focus_results:
+            self.assertEqual(ws.sample().getMaterial().name(), 'Si')
+        for run_number in self.run_numbers:
+            result, _ = mantid.CompareWorkspaces(Workspace1="processes_" + run_number,
+                                                 Workspace2="serial_" + run_number, Tolerance=self.tolerance)
+            self.assertTrue(result, "Output saved by the processes for run {} differs".format(run_number))
+        # The returned group is the focused last run
+        return self.focus_results.getName(), "ISIS_Powder-POLARIS98533_FocusSempty.nxs"
+
+    def cleanup(self):
+        try:
+            _try_delete(spline_path)
+            _try_delete(output_dir)
+        finally:
+            config['datasearch.directories'] = self.existing_config
+            mantid.mtd.clear()
+
+
 class TotalScatteringTest(systemtesting.MantidSystemTest):
 
     pdf_output = None
@@ -161,8 +198,7 @@ def run_vanadium_calibration():
     return splined_ws, unsplined_ws
 
 
-def run_focus():
-    run_number = 98533
+def run_focus(run_number=98533, **kwargs):
     sample_empty = 98532  # Use the vanadium empty again to make it obvious
     sample_empty_scale = 0.5  # Set it to 50% scale
 
@@ -175,7 +211,15 @@ def run_focus():
     inst_object = setup_inst_object(mode="PDF")
     return inst_object.focus(run_number=run_number, input_mode="Individual", do_van_normalisation=True,
                              do_absorb_corrections=False, sample_empty=sample_empty,
-                             sample_empty_scale=sample_empty_scale)
+                             sample_empty_scale=sample_empty_scale, **kwargs)
+
+
+def _load_focused_files(run_numbers, prefix):
+    inst_object = setup_inst_object(mode="PDF")
+    for run_number in run_numbers:
+        run_details = inst_object._get_run_details(run_number_string=run_number)
+        focus_file_path = inst_object._generate_out_file_paths(run_details)["nxs_filename"]
+        mantid.LoadNexusProcessed(Filename=focus_file_path, OutputWorkspace=prefix + run_number)
 
 
 def setup_mantid_paths():
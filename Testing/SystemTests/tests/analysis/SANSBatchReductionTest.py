@@ -6,6 +6,7 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 # pylint: disable=too-many-public-methods, invalid-name, too-many-arguments
 from __future__ import (absolute_import, division, print_function)
+import time
 import unittest
 import systemtesting
 from mantid.api import AnalysisDataService
@@ -24,9 +25,9 @@ from sans.common.file_information import SANSFileInformationFactory
 # -----------------------------------------------
 class SANSBatchReductionTest(unittest.TestCase):
 
-    def _run_batch_reduction(self, states, use_optimizations=False):
+    def _run_batch_reduction(self, states, use_optimizations=False, number_of_threads=1):
         batch_reduction_alg = SANSBatchReduction()
-        batch_reduction_alg(states, use_optimizations, OutputMode.PublishToADS)
+        batch_reduction_alg(states, use_optimizations, OutputMode.PublishToADS, number_of_threads=number_of_threads)
 
     def _compare_workspace(self, workspace, reference_file_name):
         # Load the reference file
@@ -314,6 +315,65 @@ class SANSBatchReductionTest(unittest.TestCase):
         for element in expected_workspaces:
             AnalysisDataService.remove(element)
 
+    def test_that_parallel_batch_reduction_gives_the_same_results_as_the_sequential_one(self):
+        # Arrange
+        # Two rows which share the transmission and direct runs and an independent multi-period row
+        def _create_state(sample_scatter, can_scatter=None, user_file="MASKSANS2Doptions.091A"):
+            file_information_factory = SANSFileInformationFactory()
+            file_information = file_information_factory.create_sans_file_information(sample_scatter)
+            data_builder = get_data_builder(SANSFacility.ISIS, file_information)
+            data_builder.set_sample_scatter(sample_scatter)
+            if can_scatter:
+                data_builder.set_sample_transmission("SANS2D00034505")
+                data_builder.set_sample_direct("SANS2D00034461")
+                data_builder.set_can_scatter(can_scatter)
+                data_builder.set_can_transmission("SANS2D00034502")
+                data_builder.set_can_direct("SANS2D00034461")
+                data_builder.set_calibration("TUBE_SANS2D_BOTH_31681_25Sept15.nxs")
+            data_info = data_builder.build()
+            user_file_director = StateDirectorISIS(data_info, file_information)
+            user_file_director.set_user_file(user_file)
+            user_file_director.set_reduction_builder_reduction_mode(ISISReductionMode.LAB)
+            user_file_director.set_compatibility_builder_use_compatibility_mode(True)
+            return user_file_director.construct()
+
+        user_file = "USER_SANS2D_154E_2p4_4m_M3_Xpress_8mm_SampleChanger.txt"
+        states = [_create_state("SANS2D00034484", "SANS2D00034481", user_file),
+                  _create_state("SANS2D00034481", "SANS2D00034484", user_file),
+                  _create_state("SANS2D0005512")]
+        expected_workspaces = ["34484rear_1D_1.75_16.5", "34481rear_1D_1.75_16.5"] + \
+                              ["5512p{0}rear_1D_2.0_14.0Phi-45.0_45.0".format(period) for period in range(1, 14)]
+
+        # Act
+        start = time.time()
+        self._run_batch_reduction(states, use_optimizations=False)
+        sequential_time = time.time() - start
+        for element in expected_workspaces:
+            AnalysisDataService.rename(element, element + "_sequential")
+
+        start = time.time()
+        self._run_batch_reduction(states, use_optimizations=False, number_of_threads=2)
+        parallel_time = time.time() - start
+        print("Reduced {0} rows sequentially in {1:.1f} s and in parallel in {2:.1f} s"
+              .format(len(states), sequential_time, parallel_time))
+
+        # Assert
+        for element in expected_workspaces:
+            self.assertTrue(AnalysisDataService.doesExist(element))
+            compare_options = {"Workspace1": element,
+                               "Workspace2": element + "_sequential",
+                               "CheckInstrument": False,
+                               "CheckSample": False}
+            compare_alg = create_unmanaged_algorithm("CompareWorkspaces", **compare_options)
+            compare_alg.setChild(False)
+            compare_alg.execute()
+            self.assertTrue(compare_alg.getProperty("Result").value)
+
+        # Clean up
+        for element in expected_workspaces:
+            AnalysisDataService.remove(element)
+            AnalysisDataService.remove(element + "_sequential")
+
 
 class SANSBatchReductionRunnerTest(systemtesting.MantidSystemTest):
     def __init__(self):
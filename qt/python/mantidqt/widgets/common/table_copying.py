@@ -71,6 +71,17 @@ def copy_bin_values(table, ws_read, num_rows):
     show_successful_copy_toast()
 
 
+def copy_columns(columns):
+    """
+    Copies whole columns to the system's clipboard, with one line per row
+
+    :param columns: The values of each copied column, in the order of the rows
+    """
+    all_string_rows = ["\t".join(map(str, row)) for row in zip(*columns)]
+    copy_to_clipboard("\n".join(all_string_rows))
+    show_successful_copy_toast()
+
+
 def copy_cells(table):
     """
     :type table: QTableView
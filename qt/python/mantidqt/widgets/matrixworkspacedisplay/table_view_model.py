@@ -10,6 +10,9 @@
 #
 from __future__ import (absolute_import, division, print_function)
 
+from collections import OrderedDict
+
+import numpy as np
 from qtpy import QtGui
 from qtpy.QtCore import QVariant, Qt, QAbstractTableModel
 from mantid.py3compat import Enum
@@ -40,6 +43,12 @@ class MatrixWorkspaceTableViewModel(QAbstractTableModel):
     MONITOR_ROW_STRING = "This is a monitor spectrum. "
     MASKED_BIN_STRING = "This bin is masked. "
 
+    # Size of the blocks of cells read from the workspace at once
+    BLOCK_ROWS = 64
+    BLOCK_COLUMNS = 256
+    # Number of blocks kept in memory, the least recently used is dropped first
+    MAX_CACHED_BLOCKS = 64
+
     def __init__(self, ws, model_type):
         """
         :param ws:
@@ -56,9 +65,15 @@ class MatrixWorkspaceTableViewModel(QAbstractTableModel):
         self.row_count = self.ws.getNumberHistograms()
         self.column_count = self.ws.blocksize()
 
-        self.masked_rows_cache = []
-        self.monitor_rows_cache = []
-        self.masked_bins_cache = {}
+        # the cells are read in blocks, to avoid going to the workspace for every cell
+        self.blocks = OrderedDict()
+
+        # whether each row is masked or a monitor, filled in for a whole block of rows when it is first needed
+        self.block_flags_loaded = np.zeros(-(-self.row_count // self.BLOCK_ROWS), dtype=bool)
+        self.masked_rows = np.zeros(self.row_count, dtype=bool)
+        self.monitor_rows = np.zeros(self.row_count, dtype=bool)
+        # the masked bins of the rows that have any
+        self.masked_bins = {}
 
         self.masked_color = QtGui.QColor(240, 240, 240)
 
@@ -144,65 +159,84 @@ class MatrixWorkspaceTableViewModel(QAbstractTableModel):
         row = index.row()
         if role == Qt.DisplayRole:
             # DisplayRole determines the text of each cell
-            return str(self.relevant_data(row)[index.column()])
+            return str(self.get_value(row, index.column()))
         elif role == Qt.BackgroundRole:
             # BackgroundRole determines the background of each cell
+            self.load_row_flags(row)
 
             # Checks if the row is MASKED, if so makes it the specified color for masked
             # The check for masked rows should be first as a monitor row can be masked as well - and we want it to be
             # colored as a masked row, rather than as a monitor row.
-            # First do the check in the cache, and only if not present go through SpectrumInfo and cache it. This logic
-            # is repeated in the other checks below
-            if self.checkMaskedCache(row):
+            if self.masked_rows[row]:
                 return self.masked_color
 
             # Checks if the row is a MONITOR, if so makes it the specified color for monitors
-            elif self.checkMonitorCache(row):
+            elif self.monitor_rows[row]:
                 return self.monitor_color
 
             # Checks if the BIN is MASKED, if so makes it the specified color for masked
-            elif self.checkMaskedBinCache(row, index):
+            elif self.is_masked_bin(row, index.column()):
                 return self.masked_color
 
         elif role == Qt.ToolTipRole:
+            self.load_row_flags(row)
             tooltip = QVariant()
-            if self.checkMaskedCache(row):
-                if self.checkMonitorCache(row):
+            if self.masked_rows[row]:
+                if self.monitor_rows[row]:
                     tooltip = self.MASKED_MONITOR_ROW_STRING
                 else:
                     tooltip = self.MASKED_ROW_STRING
-            elif self.checkMonitorCache(row):
+            elif self.monitor_rows[row]:
                 tooltip = self.MONITOR_ROW_STRING
-                if self.checkMaskedBinCache(row, index):
+                if self.is_masked_bin(row, index.column()):
                     tooltip += self.MASKED_BIN_STRING
-            elif self.checkMaskedBinCache(row, index):
+            elif self.is_masked_bin(row, index.column()):
                 tooltip = self.MASKED_BIN_STRING
             return tooltip
         else:
             return QVariant()
 
-    def checkMaskedCache(self, row):
-        if row in self.masked_rows_cache:
-            return True
-        elif self.ws_spectrum_info.hasDetectors(row) and self.ws_spectrum_info.isMasked(row):
-            self.masked_rows_cache.append(row)
-            return True
-
-    def checkMonitorCache(self, row):
-        if row in self.monitor_rows_cache:
-            return True
-        elif self.ws_spectrum_info.hasDetectors(row) and self.ws_spectrum_info.isMonitor(row):
-            self.monitor_rows_cache.append(row)
-            return True
-
-    def checkMaskedBinCache(self, row, index):
-        if row in self.masked_bins_cache:
-            # retrieve the masked bins IDs from the cache
-            if index.column() in self.masked_bins_cache[row]:
-                return True
-
-        elif self.ws.hasMaskedBins(row):
-            masked_bins = self.ws.maskedBinsIndices(row)
-            if index.column() in masked_bins:
-                self.masked_bins_cache[row] = masked_bins
-                return True
+    def get_value(self, row, column):
+        """
+        :param row: The workspace index
+        :param column: The index in the spectrum
+        :return: The value, read from the cached block of cells containing it
+        """
+        key = (row // self.BLOCK_ROWS, column // self.BLOCK_COLUMNS)
+        block = self.blocks.pop(key, None)
+        if block is None:
+            block = self._read_block(key[0] * self.BLOCK_ROWS, key[1] * self.BLOCK_COLUMNS)
+        # (re)inserting the block marks it as the most recently used
+        self.blocks[key] = block
+        if len(self.blocks) > self.MAX_CACHED_BLOCKS:
+            self.blocks.popitem(last=False)
+        return block[row % self.BLOCK_ROWS, column % self.BLOCK_COLUMNS]
+
+    def _read_block(self, first_row, first_column):
+        last_row = min(first_row + self.BLOCK_ROWS, self.row_count)
+        last_column = first_column + self.BLOCK_COLUMNS
+        # one read per spectrum, and a single copy of the part of the block in the spectrum
+        return np.array([self.relevant_data(row)[first_column:last_column] for row in range(first_row, last_row)])
+
+    def is_masked_bin(self, row, column):
+        masked_bins = self.masked_bins.get(row)
+        return masked_bins is not None and masked_bins[column]
+
+    def load_row_flags(self, row):
+        """
+        Reads which rows are masked or monitors, and which bins are masked,
+        for all the rows in the block containing the row, unless it has been done already
+        """
+        block_index = row // self.BLOCK_ROWS
+        if self.block_flags_loaded[block_index]:
+            return
+        start = block_index * self.BLOCK_ROWS
+        for ws_index in range(start, min(start + self.BLOCK_ROWS, self.row_count)):
+            if self.ws_spectrum_info.hasDetectors(ws_index):
+                self.masked_rows[ws_index] = self.ws_spectrum_info.isMasked(ws_index)
+                self.monitor_rows[ws_index] = self.ws_spectrum_info.isMonitor(ws_index)
+            if self.ws.hasMaskedBins(ws_index):
+                masked_bins = np.zeros(self.column_count, dtype=bool)
+                masked_bins[list(self.ws.maskedBinsIndices(ws_index))] = True
+                self.masked_bins[ws_index] = masked_bins
+        self.block_flags_loaded[block_index] = True
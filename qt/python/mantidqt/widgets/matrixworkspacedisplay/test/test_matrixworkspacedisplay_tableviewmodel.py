@@ -11,8 +11,9 @@ from __future__ import absolute_import, absolute_import, division, division, pri
 
 import unittest
 
+import numpy as np
 import qtpy
-from mock import Mock, call
+from mock import Mock, call, patch
 from qtpy import QtCore
 from qtpy.QtCore import Qt
 
@@ -73,12 +74,52 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
 
     def _check_correct_data_is_displayed(self, model_type, column, mock_data, row):
         ws = MockWorkspace(read_return=mock_data)
+        ws.getNumberHistograms = Mock(return_value=row + 1)
         model = MatrixWorkspaceTableViewModel(ws, model_type)
         index = MockQModelIndex(row, column)
         output = model.data(index, Qt.DisplayRole)
-        model.relevant_data.assert_called_once_with(row)
+        # all the spectra of the block are read at once
+        model.relevant_data.assert_has_calls([call(0), call(1), call(2)])
         self.assertEqual(str(mock_data[column]), output)
 
+        # the second time the cached block is used
+        output = model.data(index, Qt.DisplayRole)
+        self.assertEqual(row + 1, model.relevant_data.call_count)
+        self.assertEqual(str(mock_data[column]), output)
+
+    def test_data_is_read_in_blocks(self):
+        ws = MockWorkspace(read_return=list(range(10)))
+        ws.getNumberHistograms = Mock(return_value=5)
+        model = MatrixWorkspaceTableViewModel(ws, MatrixWorkspaceTableViewModelType.y)
+        with patch.object(model, 'BLOCK_ROWS', 2), patch.object(model, 'BLOCK_COLUMNS', 4):
+            self.assertEqual("5", model.data(MockQModelIndex(3, 5), Qt.DisplayRole))
+            ws.readY.assert_has_calls([call(2), call(3)])
+            self.assertEqual(2, ws.readY.call_count)
+            np.testing.assert_array_equal([[4, 5, 6, 7]] * 2, model.blocks[(1, 1)])
+
+            # cells of the same block are read from the cache
+            self.assertEqual("7", model.data(MockQModelIndex(2, 7), Qt.DisplayRole))
+            self.assertEqual(2, ws.readY.call_count)
+
+            # the last block only contains the last row and the last columns
+            self.assertEqual("9", model.data(MockQModelIndex(4, 9), Qt.DisplayRole))
+            ws.readY.assert_called_with(4)
+            self.assertEqual(3, ws.readY.call_count)
+            np.testing.assert_array_equal([[8, 9]], model.blocks[(2, 2)])
+
+    def test_least_recently_used_block_is_dropped(self):
+        ws = MockWorkspace(read_return=list(range(10)))
+        ws.getNumberHistograms = Mock(return_value=10)
+        model = MatrixWorkspaceTableViewModel(ws, MatrixWorkspaceTableViewModelType.y)
+        with patch.object(model, 'BLOCK_ROWS', 1), patch.object(model, 'MAX_CACHED_BLOCKS', 2):
+            for row in [0, 1, 0, 2]:
+                model.data(MockQModelIndex(row, 0), Qt.DisplayRole)
+            self.assertEqual([(0, 0), (2, 0)], list(model.blocks.keys()))
+            self.assertEqual(3, ws.readY.call_count)
+
+            model.data(MockQModelIndex(1, 0), Qt.DisplayRole)
+            self.assertEqual(4, ws.readY.call_count)
+
     def test_row_and_column_count(self):
         ws = MockWorkspace()
         model_type = MatrixWorkspaceTableViewModelType.x
@@ -87,34 +128,31 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
         ws.getNumberHistograms.assert_called_once_with()
         ws.blocksize.assert_called_once_with()
 
+    def _assert_spectrum_info_read_once_per_row(self, model, num_rows):
+        for method in [model.ws_spectrum_info.hasDetectors, model.ws_spectrum_info.isMasked,
+                       model.ws_spectrum_info.isMonitor, model.ws.hasMaskedBins]:
+            method.assert_has_calls([call(row) for row in range(num_rows)])
+            self.assertEqual(num_rows, method.call_count)
+
     def test_data_background_role_masked_row(self):
         ws, model, row, index = setup_common_for_test_data()
 
         model.ws_spectrum_info.isMasked = Mock(return_value=True)
+        model.ws_spectrum_info.isMonitor = Mock(return_value=False)
 
         output = model.data(index, Qt.BackgroundRole)
 
-        model.ws_spectrum_info.hasDetectors.assert_called_once_with(row)
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-
-        index.row.assert_called_once_with()
-        self.assertFalse(index.column.called)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(model.masked_color, output)
+        self.assertTrue(all(model.masked_rows))
 
-        # Just do it a second time -> This time it's cached and should be read off the cache.
-        # If it is not read off the cache the assert_called_once below will fail,
-        # as the functions would be called a 2nd time
+        # Just do it a second time -> This time the flags of the block have been loaded and no
+        # more calls should be made to the spectrum info
         output = model.data(index, Qt.BackgroundRole)
 
-        model.ws_spectrum_info.hasDetectors.assert_called_once_with(row)
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(model.masked_color, output)
 
-        # assert that the row was called twice with no parameters
-        self.assertEqual(2, index.row.call_count)
-        self.assertFalse(index.column.called)
-
     def test_data_background_role_monitor_row(self):
         ws, model, row, index = setup_common_for_test_data()
 
@@ -122,32 +160,12 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
         model.ws_spectrum_info.isMonitor = Mock(return_value=True)
 
         output = model.data(index, Qt.BackgroundRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_called_with(row)
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
-        index.row.assert_called_once_with()
-        self.assertFalse(index.column.called)
-
         self.assertEqual(model.monitor_color, output)
 
-        # Just do it a second time -> This time it's cached and should be read off the cache.
-        # If it is not read off the cache the assert_called_once below will fail,
-        # as the functions would be called a 2nd time
         output = model.data(index, Qt.BackgroundRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_called_with(row)
-        # assert that it has been called twice with the same parameters
-        model.ws_spectrum_info.isMasked.assert_has_calls([call.do_work(row), call.do_work(row)])
-        # only called once, as the 2nd time should have hit the cached monitor
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(model.monitor_color, output)
 
-        # assert that the row was called twice with no parameters
-        self.assertEqual(2, index.row.call_count)
-        self.assertFalse(index.column.called)
-
     def test_data_background_role_masked_bin(self):
         ws, model, row, index = setup_common_for_test_data()
 
@@ -155,62 +173,41 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
         model.ws_spectrum_info.isMonitor = Mock(return_value=False)
 
         output = model.data(index, Qt.BackgroundRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_called_with(row)
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-        ws.hasMaskedBins.assert_called_once_with(row)
-        ws.maskedBinsIndices.assert_called_once_with(row)
-
-        index.row.assert_called_once_with()
-        index.column.assert_called_once_with()
-
         self.assertEqual(model.masked_color, output)
-        # Just do it a second time -> This time it's cached and should be read off the cache.
-        # If it is not read off the cache the assert_called_once below will fail,
-        # as the functions would be called a 2nd time
-        output = model.data(index, Qt.BackgroundRole)
+        # other bins of the row are not masked
+        self.assertEqual(None, model.data(MockQModelIndex(row, index.column() + 1), Qt.BackgroundRole))
 
-        # masked bins is checked last, so it will call all other functions a second time
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMonitor.assert_has_calls([call.do_work(row), call.do_work(row)])
+        output = model.data(index, Qt.BackgroundRole)
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
+        ws.maskedBinsIndices.assert_has_calls([call(0), call(1), call(2)])
+        self.assertEqual(row + 1, ws.maskedBinsIndices.call_count)
+        self.assertEqual(model.masked_color, output)
 
-        # these, however, should remain at 1 call, as the masked bin cache should have been hit
-        ws.hasMaskedBins.assert_called_once_with(row)
-        ws.maskedBinsIndices.assert_called_once_with(row)
+    def test_data_background_role_row_without_detectors(self):
+        ws, model, row, index = setup_common_for_test_data()
 
-        self.assertEqual(model.masked_color, output)
+        model.ws_spectrum_info.hasDetectors = Mock(return_value=False)
+        model.ws_spectrum_info.isMasked = Mock(return_value=True)
+        model.ws_spectrum_info.isMonitor = Mock(return_value=True)
+        ws.hasMaskedBins = Mock(return_value=False)
 
-        self.assertEqual(2, index.row.call_count)
-        self.assertEqual(2, index.column.call_count)
+        self.assertEqual(None, model.data(index, Qt.BackgroundRole))
+        self.assertFalse(model.ws_spectrum_info.isMasked.called)
+        self.assertFalse(model.ws_spectrum_info.isMonitor.called)
 
     def test_data_tooltip_role_masked_row(self):
         if not qtpy.PYQT5:
             self.skipTest("QVariant cannot be instantiated in QT4, and the test fails with an error.")
         ws, model, row, index = setup_common_for_test_data()
 
-        model.ws_spectrum_info.hasDetectors = Mock(return_value=True)
         model.ws_spectrum_info.isMasked = Mock(return_value=True)
         model.ws_spectrum_info.isMonitor = Mock(return_value=False)
 
         output = model.data(index, Qt.ToolTipRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_ROW_STRING, output)
 
         output = model.data(index, Qt.ToolTipRole)
-
-        # The row was masked so it should have been cached
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-
-        # However it is checked if it is a monitor again
-        self.assertEqual(3, model.ws_spectrum_info.hasDetectors.call_count)
-        self.assertEqual(2, model.ws_spectrum_info.isMonitor.call_count)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_ROW_STRING, output)
 
     def test_data_tooltip_role_masked_monitor_row(self):
@@ -222,19 +219,10 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
         model.ws_spectrum_info.isMonitor = Mock(return_value=True)
 
         output = model.data(index, Qt.ToolTipRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_MONITOR_ROW_STRING, output)
 
-        # Doing the same thing a second time should hit the cache, so no additional calls will have been made
         output = model.data(index, Qt.ToolTipRole)
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_MONITOR_ROW_STRING, output)
 
     def test_data_tooltip_role_monitor_row(self):
@@ -249,20 +237,11 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
         model.ws_spectrum_info.isMonitor = Mock(return_value=True)
 
         output = model.data(index, Qt.ToolTipRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
         self.assertEqual(MatrixWorkspaceTableViewModel.MONITOR_ROW_STRING, output)
 
-        # Doing the same thing a second time should hit the cache, so no additional calls will have been made
         output = model.data(index, Qt.ToolTipRole)
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        self.assertEqual(2, model.ws_spectrum_info.isMasked.call_count)
-        # This was called only once because the monitor was cached
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
+        self.assertFalse(ws.maskedBinsIndices.called)
         self.assertEqual(MatrixWorkspaceTableViewModel.MONITOR_ROW_STRING, output)
 
     def test_data_tooltip_role_masked_bin_in_monitor_row(self):
@@ -273,25 +252,13 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
 
         model.ws_spectrum_info.isMasked = Mock(return_value=False)
         model.ws_spectrum_info.isMonitor = Mock(return_value=True)
-        ws.hasMaskedBins = Mock(return_value=True)
-        ws.maskedBinsIndices = Mock(return_value=[index.column()])
 
         output = model.data(index, Qt.ToolTipRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
         self.assertEqual(
             MatrixWorkspaceTableViewModel.MONITOR_ROW_STRING + MatrixWorkspaceTableViewModel.MASKED_BIN_STRING, output)
 
-        # Doing the same thing a second time should hit the cache, so no additional calls will have been made
         output = model.data(index, Qt.ToolTipRole)
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        self.assertEqual(2, model.ws_spectrum_info.isMasked.call_count)
-        # This was called only once because the monitor was cached
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
         self.assertEqual(
             MatrixWorkspaceTableViewModel.MONITOR_ROW_STRING + MatrixWorkspaceTableViewModel.MASKED_BIN_STRING, output)
 
@@ -303,26 +270,13 @@ class MatrixWorkspaceDisplayTableViewModelTest(unittest.TestCase):
 
         model.ws_spectrum_info.isMasked = Mock(return_value=False)
         model.ws_spectrum_info.isMonitor = Mock(return_value=False)
-        ws.hasMaskedBins = Mock(return_value=True)
-        ws.maskedBinsIndices = Mock(return_value=[index.column()])
 
         output = model.data(index, Qt.ToolTipRole)
-
-        model.ws_spectrum_info.hasDetectors.assert_has_calls([call.do_work(row), call.do_work(row)])
-        model.ws_spectrum_info.isMasked.assert_called_once_with(row)
-        model.ws_spectrum_info.isMonitor.assert_called_once_with(row)
-
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_BIN_STRING, output)
 
-        # Doing the same thing a second time should hit the cache, so no additional calls will have been made
         output = model.data(index, Qt.ToolTipRole)
-        self.assertEqual(4, model.ws_spectrum_info.hasDetectors.call_count)
-        self.assertEqual(2, model.ws_spectrum_info.isMasked.call_count)
-        self.assertEqual(2, model.ws_spectrum_info.isMonitor.call_count)
-        # This was called only once because the monitor was cached
-        ws.hasMaskedBins.assert_called_once_with(row)
-        ws.maskedBinsIndices.assert_called_once_with(row)
-
+        self._assert_spectrum_info_read_once_per_row(model, row + 1)
+        self.assertEqual(row + 1, ws.maskedBinsIndices.call_count)
         self.assertEqual(MatrixWorkspaceTableViewModel.MASKED_BIN_STRING, output)
 
     def test_headerData_not_display_or_tooltip(self):
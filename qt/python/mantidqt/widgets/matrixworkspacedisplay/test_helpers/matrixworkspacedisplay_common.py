@@ -33,6 +33,7 @@ def setup_common_for_test_data():
     model_type = MatrixWorkspaceTableViewModelType.x
     # pass onto the MockWorkspace so that it returns it when read from the TableViewModel
     ws = MockWorkspace(read_return=mock_data)
+    ws.getNumberHistograms = Mock(return_value=row + 1)
     ws.hasMaskedBins = Mock(return_value=True)
     ws.maskedBinsIndices = Mock(return_value=[column])
     model = MatrixWorkspaceTableViewModel(ws, model_type)
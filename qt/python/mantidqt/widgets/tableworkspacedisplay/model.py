@@ -13,6 +13,7 @@ from __future__ import (absolute_import, division, print_function)
 from mantid.dataobjects import PeaksWorkspace, TableWorkspace
 from mantid.kernel import V3D
 from mantidqt.widgets.tableworkspacedisplay.marked_columns import MarkedColumns
+from mantidqt.widgets.tableworkspacedisplay.table_view_model import TableWorkspaceTableViewModel
 
 
 class TableWorkspaceDisplayModel:
@@ -69,6 +70,12 @@ class TableWorkspaceDisplayModel:
     def get_column(self, index):
         return self.ws.column(index)
 
+    def get_cell(self, row, column):
+        return self.ws.cell(row, column)
+
+    def get_item_model(self):
+        return TableWorkspaceTableViewModel(self)
+
     def get_number_of_rows(self):
         return self.ws_num_rows
 
@@ -11,13 +11,10 @@ from __future__ import absolute_import, division, print_function
 
 from functools import partial
 
-from qtpy.QtCore import Qt
-
 from mantid.simpleapi import DeleteTableRows, StatisticsOfTableWorkspace
-from mantidqt.widgets.common.table_copying import copy_cells, show_no_selection_to_copy_toast
+from mantidqt.widgets.common.table_copying import copy_cells, copy_columns, show_no_selection_to_copy_toast
 from mantidqt.widgets.tableworkspacedisplay.error_column import ErrorColumn
 from mantidqt.widgets.tableworkspacedisplay.plot_type import PlotType
-from mantidqt.widgets.tableworkspacedisplay.workbench_table_widget_item import WorkbenchTableWidgetItem
 from .model import TableWorkspaceDisplayModel
 from .view import TableWorkspaceDisplayView
 
@@ -50,12 +47,8 @@ class TableWorkspaceDisplay(object):
         self.plot = plot
         self.view.set_context_menu_actions(self.view)
 
-        self.update_column_headers()
         self.load_data(self.view)
-
-        # connect to cellChanged signal after the data has been loaded
-        # all consecutive triggers will be from user actions
-        self.view.itemChanged.connect(self.handleItemChanged)
+        self.update_column_headers()
 
     @classmethod
     def supports(cls, ws):
@@ -66,22 +59,6 @@ class TableWorkspaceDisplay(object):
         """
         return TableWorkspaceDisplayModel.supports(ws)
 
-    def handleItemChanged(self, item):
-        """
-        :type item: WorkbenchTableWidgetItem
-        :param item:
-        :return:
-        """
-        try:
-            self.model.set_cell_data(item.row(), item.column(), item.data(Qt.DisplayRole), item.is_v3d)
-            item.update()
-        except ValueError:
-            self.view.show_warning("Error: Trying to set invalid data for the column.")
-        except Exception as x:
-            self.view.show_warning("Unknown error occurred: {}".format(x))
-        finally:
-            item.reset()
-
     def update_column_headers(self):
         """
         :param extra_labels: Extra labels to be appended to the column headers.
@@ -91,42 +68,42 @@ class TableWorkspaceDisplay(object):
         """
         # deep copy the original headers so that they are not changed by the appending of the label
         column_headers = self.model.original_column_headers()
-        num_headers = len(column_headers)
-        self.view.setColumnCount(num_headers)
 
         extra_labels = self.model.build_current_labels()
         if len(extra_labels) > 0:
             for index, label in extra_labels:
                 column_headers[index] += str(label)
 
-        self.view.setHorizontalHeaderLabels(column_headers)
+        self.view.model().set_column_headers(column_headers)
 
     def load_data(self, table):
-        num_rows = self.model.get_number_of_rows()
-        table.setRowCount(num_rows)
-
-        num_cols = self.model.get_number_of_columns()
-
-        # the table should be editable if the ws is not PeaksWS
-        editable = not self.model.is_peaks_workspace()
-
-        for col in range(num_cols):
-            column_data = self.model.get_column(col)
-            for row in range(num_rows):
-                item = WorkbenchTableWidgetItem(column_data[row], editable=editable)
-                table.setItem(row, col, item)
+        """
+        Sets up the table with a model that reads the cells from the workspace when they are displayed
+        """
+        table.set_model(self.model.get_item_model())
+        table.model().data_edit_failed.connect(self.view.show_warning)
 
     def action_copy_cells(self):
         copy_cells(self.view)
 
     def action_copy_bin_values(self):
-        copy_cells(self.view)
+        try:
+            selected_columns = self._get_selected_columns()
+        except ValueError:
+            return
+
+        table_model = self.view.model()
+        copy_columns([table_model.get_column(column) for column in selected_columns])
 
     def action_copy_spectrum_values(self):
         copy_cells(self.view)
 
     def action_keypress_copy(self):
-        copy_cells(self.view)
+        selection_model = self.view.selectionModel()
+        if selection_model.hasSelection() and len(selection_model.selectedColumns()) > 0:
+            self.action_copy_bin_values()
+        else:
+            copy_cells(self.view)
 
     def action_delete_row(self):
         selection_model = self.view.selectionModel()
@@ -134,15 +111,14 @@ class TableWorkspaceDisplay(object):
             show_no_selection_to_copy_toast()
             return
 
+        table_model = self.view.model()
+        # the rows of the view may be sorted, delete the matching rows of the workspace
         selected_rows = selection_model.selectedRows()
-        selected_rows_list = [index.row() for index in selected_rows]
+        selected_rows_list = [table_model.ws_row(index.row()) for index in selected_rows]
         selected_rows_str = ",".join([str(row) for row in selected_rows_list])
 
         DeleteTableRows(self.model.ws, selected_rows_str)
-        # Reverse the list so that we delete in order from bottom -> top
-        # this prevents the row index from shifting up when deleting rows above
-        for row in reversed(selected_rows_list):
-            self.view.removeRow(row)
+        table_model.remove_rows(selected_rows_list)
 
     def _get_selected_columns(self, max_selected=None, message_if_over_max=None):
         selection_model = self.view.selectionModel()
@@ -182,7 +158,7 @@ class TableWorkspaceDisplay(object):
             self.view.hideColumn(column_index)
 
     def action_show_all_columns(self):
-        for column_index in range(self.view.columnCount()):
+        for column_index in range(self.view.model().columnCount()):
             self.view.showColumn(column_index)
 
     def _action_set_as(self, add_to_list_func):
@@ -0,0 +1,153 @@
+# coding=utf-8
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantid workbench.
+#
+#
+from __future__ import (absolute_import, division, print_function)
+
+from bisect import bisect_left
+
+from qtpy.QtCore import QAbstractTableModel, QVariant, Qt, Signal
+
+from mantid.kernel import V3D
+
+
+class TableWorkspaceTableViewModel(QAbstractTableModel):
+    """
+    Gives a view access to the cells of a table workspace. The cells are read from
+    the workspace when the view requests them, so no item is created for each cell.
+    Sorting only reorders the rows that the view sees, the workspace is not changed.
+    """
+    INVALID_DATA_MESSAGE = "Error: Trying to set invalid data for the column."
+    UNKNOWN_ERROR_MESSAGE = "Unknown error occurred: {}"
+
+    # emitted with a message for the user when editing a cell fails
+    data_edit_failed = Signal(str)
+
+    def __init__(self, model):
+        """
+        :param model: The TableWorkspaceDisplayModel used to access the workspace
+        :type model: TableWorkspaceDisplayModel
+        """
+        super(TableWorkspaceTableViewModel, self).__init__()
+
+        self.model = model
+        self.row_count = self.model.get_number_of_rows()
+        self.column_count = self.model.get_number_of_columns()
+        self.column_headers = self.model.original_column_headers()
+        # the table should be editable if the ws is not PeaksWS
+        self.editable = not self.model.is_peaks_workspace()
+        # the workspace row shown in each row of the view, None if the rows are not sorted
+        self.row_mapping = None
+
+    def ws_row(self, row):
+        """
+        :param row: The row in the view
+        :return: The row of the workspace displayed in that row of the view
+        """
+        return row if self.row_mapping is None else self.row_mapping[row]
+
+    def set_column_headers(self, column_headers):
+        self.column_headers = column_headers
+        self.headerDataChanged.emit(Qt.Horizontal, 0, self.column_count - 1)
+
+    def get_column(self, column):
+        """
+        :param column: The index of the column
+        :return: All the values of the column, in the order in which the rows are displayed
+        """
+        column_data = self.model.get_column(column)
+        if self.row_mapping is None:
+            return column_data
+        return [column_data[row] for row in self.row_mapping]
+
+    def headerData(self, section, orientation, role=None):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.column_headers[section]
+        return super(TableWorkspaceTableViewModel, self).headerData(section, orientation, role)
+
+    def rowCount(self, parent=None, *args, **kwargs):
+        return self.row_count
+
+    def columnCount(self, parent=None, *args, **kwargs):
+        return self.column_count
+
+    def data(self, index, role=None):
+        if role == Qt.DisplayRole:
+            return str(self.model.get_cell(self.ws_row(index.row()), index.column()))
+        elif role == Qt.EditRole:
+            # keep numbers as numbers so that the editor used matches the type of the column
+            data = self.model.get_cell(self.ws_row(index.row()), index.column())
+            return str(data) if isinstance(data, V3D) else data
+        else:
+            return QVariant()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole:
+            return False
+
+        row = self.ws_row(index.row())
+        column = index.column()
+        try:
+            is_v3d = isinstance(self.model.get_cell(row, column), V3D)
+            self.model.set_cell_data(row, column, value, is_v3d)
+        except ValueError:
+            self.data_edit_failed.emit(self.INVALID_DATA_MESSAGE)
+            return False
+        except Exception as x:
+            self.data_edit_failed.emit(self.UNKNOWN_ERROR_MESSAGE.format(x))
+            return False
+
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index):
+        flags = super(TableWorkspaceTableViewModel, self).flags(index)
+        if self.editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the rows of the view by the values of a column. The values of the column are
+        read once from the workspace and compared in Python, so that numbers and V3Ds are ordered
+        by value. The selection follows the rows to their new position.
+        """
+        self.layoutAboutToBeChanged.emit()
+        column_data = self.model.get_column(column)
+        old_mapping = self.row_mapping
+        self.row_mapping = sorted(range(self.row_count), key=column_data.__getitem__,
+                                  reverse=(order == Qt.DescendingOrder))
+
+        new_view_rows = [0] * self.row_count
+        for view_row, ws_row in enumerate(self.row_mapping):
+            new_view_rows[ws_row] = view_row
+        old_indices = self.persistentIndexList()
+        new_indices = []
+        for old_index in old_indices:
+            ws_row = old_index.row() if old_mapping is None else old_mapping[old_index.row()]
+            new_indices.append(self.index(new_view_rows[ws_row], old_index.column()))
+        self.changePersistentIndexList(old_indices, new_indices)
+        self.layoutChanged.emit()
+
+    def remove_rows(self, ws_rows):
+        """
+        Updates the model after rows have been deleted from the workspace, keeping the order
+        in which the remaining rows are displayed.
+
+        :param ws_rows: The indices of the deleted rows in the workspace
+        """
+        self.beginResetModel()
+        self.row_count -= len(ws_rows)
+        if self.row_mapping is not None:
+            deleted = set(ws_rows)
+            deleted_sorted = sorted(deleted)
+            # every remaining row moves up by the number of deleted rows above it
+            self.row_mapping = [row - bisect_left(deleted_sorted, row) for row in self.row_mapping
+                                if row not in deleted]
+        self.endResetModel()
@@ -0,0 +1,119 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantid workbench.
+#
+#
+from __future__ import (absolute_import, division, print_function)
+
+import unittest
+
+from mock import Mock
+from qtpy.QtCore import Qt
+
+from mantid.kernel import V3D
+from mantidqt.widgets.matrixworkspacedisplay.test_helpers.matrixworkspacedisplay_common import MockQModelIndex
+from mantidqt.widgets.tableworkspacedisplay.table_view_model import TableWorkspaceTableViewModel
+
+
+class MockTableWorkspaceDisplayModel:
+    def __init__(self, columns, is_peaks_workspace=False):
+        self.columns = columns
+        self.get_number_of_rows = Mock(return_value=len(columns[0]))
+        self.get_number_of_columns = Mock(return_value=len(columns))
+        self.original_column_headers = Mock(return_value=["col{}".format(i) for i in range(len(columns))])
+        self.is_peaks_workspace = Mock(return_value=is_peaks_workspace)
+        self.get_column = Mock(side_effect=lambda column: self.columns[column])
+        self.get_cell = Mock(side_effect=lambda row, column: self.columns[column][row])
+        self.set_cell_data = Mock()
+
+
+class TableWorkspaceTableViewModelTest(unittest.TestCase):
+    def test_data_display_role_reads_the_cell(self):
+        model = MockTableWorkspaceDisplayModel([[1, 2, 3], [1.5, 2.5, 3.5]])
+        table_model = TableWorkspaceTableViewModel(model)
+
+        self.assertEqual("2.5", table_model.data(MockQModelIndex(1, 1), Qt.DisplayRole))
+        model.get_cell.assert_called_once_with(1, 1)
+        model.get_column.assert_not_called()
+
+    def test_data_edit_role_keeps_numbers(self):
+        model = MockTableWorkspaceDisplayModel([[12], [1.5], [True], [V3D(1, 2, 3)]])
+        table_model = TableWorkspaceTableViewModel(model)
+
+        self.assertEqual(12, table_model.data(MockQModelIndex(0, 0), Qt.EditRole))
+        self.assertEqual(1.5, table_model.data(MockQModelIndex(0, 1), Qt.EditRole))
+        self.assertEqual(True, table_model.data(MockQModelIndex(0, 2), Qt.EditRole))
+        self.assertEqual(str(V3D(1, 2, 3)), table_model.data(MockQModelIndex(0, 3), Qt.EditRole))
+
+    def test_set_data(self):
+        model = MockTableWorkspaceDisplayModel([[1, 2], [V3D(1, 2, 3), V3D(4, 5, 6)]])
+        table_model = TableWorkspaceTableViewModel(model)
+
+        self.assertTrue(table_model.setData(table_model.index(1, 0), 5, Qt.EditRole))
+        model.set_cell_data.assert_called_once_with(1, 0, 5, False)
+        model.set_cell_data.reset_mock()
+        self.assertTrue(table_model.setData(table_model.index(0, 1), "[7,8,9]", Qt.EditRole))
+        model.set_cell_data.assert_called_once_with(0, 1, "[7,8,9]", True)
+
+    def test_set_invalid_data_reports_error(self):
+        model = MockTableWorkspaceDisplayModel([[1, 2]])
+        model.set_cell_data.side_effect = ValueError()
+        table_model = TableWorkspaceTableViewModel(model)
+        error_handler = Mock()
+        table_model.data_edit_failed.connect(error_handler)
+
+        self.assertFalse(table_model.setData(table_model.index(0, 0), "apples", Qt.EditRole))
+        error_handler.assert_called_once_with(TableWorkspaceTableViewModel.INVALID_DATA_MESSAGE)
+
+    def test_peaks_workspace_is_not_editable(self):
+        table_model = TableWorkspaceTableViewModel(MockTableWorkspaceDisplayModel([[1]], is_peaks_workspace=True))
+        self.assertFalse(table_model.editable)
+        table_model = TableWorkspaceTableViewModel(MockTableWorkspaceDisplayModel([[1]]))
+        self.assertTrue(table_model.editable)
+
+    def test_sort(self):
+        model = MockTableWorkspaceDisplayModel([[3, 1, 2], ["c", "a", "b"]])
+        table_model = TableWorkspaceTableViewModel(model)
+
+        table_model.sort(0, Qt.AscendingOrder)
+        self.assertEqual([1, 2, 0], table_model.row_mapping)
+        self.assertEqual("a", table_model.data(MockQModelIndex(0, 1), Qt.DisplayRole))
+        self.assertEqual(["a", "b", "c"], table_model.get_column(1))
+
+        table_model.sort(1, Qt.DescendingOrder)
+        self.assertEqual([0, 2, 1], table_model.row_mapping)
+        self.assertEqual(0, table_model.ws_row(0))
+
+    def test_sort_v3d(self):
+        model = MockTableWorkspaceDisplayModel([[V3D(3, 0, 0), V3D(1, 0, 0), V3D(2, 0, 0)]])
+        table_model = TableWorkspaceTableViewModel(model)
+
+        table_model.sort(0, Qt.AscendingOrder)
+        self.assertEqual([1, 2, 0], table_model.row_mapping)
+
+    def test_remove_rows_keeps_sorting(self):
+        model = MockTableWorkspaceDisplayModel([[3, 1, 4, 2]])
+        table_model = TableWorkspaceTableViewModel(model)
+        table_model.sort(0, Qt.AscendingOrder)
+        self.assertEqual([1, 3, 0, 2], table_model.row_mapping)
+
+        # workspace rows 1 and 2 hold the values 1 and 4
+        model.columns = [[3, 2]]
+        table_model.remove_rows([1, 2])
+        self.assertEqual(2, table_model.rowCount())
+        self.assertEqual([1, 0], table_model.row_mapping)
+        self.assertEqual([2, 3], table_model.get_column(0))
+
+    def test_headers(self):
+        table_model = TableWorkspaceTableViewModel(MockTableWorkspaceDisplayModel([[1], [2]]))
+        self.assertEqual("col1", table_model.headerData(1, Qt.Horizontal, Qt.DisplayRole))
+        table_model.set_column_headers(["x[X]", "y[Y0]"])
+        self.assertEqual("y[Y0]", table_model.headerData(1, Qt.Horizontal, Qt.DisplayRole))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,7 @@ from qtpy import QtGui
 from qtpy.QtCore import QVariant, Qt
 from qtpy.QtGui import QKeySequence
 from qtpy.QtWidgets import (QAction, QHeaderView, QItemEditorFactory, QMenu, QMessageBox,
-                            QStyledItemDelegate, QTableWidget)
+                            QStyledItemDelegate, QTableView)
 
 import mantidqt.icons
 from mantidqt.widgets.tableworkspacedisplay.plot_type import PlotType
@@ -36,7 +36,7 @@ class PreciseDoubleFactory(QItemEditorFactory):
         return widget
 
 
-class TableWorkspaceDisplayView(QTableWidget):
+class TableWorkspaceDisplayView(QTableView):
     def __init__(self, presenter, parent=None, name=''):
         super(TableWorkspaceDisplayView, self).__init__(parent)
 
@@ -183,6 +183,9 @@ class TableWorkspaceDisplayView(QTableWidget):
 
         menu_main.exec_(self.mapToGlobal(position))
 
+    def set_model(self, model):
+        self.setModel(model)
+
     def make_separator(self, horizontalHeader):
         separator1 = QAction(horizontalHeader)
         separator1.setSeparator(True)
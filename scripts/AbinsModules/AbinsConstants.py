@@ -54,6 +54,9 @@ ALL_INSTRUMENTS = ["TOSCA"]  # supported instruments
 # ALL_SAMPLE_FORMS = ["SingleCrystal", "Powder"]  # valid forms of samples
 ALL_SAMPLE_FORMS = ["Powder"]  # valid forms of samples
 
+# engines which can be used to evaluate S: atom by atom or all atoms at once
+ALL_S_ENGINES = ["PerAtom", "AllAtoms"]
+
 # keywords which define data structure of KpointsData
 ALL_KEYWORDS_K_DATA = ["weights", "k_vectors", "frequencies", "atomic_displacements", "unit_cell"]
 
@@ -143,6 +146,7 @@ FIRST_BIN_INDEX = 1
 
 GAMMA_POINT = "0"
 BUF = 65536
+MEGABYTE = 1024 * 1024  # number of bytes in one megabyte
 
 CRYSTAL = False
 
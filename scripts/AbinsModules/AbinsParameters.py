@@ -62,4 +62,7 @@ optimal_size = 5000000  # this is used to create optimal size of chunk energies
 # Actual chunk of energies < optimal_size
 
 threads = 3  # number of threads used in parallel calculations
+
+# maximum size in MB of data cached in one hdf file; the least recently used data is removed first
+max_cache_size = 1000.0
 # Abins internal parameters end ###########################
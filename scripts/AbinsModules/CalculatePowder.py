@@ -20,10 +20,11 @@ class CalculatePowder(object):
     """
     Class for calculating powder data.
     """
-    def __init__(self, filename=None, abins_data=None):
+    def __init__(self, filename=None, abins_data=None, pool=None):
         """
         :param filename:  name of input DFT filename
         :param abins_data: object of type AbinsData with data from input DFT file
+        :param pool: pool of processes to use; if not given a new pool is created if pathos is available
         """
         if not isinstance(abins_data, AbinsModules.AbinsData):
             raise ValueError("Object of AbinsData was expected.")
@@ -36,7 +37,17 @@ class CalculatePowder(object):
         self._atoms_data = abins_data.get_atoms_data().extract()
 
         self._clerk = AbinsModules.IOmodule(input_filename=filename,
-                                            group_name=AbinsModules.AbinsParameters.powder_data_group)
+                                            group_name=AbinsModules.AbinsParameters.powder_data_group,
+                                            stage_parameters={})
+        self._pool = pool
+
+    def __getstate__(self):
+        """
+        Pool of processes is not sent to worker processes.
+        """
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
 
     def _calculate_powder(self):
         """
@@ -49,7 +60,9 @@ class CalculatePowder(object):
         b_tensors = {}
         a_tensors = {}
 
-        if PATHOS_FOUND:
+        if self._pool is not None:
+            tensors = self._pool.map(self._calculate_powder_k, k_indices)
+        elif PATHOS_FOUND:
             threads = AbinsModules.AbinsParameters.threads
             p_local = ProcessPool(nodes=threads)
             tensors = p_local.map(self._calculate_powder_k, k_indices)
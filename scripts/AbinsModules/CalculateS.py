@@ -18,7 +18,7 @@ class CalculateS(object):
 
     @staticmethod
     def init(filename=None, temperature=None, sample_form=None, abins_data=None, instrument=None,
-             quantum_order_num=None, bin_width=1.0):
+             quantum_order_num=None, bin_width=1.0, engine="PerAtom"):
         """
         :param filename: name of input DFT file (CASTEP: foo.phonon)
         :param temperature: temperature in K for which calculation of S should be done
@@ -27,6 +27,7 @@ class CalculateS(object):
         :param instrument: object of type Instrument for which simulation should be performed
         :param quantum_order_num: number of quantum order events taken into account during the simulation
         :param bin_width: width of bins in wavenumber
+        :param engine: engine used to evaluate S (one of AbinsConstants.ALL_S_ENGINES)
         """
         if sample_form in AbinsModules.AbinsConstants.ALL_SAMPLE_FORMS:
             if sample_form == "Powder":
@@ -34,7 +35,7 @@ class CalculateS(object):
                 return AbinsModules.SPowderSemiEmpiricalCalculator(filename=filename, temperature=temperature,
                                                                    abins_data=abins_data, instrument=instrument,
                                                                    quantum_order_num=quantum_order_num,
-                                                                   bin_width=bin_width)
+                                                                   bin_width=bin_width, engine=engine)
                 # TODO: implement numerical powder averaging
 
             # elif sample == "SingleCrystal":  #TODO implement single crystal scenario
@@ -32,6 +32,67 @@ class FrequencyPowderGenerator(object):
         :returns: array with frequencies for the required quantum number event, array which stores coefficients for all
                  frequencies
         """
+        self._check_freq_combinations_input(previous_array=previous_array,
+                                            previous_coefficients=previous_coefficients,
+                                            fundamentals_array=fundamentals_array,
+                                            fundamentals_coefficients=fundamentals_coefficients,
+                                            quantum_order=quantum_order)
+
+        # frequencies for fundamentals
+        if quantum_order == AbinsModules.AbinsConstants.FUNDAMENTALS:
+            return fundamentals_array, np.arange(start=0,
+                                                 step=1,
+                                                 stop=fundamentals_array.size,
+                                                 dtype=AbinsModules.AbinsConstants.INT_TYPE)
+
+        # higher order quantum events.
+        else:
+            return self._construct_freq_combinations_block(
+                previous_array=previous_array, previous_coefficients=previous_coefficients,
+                fundamentals_array=fundamentals_array, fundamentals_coefficients=fundamentals_coefficients,
+                quantum_order=quantum_order, start=0, stop=previous_array.size)
+
+    def construct_freq_combinations_in_blocks(self, previous_array=None, previous_coefficients=None,
+                                              fundamentals_array=None, fundamentals_coefficients=None,
+                                              quantum_order=None, max_block_size=None):
+        """
+        Generates frequencies for the given order of quantum event block by block. Concatenated blocks are the same as
+        the output of construct_freq_combinations but at most one block is kept in memory at the time.
+
+        :param previous_array: array with frequencies for the previous quantum event
+        :param previous_coefficients: coefficients which correspond to the previous order quantum event
+        :param fundamentals_array: array with frequencies for fundamentals
+        :param fundamentals_coefficients: coefficients for fundamentals
+        :param quantum_order: number of quantum order event (higher than fundamentals) for which new array should be
+                              constructed
+        :param max_block_size: maximum number of combinations in one block; by default AbinsParameters.optimal_size
+        :returns: generator which yields arrays with frequencies and coefficients for consecutive blocks
+        """
+        self._check_freq_combinations_input(previous_array=previous_array,
+                                            previous_coefficients=previous_coefficients,
+                                            fundamentals_array=fundamentals_array,
+                                            fundamentals_coefficients=fundamentals_coefficients,
+                                            quantum_order=quantum_order)
+
+        if quantum_order == AbinsModules.AbinsConstants.FUNDAMENTALS:
+            raise ValueError("Frequencies for fundamentals cannot be generated block by block.")
+
+        if max_block_size is None:
+            max_block_size = AbinsModules.AbinsParameters.optimal_size
+
+        # each transition from the previous quantum order event is combined with all fundamentals
+        block_size = max(1, max_block_size // max(fundamentals_array.size, 1))
+        for start in range(0, previous_array.size, block_size):
+            yield self._construct_freq_combinations_block(
+                previous_array=previous_array, previous_coefficients=previous_coefficients,
+                fundamentals_array=fundamentals_array, fundamentals_coefficients=fundamentals_coefficients,
+                quantum_order=quantum_order, start=start, stop=min(start + block_size, previous_array.size))
+
+    def _check_freq_combinations_input(self, previous_array=None, previous_coefficients=None,
+                                       fundamentals_array=None, fundamentals_coefficients=None, quantum_order=None):
+        """
+        Checks input for construct_freq_combinations and construct_freq_combinations_in_blocks.
+        """
         if not (isinstance(fundamentals_array, np.ndarray) and
                 len(fundamentals_array.shape) == 1 and
                 fundamentals_array.dtype.num == AbinsModules.AbinsConstants.FLOAT_ID):
@@ -52,15 +113,7 @@ class FrequencyPowderGenerator(object):
                 AbinsModules.AbinsConstants.HIGHER_ORDER_QUANTUM_EVENTS + AbinsModules.AbinsConstants.FUNDAMENTALS):
             raise ValueError("Improper value of quantum order event (quantum_order = %s)" % quantum_order)
 
-        # frequencies for fundamentals
-        if quantum_order == AbinsModules.AbinsConstants.FUNDAMENTALS:
-            return fundamentals_array, np.arange(start=0,
-                                                 step=1,
-                                                 stop=fundamentals_array.size,
-                                                 dtype=AbinsModules.AbinsConstants.INT_TYPE)
-
-        # higher order quantum events.
-        else:
+        if quantum_order > AbinsModules.AbinsConstants.FUNDAMENTALS:
 
             if not (isinstance(previous_array, np.ndarray) and
                     len(previous_array.shape) == 1 and
@@ -73,40 +126,57 @@ class FrequencyPowderGenerator(object):
                 raise ValueError("Numpy array is expected. (%s)" % previous_coefficients, type(previous_coefficients),
                                  previous_coefficients.dtype)
 
-            # generate indices
-            fundamentals_size = fundamentals_array.size
-            previous_size = previous_array.size
-            prev_indices = np.arange(start=0, step=1, stop=previous_size, dtype=AbinsModules.AbinsConstants.INT_TYPE)
-
-            # indices in fundamentals array. Not necessarily the same as fundamentals_coefficients!!!
-            # This will be the same in case full array with transitions is processed
-            # but in case array of transitions is huge and we proceed chunk by chunk then
-            # fundamentals_ind differ from fundamentals_coefficients
-            fundamentals_ind = np.arange(start=0, step=1, stop=fundamentals_size,
-                                         dtype=AbinsModules.AbinsConstants.INT_TYPE)
-
-            n = fundamentals_size * previous_size
-            num_of_arrays = 2
-            ind = np.zeros(shape=(n, num_of_arrays), dtype=AbinsModules.AbinsConstants.INT_TYPE)
-            ind[:, 0] = np.repeat(prev_indices, fundamentals_size)
-            ind[:, 1] = np.tile(fundamentals_ind, previous_size)
-
-            # calculate energies for quantum order event
-            energies = np.take(a=previous_array, indices=ind[:, 0]) + np.take(a=fundamentals_array, indices=ind[:, 1])
-
-            # calculate coefficients which allow to express those energies in terms of fundamentals
-            coeff = np.zeros(shape=(quantum_order, energies.size), dtype=AbinsModules.AbinsConstants.INT_TYPE)
-
-            if previous_coefficients.ndim == 1:
-                previous_coefficients_dim = 1
-            else:
-                previous_coefficients_dim = previous_coefficients.shape[-1]
+    def _construct_freq_combinations_block(self, previous_array=None, previous_coefficients=None,
+                                           fundamentals_array=None, fundamentals_coefficients=None,
+                                           quantum_order=None, start=None, stop=None):
+        """
+        Generates frequencies for the given order of quantum event for transitions from the previous quantum order
+        event with indices from start (inclusive) to stop (exclusive).
 
-            coeff[:previous_coefficients_dim] = np.take(a=previous_coefficients, indices=ind[:, 0])
-            coeff[previous_coefficients_dim] = np.take(a=fundamentals_coefficients, indices=ind[:, 1])
-            coeff = coeff.T
+        :param previous_array: array with frequencies for the previous quantum event
+        :param previous_coefficients: coefficients which correspond to the previous order quantum event
+        :param fundamentals_array: array with frequencies for fundamentals
+        :param fundamentals_coefficients: coefficients for fundamentals
+        :param quantum_order: number of quantum order event for which new array should be constructed
+        :param start: index of the first transition from the previous quantum order event
+        :param stop: index of the transition from the previous quantum order event after the last one in the block
+        :returns: array with frequencies for the required quantum number event, array which stores coefficients for all
+                 frequencies
+        """
+        # generate indices
+        fundamentals_size = fundamentals_array.size
+        prev_indices = np.arange(start=start, step=1, stop=stop, dtype=AbinsModules.AbinsConstants.INT_TYPE)
+
+        # indices in fundamentals array. Not necessarily the same as fundamentals_coefficients!!!
+        # This will be the same in case full array with transitions is processed
+        # but in case array of transitions is huge and we proceed chunk by chunk then
+        # fundamentals_ind differ from fundamentals_coefficients
+        fundamentals_ind = np.arange(start=0, step=1, stop=fundamentals_size,
+                                     dtype=AbinsModules.AbinsConstants.INT_TYPE)
+
+        n = fundamentals_size * prev_indices.size
+        num_of_arrays = 2
+        ind = np.zeros(shape=(n, num_of_arrays), dtype=AbinsModules.AbinsConstants.INT_TYPE)
+        ind[:, 0] = np.repeat(prev_indices, fundamentals_size)
+        ind[:, 1] = np.tile(fundamentals_ind, prev_indices.size)
+
+        # calculate energies for quantum order event
+        energies = np.take(a=previous_array, indices=ind[:, 0]) + np.take(a=fundamentals_array, indices=ind[:, 1])
+
+        # extract energies within valid energy window before coefficients are constructed
+        valid_indices = energies < AbinsModules.AbinsParameters.max_wavenumber
+        energies = energies[valid_indices]
+        ind = ind[valid_indices]
+
+        # calculate coefficients which allow to express those energies in terms of fundamentals
+        coeff = np.zeros(shape=(energies.size, quantum_order), dtype=AbinsModules.AbinsConstants.INT_TYPE)
+
+        if previous_coefficients.ndim == 1:
+            previous_coefficients_dim = 1
+        else:
+            previous_coefficients_dim = previous_coefficients.shape[-1]
 
-            # extract energies within valid energy window
-            valid_indices = energies < AbinsModules.AbinsParameters.max_wavenumber
+        coeff[:, :previous_coefficients_dim] = np.take(a=previous_coefficients, indices=ind[:, 0])[:, np.newaxis]
+        coeff[:, previous_coefficients_dim] = np.take(a=fundamentals_coefficients, indices=ind[:, 1])
 
-            return energies[valid_indices], coeff[valid_indices]
+        return energies, coeff
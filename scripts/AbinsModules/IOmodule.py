@@ -14,6 +14,7 @@ import hashlib
 import io
 import AbinsModules
 import os
+import time
 from mantid.kernel import logger, ConfigService
 
 
@@ -21,9 +22,15 @@ from mantid.kernel import logger, ConfigService
 class IOmodule(object):
     """
     Class for Abins I/O HDF file operations.
+
+    If stage_parameters are given the group works as an entry of a content-addressed cache: its name is extended
+    with a key calculated from the hash of the ab initio file, the name of the group and the parameters on which the
+    stored data depend. Entries of the cache are removed in the least recently used order once their total size
+    exceeds AbinsParameters.max_cache_size.
     """
-    def __init__(self, input_filename=None, group_name=None):
+    def __init__(self, input_filename=None, group_name=None, stage_parameters=None):
 
+        self._hash_input_filename = ""
         if isinstance(input_filename, str):
 
             self._input_filename = input_filename
@@ -52,12 +59,22 @@ class IOmodule(object):
         save_dir_path = ConfigService.getString("defaultsave.directory")
         self._hdf_filename = os.path.join(save_dir_path, core_name + ".hdf5")  # name of hdf file
 
-        try:
-            self._advanced_parameters = self._get_advanced_parameters()
-        except IOError as err:
-            logger.error(str(err))
-        except ValueError as err:
-            logger.error(str(err))
+        if stage_parameters is None:
+            try:
+                self._advanced_parameters = self._get_advanced_parameters()
+            except IOError as err:
+                logger.error(str(err))
+            except ValueError as err:
+                logger.error(str(err))
+            self._cached = False
+        elif isinstance(stage_parameters, dict):
+            self._advanced_parameters = self._get_stage_key(stage_parameters=stage_parameters)
+            self._group_name = self._group_name + "/" + self._advanced_parameters
+            self._cached = True
+        else:
+            raise ValueError("Invalid parameters of the stage. Dictionary was expected.")
+
+        self._removed_data = False  # whether some data in the hdf file were overwritten or removed
 
         self._attributes = {}  # attributes for group
 
@@ -103,6 +120,9 @@ class IOmodule(object):
         if not self._valid_advanced_parameters():
             raise ValueError("Different advanced parameters were used in the previous calculations.")
 
+        if self._cached:
+            self._mark_as_used()
+
     def erase_hdf_file(self):
         """
         Erases content of hdf file.
@@ -126,6 +146,8 @@ class IOmodule(object):
         self.add_attribute("hash", self._hash_input_filename)
         self.add_attribute("filename", self._input_filename)
         self.add_attribute("advanced_parameters", self._advanced_parameters)
+        if self._cached:
+            self.add_attribute("last_used", time.time())
 
     def add_data(self, name=None, value=None):
         """
@@ -163,10 +185,12 @@ class IOmodule(object):
             if isinstance(item, (np.int64, int, np.float64, float, str, bytes)):
                 if folder in hdf_file:
                     del hdf_file[folder]
+                    self._removed_data = True
                 hdf_file[folder] = item
             elif isinstance(item, np.ndarray):
                 if folder in hdf_file:
                     del hdf_file[folder]
+                    self._removed_data = True
                 hdf_file.create_dataset(name=folder, data=item, compression="gzip", compression_opts=9)
             elif isinstance(item, dict):
                 self._recursively_save_structured_data_to_group(hdf_file=hdf_file, path=folder + '/', dic=item)
@@ -187,6 +211,7 @@ class IOmodule(object):
             if isinstance(self._data[item], np.ndarray):
                 if item in group:
                     del group[item]
+                    self._removed_data = True
                 group.create_dataset(name=item, data=self._data[item], compression="gzip", compression_opts=9)
             # case data to save has form of list
             elif isinstance(self._data[item], list):
@@ -218,21 +243,73 @@ class IOmodule(object):
             if len(self._data.keys()) > 0:
                 self._save_data(hdf_file=hdf_file, group=group)
 
+            if self._cached:
+                self._remove_least_recently_used(hdf_file=hdf_file)
+
         # Repack if possible to reclaim disk space
+        if self._removed_data:
+            self._repack()
+
+    def _repack(self):
+        """
+        Repacks an hdf file in order to reclaim disk space left after removed or overwritten data.
+        """
         try:
-            path = os.getcwd()
-            temp_file = self._hdf_filename[self._hdf_filename.find(".")] + "temphgfrt.hdf5"
+            temp_file = os.path.splitext(self._hdf_filename)[0] + "temphgfrt.hdf5"
+            subprocess.check_call(["h5repack", "-i", self._hdf_filename, "-o", temp_file])
+            shutil.move(temp_file, self._hdf_filename)
+            self._removed_data = False
+        except (OSError, IOError, RuntimeError, subprocess.CalledProcessError):
+            pass  # repacking failed: no h5repack installed in the system... but we proceed
 
-            subprocess.check_call(["h5repack" + " -i " + os.path.join(path, self._hdf_filename) +
-                                   " -o " + os.path.join(path, temp_file)])
+    def _mark_as_used(self):
+        """
+        Updates time of the last usage of the cached group.
+        """
+        with h5py.File(self._hdf_filename, 'a') as hdf_file:
+            hdf_file[self._group_name].attrs["last_used"] = time.time()
 
-            shutil.move(os.path.join(path, temp_file), os.path.join(path, self._hdf_filename))
-        except OSError:
-            pass  # repacking failed: no h5repack installed in the system... but we proceed
-        except IOError:
-            pass
-        except RuntimeError:
-            pass
+    # noinspection PyMethodMayBeStatic
+    def _get_storage_size(self, group=None):
+        """
+        Calculates disk space occupied by all datasets in the group.
+        :param group: group in hdf file
+        :returns: size in bytes
+        """
+        sizes = []
+
+        def _add_size(_, item):
+            if isinstance(item, h5py.Dataset):
+                sizes.append(item.id.get_storage_size())
+
+        group.visititems(_add_size)
+        return sum(sizes)
+
+    def _remove_least_recently_used(self, hdf_file=None):
+        """
+        Removes the least recently used groups from the cache until the total size of the cached data is not larger
+        than AbinsParameters.max_cache_size. The group of this IOmodule is never removed.
+        :param hdf_file: hdf file object
+        """
+        entries = []
+
+        def _add_entry(name, item):
+            if isinstance(item, h5py.Group) and "last_used" in item.attrs:
+                entries.append((item.attrs["last_used"], name, self._get_storage_size(group=item)))
+
+        hdf_file.visititems(_add_entry)
+
+        max_size = AbinsModules.AbinsParameters.max_cache_size * AbinsModules.AbinsConstants.MEGABYTE
+        total_size = sum([entry[2] for entry in entries])
+        for _, name, size in sorted(entries):
+            if total_size <= max_size:
+                break
+            if name == self._group_name:
+                continue
+            logger.notice("Cached data %s is removed from %s." % (name, self._hdf_filename))
+            del hdf_file[name]
+            total_size -= size
+            self._removed_data = True
 
     # noinspection PyMethodMayBeStatic
     def _list_of_str(self, list_str=None):
@@ -459,6 +536,20 @@ class IOmodule(object):
         h = self._calculate_hash(filename=AbinsModules.AbinsParameters.__file__.replace(".pyc", ".py"))
         return h
 
+    def _get_stage_key(self, stage_parameters=None):
+        """
+        Calculates key of the cached group.
+        :param stage_parameters: dictionary with parameters on which data stored in the group depend
+        :returns: string representation of hash which contains only hexadecimal digits
+        """
+        hash_calculator = hashlib.sha512()
+        hash_calculator.update(self._hash_input_filename.encode('utf-8'))
+        hash_calculator.update(self._group_name.encode('utf-8'))
+        for name in sorted(stage_parameters.keys()):
+            hash_calculator.update(("%s=%r;" % (name, stage_parameters[name])).encode('utf-8'))
+
+        return hash_calculator.hexdigest()
+
     def get_input_filename(self):
         return self._input_filename
 
@@ -7,6 +7,9 @@
 from __future__ import (absolute_import, division, print_function)
 import AbinsModules
 import gc
+import os
+import shutil
+import tempfile
 try:
     # noinspection PyUnresolvedReferences
     from pathos.multiprocessing import ProcessingPool
@@ -41,7 +44,7 @@ class SPowderSemiEmpiricalCalculator(object):
     """
 
     def __init__(self, filename=None, temperature=None, abins_data=None, instrument=None, quantum_order_num=None,
-                 bin_width=1.0):
+                 bin_width=1.0, engine="PerAtom"):
         """
         :param filename: name of input DFT file (CASTEP: foo.phonon)
         :param temperature: temperature in K for which calculation of S should be done
@@ -50,6 +53,7 @@ class SPowderSemiEmpiricalCalculator(object):
         :param instrument: name of instrument (str)
         :param quantum_order_num: number of quantum order events taken into account during the simulation
         :param bin_width: bin width used in rebining in wavenumber
+        :param engine: engine used to evaluate S: "PerAtom" (atom by atom) or "AllAtoms" (all atoms at once)
         """
         if not isinstance(temperature, (int, float)):
             raise ValueError("Invalid value of the temperature. Number was expected.")
@@ -83,6 +87,11 @@ class SPowderSemiEmpiricalCalculator(object):
         else:
             raise ValueError("Unknown instrument %s" % instrument)
 
+        if engine in AbinsModules.AbinsConstants.ALL_S_ENGINES:
+            self._engine = engine
+        else:
+            raise ValueError("Unknown engine for calculation of S: %s" % engine)
+
         if isinstance(filename, str):
             if filename.strip() == "":
                 raise ValueError("Name of the file cannot be an empty string!")
@@ -95,7 +104,8 @@ class SPowderSemiEmpiricalCalculator(object):
         self._clerk = AbinsModules.IOmodule(
             input_filename=filename,
             group_name=(AbinsModules.AbinsParameters.s_data_group + "/%s" % self._instrument + "/" +
-                        self._sample_form + "/%sK" % self._temperature))
+                        self._sample_form + "/%sK" % self._temperature),
+            stage_parameters=self._get_stage_parameters(bin_width=bin_width))
 
         self._freq_generator = AbinsModules.FrequencyPowderGenerator()
 
@@ -104,6 +114,12 @@ class SPowderSemiEmpiricalCalculator(object):
                                  AbinsModules.AbinsConstants.QUANTUM_ORDER_THREE: self._calculate_order_three,
                                  AbinsModules.AbinsConstants.QUANTUM_ORDER_FOUR: self._calculate_order_four}
 
+        self._calculate_order_all_atoms = {
+            AbinsModules.AbinsConstants.QUANTUM_ORDER_ONE: self._calculate_order_one_all_atoms,
+            AbinsModules.AbinsConstants.QUANTUM_ORDER_TWO: self._calculate_order_two_all_atoms,
+            AbinsModules.AbinsConstants.QUANTUM_ORDER_THREE: self._calculate_order_three_all_atoms,
+            AbinsModules.AbinsConstants.QUANTUM_ORDER_FOUR: self._calculate_order_four_all_atoms}
+
         step = bin_width
         self._bin_width = bin_width
         start = AbinsModules.AbinsParameters.min_wavenumber + step
@@ -121,30 +137,103 @@ class SPowderSemiEmpiricalCalculator(object):
         self._total_s_correction_num_attempt = 0
 
         self._powder_atoms_data = None
+        self._a_tensors = None
+        self._b_tensors = None
         self._a_traces = None
         self._b_traces = None
         self._atoms_data = None
         self._fundamentals_freq = None
 
+        # pool of processes used for the whole calculation and directory with tensors shared with the processes
+        self._pool = None
+        self._shared_dir = None
+
+    def __getstate__(self):
+        """
+        Prepares the state which is sent to worker processes. The pool is not sent at all and tensors which are stored
+        in memory-mapped files are sent as names of these files.
+        """
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        for name in ["_a_tensors", "_b_tensors"]:
+            if isinstance(state[name], np.memmap):
+                state[name] = state[name].filename
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the state in a worker process. Tensors are mapped from the files created by the parent process.
+        """
+        for name in ["_a_tensors", "_b_tensors"]:
+            if isinstance(state[name], str):
+                state[name] = np.load(state[name], mmap_mode="r")
+        self.__dict__.update(state)
+
     def _calculate_s(self):
 
-        # calculate powder data
-        powder_calculator = AbinsModules.CalculatePowder(filename=self._input_filename, abins_data=self._abins_data)
-        powder_calculator.get_formatted_data()
+        self._open_pool()
+        try:
+
+            # calculate powder data
+            powder_calculator = AbinsModules.CalculatePowder(filename=self._input_filename,
+                                                             abins_data=self._abins_data, pool=self._pool)
+            powder_calculator.get_formatted_data()
 
-        # free memory
-        self._abins_data = None
-        gc.collect()
+            # free memory
+            self._abins_data = None
+            gc.collect()
 
-        # calculate S
-        calculate_s_powder = None
-        if self._instrument.get_name() in AbinsModules.AbinsConstants.ONE_DIMENSIONAL_INSTRUMENTS:
-            calculate_s_powder = self._calculate_s_powder_1d
+            # calculate S
+            calculate_s_powder = None
+            if self._instrument.get_name() in AbinsModules.AbinsConstants.ONE_DIMENSIONAL_INSTRUMENTS:
+                calculate_s_powder = self._calculate_s_powder_1d
 
-        s_data = calculate_s_powder()
+            s_data = calculate_s_powder()
+
+        finally:
+            self._close_pool()
 
         return s_data
 
+    def _open_pool(self):
+        """
+        Creates pool of processes which is used for the whole calculation of S. Tensors which are used by all
+        processes are shared through memory-mapped files instead of being sent to each process.
+        """
+        if PATHOS_FOUND:
+            self._pool = ProcessingPool(nodes=AbinsModules.AbinsParameters.threads)
+            self._shared_dir = tempfile.mkdtemp(prefix="abins_")
+
+    def _close_pool(self):
+        """
+        Terminates pool of processes and removes files with shared tensors.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool.clear()
+            self._pool = None
+
+        if self._shared_dir is not None:
+            # memory-mapped files have to be closed before they can be removed
+            self._a_tensors = None
+            self._b_tensors = None
+            gc.collect()
+            shutil.rmtree(self._shared_dir, ignore_errors=True)
+            self._shared_dir = None
+
+    def _share_tensors(self, k_point=None):
+        """
+        Stores tensors for the given k-point in memory-mapped files so that they can be used by all processes from the
+        pool without copying.
+        :param k_point: index of k-point
+        """
+        for name in ["_a_tensors", "_b_tensors"]:
+            filename = os.path.join(self._shared_dir, "%s_%s.npy" % (name.strip("_"), k_point))
+            if not os.path.exists(filename):
+                np.save(filename, getattr(self, name))
+            setattr(self, name, np.load(filename, mmap_mode="r"))
+
     def _calculate_s_over_threshold(self, s=None, freq=None, coeff=None, atom=None, order=None):
         """
         Discards frequencies for small S.
@@ -155,6 +244,18 @@ class SPowderSemiEmpiricalCalculator(object):
         :param order: order of quantum event
         :returns: large enough s, and corresponding freq, coeff and also if calculation is stable
         """
+        indices = self._find_s_over_threshold(s=s, atom=atom, order=order)
+
+        return freq[indices], coeff[indices]
+
+    def _find_s_over_threshold(self, s=None, atom=None, order=None):
+        """
+        Finds transitions with large enough S.
+        :param s: numpy array with S for the given order quantum event and atom
+        :param atom: number of atom
+        :param order: order of quantum event
+        :returns: boolean numpy array which marks transitions which should be kept
+        """
         s_max = np.max(a=s)
         threshold = max(s_max * self._s_current_threshold[atom], AbinsModules.AbinsParameters.s_absolute_threshold)
         small_s = AbinsModules.AbinsConstants.SMALL_S
@@ -179,17 +280,10 @@ class SPowderSemiEmpiricalCalculator(object):
         indices = s > threshold
         # indices are guaranteed to be a numpy array (but can be an empty numpy array)
         # noinspection PyUnresolvedReferences
-        if indices.any():
-
-            freq = freq[indices]
-            coeff = coeff[indices]
-
-        else:
+        if not indices.any():
+            indices[:AbinsModules.AbinsConstants.MIN_SIZE] = True
 
-            freq = freq[:AbinsModules.AbinsConstants.MIN_SIZE]
-            coeff = coeff[:AbinsModules.AbinsConstants.MIN_SIZE]
-
-        return freq, coeff
+        return indices
 
     def _check_tot_s(self, tot_s=None):
         """
@@ -324,9 +418,10 @@ class SPowderSemiEmpiricalCalculator(object):
         atoms = range(self._num_atoms)
         self._prepare_data(k_point=q_indx)
 
-        if PATHOS_FOUND:
-            p_local = ProcessingPool(nodes=AbinsModules.AbinsParameters.threads)
-            result = p_local.map(self._calculate_s_powder_one_atom, atoms)
+        if self._engine == "AllAtoms":
+            result = self._calculate_s_powder_all_atoms(atoms=list(atoms))
+        elif self._pool is not None:
+            result = self._pool.map(self._calculate_s_powder_one_atom, atoms)
         else:
             result = [self._calculate_s_powder_one_atom(atom=atom) for atom in atoms]
 
@@ -335,6 +430,29 @@ class SPowderSemiEmpiricalCalculator(object):
             self._report_progress(msg="S for atom %s" % atom + " has been calculated.")
         return atoms_items
 
+    # noinspection PyMethodMayBeStatic
+    def _get_stage_parameters(self, bin_width=None):
+        """
+        Collects parameters on which S depends apart from ab initio data, instrument and temperature. S calculated
+        for different values of these parameters is cached separately in the hdf file.
+        :param bin_width: width of bins in wavenumber
+        :returns: dictionary with parameters
+        """
+        parameters = AbinsModules.AbinsParameters
+        return {"bin_width": bin_width,
+                "fwhm": parameters.fwhm,
+                "delta_width": parameters.delta_width,
+                "tosca_final_neutron_energy": parameters.tosca_final_neutron_energy,
+                "tosca_cos_scattering_angle": parameters.tosca_cos_scattering_angle,
+                "tosca_a": parameters.tosca_a,
+                "tosca_b": parameters.tosca_b,
+                "tosca_c": parameters.tosca_c,
+                "pkt_per_peak": parameters.pkt_per_peak,
+                "min_wavenumber": parameters.min_wavenumber,
+                "max_wavenumber": parameters.max_wavenumber,
+                "s_relative_threshold": parameters.s_relative_threshold,
+                "s_absolute_threshold": parameters.s_absolute_threshold}
+
     def _prepare_data(self, k_point=None):
         """
         Sets all necessary fields for 1D calculations. Sorts atom indices to improve parallelism.
@@ -342,16 +460,20 @@ class SPowderSemiEmpiricalCalculator(object):
         """
         # load powder data for one k
         clerk = AbinsModules.IOmodule(input_filename=self._input_filename,
-                                      group_name=AbinsModules.AbinsParameters.powder_data_group)
+                                      group_name=AbinsModules.AbinsParameters.powder_data_group,
+                                      stage_parameters={})
         powder_data = clerk.load(list_of_datasets=["powder_data"])
         self._a_tensors = powder_data["datasets"]["powder_data"]["a_tensors"][k_point]
         self._b_tensors = powder_data["datasets"]["powder_data"]["b_tensors"][k_point]
         self._a_traces = np.trace(a=self._a_tensors, axis1=1, axis2=2)
         self._b_traces = np.trace(a=self._b_tensors, axis1=2, axis2=3)
+        if self._shared_dir is not None and self._engine == "PerAtom":
+            self._share_tensors(k_point=k_point)
 
         # load dft data for one k point
         clerk = AbinsModules.IOmodule(input_filename=self._input_filename,
-                                      group_name=AbinsModules.AbinsParameters.ab_initio_group)
+                                      group_name=AbinsModules.AbinsParameters.ab_initio_group,
+                                      stage_parameters={})
         dft_data = clerk.load(list_of_datasets=["frequencies", "weights"])
 
         frequencies = dft_data["datasets"]["frequencies"][int(k_point)]
@@ -403,26 +525,15 @@ class SPowderSemiEmpiricalCalculator(object):
         for order in range(AbinsModules.AbinsConstants.FUNDAMENTALS,
                            self._quantum_order_num + AbinsModules.AbinsConstants.S_LAST_INDEX):
 
-            # in case there is large number of transitions chop it into chunks and process chunk by chunk
-            if local_freq.size * self._fundamentals_freq.size > AbinsModules.AbinsParameters.optimal_size:
+            # in case there is large number of transitions stream them block by block
+            if self._is_too_large(num_transitions=local_freq.size, order=order):
 
-                chunked_fundamentals, chunked_fundamentals_coeff = self._prepare_chunks(local_freq=local_freq,
-                                                                                        order=order, s=s)
-
-                for fund_chunk, fund_coeff_chunk in zip(chunked_fundamentals, chunked_fundamentals_coeff):
-
-                    part_loc_freq = np.copy(local_freq)
-                    part_loc_coeff = np.copy(local_coeff)
-
-                    # number of transitions can only go up
-                    for lg_order in range(order, self._quantum_order_num + AbinsModules.AbinsConstants.S_LAST_INDEX):
-
-                        part_loc_freq, part_loc_coeff, part_broad_spectrum = self._helper_atom(
-                            atom=atom, local_freq=part_loc_freq, local_coeff=part_loc_coeff,
-                            fundamentals_freq=fund_chunk, fund_coeff=fund_coeff_chunk, order=lg_order)
-
-                        s["order_%s" % lg_order] += part_broad_spectrum
+                for lg_order in range(order, self._quantum_order_num + AbinsModules.AbinsConstants.S_LAST_INDEX):
+                    s["order_%s" % lg_order] = np.zeros(shape=self._freq_size,
+                                                        dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
 
+                self._stream_orders(atom=atom, local_freq=local_freq, local_coeff=local_coeff, fund_coeff=fund_coeff,
+                                    order=order, s=s)
                 return s
 
             # if relatively small array of transitions then process it in one shot
@@ -434,36 +545,312 @@ class SPowderSemiEmpiricalCalculator(object):
 
         return s
 
-    def _prepare_chunks(self, local_freq=None, order=None, s=None):
+    def _is_too_large(self, num_transitions=None, order=None):
         """
-        Helper function for _calculate_s_powder_1d_one_atom in case transitions energies have to be created from
-        fundamentals chunks (chunk by chunk).
-        :param local_freq: frequency from the previous transition
-        :param order:  order of quantum event
-        :param s:  dictionary with s data
-        :returns: 2D numpy array with fundamentals chunks, 2D array with corresponding coefficients
+        Checks if transitions for the given quantum order event should be generated block by block.
+        :param num_transitions: number of transitions from the previous quantum order event
+        :param order: order of quantum event
+        :returns: True if number of combinations with fundamentals exceeds AbinsParameters.optimal_size
+        """
+        return (order > AbinsModules.AbinsConstants.FUNDAMENTALS and
+                num_transitions * self._fundamentals_freq.size > AbinsModules.AbinsParameters.optimal_size)
+
+    def _stream_orders(self, atom=None, local_freq=None, local_coeff=None, fund_coeff=None, order=None, s=None):
+        """
+        Helper function for _calculate_s_powder_one_atom_core in case transitions have to be generated block by block.
+        S for each block is added to the spectrum straight away and transitions from the block which survive the
+        threshold for S are used to build the next quantum order event so that only one block per quantum order
+        event is kept in memory.
+
+        :param atom: number of atom
+        :param local_freq: frequencies from the previous quantum order event
+        :param local_coeff: coefficients from the previous quantum order event
+        :param fund_coeff: fundamental coefficients
+        :param order: order of quantum event
+        :param s: dictionary with s data
         """
+        blocks = self._freq_generator.construct_freq_combinations_in_blocks(
+            previous_array=local_freq,
+            previous_coefficients=local_coeff,
+            fundamentals_array=self._fundamentals_freq,
+            fundamentals_coefficients=fund_coeff,
+            quantum_order=order)
+
+        for block_freq, block_coeff in blocks:
+
+            block_freq, block_coeff, block_spectrum = self._helper_transitions(
+                atom=atom, local_freq=block_freq, local_coeff=block_coeff, order=order)
+            s["order_%s" % order] += block_spectrum
+
+            if order < self._quantum_order_num:
+                self._stream_orders(atom=atom, local_freq=block_freq, local_coeff=block_coeff, fund_coeff=fund_coeff,
+                                    order=order + 1, s=s)
+
+    def _calculate_s_powder_all_atoms(self, atoms=None):
+        """
+        Calculates S for all atoms at once. Atoms for which numerical instability has been detected are recalculated
+        with the increased threshold for S.
+        :param atoms: list with indices of atoms
+        :returns: list with S for all quantum events taken into account for each atom
+        """
+        s = {}
+        pending = atoms
+        while pending:
+            s_pending, unstable = self._calculate_s_powder_all_atoms_core(atoms=pending)
+            s.update(s_pending)
+            for atom in unstable:
+                self._s_threshold_up(atom=atom)
+            pending = unstable
+
+        return [s[atom] for atom in atoms]
+
+    def _calculate_s_powder_all_atoms_core(self, atoms=None):
+        """
+        Calculates S for the given atoms at once. All atoms share one array of transitions; transitions which were
+        discarded for the given atom by the threshold for S are masked out for that atom. In consequence each atom
+        gets exactly the same transitions as in _calculate_s_powder_one_atom_core.
+
+        :param atoms: list with indices of atoms
+        :returns: dictionary with S for atoms for which calculation was stable, list with unstable atoms
+        """
+        s = dict([(atom, {}) for atom in atoms])
+        unstable = []
+        streamed = []
         fund_size = self._fundamentals_freq.size
-        l_size = local_freq.size
-        opt_size = float(AbinsModules.AbinsParameters.optimal_size)
+        fund_coeff = np.arange(start=0.0, step=1.0, stop=fund_size, dtype=AbinsModules.AbinsConstants.INT_TYPE)
+
+        # Notation:
+        #     num_atoms -- number of atoms
+        #     num_trans -- number of transitions for the given quantum order event shared by all atoms
+        #
+        # local_freq[num_trans] -- transition energies
+        # masks[num_atoms, num_trans] -- True if transition is taken into account for the given atom
+        # prev_coeff[num_atoms, num_trans] -- coefficient inherited from the previous quantum order event
+        # fund_ind[num_trans] -- coefficient of fundamental added in the current quantum order event
+        local_freq = np.copy(self._fundamentals_freq)
+        masks = np.ones(shape=(len(atoms), fund_size), dtype=bool)
+        prev_coeff = None
+        fund_ind = np.copy(fund_coeff)
+
+        for order in range(AbinsModules.AbinsConstants.FUNDAMENTALS,
+                           self._quantum_order_num + AbinsModules.AbinsConstants.S_LAST_INDEX):
+
+            # in case there is large number of transitions for the given atom they are streamed block by block
+            # by _calculate_s_powder_one_atom
+            too_large = np.asarray([self._is_too_large(num_transitions=size, order=order)
+                                    for size in masks.sum(axis=1)], dtype=bool)
+            streamed.extend([atoms[row] for row in np.flatnonzero(too_large)])
+            masks[too_large] = False
+
+            active = [row for row in range(len(atoms)) if atoms[row] not in streamed and atoms[row] not in unstable]
+            if not active:
+                break
+
+            # discard transitions which are not used by any atom
+            used = masks.any(axis=0)
+            local_freq = local_freq[used]
+            fund_ind = fund_ind[used]
+            masks = masks[:, used]
+            if prev_coeff is not None:
+                prev_coeff = prev_coeff[:, used]
+
+            if order > AbinsModules.AbinsConstants.FUNDAMENTALS:
+                # the same transitions as generated by FrequencyPowderGenerator.construct_freq_combinations
+                prev_size = local_freq.size
+                energies = np.repeat(local_freq, fund_size) + np.tile(self._fundamentals_freq, prev_size)
+                valid_indices = energies < AbinsModules.AbinsParameters.max_wavenumber
+
+                prev_coeff = self._get_previous_coefficients(masks=masks, prev_coeff=prev_coeff, fund_ind=fund_ind,
+                                                             prev_dim=order - 1)
+                prev_coeff = np.repeat(prev_coeff, fund_size, axis=1)[:, valid_indices]
+                fund_ind = np.tile(fund_coeff, prev_size)[valid_indices]
+                masks = np.repeat(masks, fund_size, axis=1)[:, valid_indices]
+                local_freq = energies[valid_indices]
+
+            # spectra[num_active_atoms, num_bins] -- S rebined and convolved with the resolution function
+            spectra = np.zeros(shape=(len(active), self._freq_size), dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
+            value_dft = None
+            non_zero = np.logical_and(masks[active], local_freq != 0).any(axis=1)
+            if non_zero.any():
+                active_prev_coeff = None if prev_coeff is None else prev_coeff[active]
+                value_dft = self._calculate_order_in_chunks(order=order, frequencies=local_freq, masks=masks[active],
+                                                            prev_coeff=active_prev_coeff, fund_ind=fund_ind,
+                                                            atoms=[atoms[row] for row in active])
+                spectra[non_zero] = self._rebin_and_convolve_all_atoms(frequencies=local_freq, s=value_dft[non_zero],
+                                                                       masks=masks[active][non_zero])
+
+            for i, row in enumerate(active):
+
+                atom = atoms[row]
+                if non_zero[i]:
+                    atom_indices = np.flatnonzero(masks[row])
+                    try:
+                        kept = self._find_s_over_threshold(s=value_dft[i][atom_indices], atom=atom, order=order)
+                    except StabilityError as e:
+                        self._report_progress("{}".format(e))
+                        unstable.append(atom)
+                        masks[row] = False
+                        continue
+
+                    masks[row] = False
+                    masks[row, atom_indices[kept]] = True
+
+                # multiply by k-point weight
+                s[atom]["order_%s" % order] = spectra[i] * self._weight
+
+        for atom in unstable:
+            del s[atom]
+
+        for atom in streamed:
+            s[atom] = self._calculate_s_powder_one_atom(atom=atom)
+
+        return s, unstable
+
+    def _get_previous_coefficients(self, masks=None, prev_coeff=None, fund_ind=None, prev_dim=None):
+        """
+        Finds for each atom the coefficient which FrequencyPowderGenerator.construct_freq_combinations inherits from
+        the previous quantum order event for transitions built on top of the given transition. The generator takes
+        this coefficient from the flattened array of coefficients of the given atom so it depends on which
+        transitions were kept for that atom.
+
+        :param masks: masks[num_atoms, num_trans] with transitions taken into account for each atom
+        :param prev_coeff: prev_coeff[num_atoms, num_trans] coefficients inherited by the previous quantum order event
+                           (None for fundamentals)
+        :param fund_ind: fund_ind[num_trans] coefficients of fundamentals added in the previous quantum order event
+        :param prev_dim: number of coefficients which describe one transition of the previous quantum order event
+        :returns: coefficients[num_atoms, num_trans]
+        """
+        num_atoms = masks.shape[0]
+
+        # positions of transitions of the given atom are stored one after another in atom_positions
+        atom_positions = np.nonzero(masks)[1]
+        offsets = np.cumsum(masks.sum(axis=1)) - masks.sum(axis=1)
+
+        # for the transition with index "rank" within atom the generator takes element "rank" of the flattened
+        # array of coefficients with dimensions [num_atom_trans, prev_dim]
+        ranks = np.cumsum(masks, axis=1) - 1
+        rows = np.clip(offsets[:, np.newaxis] + ranks // prev_dim, 0, max(atom_positions.size - 1, 0))
+        positions = atom_positions[rows] if atom_positions.size else np.zeros_like(rows)
+        columns = ranks % prev_dim
+
+        coefficients = np.take(fund_ind, positions)
+        if prev_coeff is not None:
+            inherited = columns != prev_dim - 1
+            coefficients[inherited] = prev_coeff[np.arange(num_atoms)[:, np.newaxis], positions][inherited]
+
+        return coefficients
+
+    def _calculate_order_in_chunks(self, order=None, frequencies=None, masks=None, prev_coeff=None, fund_ind=None,
+                                   atoms=None):
+        """
+        Calculates S for the given atoms and the given quantum order event. For higher quantum order events transitions
+        are processed in chunks so that the size of temporary arrays does not exceed AbinsParameters.optimal_size.
+        :param order: order of quantum event
+        :param frequencies: frequencies for which transitions occur
+        :param masks: masks[num_atoms, num_trans] with transitions taken into account for each atom
+        :param prev_coeff: prev_coeff[num_atoms, num_trans] coefficients inherited from the previous quantum order event
+        :param fund_ind: fund_ind[num_trans] coefficients of fundamentals added in the current quantum order event
+        :param atoms: list with indices of atoms
+        :returns: s[num_atoms, num_trans]
+        """
+        q2 = None
+        if self._instrument.get_name() in AbinsModules.AbinsConstants.ONE_DIMENSIONAL_INSTRUMENTS:
+            q2 = self._instrument.calculate_q_powder(input_data=frequencies)
+
+        a_tensors = self._a_tensors[atoms]
+        a_traces = self._a_traces[atoms]
+        b_tensors = self._b_tensors[atoms]
+        b_traces = self._b_traces[atoms]
+
+        if order == AbinsModules.AbinsConstants.FUNDAMENTALS:
+            return self._calculate_order_all_atoms[order](q2=q2, frequencies=frequencies, indices=None,
+                                                          a_tensors=a_tensors, a_traces=a_traces,
+                                                          b_tensors=b_tensors, b_traces=b_traces)
+
+        # each transition requires num_atoms * order tensors of size 3x3
+        chunk_size = max(1, AbinsModules.AbinsParameters.optimal_size // (len(atoms) * order * 9))
+        s = np.zeros(shape=(len(atoms), frequencies.size), dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
+        for start in range(0, frequencies.size, chunk_size):
+            chunk = slice(start, start + chunk_size)
+
+            # transitions which are not used by any of the atoms are skipped
+            if not masks[:, chunk].any():
+                continue
+
+            # indices[num_atoms, chunk_size, order] -- decomposition of transitions in terms of fundamentals
+            chunk_prev_coeff = prev_coeff[:, chunk]
+            chunk_fund_ind = np.broadcast_to(fund_ind[chunk], chunk_prev_coeff.shape)
+            indices = np.stack([chunk_prev_coeff] * (order - 1) + [chunk_fund_ind], axis=-1)
+
+            s[:, chunk] = self._calculate_order_all_atoms[order](q2=q2[chunk], frequencies=frequencies[chunk],
+                                                                 indices=indices, a_tensors=a_tensors,
+                                                                 a_traces=a_traces, b_tensors=b_tensors,
+                                                                 b_traces=b_traces)
+        return s
+
+    def _rebin_and_convolve_all_atoms(self, frequencies=None, s=None, masks=None):
+        """
+        Performs for many atoms at once the same steps as _helper_atom: rebins S (if there are many transitions),
+        convolves it with the resolution function of the instrument and rebins the result.
+        :param frequencies: frequencies[num_trans] of transitions shared by all atoms
+        :param s: s[num_atoms, num_trans] with S for atoms
+        :param masks: masks[num_atoms, num_trans] with transitions taken into account for each atom
+        :returns: spectra[num_atoms, num_bins]
+        """
+        s = np.where(masks, s, 0.0)
+
+        # see _rebin_data_opt: S is rebined only if there are more transitions than bins
+        rebined = masks.sum(axis=1) >= self._bins.size
+
+        spectra = np.zeros(shape=(s.shape[0], self._freq_size), dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
+        if rebined.any():
+            spectra[rebined] = self._convolve_all_atoms(
+                frequencies=self._frequencies, s=self._rebin_data_all_atoms(array_x=frequencies, array_y=s[rebined]))
+        if not rebined.all():
+            spectra[~rebined] = self._convolve_all_atoms(frequencies=frequencies, s=s[~rebined])
 
-        chunk_size = max(1.0, np.floor(opt_size / (l_size * 2**(AbinsModules.AbinsConstants.MAX_ORDER - order))))
-        chunk_num = int(np.ceil(float(fund_size) / chunk_size))
-        new_dim = int(chunk_num * chunk_size)
-        new_fundamentals = np.zeros(shape=new_dim, dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
-        new_fundamentals_coeff = np.zeros(shape=new_dim, dtype=AbinsModules.AbinsConstants.INT_TYPE)
-        new_fundamentals[:fund_size] = self._fundamentals_freq
-        new_fundamentals_coeff[:fund_size] = np.arange(start=0.0, step=1.0, stop=self._fundamentals_freq.size,
-                                                       dtype=AbinsModules.AbinsConstants.INT_TYPE)
+        # the same as _fix_empty_array: S is shifted by one bin
+        shift = AbinsModules.AbinsConstants.FIRST_BIN_INDEX
+        output = np.zeros_like(spectra)
+        output[:, shift:] = spectra[:, :-shift]
 
-        new_fundamentals = new_fundamentals.reshape(chunk_num, int(chunk_size))
-        new_fundamentals_coeff = new_fundamentals_coeff.reshape(chunk_num, int(chunk_size))
+        return output
 
-        total_size = self._freq_size
-        for lg_order in range(order, self._quantum_order_num + AbinsModules.AbinsConstants.S_LAST_INDEX):
-            s["order_%s" % lg_order] = np.zeros(shape=total_size, dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
+    def _convolve_all_atoms(self, frequencies=None, s=None):
+        """
+        Convolves S of many atoms with the resolution function of the instrument and rebins the result. The resolution
+        function depends only on frequencies so it is evaluated once for all atoms.
+        :param frequencies: frequencies[num_trans] shared by all atoms
+        :param s: s[num_atoms, num_trans]
+        :returns: rebined broadened spectra[num_atoms, num_bins]
+        """
+        points_freq, resolution = self._instrument.convolve_with_resolution_function(
+            frequencies=frequencies, s_dft=np.ones_like(frequencies))
+        pkt_per_peak = resolution.size // max(frequencies.size, 1)
+
+        spectra = np.zeros(shape=(s.shape[0], self._freq_size), dtype=AbinsModules.AbinsConstants.FLOAT_TYPE)
+        chunk_size = max(1, AbinsModules.AbinsParameters.optimal_size // max(resolution.size, 1))
+        for start in range(0, s.shape[0], chunk_size):
+            chunk = slice(start, start + chunk_size)
+            broad_spectra = np.repeat(s[chunk], pkt_per_peak, axis=1) * resolution
+            spectra[chunk] = self._rebin_data_all_atoms(array_x=points_freq, array_y=broad_spectra)
+
+        return spectra
+
+    def _rebin_data_all_atoms(self, array_x=None, array_y=None):
+        """
+        Rebins S of many atoms at once in the same way as _rebin_data_full.
+        :param array_x: numpy array with frequencies shared by all atoms
+        :param array_y: array_y[num_atoms, num_freq] with S
+        :returns: rebined S[num_atoms, num_bins]
+        """
+        num_atoms = array_y.shape[0]
+        bin_indices = np.searchsorted(self._bins, array_x, side="right") - 1
+        valid = np.logical_and(bin_indices >= 0, bin_indices < self._freq_size)
 
-        return new_fundamentals, new_fundamentals_coeff
+        flat_indices = np.arange(num_atoms)[:, np.newaxis] * self._freq_size + bin_indices[valid]
+        return np.bincount(flat_indices.ravel(), weights=array_y[:, valid].ravel(),
+                           minlength=num_atoms * self._freq_size).reshape(num_atoms, self._freq_size)
 
     def _helper_atom(self, atom=None, local_freq=None, local_coeff=None, fundamentals_freq=None, fund_coeff=None,
                      order=None):
@@ -483,6 +870,17 @@ class SPowderSemiEmpiricalCalculator(object):
             fundamentals_coefficients=fund_coeff,
             quantum_order=order)
 
+        return self._helper_transitions(atom=atom, local_freq=local_freq, local_coeff=local_coeff, order=order)
+
+    def _helper_transitions(self, atom=None, local_freq=None, local_coeff=None, order=None):
+        """
+        Calculates broadened S for the given transitions and discards transitions with small S.
+        :param atom: number of atom
+        :param local_freq: frequencies of transitions for the given quantum order event
+        :param local_coeff: coefficients of transitions for the given quantum order event
+        :param order: order of quantum event
+        :returns: transitions with large enough S, corresponding coefficients, rebined broadened S
+        """
         if local_freq.any():  # check if local_freq has non-zero values
 
             q2 = None
@@ -639,6 +1037,111 @@ class SPowderSemiEmpiricalCalculator(object):
 
         return s
 
+    # noinspection PyUnusedLocal
+    def _calculate_order_one_all_atoms(self, q2=None, frequencies=None, indices=None, a_tensors=None, a_traces=None,
+                                       b_tensors=None, b_traces=None):
+        """
+        Calculates S for the first order quantum event for many atoms at once.
+        :param q2: squared values of momentum transfer vectors
+        :param frequencies: frequencies for which transitions occur
+        :param indices: indices[num_atoms, num_freq, order] which store information how transitions can be decomposed
+                        in terms of fundamentals for each atom
+        :param a_tensors: total MSD tensors for atoms
+        :param a_traces: total MSD traces for atoms
+        :param b_tensors: frequency dependent MSD tensors for atoms
+        :param b_traces: frequency dependent MSD traces for atoms
+        :returns: s[num_atoms, num_freq] for the first quantum order event
+        """
+        trace_ba = np.einsum('akli, ail->ak', b_tensors, a_tensors)
+        coth = 1.0 / np.tanh(frequencies * AbinsModules.AbinsConstants.CM1_2_HARTREE /
+                             (2.0 * self._temperature * AbinsModules.AbinsConstants.K_2_HARTREE))
+
+        s = q2 * b_traces / 3.0 * np.exp(-q2 * (a_traces[:, np.newaxis] + 2.0 * trace_ba / b_traces) / 5.0 *
+                                         coth * coth)
+
+        return s
+
+    # noinspection PyUnusedLocal
+    def _calculate_order_two_all_atoms(self, q2=None, frequencies=None, indices=None, a_tensors=None, a_traces=None,
+                                       b_tensors=None, b_traces=None):
+        """
+        Calculates S for the second order quantum event for many atoms at once.
+        :param q2: squared values of momentum transfer vectors
+        :param frequencies: frequencies for which transitions occur
+        :param indices: indices[num_atoms, num_freq, order] which store information how transitions can be decomposed
+                        in terms of fundamentals for each atom
+        :param a_tensors: total MSD tensors for atoms
+        :param a_traces: total MSD traces for atoms
+        :param b_tensors: frequency dependent MSD tensors for atoms
+        :param b_traces: frequency dependent MSD traces for atoms
+        :returns: s[num_atoms, num_freq] for the second quantum order event
+        """
+        coth = 1.0 / np.tanh(frequencies * AbinsModules.AbinsConstants.CM1_2_HARTREE /
+                             (2.0 * self._temperature * AbinsModules.AbinsConstants.K_2_HARTREE))
+
+        dw = np.exp(-q2 * a_traces[:, np.newaxis] / 3.0 * coth * coth)
+        q4 = q2 ** 2
+
+        # in case indices are the same factor is 2 otherwise it is 1
+        factor = (indices[..., 0] == indices[..., 1]) + 1
+
+        # the same contractions as in _calculate_order_two with an additional index "a" for atoms
+        atoms = np.arange(b_tensors.shape[0])[:, np.newaxis]
+        b_tensors_i = b_tensors[atoms, indices[..., 0]]
+        b_tensors_k = b_tensors[atoms, indices[..., 1]]
+
+        s = q4 * dw * (np.prod(b_traces[atoms[..., np.newaxis], indices], axis=2) +
+                       np.einsum('akli, akil->ak', b_tensors_i, b_tensors_k) +
+                       np.einsum('akli, akil->ak', b_tensors_k, b_tensors_i)) / (30.0 * factor)
+
+        return s
+
+    # noinspection PyUnusedLocal
+    def _calculate_order_three_all_atoms(self, q2=None, frequencies=None, indices=None, a_tensors=None, a_traces=None,
+                                         b_tensors=None, b_traces=None):
+        """
+        Calculates S for the third order quantum event for many atoms at once.
+        :param q2: squared values of momentum transfer vectors
+        :param frequencies: frequencies for which transitions occur
+        :param indices: indices[num_atoms, num_freq, order] which store information how transitions can be decomposed
+                        in terms of fundamentals for each atom
+        :param a_tensors: total MSD tensors for atoms
+        :param a_traces: total MSD traces for atoms
+        :param b_tensors: frequency dependent MSD tensors for atoms
+        :param b_traces: frequency dependent MSD traces for atoms
+        :returns: s[num_atoms, num_freq] for the third quantum order event
+        """
+        coth = 1.0 / np.tanh(frequencies * AbinsModules.AbinsConstants.CM1_2_HARTREE /
+                             (2.0 * self._temperature * AbinsModules.AbinsConstants.K_2_HARTREE))
+        atoms = np.arange(b_traces.shape[0])[:, np.newaxis, np.newaxis]
+        s = 9.0 / 1086.0 * q2 ** 3 * np.prod(b_traces[atoms, indices], axis=2) * \
+            np.exp(-q2 * a_traces[:, np.newaxis] / 3.0 * coth * coth)
+
+        return s
+
+    # noinspection PyUnusedLocal
+    def _calculate_order_four_all_atoms(self, q2=None, frequencies=None, indices=None, a_tensors=None, a_traces=None,
+                                        b_tensors=None, b_traces=None):
+        """
+        Calculates S for the fourth order quantum event for many atoms at once.
+        :param q2: squared values of momentum transfer vectors
+        :param frequencies: frequencies for which transitions occur
+        :param indices: indices[num_atoms, num_freq, order] which store information how transitions can be decomposed
+                        in terms of fundamentals for each atom
+        :param a_tensors: total MSD tensors for atoms
+        :param a_traces: total MSD traces for atoms
+        :param b_tensors: frequency dependent MSD tensors for atoms
+        :param b_traces: frequency dependent MSD traces for atoms
+        :returns: s[num_atoms, num_freq] for the fourth quantum order event
+        """
+        coth = 1.0 / np.tanh(frequencies * AbinsModules.AbinsConstants.CM1_2_HARTREE /
+                             (2.0 * self._temperature * AbinsModules.AbinsConstants.K_2_HARTREE))
+        atoms = np.arange(b_traces.shape[0])[:, np.newaxis, np.newaxis]
+        s = 27.0 / 49250.0 * q2 ** 4 * np.prod(b_traces[atoms, indices], axis=2) * \
+            np.exp(-q2 * a_traces[:, np.newaxis] / 3.0 * coth * coth)
+
+        return s
+
     def _rebin_data_full(self, array_x=None, array_y=None):
         """
         Rebins S data so that all quantum events have the same x-axis. The size of rebined data is equal to _bins.size.
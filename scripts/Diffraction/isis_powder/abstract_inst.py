@@ -204,6 +204,14 @@ class AbstractInst(object):
         """
         return common_enums.INPUT_BATCHING.Summed
 
+    def _get_focus_processes(self):
+        """
+        Returns the number of processes to focus individually processed runs in. Instruments which
+        support it override this with the user specified value, otherwise runs are focused one by one
+        :return: The number of processes or None to focus the runs one by one
+        """
+        return None
+
     def _get_current_tt_mode(self):
         """
         Returns the current tt_mode this is only applicable
@@ -169,6 +169,9 @@ class Gem(AbstractInst):
     def _get_input_batching_mode(self):
         return self._inst_settings.input_batching
 
+    def _get_focus_processes(self):
+        return self._inst_settings.focus_processes
+
     def _get_unit_to_keep(self):
         return self._inst_settings.unit_to_keep
 
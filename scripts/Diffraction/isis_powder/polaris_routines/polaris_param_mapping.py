@@ -20,6 +20,7 @@ attr_mapping = \
      ParamMapEntry(ext_name="do_van_normalisation",        int_name="do_van_normalisation"),
      ParamMapEntry(ext_name="file_ext",                    int_name="file_extension", optional=True),
      ParamMapEntry(ext_name="first_cycle_run_no",          int_name="run_in_range"),
+     ParamMapEntry(ext_name="focus_processes",             int_name="focus_processes", optional=True),
      ParamMapEntry(ext_name="focused_cropping_values",     int_name="focused_cropping_values"),
      ParamMapEntry(ext_name="focused_bin_widths",          int_name="focused_bin_widths"),
      ParamMapEntry(ext_name="grouping_file_name",          int_name="grouping_file_name"),
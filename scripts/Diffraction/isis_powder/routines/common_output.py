@@ -60,7 +60,12 @@ def save_focused_data(d_spacing_group, tof_group, output_paths, run_number_strin
     dat_folder_name = "dat_files"
     dat_file_destination = os.path.join(output_paths["output_folder"], dat_folder_name)
     if not os.path.exists(dat_file_destination):
-        os.makedirs(dat_file_destination)
+        try:
+            os.makedirs(dat_file_destination)
+        except OSError:
+            # Runs focused in parallel processes may create the folder at the same time
+            if not os.path.isdir(dat_file_destination):
+                raise
 
     _save_xye(ws_group=d_spacing_group, ws_units="d", run_number=run_number_string,
               output_folder=dat_file_destination, inst_prefix=inst_prefix, file_ext=file_ext)
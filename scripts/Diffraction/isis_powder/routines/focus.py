@@ -5,13 +5,27 @@
 #     & Institut Laue - Langevin
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import (absolute_import, division, print_function)
-from mantid.api import WorkspaceGroup
+from mantid import logger
+from mantid.api import IEventWorkspace, WorkspaceGroup
+from mantid.kernel.environment import python_interpreter, python_subprocess_environment
 import mantid.simpleapi as mantid
 
 import isis_powder.routines.common as common
 from isis_powder.routines.common_enums import INPUT_BATCHING
+from multiprocessing.pool import ThreadPool
+import hashlib
 import numpy
 import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Reciprocals of the vanadium splines rebinned to the binning of the focused banks. The rebinned spline only depends
+# on the spline and the bin edges of the bank, which are the same for all runs focused with the same calibration
+_rebinned_splines_cache = {}
+_MAX_CACHED_SPLINES = 500
 
 
 def focus(run_number_string, instrument, perform_vanadium_norm, absorb, sample_details=None):
@@ -109,14 +123,7 @@ def _batched_run_focusing(instrument, perform_vanadium_norm, run_number_string,
     read_ws_list = common.load_current_normalised_ws_list(run_number_string=run_number_string,
                                                           instrument=instrument)
     run_details = instrument._get_run_details(run_number_string=run_number_string)
-    vanadium_splines = None
-    van = "van_{}".format(run_details.vanadium_run_numbers)
-    if perform_vanadium_norm:
-        if van not in mantid.mtd:
-            vanadium_splines = mantid.LoadNexus(Filename=run_details.splined_vanadium_file_path,
-                                                OutputWorkspace=van)
-        else:
-            vanadium_splines = mantid.mtd[van]
+    vanadium_splines = _load_vanadium_splines(run_details, perform_vanadium_norm)
 
     output = None
     for ws in read_ws_list:
@@ -129,19 +136,65 @@ def _batched_run_focusing(instrument, perform_vanadium_norm, run_number_string,
 
 
 def _divide_one_spectrum_by_spline(spectrum, spline, instrument):
-    rebinned_spline = mantid.RebinToWorkspace(WorkspaceToRebin=spline, WorkspaceToMatch=spectrum, StoreInADS=False)
+    rebinned_spline, reciprocal = _get_rebinned_spline(spectrum=spectrum, spline=spline)
+
+    if isinstance(spectrum, IEventWorkspace):
+        # The histogram of an event workspace is generated from its events, so it cannot be divided in place
+        divided = mantid.Divide(LHSWorkspace=spectrum, RHSWorkspace=rebinned_spline, StoreInADS=False)
+        spectrum = mantid.ReplaceSpecialValues(InputWorkspace=divided, NaNValue=0, OutputWorkspace=spectrum)
+    else:
+        _divide_by_reciprocal_in_place(spectrum, reciprocal, rebinned_spline.readE(0))
+
     if instrument.get_instrument_prefix() == "GEM":
-        divided = mantid.Divide(LHSWorkspace=spectrum, RHSWorkspace=rebinned_spline, OutputWorkspace=spectrum,
-                                StoreInADS=False)
-        complete = mantid.ReplaceSpecialValues(InputWorkspace=divided, NaNValue=0, StoreInADS=False)
         # crop based off max between 1000 and 2000 tof as the vanadium peak on Gem will always occur here
-        return _crop_spline_to_percent_of_max(rebinned_spline, complete, spectrum, 1000, 2000)
+        return _crop_spline_to_percent_of_max(rebinned_spline, spectrum, spectrum, 1000, 2000)
+    return spectrum
+
+
+def _divide_by_reciprocal_in_place(spectrum, reciprocal, spline_errors):
+    # Divide by the spline as a multiplication by its reciprocal in place. The errors are propagated as Divide
+    # does, sqrt(e**2 + (y * spline_e / spline_y)**2) / |spline_y|, and NaN values (zero counts divided by zero
+    # spline) are replaced by zeros as ReplaceSpecialValues does
+    y_data = spectrum.dataY(0)
+    e_data = spectrum.dataE(0)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        e_data[:] = numpy.sqrt(e_data ** 2 + (y_data * spline_errors * reciprocal) ** 2) * numpy.abs(reciprocal)
+        y_data *= reciprocal
+    nan_values = numpy.isnan(y_data)
+    y_data[nan_values] = 0.
+    e_data[nan_values] = 0.
+
+
+def _get_rebinned_spline(spectrum, spline):
+    """
+    Returns the spline rebinned to the binning of the spectrum with the reciprocal of its values. These are cached
+    by the spline and the bin edges of the spectrum, so the spline is rebinned once for all runs focused with the
+    same vanadium and calibration
+    :param spectrum: The single spectrum workspace of a focused bank
+    :param spline: The vanadium spline of that bank
+    :return: The rebinned spline workspace and the array of its reciprocal values
+    """
+    bin_edges = spectrum.readX(0)
+    key = (spline.name(), _hash_arrays(spline.readX(0), spline.readY(0), spline.readE(0)), _hash_arrays(bin_edges))
+    cached = _rebinned_splines_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rebinned_spline = mantid.RebinToWorkspace(WorkspaceToRebin=spline, WorkspaceToMatch=spectrum, StoreInADS=False)
+    spline_values = rebinned_spline.readY(0)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        reciprocal = 1. / spline_values
+    if len(_rebinned_splines_cache) >= _MAX_CACHED_SPLINES:
+        _rebinned_splines_cache.clear()
+    _rebinned_splines_cache[key] = (rebinned_spline, reciprocal)
+    return _rebinned_splines_cache[key]
 
-    divided = mantid.Divide(LHSWorkspace=spectrum, RHSWorkspace=rebinned_spline,
-                            StoreInADS=False)
-    complete = mantid.ReplaceSpecialValues(InputWorkspace=divided, NaNValue=0, OutputWorkspace=spectrum)
 
-    return complete
+def _hash_arrays(*arrays):
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(numpy.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
 
 
 def _divide_by_vanadium_splines(spectra_list, vanadium_splines, instrument):
@@ -165,14 +218,15 @@ def _individual_run_focusing(instrument, perform_vanadium_norm, run_number, abso
     # Load and process one by one
     run_numbers = common.generate_run_numbers(run_number_string=run_number)
     run_details = instrument._get_run_details(run_number_string=run_number)
-    vanadium_splines = None
-    van = "van_{}".format(run_details.vanadium_run_numbers)
-    if perform_vanadium_norm:
-        if van not in mantid.mtd:
-            vanadium_splines = mantid.LoadNexus(Filename=run_details.splined_vanadium_file_path,
-                                                OutputWorkspace=van)
-        else:
-            vanadium_splines = mantid.mtd[van]
+    num_processes = instrument._get_focus_processes()
+    if num_processes and num_processes > 1 and len(run_numbers) > 1:
+        if python_interpreter() is not None:
+            return _parallel_run_focusing(instrument=instrument, perform_vanadium_norm=perform_vanadium_norm,
+                                          run_number=run_number, run_numbers=run_numbers, absorb=absorb,
+                                          sample_details=sample_details, num_processes=num_processes)
+        logger.warning("Can not find python interpreter to start the focusing processes. Focusing the runs one by one")
+
+    vanadium_splines = _load_vanadium_splines(run_details, perform_vanadium_norm)
 
     output = None
     for run in run_numbers:
@@ -183,6 +237,99 @@ def _individual_run_focusing(instrument, perform_vanadium_norm, run_number, abso
     return output
 
 
+def _load_vanadium_splines(run_details, perform_vanadium_norm):
+    if not perform_vanadium_norm:
+        return None
+    van = "van_{}".format(run_details.vanadium_run_numbers)
+    if van not in mantid.mtd:
+        return mantid.LoadNexus(Filename=run_details.splined_vanadium_file_path, OutputWorkspace=van)
+    return mantid.mtd[van]
+
+
+def _parallel_run_focusing(instrument, perform_vanadium_norm, run_number, run_numbers, absorb, sample_details,
+                           num_processes):
+    """
+    Focuses the runs individually in separate python processes. Each process has its own workspaces, loads the
+    vanadium splines once and focuses its share of the runs one at a time, so no more than num_processes runs are
+    in memory at once. The focused runs are saved by the processes as they would be by a serial focus. Only the
+    output of the last run is loaded back and returned, as the serial focus does.
+    :param instrument: The instrument object, which is passed to the processes with its current settings
+    :param run_number: The user input run number string
+    :param run_numbers: The list of runs to focus generated from it
+    :param num_processes: The maximum number of processes to focus in
+    :return: The d-spacing group of the last run
+    """
+    if perform_vanadium_norm:
+        _test_splined_vanadium_exists(instrument, instrument._get_run_details(run_number_string=run_number))
+
+    num_processes = min(num_processes, len(run_numbers))
+    work_dir = tempfile.mkdtemp(prefix="isis_powder_focus")
+    try:
+        result_file = os.path.join(work_dir, "last_run.nxs")
+        job_files = []
+        for index in range(num_processes):
+            job = {"instrument": instrument, "perform_vanadium_norm": perform_vanadium_norm, "absorb": absorb,
+                   "sample_details": sample_details, "run_number": run_number,
+                   "run_numbers": run_numbers[index::num_processes],
+                   "last_run": run_numbers[-1], "result_file": result_file}
+            job_files.append(os.path.join(work_dir, "job{}.pkl".format(index)))
+            with open(job_files[-1], "wb") as job_file:
+                pickle.dump(job, job_file, 2)
+
+        python = python_interpreter()
+        env = python_subprocess_environment()
+
+        def run_job(job_file_path):
+            return subprocess.call([python, "-m", "isis_powder.routines.focus", job_file_path], env=env)
+
+        pool = ThreadPool(num_processes)
+        try:
+            exit_codes = pool.map(run_job, job_files)
+        finally:
+            pool.terminate()
+            pool.join()
+        failed = [run for index, code in enumerate(exit_codes) if code != 0
+                  for run in run_numbers[index::num_processes]]
+        if failed:
+            raise RuntimeError("Focusing failed in the process focusing the runs: " +
+                               ", ".join(str(run) for run in failed) +
+                               "\nSee the output of the focusing processes for details.")
+
+        with open(os.path.splitext(result_file)[0] + ".pkl", "rb") as name_file:
+            output_name = pickle.load(name_file)
+        return mantid.LoadNexusProcessed(Filename=result_file, OutputWorkspace=output_name)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _focus_job(job_file_path):
+    """
+    Focuses the runs of a job written by _parallel_run_focusing. This runs in a separate python process.
+    """
+    with open(job_file_path, "rb") as job_file:
+        job = pickle.load(job_file)
+    instrument = job["instrument"]
+    run_numbers = job["run_numbers"]
+    perform_vanadium_norm = job["perform_vanadium_norm"]
+    run_details = instrument._get_run_details(run_number_string=job["run_number"])
+    vanadium_splines = _load_vanadium_splines(run_details, perform_vanadium_norm)
+
+    kept_workspaces = set(mantid.mtd.getObjectNames())
+    for run in run_numbers:
+        ws = common.load_current_normalised_ws_list(run_number_string=run, instrument=instrument)
+        output = _focus_one_ws(input_workspace=ws[0], run_number=run, instrument=instrument, absorb=job["absorb"],
+                               perform_vanadium_norm=perform_vanadium_norm, sample_details=job["sample_details"],
+                               vanadium_path=vanadium_splines)
+        if run == job["last_run"]:
+            mantid.SaveNexusProcessed(InputWorkspace=output, Filename=job["result_file"])
+            with open(os.path.splitext(job["result_file"])[0] + ".pkl", "wb") as name_file:
+                pickle.dump(output.name(), name_file, 2)
+        # The focused run has been saved, so drop its workspaces to keep the memory use bounded
+        for name in set(mantid.mtd.getObjectNames()) - kept_workspaces:
+            if name in mantid.mtd:
+                mantid.DeleteWorkspace(name)
+
+
 def _test_splined_vanadium_exists(instrument, run_details):
     # Check the necessary splined vanadium file has been created
     if not os.path.isfile(run_details.splined_vanadium_file_path):
@@ -207,3 +354,7 @@ def _crop_spline_to_percent_of_max(spline, input_ws, output_workspace, min_value
     x_min = x_list[small_spline_indecies[0]]
     output = mantid.CropWorkspace(inputWorkspace=input_ws, XMin=x_min, XMax=x_max, OutputWorkspace=output_workspace)
     return output
+
+
+if __name__ == "__main__":
+    _focus_job(sys.argv[1])
@@ -25,6 +25,8 @@ import Direct.CommonFunctions  as common
 import Direct.diagnostics      as diagnostics
 from Direct.PropertyManager  import PropertyManager
 from Direct.RunDescriptor    import RunDescriptor
+from Direct.WhiteBeamCache   import WhiteBeamCache
+import Direct.ParallelMultirep as ParallelMultirep
 from Direct.ReductionHelpers import extract_non_system_names,process_prop_list
 
 
@@ -255,6 +257,7 @@ class DirectEnergyConversion(object):
 
         # Get the background/total counts from the sample run if present
         name_to_clean = None
+        sample_mask = None
         if diag_sample is not None:
             diag_sample = self.get_run_descriptor(diag_sample)
             sample_mask = diag_sample.get_masking(1)
@@ -298,6 +301,10 @@ class DirectEnergyConversion(object):
         # extract existing white mask if one is defined and provide it for
         # diagnose to use instead of constantly diagnosing the same vanadium
         white_mask = white.get_masking(1)
+        mask_key = None
+        if white_mask is None:
+            # or use the white mask, obtained by an earlier reduction from the same white beam integrals
+            white_mask, mask_key = self._load_wb_cache_mask(white, white_integrals, diag_params)
         if white_mask is None or sample_mask is None:
             pass # have to run diagnostics
         else:
@@ -306,26 +313,9 @@ class DirectEnergyConversion(object):
             total_mask = sample_mask + white_mask
             return total_mask
 
-        # Check how we should run diag
-        diag_spectra_blocks = self.diag_spectra
-
         if white_mask is not None:
             diag_params['white_mask'] = white
-        # keep white mask workspace for further usage
-        if diag_spectra_blocks is None:
-            # Do the whole lot at once
-            white_masked_ws = diagnostics.diagnose(white_integrals, **diag_params)
-            if white_masked_ws:
-                white.add_masked_ws(white_masked_ws)
-                DeleteWorkspace(white_masked_ws)
-        else:
-            for bank in diag_spectra_blocks:
-                diag_params['start_index'] = bank[0] - 1
-                diag_params['end_index'] = bank[1] - 1
-                white_masked_ws = diagnostics.diagnose(white_integrals, **diag_params)
-                if white_masked_ws:
-                    white.add_masked_ws(white_masked_ws)
-                    DeleteWorkspace(white_masked_ws)
+        self._diagnose_with_wb_cache(white, white_integrals, diag_params, mask_key)
 
         if out_ws_name:
             if diag_sample is not None:
@@ -342,6 +332,66 @@ class DirectEnergyConversion(object):
 
         return diag_mask
 
+    def _load_wb_cache_mask(self, white, white_integrals, diag_params):
+        """Apply to the white beam run the mask stored in the persistent cache by an earlier
+           diagnostics of the same white beam integrals with the same parameters.
+
+        Returns the white beam mask, None if nothing is cached, and the key to store the
+        mask found by the diagnostics under, None if the cache is not used.
+        """
+        wb_cache = self._get_wb_cache()
+        if wb_cache is None or self.second_white:
+            return None, None
+        mask_key = WhiteBeamCache.mask_key(self._wb_integrals_key(white),diag_params,self.diag_spectra)
+        masked_detectors = wb_cache.load_mask(mask_key)
+        if masked_detectors is None:
+            return None, mask_key
+
+        cached_mask = CloneWorkspace(white_integrals,OutputWorkspace='white_ws_cached_mask')
+        if len(masked_detectors) > 0:
+            MaskDetectors(Workspace=cached_mask,DetectorList=masked_detectors)
+        white.add_masked_ws(cached_mask)
+        DeleteWorkspace(cached_mask)
+        self.prop_man.log("Diagnose: white beam mask for run(s) {0} is loaded from cache {1}".
+                          format(white.get_run_list(),self.wb_cache_dir),'information')
+        return white.get_masking(1), None
+
+    def _diagnose_with_wb_cache(self, white, white_integrals, diag_params, mask_key):
+        """Run the diagnostics on the white beam integrals, whole or by spectra blocks,
+           add the mask found to the white beam run and store it in the persistent cache
+           under mask_key unless this is None.
+           The reason codes of the vectorised diagnostics are kept in diag_reason_codes.
+        """
+        # Check how we should run diag
+        diag_spectra_blocks = self.diag_spectra
+        if diag_spectra_blocks is None:
+            # Do the whole lot at once
+            diag_spectra_blocks = [(None, None)]
+        else:
+            diag_spectra_blocks = [(bank[0] - 1, bank[1] - 1) for bank in diag_spectra_blocks]
+        reason_codes = None
+        for start_index, end_index in diag_spectra_blocks:
+            if start_index is not None:
+                diag_params['start_index'] = start_index
+                diag_params['end_index'] = end_index
+            white_masked_ws = diagnostics.diagnose(white_integrals, **diag_params)
+            if isinstance(white_masked_ws, tuple):
+                white_masked_ws, _, reasons = white_masked_ws
+                if reason_codes is None:
+                    reason_codes = np.zeros(white_integrals.getNumberHistograms(), dtype=int)
+                first = 0 if start_index is None else start_index
+                reason_codes[first:first + len(reasons)] = reasons
+            # keep white mask workspace for further usage
+            if white_masked_ws:
+                white.add_masked_ws(white_masked_ws)
+                DeleteWorkspace(white_masked_ws)
+        self._diag_reason_codes = reason_codes
+        # store the white mask, obtained by the diagnostics, for further reductions
+        if mask_key is not None:
+            white_mask = white.get_masking(1)
+            if white_mask is not None:
+                self._get_wb_cache().save_mask(mask_key,white_mask)
+
 #-------------------------------------------------------------------------------
     # Clean up unrequired workspaces
 
@@ -424,33 +474,7 @@ class DirectEnergyConversion(object):
             prop_man.log("****************************************************************")
             return None
 
-        masking = None
-        masks_done = False
-        if not prop_man.run_diagnostics:
-            header = "*** Diagnostics including hard masking is skipped "
-            masks_done = True
-        #if Reducer.save_and_reuse_masks :
-        # SAVE AND REUSE MASKS
-        if self.spectra_masks:
-            masks_done = True
-#--------------------------------------------------------------------------------------------------
-#  Diagnostics here
-# -------------------------------------------------------------------------------------------------
-        # diag the sample and detector vanadium.  It will deal with hard mask only
-        # if it is set that way
-        if not masks_done:
-            masking,header = self._run_diagnostics(prop_man)
-        else:
-            header = '*** Using stored mask file for workspace with {0} spectra and {1} masked spectra'
-            masking = self.spectra_masks
-
-        # estimate and report the number of failing detectors
-        n_masked_spectra = get_failed_spectra_list_from_masks(masking,prop_man)
-        if masking:
-            n_spectra = masking.getNumberHistograms()
-        else:
-            n_spectra = 0
-        prop_man.log(header.format(n_spectra,n_masked_spectra),'notice')
+        masking = self._find_masking(prop_man)
 #--------------------------------------------------------------------------------------------------
 #  now reduction
 #--------------------------------------------------------------------------------------------------
@@ -498,7 +522,14 @@ class DirectEnergyConversion(object):
         #  -- code below uses current energy state from PropertyManager.incident_energy
         AllEn = PropertyManager.incident_energy.getAllEiList()
         num_ei_cuts = len(AllEn)
+        # reduce the chunks in separate processes if requested
+        chunk_results = self._reduce_chunks_in_processes(masking,AllEn)
+        if chunk_results is not None:
+            self.clean_up_convert_to_energy(start_time)
+            return chunk_results if out_ws_name else None
         for ind,ei_guess in enumerate(AllEn):
+            if self._chunks_to_reduce is not None and ind not in self._chunks_to_reduce:
+                continue
             PropertyManager.incident_energy.set_current_ind(ind)
 
             cut_ind =ind + 1 # nice printing convention (1 of 1 rather them 0 of 1)
@@ -568,6 +599,64 @@ class DirectEnergyConversion(object):
         return result
 
 
+    def _find_masking(self,prop_man):
+        """Run the diagnostics, unless they are skipped or stored masks are used,
+           and report the number of failing detectors.
+
+        Returns the masks workspace or None
+        """
+        masking = None
+        masks_done = False
+        if not prop_man.run_diagnostics:
+            header = "*** Diagnostics including hard masking is skipped "
+            masks_done = True
+        #if Reducer.save_and_reuse_masks :
+        # SAVE AND REUSE MASKS
+        if self.spectra_masks:
+            masks_done = True
+#--------------------------------------------------------------------------------------------------
+#  Diagnostics here
+# -------------------------------------------------------------------------------------------------
+        # diag the sample and detector vanadium.  It will deal with hard mask only
+        # if it is set that way
+        if not masks_done:
+            masking,header = self._run_diagnostics(prop_man)
+        else:
+            header = '*** Using stored mask file for workspace with {0} spectra and {1} masked spectra'
+            masking = self.spectra_masks
+
+        # estimate and report the number of failing detectors
+        n_masked_spectra = get_failed_spectra_list_from_masks(masking,prop_man)
+        if masking:
+            n_spectra = masking.getNumberHistograms()
+        else:
+            n_spectra = 0
+        prop_man.log(header.format(n_spectra,n_masked_spectra),'notice')
+        return masking
+
+#------------------------------------------------------------------------------------------
+    def _reduce_chunks_in_processes(self,masking,AllEn):
+        """Reduce the chunks of a multirep run in separate processes if multirep_processes
+           is above one and this reducer is not a worker reducing its chunks itself.
+
+        Returns the list of the reduced workspaces or None if the chunks have to be reduced
+        one by one in this process.
+        """
+        num_ei_cuts = len(AllEn)
+        if not self._multirep_mode or num_ei_cuts < 2 or self.multirep_processes < 2 or\
+                self._chunks_to_reduce is not None:
+            return None
+        chunk_results = ParallelMultirep.reduce_in_processes(self,masking,num_ei_cuts,self.multirep_processes)
+        if chunk_results is None:
+            return None
+        for ind,(ei_guess,deltaE_ws_sample) in enumerate(zip(AllEn,chunk_results)):
+            # the chunk has been reduced and saved by a worker process
+            PropertyManager.incident_energy.set_current_ind(ind)
+            self.prop_man.log("*** Multirep chunk: #{0}/{1} for provisional energy: {2} meV reduced in separate process".
+                              format(ind + 1,num_ei_cuts,ei_guess),'notice')
+            self._old_runs_list.append(deltaE_ws_sample.name())
+        return chunk_results
+
 #------------------------------------------------------------------------------------------
     # Handles cleanup of the convert_to_energy method
 
@@ -1305,6 +1394,14 @@ class DirectEnergyConversion(object):
             raise KeyError("Property manager can be initialized by an instance of ProperyManager only")
     #########
 
+    @property
+    def diag_reason_codes(self):
+        """ Reason codes (sums of the diagnostics module constants) of the spectra failed by
+            the last vectorised diagnostics run, indexed by workspace index.
+            None if the vectorised diagnostics have not been run."""
+        return self._diag_reason_codes
+    #########
+
     @property
     def spectra_masks(self):
         """ The property keeps a workspace with masks workspace name,
@@ -1545,6 +1642,7 @@ class DirectEnergyConversion(object):
         object.__setattr__(self,'_keep_wb_workspace',True)
         object.__setattr__(self,'_do_ISIS_reduction',True)
         object.__setattr__(self,'_spectra_masks',None)
+        object.__setattr__(self,'_diag_reason_codes',None)
         # if normalized by monitor-2, range have to be established before
         # shifting the instrument
         object.__setattr__(self,'_mon2_norm_time_range',None)
@@ -1557,6 +1655,9 @@ class DirectEnergyConversion(object):
         # workspace
         # processed
         object.__setattr__(self,'_multirep_mode',False)
+        # indexes of the multirep chunks to reduce. None -- all. Set in
+        # worker processes, reducing one chunk each
+        object.__setattr__(self,'_chunks_to_reduce',None)
         # list of workspace names, processed earlier
         object.__setattr__(self,'_old_runs_list',[])
 
@@ -1839,7 +1940,6 @@ class DirectEnergyConversion(object):
            workspace in question or using cashed value
         """
         run = self.get_run_descriptor(run)
-        white_ws = run.get_workspace()
         # This both integrates the workspace into one bin spectra and sets up
         # common bin boundaries for all spectra
         done_Log = 'DET_EFFICIENCY_calculated'
@@ -1867,6 +1967,21 @@ class DirectEnergyConversion(object):
         #end
         done_log_VAL = self._build_white_tag()
 
+        # Check if the work has been done by an earlier reduction. The run is not loaded in this case
+        wb_cache = self._get_wb_cache()
+        cache_key = self._wb_integrals_key(run)
+        if wb_cache is not None:
+            white_ws = wb_cache.load_integrals(cache_key,new_ws_name)
+            if white_ws is not None:
+                self.prop_man.log("do_white: white beam integrals for run(s) {0} are loaded from cache {1}".
+                                  format(run.get_run_list(),self.wb_cache_dir),'information')
+                run.synchronize_ws(white_ws)
+                if self._keep_wb_workspace:
+                    result = run.get_ws_clone()
+                else:
+                    result = run.get_workspace()
+                return result
+
         # Normalize
         self.__in_white_normalization = True
         white_ws = self.normalise(run, self.normalise_method,0.0)
@@ -1889,6 +2004,8 @@ class DirectEnergyConversion(object):
         # Why aren't we doing this...-> because integration does not work properly for event workspaces
         #Integration(white_ws, white_ws, RangeLower=low, RangeUpper=upp)
         AddSampleLog(white_ws,LogName = done_Log,LogText=done_log_VAL,LogType='String')
+        if wb_cache is not None:
+            wb_cache.save_integrals(cache_key,white_ws)
         run.synchronize_ws(white_ws)
         if self._keep_wb_workspace:
             result = run.get_ws_clone()
@@ -1897,6 +2014,22 @@ class DirectEnergyConversion(object):
         return result
 #-------------------------------------------------------------------------------
 
+    def _get_wb_cache(self):
+        """Return persistent cache of white beam integrals and masks or None if it is disabled"""
+        cache_dir = self.wb_cache_dir
+        if cache_dir is None:
+            return None
+        return WhiteBeamCache(cache_dir,self.wb_cache_size)
+
+    def _wb_integrals_key(self,run):
+        """Key of white beam integrals of the run in the persistent cache"""
+        run_list = run.get_run_list()
+        if self.sum_runs and len(run_list) > 1:
+            run_list = ['sum'] + run_list
+        return WhiteBeamCache.integrals_key(self.prop_man.short_inst_name,run_list,self.det_cal_file,
+                                            self.normalise_method,self.wb_integr_range)
+#-------------------------------------------------------------------------------
+
     def _build_white_tag(self):
         """build tag indicating wb-integration ranges """
         low,upp = self.wb_integr_range
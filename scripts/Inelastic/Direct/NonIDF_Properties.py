@@ -64,6 +64,10 @@ class NonIDF_Properties(object):
         super(NonIDF_Properties,self).__setattr__('_tmp_run',None)
         super(NonIDF_Properties,self).__setattr__('_cashe_sum_ws',False)
         super(NonIDF_Properties,self).__setattr__('_mapmask_ref_ws',None)
+        super(NonIDF_Properties,self).__setattr__('_wb_cache_dir',None)
+        super(NonIDF_Properties,self).__setattr__('_wb_cache_size',1024)
+        super(NonIDF_Properties,self).__setattr__('_multirep_processes',1)
+        super(NonIDF_Properties,self).__setattr__('_vectorised_diag',False)
 
     #end
     def log(self, msg,level="notice"):
@@ -178,6 +182,70 @@ class NonIDF_Properties(object):
     @mapmask_ref_ws.setter
     def mapmask_ref_ws(self,val):
         object.__setattr__(self,'_mapmask_ref_ws',val)
+    # -----------------------------------------------------------------------------
+
+    @property
+    def wb_cache_dir(self):
+        """Folder to keep white beam integrals and white beam masks between reductions.
+
+           Integrals and masks are reused by any later reduction of the same vanadium run(s)
+           with the same calibration, normalization and integration range.
+           None (default) disables the cache.
+        """
+        return self._wb_cache_dir
+
+    @wb_cache_dir.setter
+    def wb_cache_dir(self,val):
+        if val is not None and len(str(val)) == 0:
+            val = None
+        object.__setattr__(self,'_wb_cache_dir',val)
+    # -----------------------------------------------------------------------------
+
+    @property
+    def multirep_processes(self):
+        """Number of processes reducing the incident energies of a multirep run in parallel.
+
+           Each process loads the sample run again, so this helps if the reduction of an energy
+           takes longer than loading the run. The diagnostics is performed once and its masks are
+           used by all processes. The reduction script has to run by a python interpreter
+           (not from MantidPlot) and the runs have to be given by numbers or file names.
+        """
+        return self._multirep_processes
+
+    @multirep_processes.setter
+    def multirep_processes(self,val):
+        val = int(val)
+        if val < 1:
+            raise ValueError("Number of multirep processes should be at least 1 but got {0}".format(val))
+        object.__setattr__(self,'_multirep_processes',val)
+    # -----------------------------------------------------------------------------
+
+    @property
+    def vectorised_diag(self):
+        """If True, the white beam, zero count and background diagnostics tests are applied to
+           the integrals read into numpy arrays and the failed spectra are masked at once,
+           instead of running the chain of Mantid algorithms. The masks found are the same.
+        """
+        return self._vectorised_diag
+
+    @vectorised_diag.setter
+    def vectorised_diag(self,val):
+        object.__setattr__(self,'_vectorised_diag',bool(val))
+    # -----------------------------------------------------------------------------
+
+    @property
+    def wb_cache_size(self):
+        """Maximal size (in MB) of the white beam cache folder. The least recently used
+           entries are deleted when the cache grows larger than that.
+        """
+        return self._wb_cache_size
+
+    @wb_cache_size.setter
+    def wb_cache_size(self,val):
+        val = float(val)
+        if val <= 0:
+            raise ValueError("White beam cache size should be positive but got {0}".format(val))
+        object.__setattr__(self,'_wb_cache_size',val)
 
     # -----------------------------------------------------------------------------
     # Service properties (used by class itself)
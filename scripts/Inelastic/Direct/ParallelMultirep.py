@@ -0,0 +1,184 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+""" Reduction of the incident energies of a multirep run in separate processes.
+
+    The reduction properties are held by class-level descriptors of the PropertyManager,
+    which also keeps the incident energy being processed, so the energy chunks can not
+    be reduced concurrently within one process. Instead, each chunk is reduced by a new
+    python process, running this module as a script. The process loads the sample run,
+    applies the masks found by the diagnostics of the calling process, reduces and saves
+    (in the requested formats) its chunk, and returns the result in a processed nexus file.
+"""
+from __future__ import (absolute_import, division, print_function)
+from mantid.simpleapi import *
+from mantid import config
+from mantid.kernel.environment import python_interpreter, python_subprocess_environment
+from multiprocessing.pool import ThreadPool
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+from six import string_types
+
+# run properties which are passed to the worker processes. Diagnostics runs are not needed there
+RUN_PROPERTIES = ['sample_run', 'wb_run', 'monovan_run', 'wb_for_monovan_run']
+NOT_PASSED_PROPERTIES = ['mask_run', 'second_white', 'incident_energy', 'multirep_processes']
+CONFIG_KEYS = ['datasearch.directories', 'defaultsave.directory', 'default.facility', 'default.instrument']
+
+
+def _is_plain(value):
+    """Check if the value can be passed to the worker process"""
+    if value is None or isinstance(value, (bool, int, float) + string_types):
+        return True
+    if isinstance(value, (list, tuple, set)):
+        return all(_is_plain(val) for val in value)
+    return False
+
+
+def _run_source(run):
+    """Return the file or the list of run numbers the run can be loaded from in another process"""
+    run_list = run.get_run_list()
+    if not run_list or None in run_list or 0 in run_list:
+        return None
+    if len(run_list) > 1:
+        return list(run_list)
+    return run.get_run_file_list()[0]
+
+
+def build_worker_settings(reducer, masking):
+    """Collect the settings the worker processes need to reduce the chunks as the reducer does.
+
+       Returns the settings and the empty string or None and the reason, why a property
+       can not be passed to another process.
+    """
+    prop_man = reducer.prop_man
+    PropertyManager = type(prop_man)
+    properties = {}
+    for name in prop_man.getChangedProperties():
+        if name in NOT_PASSED_PROPERTIES or name in RUN_PROPERTIES:
+            continue
+        value = getattr(prop_man, name)
+        if not _is_plain(value):
+            return None, 'property {0} is not a number, string or list'.format(name)
+        if isinstance(value, set):
+            value = list(value)
+        properties[name] = value
+    for name in RUN_PROPERTIES:
+        run = getattr(PropertyManager, name)
+        if getattr(prop_man, name) is None:
+            continue
+        source = _run_source(run)
+        if source is None:
+            return None, '{0} is a workspace, which is not stored in a file'.format(name)
+        properties[name] = source
+    # use the energies of the calling process to get the same chunks even in the autoEi mode
+    properties['incident_energy'] = list(PropertyManager.incident_energy.getAllEiList())
+
+    if masking is None:
+        masked_detectors = None
+    else:
+        __tmp_masks, masked_detectors = ExtractMask(InputWorkspace=masking)
+        DeleteWorkspace(__tmp_masks)
+        masked_detectors = [int(det_id) for det_id in masked_detectors]
+
+    settings = {'instrument': prop_man.instr_name,
+                'properties': properties,
+                'masked_detectors': masked_detectors,
+                'config': dict((key, config[key]) for key in CONFIG_KEYS)}
+    return settings, ''
+
+
+def reduce_in_processes(reducer, masking, num_ei_cuts, nprocesses):
+    """Reduce all energy chunks of the current sample run in nprocesses python processes
+
+       Returns the list of the resulting workspaces or None if the chunks can not be reduced
+       in separate processes. In this case they have to be reduced by the caller.
+    """
+    prop_man = reducer.prop_man
+    python = python_interpreter()
+    if python is None:
+        prop_man.log("*** Can not find python interpreter to start multirep worker processes. "
+                     "Reducing multirep chunks one by one", 'warning')
+        return None
+    settings, reason = build_worker_settings(reducer, masking)
+    if settings is None:
+        prop_man.log("*** Multirep chunks can not be reduced in separate processes as {0}. "
+                     "Reducing them one by one".format(reason), 'warning')
+        return None
+
+    work_dir = tempfile.mkdtemp(prefix='multirep')
+    try:
+        settings_file = os.path.join(work_dir, 'settings.pkl')
+        with open(settings_file, 'wb') as fhandle:
+            pickle.dump(settings, fhandle, 2)
+        script = os.path.splitext(os.path.abspath(__file__))[0] + '.py'
+        env = python_subprocess_environment()
+
+        def run_worker(ind):
+            return subprocess.call([python, script, settings_file, str(ind)], env=env)
+
+        prop_man.log("*** Reducing {0} multirep chunks in {1} processes".format(num_ei_cuts, nprocesses), 'notice')
+        pool = ThreadPool(min(nprocesses, num_ei_cuts))
+        try:
+            exit_codes = pool.map(run_worker, range(num_ei_cuts))
+        finally:
+            pool.terminate()
+            pool.join()
+        failed = [ind + 1 for ind, code in enumerate(exit_codes) if code != 0]
+        if failed:
+            raise RuntimeError("Reduction of multirep chunk(s) {0} of {1} failed. "
+                               "See the output of the worker processes for details".format(failed, num_ei_cuts))
+
+        results = []
+        for ind in range(num_ei_cuts):
+            with open(_result_file(work_dir, ind, '.pkl'), 'rb') as fhandle:
+                ws_name = pickle.load(fhandle)
+            results.append(LoadNexusProcessed(Filename=_result_file(work_dir, ind, '.nxs'),
+                                              OutputWorkspace=ws_name))
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _result_file(work_dir, ind, ext):
+    return os.path.join(work_dir, 'chunk{0}{1}'.format(ind, ext))
+
+
+def reduce_chunk(settings_file, ind):
+    """Worker process: reduce energy chunk number ind with the settings stored in the file"""
+    from Direct.DirectEnergyConversion import DirectEnergyConversion
+
+    with open(settings_file, 'rb') as fhandle:
+        settings = pickle.load(fhandle)
+    for key, val in settings['config'].items():
+        config[key] = val
+
+    reducer = DirectEnergyConversion(settings['instrument'])
+    reducer.prop_man.set_input_parameters(**settings['properties'])
+    masked_detectors = settings['masked_detectors']
+    if masked_detectors is None:
+        reducer.prop_man.run_diagnostics = False
+    else:
+        sample_ws = type(reducer.prop_man).sample_run.get_workspace()
+        masks, _ = ExtractMask(InputWorkspace=sample_ws, OutputWorkspace='multirep_worker_masks')
+        if len(masked_detectors) > 0:
+            MaskDetectors(Workspace=masks, DetectorList=masked_detectors)
+        reducer.spectra_masks = masks
+    reducer._chunks_to_reduce = [ind]
+
+    result = reducer.convert_to_energy()
+    result_ws = result[0]
+    work_dir = os.path.dirname(settings_file)
+    SaveNexusProcessed(InputWorkspace=result_ws, Filename=_result_file(work_dir, ind, '.nxs'))
+    with open(_result_file(work_dir, ind, '.pkl'), 'wb') as fhandle:
+        pickle.dump(result_ws.name(), fhandle, 2)
+
+
+if __name__ == '__main__':
+    reduce_chunk(sys.argv[1], int(sys.argv[2]))
@@ -342,7 +342,8 @@ class PropertyManager(NonIDF_Properties):
                           'van_out_lo':0.01, 'van_out_hi':100., 'van_lo':0.1, 'van_hi':1.5, 'van_sig':0.0, 'variation':1.1,
                           'bleed_test':False,'bleed_pixels':0,'bleed_maxrate':0,
                           'hard_mask_file':None,'use_hard_mask_only':False,'background_test_range':None,
-                          'instr_name':'','print_diag_results':True,'mapmask_ref_ws':None}
+                          'instr_name':'','print_diag_results':True,'mapmask_ref_ws':None,
+                          'vectorised_diag':False}
         result = {}
 
         for key,val in iteritems(diag_param_list):
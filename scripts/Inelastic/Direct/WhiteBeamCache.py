@@ -0,0 +1,166 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+""" Persistent cache of white beam vanadium integrals and of the masks obtained
+    by the white beam vanadium diagnostics.
+
+    The integrals are stored as processed nexus files and the masks as the lists
+    of masked detector ID-s in a cache folder. Entries are keyed by
+    the instrument, the vanadium run(s), the detector calibration, the normalization
+    method and the integration range, so an entry is reused by another reduction
+    session or by another reduction script only if it was obtained from the same data.
+    When the total size of the cache exceeds the limit, the least recently used
+    entries are deleted.
+"""
+from __future__ import (absolute_import, division, print_function)
+from mantid.simpleapi import *
+from mantid import api
+import hashlib
+import os
+import numpy as np
+from six import iteritems
+
+# diagnostics parameters, which define the white beam vanadium mask
+WHITE_MASK_PARAMETERS = ['tiny', 'huge', 'van_out_lo', 'van_out_hi', 'van_lo', 'van_hi', 'van_sig',
+                         'hard_mask_file']
+
+
+class WhiteBeamCache(object):
+    """Store and retrieve white beam integrals and white beam masks in a folder"""
+    INTEGRALS_EXT = '.nxs'
+    MASK_EXT = '.npy'
+
+    def __init__(self, cache_dir, max_size_mb):
+        self._cache_dir = cache_dir
+        self._max_size = int(max_size_mb * 1024 * 1024)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def integrals_key(inst_name, run_list, det_cal_file, normalise_method, wb_integr_range):
+        """Build the key of white beam integrals or None if they can not be identified reliably
+
+           The integrals of a workspace without run number or calibrated by a workspace are not cached.
+        """
+        if not run_list or None in run_list or 0 in run_list:
+            return None
+        if isinstance(det_cal_file, api.Workspace):
+            return None
+        cal_source = str(det_cal_file)
+        if det_cal_file is not None and os.path.isfile(cal_source):
+            # the calibration file may be changed without changing its name
+            cal_source = '{0}:{1}:{2}'.format(os.path.abspath(cal_source), os.path.getsize(cal_source),
+                                              os.path.getmtime(cal_source))
+        low, upp = wb_integr_range
+        key = 'Inst:{0}_Runs:{1}_Cal:{2}_NormBy:{3}_IntegratedIn:{4!r}:{5!r}'.format(
+            inst_name, ','.join(str(run) for run in run_list), cal_source, normalise_method, low, upp)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def mask_key(integrals_key, diag_params, diag_spectra):
+        """Build the key of the white beam mask obtained from the integrals with key provided"""
+        if integrals_key is None:
+            return None
+        params = dict((name, diag_params.get(name, None)) for name in WHITE_MASK_PARAMETERS)
+        hard_mask = params['hard_mask_file']
+        if hard_mask is not None and os.path.isfile(str(hard_mask)):
+            params['hard_mask_file'] = '{0}:{1}'.format(hard_mask, os.path.getmtime(hard_mask))
+        key = '{0}_{1}_Spectra:{2}'.format(integrals_key, sorted(iteritems(params)), diag_spectra)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def load_integrals(self, key, ws_name):
+        """Load cached integrals into workspace with the name provided. Return None if they are not cached"""
+        file_name = self._file_name(key, self.INTEGRALS_EXT)
+        if key is None or not os.path.isfile(file_name):
+            return None
+        try:
+            ws = LoadNexusProcessed(Filename=file_name, OutputWorkspace=ws_name)
+        except (RuntimeError, ValueError):
+            # file damaged or written by another version
+            self._remove(file_name)
+            return None
+        self._touch(file_name)
+        return ws
+
+    def save_integrals(self, key, ws):
+        """Store white beam integrals workspace under the key provided"""
+        if key is None:
+            return
+        file_name = self._file_name(key, self.INTEGRALS_EXT)
+        # write to a temporary file first, so other sessions never load a partially written file
+        tmp_name = file_name + '.tmp' + self.INTEGRALS_EXT
+        SaveNexusProcessed(InputWorkspace=ws, Filename=tmp_name)
+        self._replace(tmp_name, file_name)
+        self._evict()
+
+    def load_mask(self, key):
+        """Return array of masked detector ID-s or None if the mask is not cached"""
+        file_name = self._file_name(key, self.MASK_EXT)
+        if key is None or not os.path.isfile(file_name):
+            return None
+        try:
+            det_ids = np.load(file_name)
+        except (IOError, ValueError):
+            self._remove(file_name)
+            return None
+        self._touch(file_name)
+        return det_ids
+
+    def save_mask(self, key, mask_ws):
+        """Store the ID-s of the detectors masked in the workspace provided under the key provided"""
+        if key is None:
+            return
+        __tmp_masks, det_ids = ExtractMask(InputWorkspace=mask_ws)
+        DeleteWorkspace(__tmp_masks)
+        file_name = self._file_name(key, self.MASK_EXT)
+        tmp_name = file_name + '.tmp' + self.MASK_EXT
+        np.save(tmp_name, np.asarray(det_ids, dtype=np.int64))
+        self._replace(tmp_name, file_name)
+        self._evict()
+
+    def _file_name(self, key, ext):
+        return os.path.join(self._cache_dir, '{0}{1}'.format(key, ext))
+
+    @staticmethod
+    def _touch(file_name):
+        """Mark an entry as recently used"""
+        try:
+            os.utime(file_name, None)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _replace(tmp_name, file_name):
+        """Move written file in place. Rename does not overwrite existing files on Windows"""
+        if os.path.isfile(file_name):
+            WhiteBeamCache._remove(file_name)
+        os.rename(tmp_name, file_name)
+
+    @staticmethod
+    def _remove(file_name):
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Delete the least recently used entries until the cache fits its size limit"""
+        entries = []
+        for name in os.listdir(self._cache_dir):
+            if not (name.endswith(self.INTEGRALS_EXT) or name.endswith(self.MASK_EXT)) or '.tmp' in name:
+                continue
+            file_name = os.path.join(self._cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(file_name), os.path.getsize(file_name), file_name))
+            except OSError:
+                # removed by another session
+                pass
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, file_name in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            self._remove(file_name)
+            total_size -= size
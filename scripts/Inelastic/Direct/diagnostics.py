@@ -21,12 +21,23 @@ from __future__ import (absolute_import, division, print_function)
 from mantid.simpleapi import *
 from mantid.kernel.funcinspect import lhs_info
 import os
+import sys
+import numpy as np
 import Direct.RunDescriptor as RunDescriptor
 from Direct.PropertyManager import PropertyManager
 from six import iteritems
 # Reference to reducer used if necessary for working with run descriptors (in diagnostics)
 __Reducer__ = None
 
+# Reason codes of the spectra failed by the vectorised diagnostics. A spectrum failed by
+# several tests has the sum of their codes.
+MASKED_BEFORE = 1
+WHITE_LIMITS = 2
+WHITE_MEDIAN = 4
+ZERO_COUNTS = 8
+BACKGROUND = 16
+BLEED = 32
+
 
 def diagnose(white_int,**kwargs):
     """
@@ -66,6 +77,14 @@ def diagnose(white_int,**kwargs):
           bleed_pixels - If the bleed test is on then this is the number of pixels ignored within the
                          bleed test diagnostic
           print_diag_results - If True then the results are printed to the screen
+          vectorised_diag - If True then the white beam, zero count and background tests are applied to
+                       the integrals in numpy arrays and the failed spectra are masked once at the end
+
+        Returns the white beam mask workspace. With vectorised_diag, returns it together with the
+        boolean array of the failed spectra and the array of their reason codes (the sum of
+        MASKED_BEFORE, WHITE_LIMITS, WHITE_MEDIAN, ZERO_COUNTS and BACKGROUND for the tests each
+        spectrum failed) for the spectra from start_index to end_index. The spectra failed by the
+        bleed test only are masked, but not included in these arrays.
     """
     if white_int is None and str(white_int) != '':
         raise RuntimeError("No white beam integral specified. This is the minimum required to run diagnostics")
@@ -92,6 +111,7 @@ def diagnose(white_int,**kwargs):
         van_mask  = None
     else: # prepare workspace to keep white mask
         white_mask = None
+        num_failed = 0
         van_mask = CloneWorkspace(white_int)
 
     if hardmask_file is not None:
@@ -110,7 +130,11 @@ def diagnose(white_int,**kwargs):
         test_results['Hard mask:'] = [os.path.basename(parser.hard_mask_file),len(masked_list)]
         DeleteWorkspace('hard_mask_ws')
 
-    if not parser.use_hard_mask_only :
+    vectorised = getattr(parser, 'vectorised_diag', False) and not parser.use_hard_mask_only
+    if vectorised:
+        failed, reasons = do_vectorised_tests(white_int, van_mask, white_mask is not None, num_failed, parser,
+                                              test_results)
+    elif not parser.use_hard_mask_only :
         # White beam Test
         if white_mask:
             test_results['First detector vanadium test:'] = ['white_mask cache global', num_failed]
@@ -189,11 +213,207 @@ def diagnose(white_int,**kwargs):
 
     if hasattr(parser, 'print_diag_results') and parser.print_diag_results:
         print_test_summary(test_results,testName)
+    if vectorised:
+        return van_mask, failed, reasons
     return van_mask
 
 #-------------------------------------------------------------------------------
 
 
+def do_vectorised_tests(white_int, van_mask, white_mask_known, num_white_masked, parser, test_results):
+    """
+    Run the white beam, zero count and background tests on the integrals read into numpy arrays
+    and mask the failed spectra of white_int (and of van_mask for the white beam tests) at the end.
+
+    The tests find the same spectra (and report the same numbers of failures) as the chain of
+    do_white_test, FindDetectorsOutsideLimits and do_background_test algorithms. The bleed test
+    needs whole spectra of the sample run, so it is still done by the CreatePSDBleedMask algorithm.
+    """
+    if hasattr(parser, 'second_white'):
+        raise NotImplementedError("Second detector vanadium test")
+    start_index, end_index = parser.start_index, parser.end_index
+    white = read_integrals(white_int, start_index, end_index)
+    sample_counts = None
+    if getattr(parser, 'sample_counts', None) is not None and getattr(parser, 'samp_zero', False):
+        sample_counts = read_integrals(parser.sample_counts, start_index, end_index)
+    background = None
+    if hasattr(parser, 'background_int'):
+        background = read_integrals(parser.background_int, start_index, end_index)
+    failed, reasons, failures = vectorised_tests(white, sample_counts, background, parser, not white_mask_known)
+
+    label = 'vectorised'
+    if white_mask_known:
+        test_results['First detector vanadium test:'] = ['white_mask cache global', num_white_masked]
+    else:
+        test_results['First detector vanadium test:'] = [label, failures['white']]
+    if sample_counts is not None:
+        test_results['Zero total count sample check:'] = [label, failures['zero_counts']]
+    if background is not None:
+        test_results['Background test:'] = [label, failures['zero_counts'] + failures['background']]
+
+    first = 0 if start_index is None else start_index
+    newly_failed = failed & (reasons & MASKED_BEFORE == 0)
+    if van_mask is not None:
+        white_failed = np.flatnonzero(newly_failed & (reasons & (WHITE_LIMITS | WHITE_MEDIAN) != 0)) + first
+        if len(white_failed) > 0:
+            MaskDetectors(Workspace=van_mask, WorkspaceIndexList=white_failed)
+    failed_indices = np.flatnonzero(newly_failed) + first
+
+    # Bleed test (bleed test in multirep mode calculated per TOF region)
+    if hasattr(parser, 'bleed_test') and parser.bleed_test and not PropertyManager.incident_energy.multirep_mode():
+        if not hasattr(parser, 'sample_run'):
+            raise RuntimeError("Bleed test requested but the sample_run keyword has not been provided")
+        __bleed_masks, bleed_failures = do_bleed_test(parser.sample_run, parser.bleed_maxrate, parser.bleed_pixels)
+        test_results['PSD Bleed test:'] = [label, bleed_failures]
+        bleed_failed = np.flatnonzero(__bleed_masks.extractY()[:, 0] > 0.5)
+        DeleteWorkspace(__bleed_masks)
+        failed_indices = np.union1d(failed_indices, bleed_failed)
+
+    if len(failed_indices) > 0:
+        MaskDetectors(Workspace=white_int, WorkspaceIndexList=failed_indices)
+    return failed, reasons
+
+
+def read_integrals(integrals, start_index=None, end_index=None):
+    """
+    Read the integrated counts, their errors, masked and monitor flags of the spectra
+    in the range from a single bin workspace into numpy arrays
+    """
+    if isinstance(integrals, str):
+        integrals = mtd[integrals]
+    first = 0 if start_index is None else start_index
+    last = integrals.getNumberHistograms() - 1 if end_index is None else end_index
+    values = integrals.extractY()[first:last + 1, 0].copy()
+    errors = integrals.extractE()[first:last + 1, 0].copy()
+    # as the algorithms do, use masking only if the instrument is complete
+    instrument = integrals.getInstrument()
+    if instrument is not None and instrument.getSource() is not None and instrument.getSample() is not None:
+        masked = masked_spectra(integrals)[first:last + 1]
+        monitors = monitor_spectra(integrals)[first:last + 1]
+    else:
+        masked = np.zeros(len(values), dtype=bool)
+        monitors = np.zeros(len(values), dtype=bool)
+    return values, errors, masked, monitors
+
+
+def masked_spectra(workspace):
+    """
+    Boolean array of the spectra of a workspace with masked detectors, found by ExtractMask
+    """
+    mask_ws, _ = ExtractMask(InputWorkspace=workspace, StoreInADS=False)
+    return mask_ws.extractY()[:, 0] > 0.5
+
+
+def monitor_spectra(workspace):
+    """
+    Boolean array of the monitor spectra of a single bin workspace with a complete instrument.
+
+    FindDetectorsOutsideLimits skips the monitors, so with the largest possible low threshold
+    it fails every spectrum but the monitors.
+    """
+    mask_ws, _ = FindDetectorsOutsideLimits(InputWorkspace=workspace, LowThreshold=sys.float_info.max,
+                                            StoreInADS=False)
+    return mask_ws.extractY()[:, 0] < 0.5
+
+
+def vectorised_tests(white, sample_counts, background, parser, test_white=True):
+    """
+    Apply the white beam, zero count and background criteria to the integrals.
+
+    white, sample_counts and background are tuples of values, errors, masked and monitor flags
+    as returned by read_integrals for the same spectra. sample_counts and background may be None
+    if the tests are not requested. Returns the boolean array of the failed spectra, the array of
+    reason codes and the dictionary with the numbers of failures reported by each test.
+    """
+    values, errors, masked, monitors = white
+    reasons = np.where(masked, MASKED_BEFORE, 0).astype(np.uint8)
+    failures = {'white': 0, 'zero_counts': 0, 'background': 0}
+    if test_white:
+        failed, num_failed = find_outside_limits(values, masked, monitors, parser.tiny, parser.huge)
+        reasons[failed & ~masked] |= WHITE_LIMITS
+        masked = masked | failed
+        failed, failed_median = median_detector_test(np.where(masked, 0., values), np.where(masked, 0., errors),
+                                                     masked, monitors, parser.van_lo, parser.van_hi,
+                                                     parser.van_out_lo, parser.van_out_hi, parser.van_sig, False)
+        reasons[failed & ~masked] |= WHITE_MEDIAN
+        masked = masked | failed
+        failures['white'] = num_failed + failed_median
+    if sample_counts is not None:
+        counts, _, counts_masked, counts_monitors = sample_counts
+        counts_masked = counts_masked | masked
+        failed, failures['zero_counts'] = find_outside_limits(np.where(counts_masked, 0., counts), counts_masked,
+                                                              counts_monitors, 1e-10, 1e100)
+        reasons[failed & ~masked] |= ZERO_COUNTS
+        masked = masked | failed
+    if background is not None:
+        bkgd, bkgd_errors, bkgd_masked, bkgd_monitors = background
+        bkgd_masked = bkgd_masked | masked
+        failed, num_failed = median_detector_test(np.where(bkgd_masked, 0., bkgd),
+                                                  np.where(bkgd_masked, 0., bkgd_errors),
+                                                  bkgd_masked, bkgd_monitors, parser.samp_lo, parser.samp_hi,
+                                                  0.0, 1e100, parser.samp_sig, True)
+        reasons[failed & ~masked] |= BACKGROUND
+        masked = masked | failed
+        failures['background'] = abs(num_failed)
+    return masked, reasons, failures
+
+
+def find_outside_limits(values, masked, monitors, low, high):
+    """
+    Vectorised FindDetectorsOutsideLimits. Returns the failed spectra, including the masked ones,
+    and the number of them
+    """
+    with np.errstate(invalid='ignore'):
+        failed = masked | ~np.isfinite(values) | (values <= low)
+        if high is not None:
+            failed |= values >= high
+    failed &= ~monitors
+    return failed, int(np.count_nonzero(failed))
+
+
+def _median(values, excluded, exclude_zeroes):
+    """Median of the values of the spectra used by MedianDetectorTest"""
+    used = ~excluded
+    if np.any(values[used] < 0.0):
+        raise ValueError("Negative number of counts found, could be corrupted raw counts or solid angle data")
+    used &= np.isfinite(values)
+    if exclude_zeroes:
+        used &= values >= np.finfo(float).eps
+    if not np.any(used):
+        return 0.0
+    median = np.median(values[used])
+    if median > sys.float_info.max / 10.0:
+        raise ValueError("The calculated value for the median was either negative or unreliably large")
+    return median
+
+
+def median_detector_test(values, errors, masked, monitors, low, high, low_outlier, high_outlier, sigma,
+                         exclude_zeroes):
+    """
+    Vectorised MedianDetectorTest of the integrated counts. The values of the masked spectra are
+    expected to be zero, as MaskDetectors leaves them. Returns the failed spectra, including the
+    masked ones, and the number of failures counted as the algorithm does.
+    """
+    median = _median(values, masked | monitors, exclude_zeroes)
+    # masking outliers allows the median of the remaining spectra to be calculated better
+    num_failed = -int(np.count_nonzero((values == 0.) & masked))
+    with np.errstate(invalid='ignore'):
+        outliers = ((values < low_outlier * median) & (values > 0.0)) | (values > high_outlier * median)
+    num_failed += int(np.count_nonzero(outliers))
+    masked = masked | outliers
+    median = _median(values, masked | monitors, exclude_zeroes)
+
+    error = sigma * errors
+    with np.errstate(invalid='ignore'):
+        failed = ~np.isfinite(values) | ((values < median * low) & (values - median < -error)) |\
+            ((values > median * high) & (values - median > error))
+    failed &= ~masked & ~monitors
+    num_failed += int(np.count_nonzero(failed))
+    return masked | failed, num_failed
+
+#-------------------------------------------------------------------------------
+
+
 def add_masking(input_ws, mask_ws, start_index=None, end_index=None):
     """
     Mask the Detectors on the input workspace that are masked
@@ -459,14 +679,11 @@ def get_failed_spectra_list(diag_workspace):
     if isinstance(diag_workspace, str):
         diag_workspace = mtd[diag_workspace]
 
-    failed_spectra = []
-    spectrumInfo = diag_workspace.spectrumInfo()
-    for i in range(diag_workspace.getNumberHistograms()):
-        if spectrumInfo.hasDetectors(i):
-            if spectrumInfo.isMasked(i):
-                failed_spectra.append(diag_workspace.getSpectrum(i).getSpectrumNo())
-
-    return failed_spectra
+    masked = masked_spectra(diag_workspace)
+    spectra_axis = diag_workspace.getAxis(1)
+    if spectra_axis.isSpectra():
+        return [int(spectrum_no) for spectrum_no in spectra_axis.extractValues()[masked]]
+    return [diag_workspace.getSpectrum(int(ind)).getSpectrumNo() for ind in np.flatnonzero(masked)]
 
 #------------------------------------------------------------------------------
 
@@ -6,9 +6,8 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import numpy as np
 import math
-from Muon.MaxentTools.opus import OPUS
-from Muon.MaxentTools.tropus import TROPUS
-from Muon.MaxentTools.project import PROJECT
+from Muon.MaxentTools.zft import ZFT
+from Muon.MaxentTools.tropus import TROPUS, TROPUS_AB
 from Muon.MaxentTools.move import MOVE
 
 # translated from MAXENT.for
@@ -26,117 +25,167 @@ def warningMsg(values,name,mylog):
 
 def MAXENT(datum, sigma, flat, base, itermax, sumfix, SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol,
            DETECT_a, DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog):
-    npts, ngroups = datum.shape
+    (sigma, base, HERITAGE_iter, MAXPAGE_f, FAC_factor, FAC_facfake) = MAXENT_BATCH(
+        datum[np.newaxis], sigma[np.newaxis], flat, base[np.newaxis], itermax, sumfix, SAVETIME_ngo, MAXPAGE_n,
+        None if MAXPAGE_f is None else MAXPAGE_f[np.newaxis], PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e,
+        FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog)
+    return (sigma[0], base[0], int(HERITAGE_iter[0]), MAXPAGE_f[0], float(FAC_factor[0]), float(FAC_facfake[0]))
+
+
+# Solves several problems of the same size at once (different runs, or the same run with
+# different Factors). datum and sigma are [problem, npts, ngroups], base and MAXPAGE_f are
+# [problem, MAXPAGE_n]. PULSESHAPE_convol, DETECT_a, DETECT_b and DETECT_e are either shared,
+# or have a first axis for the problem. FAC_factor and FAC_facfake are scalars or one per problem.
+# If MAXPAGE_f is given the iterations are warm started from it, otherwise from the flat spectrum.
+# Each problem stops iterating when it has converged; the others carry on.
+def MAXENT_BATCH(datum, sigma, flat, base, itermax, sumfix, SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol,
+                 DETECT_a, DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog):
+    nprob, npts, ngroups = datum.shape
     p = npts*ngroups
-    xi = np.zeros([MAXPAGE_n, 3])
-    eta = np.zeros([npts, ngroups, 3])
+    sigma = np.array(sigma, dtype=float)  # MOVE may tighten it
+    FAC_factor = np.zeros([nprob]) + FAC_factor
+    FAC_facfake = np.zeros([nprob]) + FAC_facfake
+    # the instrument arrays, one per problem
+    convol = np.broadcast_to(PULSESHAPE_convol, (nprob, MAXPAGE_n))
+    a_det = np.broadcast_to(DETECT_a, (nprob, ngroups))
+    b_det = np.broadcast_to(DETECT_b, (nprob, ngroups))
+    e_det = np.broadcast_to(DETECT_e, (nprob, npts))
     #
-    SPACE_blank = flat
-    if(SPACE_blank != 0):
-        base = np.zeros([MAXPAGE_n])
-        base[:] = SPACE_blank
+    if(flat != 0):
+        base = np.zeros([nprob, MAXPAGE_n])
+        base[:] = flat
+        SPACE_blank = np.zeros([nprob]) + flat
     else:
-
-        SPACE_blank = np.mean(base)
+        SPACE_blank = np.mean(base, axis=1)
     SPACE_chizer = float(p)
-    SPACE_chtarg = SPACE_chizer
-    HERITAGE_iter = 0
-    m = 3
-    if(SAVETIME_ngo > 0):
-        HERITAGE_iter = 1
+    SPACE_chtarg = np.zeros([nprob]) + SPACE_chizer
+    if(SAVETIME_ngo > 0 or MAXPAGE_f is not None):
+        HERITAGE_iter = np.ones([nprob], dtype=int)
+        MAXPAGE_f = np.array(MAXPAGE_f, dtype=float)
     else:
+        HERITAGE_iter = np.zeros([nprob], dtype=int)
         MAXPAGE_f = np.array(base)
-    test = 99. # temporary for 1st test
-    SPACE_chisq = SPACE_chizer*2. # temporary for 1st test
-    mylog.debug("entering loop with spectrum from {0} to {1}".format(np.amin(MAXPAGE_f), np.amax(MAXPAGE_f)))
-    while( HERITAGE_iter <= itermax and (HERITAGE_iter <= 1 or not (test < 0.02 and abs(SPACE_chisq/SPACE_chizer-1) < 0.01) ) ): # label 6
-        mylog.debug("start loop, iter={} ngo={} test={} chisq={}".format(HERITAGE_iter, SAVETIME_ngo, test, SPACE_chisq/SPACE_chizer))
-        mylog.debug("entering loop with spectrum from {0} to {1}".format(np.amin(MAXPAGE_f), np.amax(MAXPAGE_f)))
-        ox = OPUS(MAXPAGE_f, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        warningMsg(ox,'ox',mylog)
-        mylog.debug("ox from {0} to {1}".format(np.amin(ox), np.amax(ox)))
-        a = ox-datum
-        SPACE_chisq = np.sum(a**2/sigma**2)
-        ox = 2*a/(sigma**2)
-        cgrad = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        warningMsg(cgrad,'cgrad',mylog)
-        mylog.debug("cgrad from {0} to {1}".format(np.amin(cgrad), np.amax(cgrad)))
-        SPACE_xsum = np.sum(MAXPAGE_f)
-        sgrad = -np.log(MAXPAGE_f/base)/SPACE_blank
-        warningMsg(sgrad,'sgrad',mylog)
-        mylog.debug("sgrad from {0} to {1}".format(np.amin(sgrad), np.amax(sgrad)))
-        snorm = math.sqrt(np.sum(sgrad**2*MAXPAGE_f))
-        cnorm = math.sqrt(np.sum(cgrad**2*MAXPAGE_f))
-        tnorm = np.sum(sgrad*cgrad*MAXPAGE_f)
-        mylog.debug("snorm={} cnorm={} tnorm={}".format(snorm, cnorm, tnorm))
-        a = 1.
-        b = 1./cnorm
-        c = 1./cnorm
-        if(HERITAGE_iter != 0):
-            test = math.sqrt(0.5*abs(1.-tnorm/(snorm*cnorm)))
-            # also eliminate NaNs!
-            if(test < 1.E-7 or not np.isfinite(test)):
-                test = 1.E-7
-            a = 1./(snorm*2.*test)
-            b = 1./(cnorm*2.*test)
-        else:
-            test = 0.
-        if( math.isnan(a) or math.isnan(b) or math.isnan(c)):
-            mylog.debug("aa={} b={} c={}".format(a, b, c))
-            raise ValueError("invalid value: a={} b={} c={}".format(a, b, c))
-        mylog.debug("a={} b={} c={}".format(a, b, c))
-        xi[:, 0] = MAXPAGE_f*c*cgrad
-        xi[:, 1] = MAXPAGE_f*(a*sgrad-b*cgrad)
-        warningMsg(xi[:,0],'xi[,0]',mylog)
-        warningMsg(xi[:,1],'xi[,1]',mylog)
+    test = np.zeros([nprob]) + 99.  # temporary for 1st test
+    SPACE_chisq = np.zeros([nprob]) + SPACE_chizer*2.  # temporary for 1st test
+    # OPUS(x) is the outer product of ZFT(x) with the group amplitudes, so only the real and imaginary
+    # parts of ZFT(x) are kept. Those of the spectrum are carried over from the previous iteration.
+    zr_f = np.zeros([nprob, npts])
+    zi_f = np.zeros([nprob, npts])
+    zft_f_valid = np.zeros([nprob], dtype=bool)
+    while(True):  # label 6
+        active = np.logical_and(HERITAGE_iter <= itermax, np.logical_or(HERITAGE_iter <= 1, np.logical_not(
+            np.logical_and(test < 0.02, np.abs(SPACE_chisq/SPACE_chizer-1) < 0.01))))
+        if(not np.any(active)):
+            break
+        ip = np.nonzero(active)[0]
+        iters = HERITAGE_iter[ip]
+        f = MAXPAGE_f[ip]
+        blank = SPACE_blank[ip]
+        convol_ip = convol[ip]
+        e_ip = e_det[ip]
+        a_ip = a_det[ip][:, np.newaxis, :]
+        b_ip = b_det[ip][:, np.newaxis, :]
+        weight = 1./sigma[ip]**2
+        stale = ip[np.logical_not(zft_f_valid[ip])]
+        if(len(stale) > 0):
+            zr_f[stale], zi_f[stale] = ZFT(MAXPAGE_f[stale], convol[stale], e_det[stale], SAVETIME_i2)
+        zr = zr_f[ip]
+        zi = zi_f[ip]
+        ox = zr[:, :, np.newaxis]*a_ip + zi[:, :, np.newaxis]*b_ip
+        warningMsg(ox, 'ox', mylog)
+        a = ox-datum[ip]
+        chisq = np.sum(a**2*weight, axis=(1, 2))
+        cgrad = TROPUS(2*a*weight, SAVETIME_i2, convol_ip, a_det[ip], b_det[ip], e_ip)
+        warningMsg(cgrad, 'cgrad', mylog)
+        xsum = np.sum(f, axis=1)
+        sgrad = -np.log(f/base[ip])/blank[:, np.newaxis]
+        warningMsg(sgrad, 'sgrad', mylog)
+        snorm = np.sqrt(np.sum(sgrad**2*f, axis=1))
+        cnorm = np.sqrt(np.sum(cgrad**2*f, axis=1))
+        tnorm = np.sum(sgrad*cgrad*f, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.sqrt(0.5*np.abs(1.-tnorm/(snorm*cnorm)))
+        # also eliminate NaNs!
+        t = np.where(np.logical_or(t < 1.E-7, np.logical_not(np.isfinite(t))), 1.E-7, t)
+        first = iters == 0
+        t = np.where(first, 0., t)
+        with np.errstate(divide='ignore'):
+            a = np.where(first, 1., 1./(snorm*2.*t))
+            b = np.where(first, 1./cnorm, 1./(cnorm*2.*t))
+            c = 1./cnorm
+        for k in range(len(ip)):
+            if(math.isnan(a[k]) or math.isnan(b[k]) or math.isnan(c[k])):
+                mylog.debug("aa={} b={} c={}".format(a[k], b[k], c[k]))
+                raise ValueError("invalid value: a={} b={} c={}".format(a[k], b[k], c[k]))
+        # the three search directions xi[problem, direction, frequency] and the parts of their transforms
+        xi = np.zeros([len(ip), 3, MAXPAGE_n])
+        eta_r = np.zeros([len(ip), 3, npts])
+        eta_i = np.zeros([len(ip), 3, npts])
+        xi[:, 0] = f*c[:, np.newaxis]*cgrad
+        xi[:, 1] = f*(a[:, np.newaxis]*sgrad-b[:, np.newaxis]*cgrad)
+        warningMsg(xi[:, 0], 'xi[,0]', mylog)
+        warningMsg(xi[:, 1], 'xi[,1]', mylog)
         if(sumfix):
-            PROJECT(0, MAXPAGE_n, xi)
-            PROJECT(1, MAXPAGE_n, xi)
-        eta[:,:, 0] = OPUS(xi[:, 0], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        eta[:,:, 1] = OPUS(xi[:, 1], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        warningMsg(eta[:,:, 0],"eta[,,0]",mylog)
-        warningMsg(eta[:,:, 1],"eta[,,1]",mylog)
-        ox = eta[:,:, 1]/(sigma**2)
-        xi[:, 2] = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        warningMsg(xi[:, 2],"xi[,2]", mylog)
-        a = 1./math.sqrt(np.sum(xi[:, 2]**2*MAXPAGE_f))
-        xi[:, 2] = xi[:, 2]*MAXPAGE_f*a
+            xi[:, :2] -= np.mean(xi[:, :2], axis=2)[:, :, np.newaxis]
+        eta_r[:, :2], eta_i[:, :2] = ZFT(xi[:, :2], convol_ip[:, np.newaxis], e_ip[:, np.newaxis], SAVETIME_i2)
+        # sums over the groups of the weighted products of the amplitudes
+        weight_aa = np.sum(a_ip**2*weight, axis=2)
+        weight_bb = np.sum(b_ip**2*weight, axis=2)
+        weight_ab = np.sum(a_ip*b_ip*weight, axis=2)
+        # the third direction depends on the transform of the second, so needs a separate FFT
+        xi2 = TROPUS_AB(eta_r[:, 1]*weight_aa + eta_i[:, 1]*weight_ab, eta_r[:, 1]*weight_ab + eta_i[:, 1]*weight_bb,
+                        SAVETIME_i2, convol_ip, e_ip)
+        warningMsg(xi2, "xi[,2]", mylog)
+        a = 1./np.sqrt(np.sum(xi2**2*f, axis=1))
+        xi[:, 2] = xi2*f*a[:, np.newaxis]
         if(sumfix):
-            PROJECT(2, MAXPAGE_n, xi)
-        eta[:,:, 2] = OPUS(xi[:, 2], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        warningMsg(eta[:,:, 2],"eta[,,2]",mylog)
+            xi[:, 2] -= np.mean(xi[:, 2], axis=1)[:, np.newaxis]
+        eta_r[:, 2], eta_i[:, 2] = ZFT(xi[:, 2], convol_ip, e_ip, SAVETIME_i2)
+        warningMsg(eta_r, "eta", mylog)
+        warningMsg(eta_i, "eta", mylog)
         # loop DO 17, DO 18
-        SPACE_s1 = np.dot(sgrad, xi)
-        SPACE_c1 = np.dot(cgrad, xi)/SPACE_chisq
-        # loops DO 19,DO 20, DO 21 harder to completely remove
-        SPACE_s2 = np.zeros([3, 3])
-        SPACE_c2 = np.zeros([3, 3])
-        for L in range(m):
-            for k in range(m):
-                if(L <= k):
-                    SPACE_s2[k, L] = -np.sum(xi[:, k]*xi[:, L]/MAXPAGE_f)/SPACE_blank
-                    SPACE_c2[k, L] = np.sum(eta[:,:, k]*eta[:,:, L]/sigma**2)*2./SPACE_chisq
-                else: # make symmetric
-                    SPACE_s2[k, L] = SPACE_s2[L, k]
-                    SPACE_c2[k, L] = SPACE_c2[L, k]
-        s = -np.sum(MAXPAGE_f*np.log(MAXPAGE_f/(base*math.e)))/(SPACE_blank*math.e) # spotted missing minus sign!
-        a = s*SPACE_blank*math.e/SPACE_xsum
-        mylog.notice("{:3}    {:10.4}  {:10.4}  {:10.4}  {:10.4}  {:10.4}".format(HERITAGE_iter,
-                     test, s, SPACE_chtarg, SPACE_chisq, SPACE_xsum))
-        SPACE_beta = np.array([-0.5*SPACE_c1[0]/SPACE_c2[0, 0], 0.0, 0.0])
-        warningMsg(SPACE_beta,"SPACE_beta", mylog)
-        if(HERITAGE_iter != 0):
-            (sigma, SPACE_chtarg, SPACE_beta, FAC_factor, FAC_facfake) = MOVE(
-                    sigma, SPACE_chisq, SPACE_chizer, SPACE_xsum, SPACE_c1, SPACE_c2, SPACE_s1,
-                    SPACE_s2, SPACE_blank, FAC_factor, FAC_facfake, mylog)
+        SPACE_s1 = np.matmul(xi, sgrad[:, :, np.newaxis])[:, :, 0]
+        SPACE_c1 = np.matmul(xi, cgrad[:, :, np.newaxis])[:, :, 0]/chisq[:, np.newaxis]
+        # loops DO 19, DO 20, DO 21 as matrix products
+        SPACE_s2 = -np.matmul(xi/f[:, np.newaxis, :], xi.transpose(0, 2, 1))/blank[:, np.newaxis, np.newaxis]
+        eta_r_t = eta_r.transpose(0, 2, 1)
+        eta_i_t = eta_i.transpose(0, 2, 1)
+        cross = np.matmul(eta_r*weight_ab[:, np.newaxis, :], eta_i_t)
+        SPACE_c2 = (np.matmul(eta_r*weight_aa[:, np.newaxis, :], eta_r_t) + cross + cross.transpose(0, 2, 1) +
+                    np.matmul(eta_i*weight_bb[:, np.newaxis, :], eta_i_t))*2./chisq[:, np.newaxis, np.newaxis]
+        s = -np.sum(f*np.log(f/(base[ip]*math.e)), axis=1)/(blank*math.e)  # spotted missing minus sign!
+        SPACE_beta = np.zeros([len(ip), 3])
+        SPACE_beta[:, 0] = -0.5*SPACE_c1[:, 0]/SPACE_c2[:, 0, 0]
+        warningMsg(SPACE_beta, "SPACE_beta", mylog)
+        for k, i in enumerate(ip):
+            mylog.notice("{:3}    {:10.4}  {:10.4}  {:10.4}  {:10.4}  {:10.4}".format(iters[k],
+                         t[k], s[k], SPACE_chtarg[i], chisq[k], xsum[k]))
+            if(iters[k] != 0):
+                (sigma[i], SPACE_chtarg[i], SPACE_beta[k], FAC_factor[i], FAC_facfake[i]) = MOVE(
+                    sigma[i], chisq[k], SPACE_chizer, xsum[k], SPACE_c1[k], SPACE_c2[k], SPACE_s1[k],
+                    SPACE_s2[k], blank[k], FAC_factor[i], FAC_facfake[i], mylog)
         # do 23,24
-        MAXPAGE_f += np.dot(xi, SPACE_beta)
-        MAXPAGE_f = np.where(MAXPAGE_f < 0, 1.E-3*SPACE_blank, MAXPAGE_f)
-        a = np.sum(MAXPAGE_f)
+        f = f + np.matmul(SPACE_beta[:, np.newaxis, :], xi)[:, 0]
+        # the transforms are linear, so the transform of the new spectrum follows from those of the
+        # directions unless some of it had to be reset
+        clipped = np.any(f < 0, axis=1)
+        f = np.where(f < 0, 1.E-3*blank[:, np.newaxis], f)
+        zr = zr + np.matmul(SPACE_beta[:, np.newaxis, :], eta_r)[:, 0]
+        zi = zi + np.matmul(SPACE_beta[:, np.newaxis, :], eta_i)[:, 0]
         if(sumfix):
-            MAXPAGE_f /= a
+            a = np.sum(f, axis=1)[:, np.newaxis]
+            f /= a
+            zr /= a
+            zi /= a
+        MAXPAGE_f[ip] = f
+        zr_f[ip] = zr
+        zi_f[ip] = zi
+        zft_f_valid[ip] = np.logical_not(clipped)
+        test[ip] = t
+        SPACE_chisq[ip] = chisq
         # 50
-        HERITAGE_iter += 1
-        prog.report("chisq="+str(SPACE_chisq))
+        HERITAGE_iter[ip] += 1
+        for k in range(len(ip)):
+            prog.report("chisq="+str(chisq[k]))
 
     return (sigma, base, HERITAGE_iter, MAXPAGE_f, FAC_factor, FAC_facfake)
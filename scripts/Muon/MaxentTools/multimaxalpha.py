@@ -11,7 +11,7 @@ import numpy as np
 from Muon.MaxentTools.input import INPUT
 from Muon.MaxentTools.start import START
 from Muon.MaxentTools.back import BACK
-from Muon.MaxentTools.maxent import MAXENT
+from Muon.MaxentTools.maxent import MAXENT_BATCH
 from Muon.MaxentTools.deadfit import DEADFIT
 from Muon.MaxentTools.modbak import MODBAK
 from Muon.MaxentTools.modamp import MODAMP
@@ -23,65 +23,105 @@ def MULTIMAX(
       POINTS_nhists, POINTS_ngroups, POINTS_npts, CHANNELS_itzero, CHANNELS_i1stgood, CHANNELS_itotal, RUNDATA_res, RUNDATA_frames,
       GROUPING_group, DATALL_rdata, FAC_factor, SENSE_taud, MAXPAGE_n, filePHASE,
       PULSES_def, PULSES_npulse, FLAGS_fitdead, FLAGS_fixphase, SAVETIME_i2,
-      OuterIter, InnerIter, mylog, prog, phaseconvWS, TZERO_fine,deadDetectors):
+      OuterIter, InnerIter, mylog, prog, phaseconvWS, TZERO_fine,deadDetectors, MAXPAGE_f=None):
+    # MAXPAGE_f, if given, is the spectrum to start from, e.g. the result for a similar run
+    return MULTIMAX_SWEEP(
+        POINTS_nhists, POINTS_ngroups, POINTS_npts, CHANNELS_itzero, CHANNELS_i1stgood, CHANNELS_itotal, RUNDATA_res,
+        [RUNDATA_frames], GROUPING_group, [DATALL_rdata], [FAC_factor], [SENSE_taud], MAXPAGE_n, filePHASE,
+        PULSES_def, PULSES_npulse, FLAGS_fitdead, FLAGS_fixphase, SAVETIME_i2,
+        OuterIter, InnerIter, mylog, prog, [phaseconvWS], TZERO_fine, deadDetectors,
+        None if MAXPAGE_f is None else [MAXPAGE_f])[0]
+
+
+# Runs MULTIMAX for several problems sharing the grouping, time bins and pulse shape, e.g. a series
+# of runs or one run with several values of Factor. RUNDATA_frames, DATALL_rdata, FAC_factor, SENSE_taud,
+# phaseconvWS and MAXPAGE_f (if given) are lists with one entry per problem. The inner MAXENT iterations
+# of all the problems are done together. Returns a list with the MULTIMAX result of each problem.
+def MULTIMAX_SWEEP(
+      POINTS_nhists, POINTS_ngroups, POINTS_npts, CHANNELS_itzero, CHANNELS_i1stgood, CHANNELS_itotal, RUNDATA_res, RUNDATA_frames,
+      GROUPING_group, DATALL_rdata, FAC_factor, SENSE_taud, MAXPAGE_n, filePHASE,
+      PULSES_def, PULSES_npulse, FLAGS_fitdead, FLAGS_fixphase, SAVETIME_i2,
+      OuterIter, InnerIter, mylog, prog, phaseconvWS, TZERO_fine, deadDetectors, MAXPAGE_f=None):
     #
-    base = np.zeros([MAXPAGE_n])
-    (datum, sigma, corr, datt, MISSCHANNELS_mm, RUNDATA_fnorm, RUNDATA_hists, FAC_facfake, FAC_ratio) = INPUT(
-        POINTS_nhists, POINTS_ngroups, POINTS_npts, CHANNELS_itzero, CHANNELS_i1stgood, CHANNELS_itotal,
-        RUNDATA_res, RUNDATA_frames, GROUPING_group, DATALL_rdata, FAC_factor, SENSE_taud, mylog)
+    nprob = len(DATALL_rdata)
+    FAC_factor = list(FAC_factor)
+    SENSE_taud = list(SENSE_taud)
+    (datum, sigma, corr, datt, MISSCHANNELS_mm, RUNDATA_fnorm, RUNDATA_hists, FAC_facfake, FAC_ratio) = (
+        [None]*nprob for k in range(9))
+    (DETECT_a, DETECT_b, DETECT_c, DETECT_d, FASE_phase, SENSE_phi, AMPS_amp) = ([None]*nprob for k in range(7))
+    for i in range(nprob):
+        (datum[i], sigma[i], corr[i], datt[i], MISSCHANNELS_mm[i], RUNDATA_fnorm[i], RUNDATA_hists[i], FAC_facfake[i],
+         FAC_ratio[i]) = INPUT(
+            POINTS_nhists, POINTS_ngroups, POINTS_npts, CHANNELS_itzero, CHANNELS_i1stgood, CHANNELS_itotal,
+            RUNDATA_res, RUNDATA_frames[i], GROUPING_group, DATALL_rdata[i], FAC_factor[i], SENSE_taud[i], mylog)
 
     (DETECT_e, PULSESHAPE_convol) = START(
         POINTS_npts, PULSES_npulse, RUNDATA_res, MAXPAGE_n, TZERO_fine, mylog)
 
-    (datum, DETECT_a, DETECT_b, DETECT_d, FASE_phase) = BACK(
-        RUNDATA_hists, datum, sigma, DETECT_e, filePHASE, mylog)
+    for i in range(nprob):
+        (datum[i], DETECT_a[i], DETECT_b[i], DETECT_d[i], FASE_phase[i]) = BACK(
+            RUNDATA_hists[i], datum[i], sigma[i], DETECT_e, filePHASE, mylog)
+    base = np.zeros([nprob, MAXPAGE_n])
+    if(MAXPAGE_f is not None):
+        MAXPAGE_f = np.array(MAXPAGE_f, dtype=float)
     SAVETIME_ngo = -1
-    MAXPAGE_f = None
     for j in range(OuterIter):  # outer "alpha chop" iterations?
         SAVETIME_ngo = SAVETIME_ngo + 1
         mylog.information("CYCLE NUMBER=" + str(SAVETIME_ngo))
-        (sigma, base, HERITAGE_iter, MAXPAGE_f, FAC_factor, FAC_facfake) = MAXENT(
-            datum, sigma, PULSES_def, base, InnerIter, False,
-            SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, DETECT_a,
-            DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog)
+        # MAXPAGE_f is the result of the previous cycle, or the starting spectrum given
+        (sigma, base, HERITAGE_iter, MAXPAGE_f, FAC_factor, FAC_facfake) = MAXENT_BATCH(
+            np.array(datum), np.array(sigma), PULSES_def, base, InnerIter, False,
+            SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, np.array(DETECT_a),
+            np.array(DETECT_b), DETECT_e, np.array(FAC_factor), np.array(FAC_facfake), SAVETIME_i2, mylog, prog)
+        sigma = list(sigma)
+        FAC_factor = [float(x) for x in FAC_factor]
+        FAC_facfake = [float(x) for x in FAC_facfake]
 
-        if(FLAGS_fitdead):
-            (datum, corr, DETECT_c, DETECT_d, SENSE_taud) = DEADFIT(
-                datum, sigma, datt, DETECT_a, DETECT_b, DETECT_d, DETECT_e, RUNDATA_res, RUNDATA_frames, RUNDATA_fnorm, RUNDATA_hists,
-                MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog)
-        else:
-            (DETECT_c, DETECT_d) = MODBAK(RUNDATA_hists, datum, sigma, DETECT_a, DETECT_b,
-                                          DETECT_e, DETECT_d, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog)
+        for i in range(nprob):
+            if(FLAGS_fitdead):
+                (datum[i], corr[i], DETECT_c[i], DETECT_d[i], SENSE_taud[i]) = DEADFIT(
+                    datum[i], sigma[i], datt[i], DETECT_a[i], DETECT_b[i], DETECT_d[i], DETECT_e, RUNDATA_res,
+                    RUNDATA_frames[i], RUNDATA_fnorm[i], RUNDATA_hists[i],
+                    MAXPAGE_n, MAXPAGE_f[i], PULSESHAPE_convol, SAVETIME_i2, mylog)
+            else:
+                (DETECT_c[i], DETECT_d[i]) = MODBAK(RUNDATA_hists[i], datum[i], sigma[i], DETECT_a[i], DETECT_b[i],
+                                                    DETECT_e, DETECT_d[i], MAXPAGE_f[i], PULSESHAPE_convol, SAVETIME_i2,
+                                                    mylog)
 
-        if(FLAGS_fixphase):
-            (SENSE_phi, DETECT_a, DETECT_b, AMPS_amp) = MODAMP(RUNDATA_hists, datum, sigma,
-                                                               MISSCHANNELS_mm, FASE_phase, MAXPAGE_f, PULSESHAPE_convol, DETECT_e,
-                                                               SAVETIME_i2, mylog)
-        else:
-            (SENSE_phi, DETECT_a, DETECT_b, AMPS_amp) = MODAB(RUNDATA_hists, datum, sigma,
-                                                              MISSCHANNELS_mm, MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2, mylog)
-        # output per-iteration debug info
-        if(phaseconvWS):
-            offset = 0
-            for k in range(POINTS_ngroups+len(deadDetectors)):
-                phaseConvX_k = phaseconvWS.dataX(k)
-                phaseConvY_k = phaseconvWS.dataY(k)
-                if k+1 in deadDetectors:
-                    offset+=1
-                    phaseConvX_k[j + 1] = (j + 1) * 1.0
-                    phaseConvY_k[j + 1] = 0.0
-                else:
-                    phaseConvX_k[j + 1] = (j + 1) * 1.0
-                    phaseConvY_k[j + 1] = SENSE_phi[k-offset]
+            if(FLAGS_fixphase):
+                (SENSE_phi[i], DETECT_a[i], DETECT_b[i], AMPS_amp[i]) = MODAMP(
+                    RUNDATA_hists[i], datum[i], sigma[i], MISSCHANNELS_mm[i], FASE_phase[i], MAXPAGE_f[i],
+                    PULSESHAPE_convol, DETECT_e, SAVETIME_i2, mylog)
+            else:
+                (SENSE_phi[i], DETECT_a[i], DETECT_b[i], AMPS_amp[i]) = MODAB(
+                    RUNDATA_hists[i], datum[i], sigma[i], MISSCHANNELS_mm[i], MAXPAGE_f[i], PULSESHAPE_convol,
+                    DETECT_e, SAVETIME_i2, mylog)
+            # output per-iteration debug info
+            if(phaseconvWS[i]):
+                offset = 0
+                for k in range(POINTS_ngroups+len(deadDetectors)):
+                    phaseConvX_k = phaseconvWS[i].dataX(k)
+                    phaseConvY_k = phaseconvWS[i].dataY(k)
+                    if k+1 in deadDetectors:
+                        offset+=1
+                        phaseConvX_k[j + 1] = (j + 1) * 1.0
+                        phaseConvY_k[j + 1] = 0.0
+                    else:
+                        phaseConvX_k[j + 1] = (j + 1) * 1.0
+                        phaseConvY_k[j + 1] = SENSE_phi[i][k-offset]
 
-        prog.report((j + 1) * InnerIter, "")
+        prog.report((j + 1) * InnerIter * nprob, "")
                     # finished outer loop, jump progress bar
 
-    (OUTSPEC_test, OUTSPEC_guess) = OUTSPEC(datum, MAXPAGE_f, sigma, datt, CHANNELS_itzero, CHANNELS_itotal,
-                                            PULSESHAPE_convol, FAC_ratio, DETECT_a, DETECT_b, DETECT_d, DETECT_e, SAVETIME_i2,
-                                            RUNDATA_fnorm, mylog)
-
-    return (
-                            MISSCHANNELS_mm, RUNDATA_fnorm, RUNDATA_hists, MAXPAGE_f, FAC_factor, FAC_facfake, FAC_ratio,
-                            DETECT_a, DETECT_b, DETECT_c, DETECT_d, DETECT_e, PULSESHAPE_convol, SENSE_taud, FASE_phase, SAVETIME_ngo,
-                            AMPS_amp, SENSE_phi, OUTSPEC_test, OUTSPEC_guess)
+    results = []
+    for i in range(nprob):
+        (OUTSPEC_test, OUTSPEC_guess) = OUTSPEC(datum[i], MAXPAGE_f[i], sigma[i], datt[i], CHANNELS_itzero,
+                                                CHANNELS_itotal, PULSESHAPE_convol, FAC_ratio[i], DETECT_a[i],
+                                                DETECT_b[i], DETECT_d[i], DETECT_e, SAVETIME_i2, RUNDATA_fnorm[i],
+                                                mylog)
+        results.append((
+                            MISSCHANNELS_mm[i], RUNDATA_fnorm[i], RUNDATA_hists[i], MAXPAGE_f[i], FAC_factor[i],
+                            FAC_facfake[i], FAC_ratio[i], DETECT_a[i], DETECT_b[i], DETECT_c[i], DETECT_d[i], DETECT_e,
+                            PULSESHAPE_convol, SENSE_taud[i], FASE_phase[i], SAVETIME_ngo, AMPS_amp[i], SENSE_phi[i],
+                            OUTSPEC_test, OUTSPEC_guess))
+    return results
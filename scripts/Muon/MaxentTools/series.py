@@ -0,0 +1,72 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+
+from __future__ import (absolute_import, division, print_function)
+import multiprocessing
+
+from Muon.MaxentTools.multimaxalpha import MULTIMAX_SWEEP
+
+# Solves a series of runs sharing the grouping, phases, time bins and transform sizes.
+# The runs are split into chunks of up to chunksize runs, the runs of a chunk are solved
+# together by MULTIMAX_SWEEP. With nprocesses > 1 the chunks are shared out to a pool of
+# processes, which cannot log to Mantid, so only the progress of whole chunks is reported.
+# settings holds the MULTIMAX_SWEEP arguments shared by all the runs. Returns a list with
+# the MULTIMAX result of each run.
+
+
+class QuietLog(object):
+    def debug(self, message):
+        pass
+
+    def information(self, message):
+        pass
+
+    def notice(self, message):
+        pass
+
+    def warning(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+
+class QuietProgress(object):
+    def report(self, *args):
+        pass
+
+
+def SOLVECHUNK(args):
+    (settings, RUNDATA_frames, DATALL_rdata, FAC_factor, SENSE_taud, mylog) = args
+    return MULTIMAX_SWEEP(RUNDATA_frames=RUNDATA_frames, DATALL_rdata=DATALL_rdata, FAC_factor=FAC_factor,
+                          SENSE_taud=SENSE_taud, phaseconvWS=[None] * len(DATALL_rdata),
+                          mylog=QuietLog() if mylog is None else mylog, prog=QuietProgress(), **settings)
+
+
+def MULTIMAX_SERIES(settings, RUNDATA_frames, DATALL_rdata, FAC_factor, SENSE_taud, nprocesses, chunksize,
+                    mylog, prog):
+    nruns = len(DATALL_rdata)
+    starts = range(0, nruns, chunksize)
+    chunks = [(settings, RUNDATA_frames[i:i + chunksize], DATALL_rdata[i:i + chunksize],
+               FAC_factor[i:i + chunksize], SENSE_taud[i:i + chunksize], None) for i in starts]
+    results = []
+    if(nprocesses > 1 and len(chunks) > 1):
+        mylog.information("solving {0} runs in {1} chunks with {2} processes".format(
+            nruns, len(chunks), nprocesses))
+        pool = multiprocessing.Pool(min(nprocesses, len(chunks)))
+        try:
+            for chunk_results in pool.imap(SOLVECHUNK, chunks):
+                results.extend(chunk_results)
+                prog.report("solved {0} of {1} runs".format(len(results), nruns))
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for chunk in chunks:
+            results.extend(SOLVECHUNK(chunk[:-1] + (mylog,)))
+            prog.report("solved {0} of {1} runs".format(len(results), nruns))
+    return results
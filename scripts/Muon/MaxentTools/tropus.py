@@ -9,16 +9,21 @@ from __future__ import (absolute_import, division, print_function)
 import numpy as np
 
 
+# ox may have leading dimensions (e.g. search directions, problems), which must broadcast with
+# the leading dimensions of PULSESHAPE_convol, DETECT_a, DETECT_b and DETECT_e
 def TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e):
-    npts, ngroups = ox.shape
-    n = PULSESHAPE_convol.shape[0]
-    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
-    y[:npts] = np.dot(
-        ox,
-        DETECT_a) * DETECT_e + 1.j * np.dot(ox,
-                                            DETECT_b) * DETECT_e
-    y2 = np.fft.fft(y)  # SN=-1 meaning forward fft, scale is OK
-    x = np.real(y2)[:n] * np.real(PULSESHAPE_convol) + \
-        np.imag(y2)[:n] * np.imag(PULSESHAPE_convol)
+    return TROPUS_AB(np.matmul(ox, DETECT_a[..., np.newaxis])[..., 0], np.matmul(ox, DETECT_b[..., np.newaxis])[..., 0],
+                     SAVETIME_i2, PULSESHAPE_convol, DETECT_e)
+
+
+# TROPUS for ox already summed over the groups with the weights DETECT_a (oxa) and DETECT_b (oxb)
+def TROPUS_AB(oxa, oxb, SAVETIME_i2, PULSESHAPE_convol, DETECT_e):
+    npts = oxa.shape[-1]
+    n = PULSESHAPE_convol.shape[-1]
+    y = np.zeros(oxa.shape[:-1] + (SAVETIME_i2,), dtype=np.complex_)
+    y[..., :npts] = oxa * DETECT_e + 1.j * oxb * DETECT_e
+    y2 = np.fft.fft(y, axis=-1)  # SN=-1 meaning forward fft, scale is OK
+    x = np.real(y2)[..., :n] * np.real(PULSESHAPE_convol) + \
+        np.imag(y2)[..., :n] * np.imag(PULSESHAPE_convol)
 
     return x
@@ -13,13 +13,15 @@ import numpy as np
 # 2**I2PWR is length of FFT (zero pad spectrum). Replace with I2
 # npts is number of time bins (truncate result)
 # PULSESHAPE_convol is complex (convolR + i*convolI)
+# f may have leading dimensions (e.g. search directions, problems), which must broadcast with
+# the leading dimensions of PULSESHAPE_convol and DETECT_e. All the spectra are transformed in one FFT call.
 
 
 def ZFT(f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2):
-    n = f.shape[0]
-    npts = DETECT_e.shape[0]
-    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
-    y[:n] = f * PULSESHAPE_convol
-    y2 = np.fft.ifft(y) * \
+    n = f.shape[-1]
+    npts = DETECT_e.shape[-1]
+    y = np.zeros(f.shape[:-1] + (SAVETIME_i2,), dtype=np.complex_)
+    y[..., :n] = f * PULSESHAPE_convol
+    y2 = np.fft.ifft(y, axis=-1)[..., :npts] * \
         SAVETIME_i2  # SN=+1 meaning inverse FFT without the 1/N scale factor
-    return np.real(y2[:npts]) * DETECT_e, np.imag(y2[:npts]) * DETECT_e
+    return np.real(y2) * DETECT_e, np.imag(y2) * DETECT_e
@@ -44,14 +44,13 @@ def tchop(freq, Ei, pslit, radius, rho):
     veloc = 437.3920 * np.sqrt(Ei)
     gamm = (2.00*(R**2)/p) * abs(1.00/rho - 2.00*w/veloc)
     # Find regime and calculate variance:
-    if hasattr(gamm, '__len__'):
-        tausqr = np.zeros(len(gamm))
+    if np.shape(gamm):
+        # arrays of Ei and / or freq are broadcast against each other, NaN where there is no transmission
         pre = ((p/(2.00*R*w))**2/ 6.00)
-        idx = np.where((gamm <= 1.0))
-        tausqr[idx] = pre * (1.00-(gamm[idx]**2)**2 /10.00) / (1.00-(gamm[idx]**2)/6.00)
-        idx = np.where((gamm > 1.0)*(gamm < 4.0))
-        groot = np.sqrt(gamm[idx])
-        #area[idx] = pre * 0.60 * gamm[idx] * ((groot-2.00)**2) * (groot+8.00) / (groot+4.00)
+        groot = np.sqrt(gamm)
+        gsqr = np.where(gamm <= 1.0, (1.00-(gamm**2)**2 /10.00) / (1.00-(gamm**2)/6.00),
+                        0.60 * gamm * ((groot-2.00)**2) * (groot+8.00) / (groot+4.00))
+        tausqr = np.where(gamm < 4.0, pre * gsqr, np.nan)
     else:
         if gamm >= 4.00:
             warnings.warn('PyChop: tchop(): No transmission at %5.3f meV at %3d Hz' % (Ei, freq))
@@ -85,14 +84,12 @@ def achop(Ei, freq, dslat, pslit, radius, rho):
     vela = 437.3920*np.sqrt(Ei)
     gamm = (2.00*(R1**2)/p1) * abs(1.00/rho1 - 2.00*w1/vela)
     # Find regime and calculate variance:
-    if hasattr(gamm, '__len__'):
-        area = np.zeros(len(gamm))
+    if np.shape(gamm):
+        # arrays of Ei and / or freq are broadcast against each other, zero where there is no transmission
         pre = (p1**2) / (2.00*R1*w1)
-        idx = np.where(gamm <= 1.0)
-        area[idx] = pre * (1.-(gamm[idx]**2)/6.)
-        idx = np.where((gamm > 1.0)*(gamm < 4.0))
-        groot = np.sqrt(gamm[idx])
-        area[idx] = pre * groot * ((groot-2.0)**2) * (groot+4.0)/6.0
+        groot = np.sqrt(gamm)
+        f1 = np.where(gamm <= 1.0, 1.-(gamm**2)/6., groot * ((groot-2.0)**2) * (groot+4.0)/6.0)
+        area = np.where(gamm < 4.0, pre * f1, 0.)
     else:
         if gamm >= 4.00:
             warnings.warn('PyChop: achop(): No transmission at %5.3f meV at %3d Hz' % (Ei, freq), UserWarning)
@@ -119,8 +116,7 @@ def tikeda(S1, S2, B1, B2, Emod, Ei):
     sig = np.sqrt((S1*S1) + ((S2*S2*81.8048)/Ei))
     A = 4.37392e-4 * sig * np.sqrt(Ei)
     tausqr = []
-    B = np.array([B1] * len(Ei))
-    B[np.where(Ei > 130.0)] = B2
+    B = np.where(Ei > 130.0, B2, B1)
     R = np.exp(-Ei/Emod)
     tausqr = (3.0/(A**2)) + (R*(2.0-R)) / (B**2)
     # variance currently in mms**2. Convert to sec**2
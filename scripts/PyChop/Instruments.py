@@ -15,6 +15,7 @@ import numpy as np
 import yaml
 import warnings
 import copy
+import multiprocessing
 from . import Chop, MulpyRep
 from scipy.interpolate import interp1d
 from scipy.special import erf
@@ -26,6 +27,7 @@ SIGMA2FWHMSQ = SIGMA2FWHM ** 2
 E2V = np.sqrt((constants.e / 1000) * 2 / constants.neutron_mass) # v = E2V * sqrt(E)    veloc in m/s, E in meV
 E2L = 1.e23 * constants.h**2 / (2 * constants.m_n * constants.e) # lam = sqrt(E2L / E)  lam in Angst, E in meV
 E2K = constants.e * 2 * constants.m_n / constants.hbar**2 / 1e23 # k = sqrt(E2K * E)    k in 1/Angst, E in meV
+MAX_SAVED_STATES = 1000   # Number of chopper opening time calculations kept by ChopperSystem
 
 
 def wrap_attributes(obj, inval, allowed_var_names):
@@ -66,9 +68,7 @@ def soft_hat(x, p):
     sig1, sig2 = tuple(np.abs(p[4:6]/sig2fwhh))
     # linearly interpolate sig for x1<x<x2
     sig = ((x2-x)*sig1-(x1-x)*sig2)/(x2-x1)
-    if np.shape(sig):
-        sig[x < x1] = sig1
-        sig[x > x2] = sig2
+    sig = np.where(x < x1, sig1, np.where(x > x2, sig2, sig))
     # calculate blurred hat function with gradient
     e1 = (x1-x) / (np.sqrt(2)*sig)
     e2 = (x2-x) / (np.sqrt(2)*sig)
@@ -77,6 +77,34 @@ def soft_hat(x, p):
     return y
 
 
+def _scan_settings(args):
+    """
+    Calculates the resolution, flux and number of reps over an array of Ei for a list of (frequency, phase) settings.
+    Takes a tuple so it can be mapped over a process pool, in which case the instrument is sent as a dictionary
+    of its components.
+    """
+    instrument, Ei, Etrans, settings = args
+    if not isinstance(instrument, Instrument):
+        instrument = Instrument(instrument)
+    chopper_system = instrument.chopper_system
+    oldfreq, oldphase = (chopper_system.frequency, chopper_system.phase)
+    Ei_col = Ei[:, np.newaxis]
+    results = []
+    try:
+        for frequency, phase in settings:
+            chopper_system.frequency = frequency
+            chopper_system.phase = phase
+            # The resolution and flux are broadcast over all the Ei (and energy transfers) at once
+            res = instrument.getResolution(np.atleast_1d(Etrans) * Ei_col, Ei_col)
+            flux = instrument.getFlux(Ei_col)
+            reps = [len(chopper_system.getAllowedEi(ei)) for ei in Ei]
+            results.append((res if np.shape(Etrans) else res[:, 0], np.ravel(flux), reps))
+    finally:
+        chopper_system.frequency = oldfreq
+        chopper_system.phase = oldphase
+    return results
+
+
 class FermiChopper(object):
     """
     Class which represents a Fermi chopper package
@@ -322,6 +350,10 @@ class ChopperSystem(object):
         """Returns the chopper time width (FWHM) at the (final) chopper in microseconds"""
         if self.isFermi:
             return self._ChopDriver(Ei_in, squared), None
+        elif np.shape(Ei_in):
+            # The chopper opening times are calculated for one Ei at a time
+            widths = np.array([self.getWidth(Ei, squared) for Ei in np.ravel(Ei_in)])
+            return tuple(np.reshape(wd, np.shape(Ei_in)) for wd in widths.T)
         else:
             chop_times = self._MulpyRepDriver(Ei_in, calc_res=False)[1]
             # Output of MulpyRep is FWHM in us - want it in seconds for later calculations
@@ -345,7 +377,7 @@ class ChopperSystem(object):
             return self.packages[self.package].getTransmission(Ei, freq) * magic / fudge
         else:
             # For disk choppers, transmission goes quadratic with freq at high resolution, linear at low
-            freqdep = (self.flux_ref_freq / freq)**2 if hires else  (self.flux_ref_freq / freq)
+            freqdep = np.where(hires, (self.flux_ref_freq / freq)**2, (self.flux_ref_freq / freq))
             return (self.slot_width[-1] / self.flux_ref_slot) * freqdep
 
     def setNFrame(self, value):
@@ -371,12 +403,15 @@ class ChopperSystem(object):
     def _MulpyRepDriver(self, Ei_in=None, calc_res=True):
         """Private method to calculate resolution for given Ei from chopper opening times"""
         Ei = _check_input(self, Ei_in)
-        if '_saved_state' not in self.__dict__ or (self._saved_state[0] != self._get_state(Ei)):
+        # Keeps the opening times of recent states, so that scans over Ei compute them once for each Ei
+        state = self._get_state(Ei)
+        if '_saved_states' not in self.__dict__ or len(self._saved_states) >= MAX_SAVED_STATES:
+            self._saved_states = {}
+        if state not in self._saved_states:
             Eis, all_times, chop_times, lastChopDist, lines = MulpyRep.calcChopTimes(Ei, self._long_frequency, self._instpar, self.phase)
             Eis, lines = self._removeLowIntensityReps(Eis, lines, Ei)
-            self._saved_state = [self._get_state(Ei), Eis, chop_times, lastChopDist, lines, all_times]
-        else:
-            Eis, chop_times, lastChopDist, lines, all_times = tuple(self._saved_state[1:])
+            self._saved_states[state] = [Eis, chop_times, lastChopDist, lines, all_times]
+        Eis, chop_times, lastChopDist, lines, all_times = tuple(self._saved_states[state])
         if calc_res:
             res_el, percent, chop_width, mod_width = MulpyRep.calcRes(Eis, chop_times, lastChopDist, self.chop_sam, self.sam_det)
             return res_el, percent, chop_width, mod_width
@@ -553,13 +588,16 @@ class Moderator(object):
     def getWidthSquared(self, Ei):
         """ Returns the squared time gaussian FWHM width due to the sample in s^2 """
         if hasattr(self, 'width_interp'):
-            wavelength = np.sqrt(E2L / (Ei if not hasattr(Ei, '__len__') else Ei[0]))
-            if wavelength >= self.wmn:
-                # Data is obtained from measuring widths of powder Bragg peaks in backscattering
-                # At low wavelengths / high energies, the peaks are too close together to discern
-                # so there is no measurements, but the analytical expressions should still be good.
-                width = self.width_interp(min([wavelength, self.wmx]))**2 / 1e12
-                return (width * SIGMA2FWHMSQ) if self.measured_width['isSigma'] else width
+            wavelength = np.sqrt(E2L / np.asarray(Ei, dtype=float))
+            # Data is obtained from measuring widths of powder Bragg peaks in backscattering
+            # At low wavelengths / high energies, the peaks are too close together to discern
+            # so there is no measurements, but the analytical expressions should still be good.
+            width = self.width_interp(np.clip(wavelength, self.wmn, self.wmx))**2 / 1e12
+            width = (width * SIGMA2FWHMSQ) if self.measured_width['isSigma'] else width
+            if np.all(wavelength >= self.wmn):
+                return width
+            elif np.shape(Ei):
+                return np.where(wavelength >= self.wmn, width, self.getAnalyticWidthsSquared(Ei))
         return self.getAnalyticWidthsSquared(Ei)
 
     def getWidth(self, Ei):
@@ -589,7 +627,7 @@ class Moderator(object):
         """ Interpolates flux from a table of measured flux """
         if not hasattr(self, 'flux_interp'):
             raise AttributeError('This instrument does not have a table of measured flux')
-        wavelength = [min(max(l, self.fmn), self.fmx) for l in np.sqrt(E2L / np.array(Ei if hasattr(Ei, '__len__') else [Ei]))]
+        wavelength = np.clip(np.sqrt(E2L / np.array(Ei if hasattr(Ei, '__len__') else [Ei])), self.fmn, self.fmx)
         return self.flux_interp(wavelength)
 
     @property
@@ -700,8 +738,8 @@ class Instrument(object):
             setattr(self, method, getattr(self.chopper_system, method))
         for prop in self.__child_properties:
             setattr(type(self), prop,
-                    property(lambda obj, prop=prop, self=self: ChopperSystem.__dict__[prop].__get__(self.chopper_system, ChopperSystem),
-                             lambda obj, val, prop=prop, self=self: ChopperSystem.__dict__[prop].__set__(self.chopper_system, val)))
+                    property(lambda obj, prop=prop: ChopperSystem.__dict__[prop].__get__(obj.chopper_system, ChopperSystem),
+                             lambda obj, val, prop=prop: ChopperSystem.__dict__[prop].__set__(obj.chopper_system, val)))
         # Now reset default chopper/variant and frequency
         if chopper or freq:
             self.setChopper(chopper if chopper else self.getChopper(), freq if freq else self.frequency)
@@ -713,7 +751,7 @@ class Instrument(object):
     def getFlux(self, Ei_in=None, frequency=None):
         """ Returns the monochromatic flux estimate in n/cm^2/s """
         Ei = _check_input(self.chopper_system, Ei_in)
-        isHires = False if (self.isFermi or (self.getResolution(0., Ei) / Ei) > 0.02) else True
+        isHires = False if self.isFermi else np.logical_not((self.getResolution(0., Ei) / Ei) > 0.02)
         return self.moderator.getFlux(Ei) * self.chopper_system.getTransmission(Ei, frequency, hires=isHires)
 
     def getMultiRepFlux(self, Ei_in=None, frequency=None):
@@ -801,30 +839,30 @@ class Instrument(object):
             frac_dist = 1 - (xm / x0)
             tsmeff = tsqmod * frac_dist**2   # Effective moderator time at first chopper
             x0 -= xm                         # Propagate from first chopper, not from moderator (after rescaling tmod)
-            tsqmod = tsmeff if (tsqchp[1] > tsmeff) else tsqchp[1]
+            tsqmod = np.where(tsqchp[1] > tsmeff, tsmeff, tsqchp[1])
         tsqchp = tsqchp[0]
-        tsqmodchop = np.array([tsqmod, tsqchp, x0])
+        tsqmodchop = [tsqmod, tsqchp, x0]
         # Propagate the time widths to the sample position
         omega = self.frequency[0] * 2 * np.pi
         vi = E2V * np.sqrt(Ei)
         vf = E2V * np.sqrt(Ei - Etrans)
         vratio = (vi / vf)**3
         tanthm = np.tan(self.moderator.theta_m * np.pi / 180.)
-        g1, g2 = tuple(1. - ((omega * tanthm / vi) * np.array([xa + x1, x0 - xa])))
-        f1, f2 = tuple(1. + (x1 / x0) * np.array([g1, g2]))
-        g1, g2, f1, f2 = tuple(np.array([g1, g2, f1, f2]) / (omega * (xa + x1)))
+        g1, g2 = (1. - ((omega * tanthm / vi) * (xa + x1)), 1. - ((omega * tanthm / vi) * (x0 - xa)))
+        f1, f2 = (1. + (x1 / x0) * g1, 1. + (x1 / x0) * g2)
+        g1, g2, f1, f2 = tuple(g / (omega * (xa + x1)) for g in (g1, g2, f1, f2))
         modfac = (x1 + vratio * x2) / x0
         chpfac = 1. + modfac
         apefac = f1 + ((vratio * x2 / x0) * g1)
-        tsqmod *= modfac**2
-        tsqchp *= chpfac**2
-        tsqjit *= chpfac**2
+        tsqmod = tsqmod * modfac**2
+        tsqchp = tsqchp * chpfac**2
+        tsqjit = tsqjit * chpfac**2
         tsqape = apefac**2 * (self.aperture_width**2 / 12.) * SIGMA2FWHMSQ
         vsqvan = tsqmod + tsqchp + tsqjit + tsqape
         outdic = {'moderator': tsqmod, 'chopper': tsqchp, 'jitter': tsqjit, 'aperture': tsqape}
         if self.has_detector and hasattr(self.detector, 'idet'):
             phi = self.detector.phi_deg * np.pi / 180.
-            tsqdet = (1. / vf)**2 * np.array([self.detector.getWidthSquared(Ei, en) for en in Etrans])
+            tsqdet = (1. / vf)**2 * np.vectorize(self.detector.getWidthSquared)(Ei, Etrans)
             vsqvan += tsqdet
             outdic['detector'] = tsqdet
         else:
@@ -840,6 +878,51 @@ class Instrument(object):
             self.frequency = oldfreq
         return vsqvan, outdic, tsqmodchop
 
+    def scan(self, Ei, frequency=None, phase=None, Etrans=0., nprocesses=1):
+        """
+        Calculates the resolution, flux and number of reps for all combinations of Ei, frequency and phase
+
+        maps = scan(np.linspace(10, 100, 50), [200, 300, 400])
+        let = scan(np.linspace(1, 10, 50), [[160, 80], [240, 120]], [5, 2000], nprocesses=4)
+
+        Inputs:
+            ei - list or numpy array of (focused) incident energies in meV
+            frequency - list of chopper frequency settings, each as given to setFrequency [default: preset frequency]
+            phase - list of settings of the phase independent choppers [default: preset phase]
+            etrans - energy transfer(s) as fractions of Ei, e.g. linspace(0,0.9,10) [default: 0]
+            nprocesses - number of processes the chopper settings are shared out to [default: 1]
+
+        Output:
+            a dictionary of the inputs ('Ei', 'frequency', 'phase') and of arrays indexed by [frequency, phase, ei]:
+            'resolution' - the FWHM in meV (with a last index over etrans if etrans is a list or array)
+            'flux' - the flux in n/cm^2/s
+            'reps' - the number of reps (incident energies) in each frame
+        """
+        Ei = np.atleast_1d(np.asarray(Ei, dtype=float))
+        frequencies = [self.chopper_system.frequency] if frequency is None else list(frequency)
+        phases = [self.chopper_system.phase] if phase is None else list(phase)
+        settings = [(freq, ph) for freq in frequencies for ph in phases]
+        if nprocesses > 1 and len(settings) > 1:
+            # Each process gets a contiguous block of settings so the results come back in order
+            components = {key: getattr(self, key) for key in self.__allowed_var_names if hasattr(self, key)}
+            blocks = np.array_split(np.arange(len(settings)), min(nprocesses, len(settings)))
+            pool = multiprocessing.Pool(len(blocks))
+            try:
+                results = pool.map(_scan_settings, [(components, Ei, Etrans, [settings[i] for i in block])
+                                                    for block in blocks])
+            finally:
+                pool.terminate()
+                pool.join()
+            results = [result for block_results in results for result in block_results]
+        else:
+            results = _scan_settings((self, Ei, Etrans, settings))
+        shape = (len(frequencies), len(phases), len(Ei))
+        outdic = {'Ei': Ei, 'frequency': frequencies, 'phase': phases}
+        for idx, key in enumerate(['resolution', 'flux', 'reps']):
+            values = np.array([result[idx] for result in results])
+            outdic[key] = np.reshape(values, shape + values.shape[2:])
+        return outdic
+
     @property
     def aperture_width(self):
         if hasattr(self.chopper_system, 'aperture_width') and self.chopper_system.aperture_width:
@@ -27,74 +27,64 @@ def findLine(chop_times, chopDist, moderator_limits):
     chop_times: a list of the opening and closing times of the chopper within the time frame
     chopDist: a list of the distance from moderator to chopper in meters
     moderator_limits: the earliest and latest times that neutrons can leave the the moderator in microseconds
+
+    Returns an array of shape (nlines, 2, 2) holding the [slope, intercept] of the fast and slow edge of each line
     """
-    lines = []
-    for i in range(len(chop_times)):
-        # final chopper openings
-        leftM = (-chopDist) / (moderator_limits[0]-chop_times[i][0])
-        rightM = (-chopDist) / (moderator_limits[1]-chop_times[i][1])
-        leftC = -leftM*moderator_limits[0]
-        rightC = -rightM*moderator_limits[1]
-        if leftM > 0 and rightM > 0:
-            lines.append([[leftM, leftC], [rightM, rightC]])
-    return lines
+    chop_times = np.reshape(np.asarray(chop_times, dtype=float), (-1, 2))
+    # final chopper openings
+    leftM = (-chopDist) / (moderator_limits[0]-chop_times[:, 0])
+    rightM = (-chopDist) / (moderator_limits[1]-chop_times[:, 1])
+    leftC = -leftM*moderator_limits[0]
+    rightC = -rightM*moderator_limits[1]
+    lines = np.stack([np.stack([leftM, leftC], axis=-1), np.stack([rightM, rightC], axis=-1)], axis=1)
+    return lines[(leftM > 0) & (rightM > 0)]
 
 
 def checkPath(chop_times, lines, chopDist, chop5Dist):
     """
-    A recursive function to check for lines which can satisfy a window in the next chopper
+    Checks for lines which can satisfy a window in each of the other choppers, starting from the last one.
+    Every line is compared to all the windows of a chopper at once, a line which passes through
+    several windows is split into one line per window, keeping the order of the lines and windows.
     """
-    if len(chop_times) > 1:
-        # recursive bit
-        lines = checkPath(chop_times[1:], lines, chopDist[1:], chop5Dist)
-    newLines = []
-    for line in lines:
-        # for each line check to see if there is an opening in the right time window
-        # fast first
-        earlyT = (chopDist[0]-line[0][1]) / line[0][0]
-        # then slow
-        lateT = (chopDist[0]-line[1][1]) / line[1][0]
-
+    lines = np.reshape(np.asarray(lines, dtype=float), (-1, 2, 2))
+    for times, dist in reversed(list(zip(chop_times, chopDist))):
+        times = np.reshape(np.asarray(times, dtype=float), (-1, 2))
+        opening, closing = times[:, 0], times[:, 1]
+        slope, intercept = lines[:, :, 0], lines[:, :, 1]
+        # for each line the time window at this chopper, fast first then slow
+        earlyT = ((dist-intercept[:, 0]) / slope[:, 0])[:, np.newaxis]
+        lateT = ((dist-intercept[:, 1]) / slope[:, 1])[:, np.newaxis]
         # then compare this time window to when this chopper is open, keep the range if it is possible
-        for i in range(len(chop_times[0])):
-            if (chop_times[0][i][0] < earlyT) and ((chop_times[0][i][1] > lateT)):
-                # the chopper window is larger than the maximum possible spread, change nothing
-                newLines.append(line)
-            elif (chop_times[0][i][0] > earlyT) and ((chop_times[0][i][1] < lateT)):
-                # both are within the window, draw a new box
-                chop5_open = (chop5Dist-line[0][1]) / line[0][0]
-                leftM = (chopDist[0]-chop5Dist) / (chop_times[0][i][0]-chop5_open)
-                leftC = chop5Dist - leftM*chop5_open
-                chop5_close = (chop5Dist-line[1][1]) / line[1][0]
-                rightM = (chopDist[0]-chop5Dist) / (chop_times[0][i][1]-chop5_close)
-                rightC = chop5Dist - rightM*chop5_close
-                newLines.append([[leftM, leftC], [rightM, rightC]])
-            elif ((chop_times[0][i][1] < lateT) and (chop_times[0][i][1] > earlyT)) and (chop_times[0][i][0] < earlyT):
-                # the left most range is fine but the right most is outside the window. Redefine it
-                chop5_close = (chop5Dist-line[1][1]) / line[1][0]
-                rightM = (chopDist[0]-chop5Dist) / (chop_times[0][i][1]-chop5_close)
-                rightC = chop5Dist - rightM*chop5_close
-                newLines.append([line[0], [rightM, rightC]])
-            elif (chop_times[0][i][1] > lateT) and ((chop_times[0][i][0] > earlyT) and (chop_times[0][i][0] < lateT)):
-                # the leftmost range is outside the chopper window
-                chop5_open = (chop5Dist-line[0][1]) / line[0][0]
-                leftM = (chopDist[0]-chop5Dist) / (chop_times[0][i][0]-chop5_open)
-                leftC = chop5Dist - leftM*chop5_open
-                newLines.append([[leftM, leftC], line[1]])
-    return newLines
+        # the chopper window is larger than the maximum possible spread, change nothing
+        wider = (opening < earlyT) & (closing > lateT)
+        # both are within the window, draw a new box
+        within = (opening > earlyT) & (closing < lateT)
+        # the left most range is fine but the right most is outside the window. Redefine it
+        late_cut = (closing < lateT) & (closing > earlyT) & (opening < earlyT)
+        # the leftmost range is outside the chopper window
+        early_cut = (closing > lateT) & (opening > earlyT) & (opening < lateT)
+        chop5_open = ((chop5Dist-intercept[:, 0]) / slope[:, 0])[:, np.newaxis]
+        chop5_close = ((chop5Dist-intercept[:, 1]) / slope[:, 1])[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            leftM = (dist-chop5Dist) / (opening-chop5_open)
+            rightM = (dist-chop5Dist) / (closing-chop5_close)
+        left = np.where((within | early_cut)[:, :, np.newaxis],
+                        np.stack([leftM, chop5Dist - leftM*chop5_open], axis=-1), lines[:, np.newaxis, 0, :])
+        right = np.where((within | late_cut)[:, :, np.newaxis],
+                         np.stack([rightM, chop5Dist - rightM*chop5_close], axis=-1), lines[:, np.newaxis, 1, :])
+        lines = np.stack([left, right], axis=2)[wider | within | late_cut | early_cut]
+    return lines
 
 
 def calcEnergy(lines, samDist):
     """
     Calculates the energies of neutrons which can pass through choppering openings.
     """
-    Ei = np.zeros(len(lines))
+    lines = np.reshape(np.asarray(lines, dtype=float), (-1, 2, 2))
     massN = 1.674927e-27
-    for i in range(len(lines)):
-        # look at the middle of the time window
-        v = 0.5 * (lines[i][0][0] + lines[i][1][0])
-        Ei[i] = (v*1e6)**2 * massN / 2. / 1.60217662e-22
-    return Ei
+    # look at the middle of the time window
+    v = 0.5 * (lines[:, 0, 0] + lines[:, 1, 0])
+    return (v*1e6)**2 * massN / 2. / 1.60217662e-22
 
 
 def calcRes(ei, chop_times, lastChopDist, samDist, detDist):
@@ -218,7 +208,7 @@ def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
             chopVel = 2*np.pi*radius[i] * numDisk[i] * freq[i]
             # full opening time
             t_full_op = uSec * (slot_width[i]+guide_width[i]) / chopVel
-            realTimeOp = np.array([chop2Phase, chop2Phase+t_full_op])
+            realTimeOp = np.array([phase[i], phase[i]+t_full_op])
         else:
             # the opening time of the chopper so that it is open for the focus wavelength
             t_open = lam2TOF * lam * dist[i]
@@ -248,19 +238,17 @@ def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
             # If angular positions of slots not defined, assumed evenly spaced (LET, MERLIN)
             next_win_t = uSec / (nslot[i]*freq[i])
             realTimeOp -= next_win_t * np.ceil(realTimeOp[0]/next_win_t)
-            while realTimeOp[0] < (uSec/p_frames+next_win_t):
-                chop_times[i].append(copy.deepcopy(realTimeOp[:]))
-                realTimeOp += next_win_t
+            # all the openings starting before the end of the (multi-)frame, one row per window
+            nwin = int(np.ceil((uSec/p_frames + next_win_t - realTimeOp[0]) / next_win_t))
+            chop_times[i] = realTimeOp + next_win_t * np.arange(max(nwin, 0))[:, np.newaxis]
     # then we look for what else gets through
     # firstly calculate the bounding box for each window in final chopper
     lines_all = []
     for i in range(nframe):
         t0 = i * uSec / source_rep
         lines = findLine(chop_times[-1], dist[-1], [t0, t0+tmod])
-        lines = checkPath(chop_times[0:-1], lines, dist[:-1], dist[-1])
-        if lines:
-            for line in lines:
-                lines_all.append(line)
+        lines_all.append(checkPath(chop_times[0:-1], lines, dist[:-1], dist[-1]))
+    lines_all = np.concatenate(lines_all)
     # ok, now we know the possible neutron velocities. we now need their energies
     Ei = calcEnergy(lines_all, (dist[-1]+chop_samp))
     return Ei, chop_times, [chop_times[0][0], chop_times[-1][0]], dist[-1]-dist[0], lines_all
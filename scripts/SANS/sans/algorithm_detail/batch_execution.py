@@ -6,7 +6,11 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import (absolute_import, division, print_function)
 from copy import deepcopy
+from multiprocessing.pool import ThreadPool
+import os
+import threading
 from mantid.api import AnalysisDataService, WorkspaceGroup
+from mantid.kernel import MemoryStats
 from sans.common.general_functions import (create_managed_non_child_algorithm, create_unmanaged_algorithm,
                                            get_output_name, get_base_name_from_multi_period_name, get_transmission_output_name)
 from sans.common.enums import (SANSDataType, SaveType, OutputMode, ISISReductionMode, DataType)
@@ -17,7 +21,7 @@ from sans.common.constants import (TRANS_SUFFIX, SANS_SUFFIX, ALL_PERIODS,
                                    REDUCED_HAB_AND_LAB_WORKSPACE_FOR_MERGED_REDUCTION,
                                    CAN_COUNT_AND_NORM_FOR_OPTIMIZATION,
                                    CAN_AND_SAMPLE_WORKSPACE)
-from sans.common.file_information import (get_extension_for_file_type, SANSFileInformationFactory)
+from sans.common.file_information import (get_extension_for_file_type, find_sans_file, SANSFileInformationFactory)
 from sans.state.data import StateData
 try:
     import mantidplot
@@ -154,6 +158,174 @@ def single_reduction_for_batch(state, use_optimizations, output_mode, plot_resul
     return out_scale_factors, out_shift_factors
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# Functions for the parallel execution of several batch iterations
+# ----------------------------------------------------------------------------------------------------------------------
+# The loaded data of a row is assumed to take up to this many times the size of its files in memory
+MEMORY_PER_FILE_SIZE = 4
+# The fraction of the available memory which the rows which are reduced at the same time may take up
+MEMORY_FRACTION_FOR_PARALLEL_REDUCTION = 0.8
+# The workspace groups which are shared by the rows of a batch
+SHARED_WORKSPACE_GROUPS = ['sans_interface_raw_data', REDUCED_HAB_AND_LAB_WORKSPACE_FOR_MERGED_REDUCTION,
+                           CAN_COUNT_AND_NORM_FOR_OPTIMIZATION, CAN_AND_SAMPLE_WORKSPACE]
+
+
+def get_input_files(state):
+    """
+    Provides the names of the files which are loaded for the reduction of a state.
+
+    :param state: a SANSState object
+    :return: a list of the file names
+    """
+    data = state.data
+    file_names = [data.sample_scatter, data.sample_transmission, data.sample_direct,
+                  data.can_scatter, data.can_transmission, data.can_direct]
+    return [file_name for file_name in file_names if file_name]
+
+
+def group_states_by_shared_inputs(states):
+    """
+    Groups the states which load any of the same files, e.g. the same can, transmission or direct run.
+
+    The states of a group have to be reduced one after the other in order to reuse the loaded data and to avoid
+    loading the same data into the same workspaces concurrently. States of different groups are independent.
+    :param states: a list of SANSState objects
+    :return: a list of groups, each being a list of indices into states. The groups are ordered by their first
+             state and the indices within a group are ascending.
+    """
+    # Union-find over the states, where states are joined if they share an input file
+    parents = list(range(len(states)))
+
+    def _find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    first_state_for_file = {}
+    for index, state in enumerate(states):
+        for file_name in get_input_files(state):
+            other = first_state_for_file.setdefault(file_name, index)
+            root, other_root = _find(index), _find(other)
+            if root != other_root:
+                parents[max(root, other_root)] = min(root, other_root)
+
+    groups = {}
+    for index in range(len(states)):
+        groups.setdefault(_find(index), []).append(index)
+    return [groups[root] for root in sorted(groups)]
+
+
+def _get_file_size(file_name):
+    try:
+        return os.path.getsize(find_sans_file(file_name))
+    except (RuntimeError, OSError):
+        return 0
+
+
+def get_memory_estimate(states):
+    """
+    Estimates the memory which the loaded data of a group of states takes up.
+
+    :param states: a list of SANSState objects which are reduced one after the other
+    :return: the estimate in bytes
+    """
+    file_names = set()
+    for state in states:
+        file_names.update(get_input_files(state))
+    return MEMORY_PER_FILE_SIZE * sum(_get_file_size(file_name) for file_name in file_names)
+
+
+def get_number_of_parallel_reductions(groups_of_states, number_of_threads, available_memory=None):
+    """
+    Provides the number of groups of states which can be reduced at the same time.
+
+    The number is limited by the requested number of threads, the number of groups and the number of the largest
+    groups which fit into the available memory.
+    :param groups_of_states: a list of lists of SANSState objects
+    :param number_of_threads: the requested number of threads
+    :param available_memory: the available memory in bytes. If None, then it is obtained from the system.
+    :return: the number of groups to reduce at the same time, at least 1
+    """
+    number_of_reductions = min(number_of_threads, len(groups_of_states))
+    if number_of_reductions <= 1:
+        return 1
+    if available_memory is None:
+        memory_stats = MemoryStats()
+        memory_stats.update()
+        available_memory = memory_stats.availMem() * 1024
+    largest_estimate = max(get_memory_estimate(states) for states in groups_of_states)
+    if largest_estimate > 0:
+        fitting_reductions = int(MEMORY_FRACTION_FOR_PARALLEL_REDUCTION * available_memory // largest_estimate)
+        number_of_reductions = min(number_of_reductions, fitting_reductions)
+    return max(1, number_of_reductions)
+
+
+def sort_shared_workspace_groups():
+    """
+    Sorts the members of the workspace groups shared by the rows of a batch, which are filled in the order in which
+    the parallel reductions finish.
+    """
+    for group_name in SHARED_WORKSPACE_GROUPS:
+        if AnalysisDataService.doesExist(group_name):
+            group_workspace = AnalysisDataService.retrieve(group_name)
+            if type(group_workspace) is WorkspaceGroup:
+                group_workspace.sortByName()
+
+
+def parallel_reduction_for_batch(states, use_optimizations, output_mode, number_of_threads, save_can=False):
+    """
+    Runs the reductions of several states, reducing independent states at the same time.
+
+    The states which share input files are reduced one after the other by the same thread, so that the loaded data
+    is reused. The number of groups of states which are reduced at the same time is limited by the available memory.
+    The results are provided in the order of the states. If any of the reductions fails, the error of the first
+    failed state is raised once the other reductions are finished.
+    :param states: a list of SANSState objects
+    :param use_optimizations: if true then the optimizations of child algorithms are enabled.
+    :param output_mode: the output mode
+    :param number_of_threads: the maximum number of states which are reduced at the same time
+    :param save_can: bool. whether or not to save out can workspaces
+    :return: a list of out_scale_factors and a list of out_shift_factors in the order of the states
+    """
+    groups = group_states_by_shared_inputs(states)
+    number_of_reductions = get_number_of_parallel_reductions([[states[index] for index in group]
+                                                              for group in groups], number_of_threads)
+    results = [None] * len(states)
+    errors = [None] * len(states)
+
+    def _reduce_group(group):
+        for index in group:
+            try:
+                results[index] = single_reduction_for_batch(states[index], use_optimizations, output_mode,
+                                                            False, '', save_can=save_can)
+            except Exception as error:
+                # Stop the group like the sequential reduction stops the batch
+                errors[index] = error
+                return
+
+    if number_of_reductions == 1:
+        for group in groups:
+            _reduce_group(group)
+            if any(errors):
+                break
+    else:
+        pool = ThreadPool(number_of_reductions)
+        try:
+            pool.map(_reduce_group, groups, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        sort_shared_workspace_groups()
+
+    for error in errors:
+        if error is not None:
+            raise error
+    out_scale_factors_list = [result[0] for result in results]
+    out_shift_factors_list = [result[1] for result in results]
+    return out_scale_factors_list, out_shift_factors_list
+
+
 def load_workspaces_from_states(state):
     workspace_to_name = {SANSDataType.SampleScatter: "SampleScatterWorkspace",
                          SANSDataType.SampleTransmission: "SampleTransmissionWorkspace",
@@ -932,6 +1104,9 @@ def group_workspaces_if_required(reduction_package, output_mode, save_can):
         add_to_group(reduction_package.unfitted_transmission_can, reduction_package.unfitted_transmission_can_base_name)
 
 
+_add_to_group_lock = threading.Lock()
+
+
 def add_to_group(workspace, name_of_group_workspace):
     """
     Creates a group workspace with the base name for the workspace
@@ -941,12 +1116,22 @@ def add_to_group(workspace, name_of_group_workspace):
     """
     if workspace is None:
         return
-    name_of_workspace = workspace.name()
-    if AnalysisDataService.doesExist(name_of_group_workspace):
-        group_workspace = AnalysisDataService.retrieve(name_of_group_workspace)
-        if type(group_workspace) is WorkspaceGroup:
-            if not group_workspace.contains(name_of_workspace):
-                group_workspace.add(name_of_workspace)
+    # The rows of a parallel reduction add their workspaces to the same groups
+    with _add_to_group_lock:
+        name_of_workspace = workspace.name()
+        if AnalysisDataService.doesExist(name_of_group_workspace):
+            group_workspace = AnalysisDataService.retrieve(name_of_group_workspace)
+            if type(group_workspace) is WorkspaceGroup:
+                if not group_workspace.contains(name_of_workspace):
+                    group_workspace.add(name_of_workspace)
+            else:
+                group_name = "GroupWorkspaces"
+                group_options = {"InputWorkspaces": [name_of_workspace],
+                                 "OutputWorkspace": name_of_group_workspace}
+                group_alg = create_unmanaged_algorithm(group_name, **group_options)
+
+                group_alg.setAlwaysStoreInADS(True)
+                group_alg.execute()
         else:
             group_name = "GroupWorkspaces"
             group_options = {"InputWorkspaces": [name_of_workspace],
@@ -955,14 +1140,6 @@ def add_to_group(workspace, name_of_group_workspace):
 
             group_alg.setAlwaysStoreInADS(True)
             group_alg.execute()
-    else:
-        group_name = "GroupWorkspaces"
-        group_options = {"InputWorkspaces": [name_of_workspace],
-                         "OutputWorkspace": name_of_group_workspace}
-        group_alg = create_unmanaged_algorithm(group_name, **group_options)
-
-        group_alg.setAlwaysStoreInADS(True)
-        group_alg.execute()
 
 
 def save_to_file(reduction_packages, save_can):
@@ -9,6 +9,7 @@
 # pylint: disable=too-few-public-methods, invalid-name
 
 from __future__ import (absolute_import, division, print_function)
+import json
 import os
 import h5py as h5
 from abc import (ABCMeta, abstractmethod)
@@ -34,6 +35,9 @@ ADD_FILE_SUFFIX = "-ADD.NXS"
 
 PARAMETERS_XML_SUFFIX = "_Parameters.xml"
 
+# Run index
+RUN_INDEX_FILE_NAME = "sans_run_index.jsonl"
+
 
 # Nexus key words
 RAW_DATA_1 = "raw_data_1"
@@ -342,15 +346,19 @@ def get_instrument_name_for_isis_nexus(file_name):
         # Open first entry
         keys = list(h5_file.keys())
         first_entry = h5_file[keys[0]]
-        # Open instrument group
-        instrument_group = first_entry[INSTRUMENT]
-        # Open name data set
-        name_data_set = instrument_group[NAME]
-        # Read value
-        instrument_name = name_data_set[0].decode("utf-8")
+        instrument_name = _read_instrument_name(first_entry)
     return instrument_name
 
 
+def _read_instrument_name(first_entry):
+    # Open instrument group
+    instrument_group = first_entry[INSTRUMENT]
+    # Open name data set
+    name_data_set = instrument_group[NAME]
+    # Read value
+    return name_data_set[0].decode("utf-8")
+
+
 def get_top_level_nexus_entry(file_name, entry_name):
     """
     Gets the first entry in a Nexus file.
@@ -389,15 +397,17 @@ def get_event_mode_information(file_name):
         # Open first entry
         keys = list(h5_file.keys())
         first_entry = h5_file[keys[0]]
-        # Open instrument group
-        is_event_mode = False
-        for value in list(first_entry.values()):
-            if NX_CLASS in value.attrs and NX_EVENT_DATA == value.attrs[NX_CLASS].decode("utf-8"):
-                is_event_mode = True
-                break
+        is_event_mode = _read_event_mode(first_entry)
     return is_event_mode
 
 
+def _read_event_mode(first_entry):
+    for value in list(first_entry.values()):
+        if NX_CLASS in value.attrs and NX_EVENT_DATA == value.attrs[NX_CLASS].decode("utf-8"):
+            return True
+    return False
+
+
 def get_geometry_information_isis_nexus(file_name):
     """
     Gets geometry information from the sample folder in the nexus file
@@ -409,20 +419,151 @@ def get_geometry_information_isis_nexus(file_name):
         # Open first entry
         keys = list(h5_file.keys())
         top_level = h5_file[keys[0]]
-        sample = top_level[SAMPLE]
-        height = float(sample[HEIGHT][0])
-        width = float(sample[WIDTH][0])
-        thickness = float(sample[THICKNESS][0])
-        shape_as_string = sample[SHAPE][0].upper().decode("utf-8")
-        if shape_as_string == CYLINDER:
-            shape = SampleShape.Cylinder
-        elif shape_as_string == FLAT_PLATE:
-            shape = SampleShape.FlatPlate
-        elif shape_as_string == DISC:
-            shape = SampleShape.Disc
-        else:
-            shape = None
-    return height, width, thickness, shape
+        height, width, thickness, shape_as_string = _read_geometry(top_level)
+    return height, width, thickness, convert_nexus_shape(shape_as_string)
+
+
+def _read_geometry(top_level):
+    sample = top_level[SAMPLE]
+    height = float(sample[HEIGHT][0])
+    width = float(sample[WIDTH][0])
+    thickness = float(sample[THICKNESS][0])
+    shape_as_string = sample[SHAPE][0].upper().decode("utf-8")
+    return height, width, thickness, shape_as_string
+
+
+def convert_nexus_shape(shape_as_string):
+    if shape_as_string == CYLINDER:
+        shape = SampleShape.Cylinder
+    elif shape_as_string == FLAT_PLATE:
+        shape = SampleShape.FlatPlate
+    elif shape_as_string == DISC:
+        shape = SampleShape.Disc
+    else:
+        shape = None
+    return shape
+
+
+def get_isis_nexus_metadata(file_name):
+    """
+    Reads all information of an ISIS Nexus file, which is needed by SANSFileInformationISISNexus, with the file
+    opened once.
+
+    :param file_name: the full file path.
+    :return: a dictionary with the information or None if the file is not an ISIS Nexus file.
+    """
+    try:
+        with h5.File(file_name) as h5_file:
+            keys = list(h5_file.keys())
+            if RAW_DATA_1 not in keys:
+                return None
+            number_of_periods = len(h5_file[RAW_DATA_1][PERIODS][PROTON_CHARGE])
+            top_level = h5_file[keys[0]]
+            start_time = top_level[START_TIME][0]
+            height, width, thickness, shape_as_string = _read_geometry(top_level)
+            metadata = {"instrument_name": _read_instrument_name(top_level),
+                        "date": start_time.decode("utf-8") if isinstance(start_time, bytes) else str(start_time),
+                        "number_of_periods": number_of_periods,
+                        "run_number": int(top_level[RUN_NUMBER][0]),
+                        "is_event_mode": _read_event_mode(top_level),
+                        "height": height,
+                        "width": width,
+                        "thickness": thickness,
+                        "shape": shape_as_string}
+    except IOError:
+        return None
+    return metadata
+
+
+class SANSRunIndex(object):
+    """
+    Persistent index of the metadata of ISIS Nexus files.
+
+    The entries are appended as JSON lines to the index file and are keyed by the full path of the run file. An entry
+    is only used while the size and the modification time of the run file are the same as when it was indexed.
+    """
+    def __init__(self, index_file=None):
+        if index_file is None:
+            index_file = os.path.join(ConfigService.getAppDataDirectory(), RUN_INDEX_FILE_NAME)
+        self._index_file = index_file
+        self._entries = None
+
+    def get(self, file_name):
+        """
+        :param file_name: the full file path.
+        :return: the indexed metadata of the file or None if the file has not been indexed or has changed since.
+        """
+        stamp = self._get_file_stamp(file_name)
+        entry = self._get_entries().get(os.path.abspath(file_name))
+        if stamp is None or entry is None or (entry["size"], entry["mtime"]) != stamp:
+            return None
+        return entry["metadata"]
+
+    def add(self, file_name, metadata):
+        stamp = self._get_file_stamp(file_name)
+        if stamp is None:
+            return
+        entry = {"path": os.path.abspath(file_name), "size": stamp[0], "mtime": stamp[1], "metadata": metadata}
+        self._get_entries()[entry["path"]] = entry
+        try:
+            with open(self._index_file, "a") as index_file:
+                index_file.write(json.dumps(entry) + "\n")
+        except (IOError, OSError):
+            # The index only speeds up finding the file information
+            pass
+
+    @staticmethod
+    def _get_file_stamp(file_name):
+        try:
+            return os.path.getsize(file_name), os.path.getmtime(file_name)
+        except OSError:
+            return None
+
+    def _get_entries(self):
+        if self._entries is None:
+            self._entries = {}
+            number_of_lines = 0
+            try:
+                with open(self._index_file, "r") as index_file:
+                    for line in index_file:
+                        number_of_lines += 1
+                        try:
+                            entry = json.loads(line)
+                            self._entries[entry["path"]] = entry
+                        except (ValueError, KeyError, TypeError):
+                            # A line which was being written by another process
+                            continue
+            except (IOError, OSError):
+                pass
+            # Later entries of a file replace the earlier ones. Drop the replaced ones once there are many
+            if number_of_lines > 2 * len(self._entries) + 100:
+                self._rewrite()
+        return self._entries
+
+    def _rewrite(self):
+        temporary_file = self._index_file + ".tmp"
+        try:
+            with open(temporary_file, "w") as index_file:
+                for entry in self._entries.values():
+                    index_file.write(json.dumps(entry) + "\n")
+            if os.path.exists(self._index_file):
+                os.remove(self._index_file)
+            os.rename(temporary_file, self._index_file)
+        except (IOError, OSError):
+            pass
+
+
+_default_run_index = None
+
+
+def get_default_run_index():
+    """
+    :return: the run index which is kept in the Mantid application data directory.
+    """
+    global _default_run_index
+    if _default_run_index is None:
+        _default_run_index = SANSRunIndex()
+    return _default_run_index
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -825,29 +966,33 @@ class SANSFileInformation(with_metaclass(ABCMeta, object)):
 
 
 class SANSFileInformationISISNexus(SANSFileInformation):
-    def __init__(self, file_name):
+    def __init__(self, file_name, metadata=None):
         super(SANSFileInformationISISNexus, self).__init__(file_name)
+        # All information is read from the file at once, unless it has been read before
+        if metadata is None:
+            metadata = get_isis_nexus_metadata(self._full_file_name)
+
         # Setup instrument name
-        instrument_name = get_instrument_name_for_isis_nexus(self._full_file_name)
-        self._instrument = SANSInstrument.from_string(instrument_name)
+        self._instrument = SANSInstrument.from_string(metadata["instrument_name"])
 
         # Setup the facility
         self._facility = get_facility(self._instrument)
 
         # Setup date
-        self._date = get_date_for_isis_nexus(self._full_file_name)
+        self._date = DateAndTime(str(metadata["date"]))
 
         # Setup number of periods
-        self._number_of_periods = get_number_of_periods_for_isis_nexus(self._full_file_name)
+        self._number_of_periods = metadata["number_of_periods"]
 
         # Setup run number
-        self._run_number = get_run_number_for_isis_nexus(self._full_file_name)
+        self._run_number = metadata["run_number"]
 
         # Setup event mode check
-        self._is_event_mode = get_event_mode_information(self._full_file_name)
+        self._is_event_mode = metadata["is_event_mode"]
 
         # Get geometry details
-        height, width, thickness, shape = get_geometry_information_isis_nexus(self._full_file_name)
+        height, width, thickness = metadata["height"], metadata["width"], metadata["thickness"]
+        shape = convert_nexus_shape(metadata["shape"])
         self._height = height if height is not None else 1.
         self._width = width if width is not None else 1.
         self._thickness = thickness if thickness is not None else 1.
@@ -1026,8 +1171,9 @@ class SANSFileInformationRaw(SANSFileInformation):
 
 
 class SANSFileInformationFactory(object):
-    def __init__(self):
+    def __init__(self, run_index=None):
         super(SANSFileInformationFactory, self).__init__()
+        self._run_index = run_index if run_index is not None else get_default_run_index()
 
     def create_sans_file_information(self, file_name):
         if not file_name:
@@ -1035,8 +1181,9 @@ class SANSFileInformationFactory(object):
 
         full_file_name = find_sans_file(file_name)
 
-        if is_isis_nexus_single_period(full_file_name) or is_isis_nexus_multi_period(full_file_name):
-            file_information = SANSFileInformationISISNexus(full_file_name)
+        isis_nexus_metadata = self._get_isis_nexus_metadata(full_file_name)
+        if isis_nexus_metadata is not None:
+            file_information = SANSFileInformationISISNexus(full_file_name, isis_nexus_metadata)
         elif is_raw_single_period(full_file_name) or is_raw_multi_period(full_file_name):
             file_information = SANSFileInformationRaw(full_file_name)
         elif is_added_histogram(full_file_name) or is_added_event(full_file_name):
@@ -1044,3 +1191,18 @@ class SANSFileInformationFactory(object):
         else:
             raise NotImplementedError("The file type you have provided is not implemented yet.")
         return file_information
+
+    def _get_isis_nexus_metadata(self, full_file_name):
+        """
+        Gets the metadata of an ISIS Nexus file from the run index or, if it is not indexed, from the file itself.
+
+        :param full_file_name: the full file path.
+        :return: the metadata or None if the file is not an ISIS Nexus file with at least one period.
+        """
+        metadata = self._run_index.get(full_file_name)
+        if metadata is None:
+            metadata = get_isis_nexus_metadata(full_file_name)
+            if metadata is None or metadata["number_of_periods"] < 1:
+                return None
+            self._run_index.add(full_file_name, metadata)
+        return metadata
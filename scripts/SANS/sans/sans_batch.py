@@ -8,7 +8,7 @@
 """ SANBatchReduction algorithm is the starting point for any new type reduction, event single reduction"""
 from __future__ import (absolute_import, division, print_function)
 from sans.state.state import State
-from sans.algorithm_detail.batch_execution import (single_reduction_for_batch)
+from sans.algorithm_detail.batch_execution import (single_reduction_for_batch, parallel_reduction_for_batch)
 from sans.common.enums import (OutputMode, FindDirectionEnum, DetectorType)
 from sans.algorithm_detail.centre_finder_new import centre_finder_new, centre_finder_mass
 
@@ -18,7 +18,7 @@ class SANSBatchReduction(object):
         super(SANSBatchReduction, self).__init__()
 
     def __call__(self, states, use_optimizations=True, output_mode=OutputMode.PublishToADS, plot_results = False,
-                 output_graph='', save_can=False):
+                 output_graph='', save_can=False, number_of_threads=1):
         """
         This is the start of any reduction.
 
@@ -28,9 +28,16 @@ class SANSBatchReduction(object):
                             1. PublishToADS
                             2. SaveToFile
                             3. Both
+        :param number_of_threads: the maximum number of states which are reduced at the same time. States which share
+                                  the can, transmission or direct runs are reduced one after the other in order to
+                                  reuse the loaded data. The limit is lowered if the loaded data would not fit into the
+                                  available memory. Results cannot be plotted during a parallel reduction.
         """
-        self.validate_inputs(states, use_optimizations, output_mode, plot_results, output_graph)
+        self.validate_inputs(states, use_optimizations, output_mode, plot_results, output_graph, number_of_threads)
 
+        if number_of_threads > 1 and len(states) > 1:
+            return parallel_reduction_for_batch(states, use_optimizations, output_mode, number_of_threads,
+                                                save_can=save_can)
         return self._execute(states, use_optimizations, output_mode, plot_results, output_graph, save_can=save_can)
 
     @staticmethod
@@ -46,11 +53,13 @@ class SANSBatchReduction(object):
             out_scale_factors_list.append(out_scale_factors)
         return out_scale_factors_list, out_shift_factors_list
 
-    def validate_inputs(self, states, use_optimizations, output_mode, plot_results, output_graph):
+    def validate_inputs(self, states, use_optimizations, output_mode, plot_results, output_graph,
+                        number_of_threads=1):
         # We are strict about the types here.
         # 1. states has to be a list of sans state objects
         # 2. use_optimizations has to be bool
         # 3. output_mode has to be an OutputMode enum
+        # 4. number_of_threads has to be a positive integer
         if not isinstance(states, list):
             raise RuntimeError("The provided states are not in a list. They have to be in a list.")
 
@@ -76,6 +85,13 @@ class SANSBatchReduction(object):
             raise RuntimeError("The output mode has to be an enum of type OutputMode. The provided type is"
                                " {0}".format(type(output_mode)))
 
+        if not isinstance(number_of_threads, int) or isinstance(number_of_threads, bool) or number_of_threads < 1:
+            raise RuntimeError("The number of threads has to be a positive integer. The provided value is"
+                               " {0}".format(number_of_threads))
+
+        if plot_results and number_of_threads > 1:
+            raise RuntimeError("The results cannot be plotted if several states are reduced at the same time.")
+
         errors = self._validate_inputs(states)
         if errors:
             raise RuntimeError("The provided states are not valid: {}".format(errors))
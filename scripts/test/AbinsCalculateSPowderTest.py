@@ -8,6 +8,9 @@ from __future__ import (absolute_import, division, print_function)
 import unittest
 from mantid.simpleapi import logger
 import json
+import os
+import sys
+import tempfile
 import numpy as np
 import AbinsModules
 
@@ -68,18 +71,61 @@ class AbinsCalculateSPowderTest(unittest.TestCase):
                                          sample_form=self._sample_form, abins_data=good_data.extract(),
                                          instrument=self._instrument, quantum_order_num=self._order_event)
 
+        # wrong engine
+        with self.assertRaises(ValueError):
+            AbinsModules.CalculateS.init(filename=full_path_filename, temperature=self._temperature,
+                                         sample_form=self._sample_form, abins_data=good_data,
+                                         instrument=self._instrument, quantum_order_num=self._order_event,
+                                         engine="Fastest")
+
     #  main test
     def test_good_case(self):
         self._good_case(name=self._si2)
 
+    def test_good_case_all_atoms(self):
+        self._good_case(name=self._si2, engine="AllAtoms")
+
+    def test_pool_of_processes_matches_serial_calculation(self):
+        s_module = sys.modules[AbinsModules.SPowderSemiEmpiricalCalculator.__module__]
+        if not s_module.PATHOS_FOUND:
+            self.skipTest("pathos is not available")
+
+        # record the directories of the memory-mapped tensors
+        shared_dirs = []
+        mkdtemp = tempfile.mkdtemp
+
+        def recording_mkdtemp(*args, **kwargs):
+            path = mkdtemp(*args, **kwargs)
+            if kwargs.get("prefix") == "abins_":
+                shared_dirs.append(path)
+            return path
+
+        threads = AbinsModules.AbinsParameters.threads
+        try:
+            s_module.PATHOS_FOUND = False
+            serial_data = self._calculate_s(name=self._si2)
+            s_module.PATHOS_FOUND = True
+            tempfile.mkdtemp = recording_mkdtemp
+            for num_threads in [2, 3]:
+                AbinsModules.AbinsParameters.threads = num_threads
+                self._check_data(good_data=serial_data, data=self._calculate_s(name=self._si2))
+        finally:
+            s_module.PATHOS_FOUND = True
+            tempfile.mkdtemp = mkdtemp
+            AbinsModules.AbinsParameters.threads = threads
+
+        self.assertEqual(len(shared_dirs), 2)
+        for shared_dir in shared_dirs:
+            self.assertFalse(os.path.exists(shared_dir))
+
     # helper functions
-    def _good_case(self, name=None):
+    def _good_case(self, name=None, engine="PerAtom"):
         # calculation of powder data
         good_data = self._get_good_data(filename=name)
         good_tester = AbinsModules.CalculateS.init(
             filename=AbinsModules.AbinsTestHelpers.find_file(filename=name + ".phonon"), temperature=self._temperature,
             sample_form=self._sample_form, abins_data=good_data["DFT"], instrument=self._instrument,
-            quantum_order_num=self._order_event)
+            quantum_order_num=self._order_event, engine=engine)
         calculated_data = good_tester.get_formatted_data()
 
         self._check_data(good_data=good_data["S"], data=calculated_data.extract())
@@ -93,6 +139,16 @@ class AbinsCalculateSPowderTest(unittest.TestCase):
 
         self._check_data(good_data=good_data["S"], data=loaded_data.extract())
 
+    def _calculate_s(self, name=None):
+        # calculate S again rather than load it from the hdf file of an earlier calculation
+        AbinsModules.AbinsTestHelpers.remove_output_files(list_of_names=["CalculateSPowder"])
+        good_data = self._get_good_data(filename=name)
+        calculator = AbinsModules.CalculateS.init(
+            filename=AbinsModules.AbinsTestHelpers.find_file(filename=name + ".phonon"), temperature=self._temperature,
+            sample_form=self._sample_form, abins_data=good_data["DFT"], instrument=self._instrument,
+            quantum_order_num=self._order_event)
+        return calculator.calculate_data().extract()
+
     def _get_good_data(self, filename=None):
 
         castep_reader = AbinsModules.LoadCASTEP(
@@ -131,6 +131,41 @@ class AbinsFrequencyPowderGeneratorTest(unittest.TestCase):
         self.assertEqual(True, np.allclose(correct_array_1, generated_array_1))
         self.assertEqual(True, np.allclose(correct_coefficients_1, generated_coefficients_1))
 
+    def test_construct_freq_combinations_in_blocks(self):
+
+        array = np.arange(AbinsParameters.bin_width, 10.0 * AbinsParameters.bin_width, AbinsParameters.bin_width)
+        array_coeff = np.arange(array.size, dtype=AbinsConstants.INT_TYPE)
+
+        # fundamentals cannot be generated block by block
+        with self.assertRaises(ValueError):
+            next(self.simple_freq_generator.construct_freq_combinations_in_blocks(
+                fundamentals_array=array, fundamentals_coefficients=array_coeff, previous_array=array,
+                quantum_order=AbinsConstants.FUNDAMENTALS))
+
+        previous_array = array
+        previous_coefficients = array_coeff
+        for order in range(AbinsConstants.FIRST_OVERTONE, AbinsConstants.MAX_ORDER + AbinsConstants.S_LAST_INDEX):
+
+            generated_array, generated_coefficients = self.simple_freq_generator.construct_freq_combinations(
+                fundamentals_array=array, fundamentals_coefficients=array_coeff, previous_array=previous_array,
+                previous_coefficients=previous_coefficients, quantum_order=order)
+
+            # each block has at most 2 * 9 combinations
+            blocks = list(self.simple_freq_generator.construct_freq_combinations_in_blocks(
+                fundamentals_array=array, fundamentals_coefficients=array_coeff, previous_array=previous_array,
+                previous_coefficients=previous_coefficients, quantum_order=order, max_block_size=2 * array.size))
+
+            self.assertEqual(int(np.ceil(previous_array.size / 2.0)), len(blocks))
+            for block_array, block_coefficients in blocks:
+                self.assertTrue(block_array.size <= 2 * array.size)
+
+            self.assertEqual(True, np.array_equal(generated_array, np.concatenate([block[0] for block in blocks])))
+            self.assertEqual(True, np.array_equal(generated_coefficients,
+                                                  np.concatenate([block[1] for block in blocks])))
+
+            previous_array = generated_array
+            previous_coefficients = generated_coefficients
+
 
 if __name__ == '__main__':
     unittest.main()
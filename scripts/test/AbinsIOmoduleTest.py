@@ -8,12 +8,16 @@ from __future__ import (absolute_import, division, print_function)
 import unittest
 from mantid.simpleapi import logger
 import numpy as np
-from AbinsModules import IOmodule, AbinsTestHelpers
+from AbinsModules import IOmodule, AbinsTestHelpers, AbinsParameters
 
 
 class AbinsIOmoduleTest(unittest.TestCase):
 
+    def setUp(self):
+        self._max_cache_size = AbinsParameters.max_cache_size
+
     def tearDown(self):
+        AbinsParameters.max_cache_size = self._max_cache_size
         AbinsTestHelpers.remove_output_files(list_of_names=["Cars", "temphgfrt"])
 
     # noinspection PyMethodMayBeStatic
@@ -100,6 +104,41 @@ class AbinsIOmoduleTest(unittest.TestCase):
 
         self.assertRaises(ValueError, self.loader.load, list_of_datasets=1)
 
+    def _save_cached(self, colour=None):
+        saver = IOmodule(input_filename="Cars.foo", group_name="Paint", stage_parameters={"colour": colour})
+        saver.add_file_attributes()
+        saver.add_data("Layers", np.ones(1000) * len(colour))
+        saver.save()
+
+    def _cached_stages(self):
+        self.assertRaises(ValueError, IOmodule, input_filename="Cars.foo", group_name="Paint", stage_parameters=1)
+
+        self._save_cached(colour="red")
+        self._save_cached(colour="blue")
+
+        # each set of parameters is stored separately
+        red = IOmodule(input_filename="Cars.foo", group_name="Paint", stage_parameters={"colour": "red"})
+        red.check_previous_data()
+        self.assertEqual(3, red.load(list_of_datasets=["Layers"])["datasets"]["Layers"][0])
+
+        blue = IOmodule(input_filename="Cars.foo", group_name="Paint", stage_parameters={"colour": "blue"})
+        blue.check_previous_data()
+        self.assertEqual(4, blue.load(list_of_datasets=["Layers"])["datasets"]["Layers"][0])
+
+        green = IOmodule(input_filename="Cars.foo", group_name="Paint", stage_parameters={"colour": "green"})
+        self.assertRaises(ValueError, green.check_previous_data)
+
+        # with a tiny cache only the data which has just been saved is kept
+        AbinsParameters.max_cache_size = 0.000001
+        self._save_cached(colour="green")
+        self.assertRaises(ValueError, red.check_previous_data)
+        self.assertRaises(ValueError, blue.check_previous_data)
+        green.check_previous_data()
+        self.assertEqual(5, green.load(list_of_datasets=["Layers"])["datasets"]["Layers"][0])
+
+        # groups which are not cached are never removed
+        self._loading_datasets()
+
     def runTest(self):
 
         self._save_stuff()
@@ -117,5 +156,7 @@ class AbinsIOmoduleTest(unittest.TestCase):
         self._loading_datasets()
         self._loading_structured_datasets()
 
+        self._cached_stages()
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,12 +6,18 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import (absolute_import, division, print_function)
 import os, sys
+import shutil
+import tempfile
+import time
+import numpy as np
 from mantid.simpleapi import *
 from mantid import api
 import unittest
 import inspect
 from Direct.DirectEnergyConversion import DirectEnergyConversion
 from Direct.PropertyManager  import PropertyManager
+from Direct.WhiteBeamCache   import WhiteBeamCache
+import Direct.diagnostics as diagnostics
 import Direct.dgreduce as dgreduce
 
 #-----------------------------------------------------------------------------------------------------------------------------------------
@@ -119,6 +125,130 @@ class DirectEnergyConversionTest(unittest.TestCase):
 
         api.AnalysisDataService.clear()
 
+    def test_vectorised_diagnostics_as_algorithms(self):
+        wb_ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=10000)
+        LoadInstrument(wb_ws,InstrumentName='MARI', RewriteSpectraMap=True)
+        # make some spectra fail the limits and the median tests
+        wb_ws.setY(1,wb_ws.readY(1)*0)
+        wb_ws.setY(5,wb_ws.readY(5)*10)
+        wb_ws.setY(9,wb_ws.readY(9)*0.01)
+
+        tReducer = DirectEnergyConversion(wb_ws.getInstrument())
+        tReducer.prop_man.van_sig = 0
+        masks = []
+        for vectorised in (False,True):
+            tReducer.prop_man.vectorised_diag = vectorised
+            mask_ws = tReducer.diagnose(CloneWorkspace(wb_ws))
+            _, masked_list = ExtractMask(InputWorkspace=mask_ws)
+            masks.append(sorted(masked_list))
+            if not vectorised:
+                self.assertTrue(tReducer.diag_reason_codes is None)
+
+        self.assertTrue(len(masks[0]) >= 3)
+        self.assertEqual(masks[0],masks[1])
+        self.assertEqual(len(tReducer.diag_reason_codes), wb_ws.getNumberHistograms())
+        self.assertEqual(tReducer.diag_reason_codes[1], diagnostics.WHITE_LIMITS)
+
+    def _diag_integrals(self, name, scales):
+        ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=10000, OutputWorkspace=name+'_raw')
+        LoadInstrument(ws,InstrumentName='MARI', RewriteSpectraMap=True)
+        ws = Integration(ws, OutputWorkspace=name)
+        for index, scale in scales.items():
+            ws.setY(index,ws.readY(index)*scale)
+        return ws
+
+    def test_vectorised_diagnostics_with_background_and_sample_counts(self):
+        # white beam spectra failing the limits and the median tests
+        white = self._diag_integrals('white', {4:0, 6:10, 8:0.01})
+        # sample spectrum with zero counts
+        counts = self._diag_integrals('counts', {10:0})
+        # background spectra failing the median test, the zero one is also excluded from the median
+        background = self._diag_integrals('background', {12:10, 13:0})
+        diag_params = dict(tiny=1e-10, huge=1e10, van_out_lo=0.01, van_out_hi=100., van_lo=0.5, van_hi=1.5,
+                           van_sig=0., samp_zero=True, samp_lo=0.5, samp_hi=1.5, samp_sig=0.,
+                           use_hard_mask_only=False, print_diag_results=True)
+
+        summaries = []
+        print_test_summary = diagnostics.print_test_summary
+        diagnostics.print_test_summary = lambda test_results, test_name=None: summaries.append(test_results)
+        masks = []
+        van_masks = []
+        try:
+            for vectorised in (False,True):
+                white_int = CloneWorkspace(white, OutputWorkspace='white_int')
+                van_mask = diagnostics.diagnose(white_int, vectorised_diag=vectorised,
+                                                sample_counts=CloneWorkspace(counts, OutputWorkspace='counts_int'),
+                                                background_int=CloneWorkspace(background, OutputWorkspace='bkgd_int'),
+                                                **diag_params)
+                if vectorised:
+                    van_mask, failed, reasons = van_mask
+                masks.append(sorted(ExtractMask(InputWorkspace=white_int)[1]))
+                van_masks.append(sorted(ExtractMask(InputWorkspace=van_mask)[1]))
+        finally:
+            diagnostics.print_test_summary = print_test_summary
+
+        self.assertEqual(masks[0],masks[1])
+        self.assertEqual(van_masks[0],van_masks[1])
+        failed = [white.getDetector(index).getID() for index in (4,6,8,10,12,13)]
+        for det_id in failed:
+            self.assertTrue(det_id in masks[1])
+        for det_id in failed[:3]:
+            self.assertTrue(det_id in van_masks[1])
+        self.assertEqual(len(summaries), 2)
+        self.assertEqual(sorted(summaries[0].keys()),
+                         ['Background test:', 'First detector vanadium test:', 'Zero total count sample check:'])
+        self.assertEqual(sorted(summaries[0].keys()), sorted(summaries[1].keys()))
+        for test_name in summaries[0]:
+            self.assertEqual(summaries[0][test_name][1], summaries[1][test_name][1])
+
+        np.testing.assert_array_equal(np.flatnonzero(failed), [4,6,8,10,12,13])
+        expected_reasons = np.zeros(white.getNumberHistograms(), dtype=int)
+        expected_reasons[4] = diagnostics.WHITE_LIMITS
+        expected_reasons[[6,8]] = diagnostics.WHITE_MEDIAN
+        expected_reasons[10] = diagnostics.ZERO_COUNTS
+        expected_reasons[[12,13]] = diagnostics.BACKGROUND
+        np.testing.assert_array_equal(reasons, expected_reasons)
+
+    def test_vectorised_diagnostics_reason_codes_of_spectra_blocks(self):
+        wb_ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=10000)
+        LoadInstrument(wb_ws,InstrumentName='MARI', RewriteSpectraMap=True)
+        # a spectrum failing the limits test in each block
+        wb_ws.setY(2,wb_ws.readY(2)*0)
+        wb_ws.setY(11,wb_ws.readY(11)*0)
+
+        tReducer = DirectEnergyConversion(wb_ws.getInstrument())
+        tReducer.prop_man.van_sig = 0
+        tReducer.prop_man.vectorised_diag = True
+        tReducer.prop_man.diag_spectra = '(1,8);(9,16)'
+        try:
+            tReducer.diagnose(CloneWorkspace(wb_ws))
+        finally:
+            tReducer.prop_man.diag_spectra = None
+
+        reasons = tReducer.diag_reason_codes
+        self.assertEqual(len(reasons), wb_ws.getNumberHistograms())
+        self.assertEqual(reasons[2], diagnostics.WHITE_LIMITS)
+        self.assertEqual(reasons[11], diagnostics.WHITE_LIMITS)
+
+    def test_vectorised_median_detector_test_as_algorithm(self):
+        background = self._diag_integrals('background', {5:0, 9:20, 12:0.1})
+        # the masked spectra make the number of failures the algorithm returns negative
+        MaskDetectors(Workspace=background, WorkspaceIndexList=[4,6,7,8,10])
+        expected_mask, expected_failures = MedianDetectorTest(InputWorkspace=background, SignificanceTest=0.,
+                                                              LowThreshold=0.5, HighThreshold=1.5,
+                                                              LowOutlier=0.0, HighOutlier=1e100,
+                                                              ExcludeZeroesFromMedian=True)
+        self.assertTrue(expected_failures < 0)
+
+        values, errors, masked, monitors = diagnostics.read_integrals(background)
+        failed, failures = diagnostics.median_detector_test(values, errors, masked, monitors, 0.5, 1.5,
+                                                            0.0, 1e100, 0., True)
+        self.assertEqual(failures, expected_failures)
+        np.testing.assert_array_equal(np.flatnonzero(failed),
+                                      np.flatnonzero(expected_mask.extractY()[:, 0] > 0.5))
+        _, bkgd_failures = diagnostics.do_background_test(background, 0.5, 1.5, 0., True)
+        self.assertEqual(bkgd_failures, abs(expected_failures))
+
 
     def test_do_white_wb(self) :
         wb_ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=10000)
@@ -131,6 +261,64 @@ class DirectEnergyConversionTest(unittest.TestCase):
         self.assertTrue(white_ws)
 
 
+    def test_do_white_uses_wb_cache(self):
+        wb_ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=10000)
+        LoadInstrument(wb_ws,InstrumentName='MARI', RewriteSpectraMap=True)
+        AddSampleLog(wb_ws,LogName='run_number',LogText='1000',LogType='Number')
+        cache_dir = tempfile.mkdtemp()
+        try:
+            tReducer = DirectEnergyConversion(wb_ws.getInstrument())
+            tReducer.wb_cache_dir = cache_dir
+
+            white_ws = tReducer.do_white(wb_ws, None, None)
+            white_ws = CloneWorkspace(white_ws,OutputWorkspace='white_from_data')
+            self.assertEqual(len(os.listdir(cache_dir)),1)
+
+            mask_ws = tReducer.diagnose(wb_ws)
+            masked_ws = ExtractMask(mask_ws,OutputWorkspace='masked_from_data')[0]
+            self.assertEqual(len(os.listdir(cache_dir)),2)
+
+            # there is no run 1000 of MARI so it can be obtained from cache only
+            for ws_name in mtd.getObjectNames():
+                if ws_name not in ['white_from_data','masked_from_data']:
+                    DeleteWorkspace(ws_name)
+            tReducer = DirectEnergyConversion(white_ws.getInstrument())
+            tReducer.wb_cache_dir = cache_dir
+            cached_ws = tReducer.do_white(1000, None, None)
+            result = CompareWorkspaces(white_ws,cached_ws)
+            self.assertTrue(result[0])
+
+            cached_mask = tReducer.diagnose(1000)
+            result = CompareWorkspaces(masked_ws,ExtractMask(cached_mask)[0],CheckMasking=True)
+            self.assertTrue(result[0])
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_wb_cache_evicts_least_recently_used(self):
+        ws = CreateSampleWorkspace(NumBanks=1, BankPixelWidth=4, NumEvents=100)
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = WhiteBeamCache(cache_dir,1000)
+            keys = [WhiteBeamCache.integrals_key('MAR',[run],None,'current',[20,100]) for run in [11,12,13]]
+            self.assertEqual(len(set(keys)),3)
+            self.assertTrue(WhiteBeamCache.integrals_key('MAR',[0],None,'current',[20,100]) is None)
+
+            cache.save_integrals(keys[0],ws)
+            cache.save_integrals(keys[1],ws)
+            entry_size = sum(os.path.getsize(os.path.join(cache_dir,name)) for name in os.listdir(cache_dir))//2
+            old_time = time.time() - 100
+            os.utime(os.path.join(cache_dir,keys[0] + '.nxs'),(old_time,old_time))
+            os.utime(os.path.join(cache_dir,keys[1] + '.nxs'),(old_time + 10,old_time + 10))
+            # use the oldest entry, so the other one is deleted first
+            self.assertTrue(cache.load_integrals(keys[0],'cached_ws') is not None)
+
+            cache = WhiteBeamCache(cache_dir,2.5*entry_size/(1024*1024))
+            cache.save_integrals(keys[2],ws)
+            self.assertEqual(sorted(os.listdir(cache_dir)),sorted([keys[0] + '.nxs',keys[2] + '.nxs']))
+            self.assertTrue(cache.load_integrals(keys[1],'cached_ws') is None)
+        finally:
+            shutil.rmtree(cache_dir)
+
     def test_get_set_attributes(self):
         tReducer = self.reducer
 
@@ -420,6 +608,67 @@ class DirectEnergyConversionTest(unittest.TestCase):
         self.assertTrue(rez[0])
 
 
+    def test_multirep_chunk_reduced_alone(self):
+        run_monitors=CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,
+                                           NumEvents=100000,XUnit='Energy', XMin=3, XMax=200, BinWidth=0.1)
+        LoadInstrument(run_monitors,InstrumentName='MARI', RewriteSpectraMap=True)
+        ConvertUnits(InputWorkspace='run_monitors', OutputWorkspace='run_monitors', Target='TOF')
+        run_monitors = mtd['run_monitors']
+        tof = run_monitors.dataX(3)
+        tMin = tof[0]
+        tMax = tof[-1]
+        run = CreateSampleWorkspace( Function='Multiple Peaks',WorkspaceType='Event',NumBanks=8, BankPixelWidth=1,
+                                     NumEvents=100000, XUnit='TOF',xMin=tMin,xMax=tMax)
+        LoadInstrument(run,InstrumentName='MARI', RewriteSpectraMap=True)
+        run2 = CloneWorkspace(run)
+        wb_ws   = Rebin(run,Params=[tMin,1,tMax],PreserveEvents=False)
+
+        tReducer = DirectEnergyConversion(run.getInstrument())
+        tReducer.prop_man.run_diagnostics=False
+        tReducer.hard_mask_file=None
+        tReducer.map_file=None
+        tReducer.save_format=None
+        tReducer.multirep_tof_specta_list = [4,5]
+        # runs given as workspaces can not be reduced by other processes, so this reduces chunks one by one
+        tReducer.multirep_processes = 2
+
+        result = tReducer.convert_to_energy(wb_ws,run,[67.,122.],[-2,0.02,0.8])
+        self.assertEqual(len(result),2)
+        result[1] = RenameWorkspace(result[1],OutputWorkspace='SampleRez#1')
+
+        # as the worker processes do
+        tReducer._chunks_to_reduce = [1]
+        result2 = tReducer.convert_to_energy(wb_ws,run2,[67.,122.],[-2,0.02,0.8])
+        self.assertEqual(len(result2),1)
+        rez = CompareWorkspaces(result[1],result2[0])
+        self.assertTrue(rez[0])
+
+    def test_multirep_chunks_reduced_in_processes(self):
+        def reduce_runs(multirep_processes):
+            tReducer = DirectEnergyConversion('MAR')
+            tReducer.prop_man.run_diagnostics=False
+            tReducer.hard_mask_file=None
+            tReducer.map_file=None
+            tReducer.save_format=None
+            tReducer.fix_ei=True
+            tReducer.multirep_processes = multirep_processes
+            # runs given as files can be loaded by the worker processes
+            return tReducer.convert_to_energy('MAR11060.raw','MAR11001.raw',[11.,12.],[-0.5,0.01,0.9])
+
+        result = reduce_runs(1)
+        self.assertEqual(len(result),2)
+        for ind,item in enumerate(result):
+            result[ind]=RenameWorkspace(item,OutputWorkspace='SampleRez#'+str(ind))
+
+        result2 = reduce_runs(2)
+        self.assertEqual(len(result2),2)
+        for ws,ws2 in zip(result,result2):
+            # the chunk has been reduced by a worker process and loaded back from its file
+            self.assertEqual(ws2.getHistory().lastAlgorithm().name(),'LoadNexusProcessed')
+            self.assertAlmostEqual(ws.readX(0)[0],ws2.readX(0)[0])
+            rez = CompareWorkspaces(ws,ws2,CheckInstrument=False)
+            self.assertTrue(rez[0])
+
     def test_multirep_abs_units_mode(self):
         # create test workspace
         run_monitors=CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,\
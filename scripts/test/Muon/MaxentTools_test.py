@@ -0,0 +1,94 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+import unittest
+
+import numpy as np
+
+from Muon.MaxentTools.maxent import MAXENT, MAXENT_BATCH
+from Muon.MaxentTools.multimaxalpha import MULTIMAX, MULTIMAX_SWEEP
+from Muon.MaxentTools.tropus import TROPUS
+from Muon.MaxentTools.zft import ZFT
+
+
+class NullLog(object):
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+class NullProgress(object):
+    def report(self, *args):
+        pass
+
+
+def muon_problem(seed, factor=1.04, ngroups=4, npts=256, nbins=256, res=0.016):
+    rng = np.random.RandomState(seed)
+    t = (np.arange(nbins) + 0.5) * res
+    phases = np.arange(ngroups) * 2 * np.pi / ngroups
+    rdata = np.array([rng.poisson(1000 * np.exp(-t / 2.197) * (1 + 0.2 * np.cos(2.7 * t + phase))) + 1.
+                      for phase in phases])
+    return dict(POINTS_nhists=ngroups, POINTS_ngroups=ngroups, POINTS_npts=npts, CHANNELS_itzero=0,
+                CHANNELS_i1stgood=10, CHANNELS_itotal=nbins, RUNDATA_res=res, RUNDATA_frames=100000,
+                GROUPING_group=np.arange(ngroups), DATALL_rdata=rdata, FAC_factor=factor, SENSE_taud=np.zeros(ngroups),
+                MAXPAGE_n=64, filePHASE=phases, PULSES_def=0.1, PULSES_npulse=1, FLAGS_fitdead=False,
+                FLAGS_fixphase=False, SAVETIME_i2=2 * npts, OuterIter=3, InnerIter=5, mylog=NullLog(),
+                prog=NullProgress(), phaseconvWS=None, TZERO_fine=0.008, deadDetectors=[])
+
+
+class MaxentToolsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.npts, self.ngroups, self.n, self.i2 = 50, 3, 20, 128
+        self.convol = rng.rand(self.n) + 1.j * rng.rand(self.n)
+        self.a = rng.rand(self.ngroups)
+        self.b = rng.rand(self.ngroups)
+        self.e = rng.rand(self.npts)
+
+    def test_transforms_of_stacked_arrays_match_single_transforms(self):
+        f = np.random.RandomState(1).rand(2, 3, self.n)
+        ox = np.random.RandomState(2).rand(2, self.npts, self.ngroups)
+        zr, zi = ZFT(f, self.convol, self.e, self.i2)
+        x = TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e)
+        for i in range(2):
+            np.testing.assert_allclose(TROPUS(ox[i], self.i2, self.convol, self.a, self.b, self.e), x[i])
+            for k in range(3):
+                single_zr, single_zi = ZFT(f[i, k], self.convol, self.e, self.i2)
+                np.testing.assert_allclose(single_zr, zr[i, k])
+                np.testing.assert_allclose(single_zi, zi[i, k])
+
+    def test_batch_matches_separate_problems(self):
+        rng = np.random.RandomState(3)
+        f = rng.rand(2, self.n)
+        zr, zi = ZFT(f, self.convol, self.e, self.i2)
+        datum = (zr[:, :, np.newaxis] * self.a + zi[:, :, np.newaxis] * self.b) + 0.01 * rng.randn(
+            2, self.npts, self.ngroups)
+        sigma = np.full(datum.shape, 0.01)
+        args = (0.1, np.zeros(self.n), 10, False, 0, self.n, None, self.convol, self.a, self.b, self.e)
+        batch = MAXENT_BATCH(datum, sigma, *(args + (np.array([1.0, 1.2]), 0.0, self.i2, NullLog(),
+                                                     NullProgress())))
+        for i, factor in enumerate([1.0, 1.2]):
+            single = MAXENT(datum[i], sigma[i], *(args + (factor, 0.0, self.i2, NullLog(), NullProgress())))
+            np.testing.assert_allclose(single[0], batch[0][i])
+            self.assertEqual(single[2], batch[2][i])
+            np.testing.assert_allclose(single[3], batch[3][i])
+            self.assertAlmostEqual(single[4], batch[4][i])
+
+    def test_sweep_matches_separate_runs(self):
+        problems = [muon_problem(0), muon_problem(1, factor=1.2)]
+        sweep_args = dict(problems[0])
+        for name in ['RUNDATA_frames', 'DATALL_rdata', 'FAC_factor', 'SENSE_taud', 'phaseconvWS']:
+            sweep_args[name] = [problem[name] for problem in problems]
+        sweep = MULTIMAX_SWEEP(**sweep_args)
+        self.assertEqual(2, len(sweep))
+        for problem, result in zip(problems, sweep):
+            single = MULTIMAX(**problem)
+            np.testing.assert_allclose(single[3], result[3], rtol=1e-10, atol=1e-12)
+            np.testing.assert_allclose(single[17], result[17], rtol=1e-10, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
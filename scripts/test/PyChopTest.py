@@ -11,7 +11,7 @@ import numpy as np
 
 # Import mantid to setup the python paths to the bundled scripts
 import mantid
-from PyChop import PyChop2
+from PyChop import PyChop2, Chop
 
 class PyChop2Tests(unittest.TestCase):
 
@@ -72,5 +72,64 @@ class PyChop2Tests(unittest.TestCase):
             self.assertAlmostEqual(rr[0], res[inc][0], places=7)
             self.assertAlmostEqual(ff, flux[inc], places=7)
 
+    # Tests that the analytic moderator width is clamped at high Ei for single points as for arrays
+    def test_pychop_moderator_width_clamped(self):
+        chopobj = PyChop2('MAPS', 'A', 400)
+        eis = [500., 1000., 1500.]
+        widths = chopobj.moderator.getWidthSquared(np.array(eis))
+        for ei, width, res in zip(eis, widths, [15.61098086204612, 38.87949983077104, 66.07270943809273]):
+            self.assertAlmostEqual(chopobj.moderator.getWidthSquared(ei) / width, 1.)
+            self.assertAlmostEqual(chopobj.getResolution(0., ei)[0], res, places=7)
+
+    # Tests the independently phased chopper of LET, whose openings used to be built from the whole phase list
+    def test_pychop_let_phase(self):
+        chopobj = PyChop2('LET', 'High flux')
+        chopobj.setFrequency([160, 80])
+        for phase in [5, '2']:
+            chopobj.phase = phase
+            self.assertAlmostEqual(chopobj.getResolution(0., 2.)[0], 0.0469303956802042, places=10)
+            self.assertEqual(len(chopobj.getAllowedEi(2.)), 6)
+
+    # Tests that the Fermi chopper width of an array of Ei matches the single point widths in all regimes
+    def test_pychop_fermi_width_array(self):
+        # MAPS 'A' chopper at 400 Hz: no transmission at 30 meV, 1 < gamma < 4 at 50 to 500 meV and gamma < 1 at 200 meV
+        eis = np.array([30., 50., 100., 200., 500.])
+        widths = Chop.tchop(400., eis, 1.087e-3, 49e-3, 1.3)
+        self.assertTrue(np.isnan(widths[0]))
+        self.assertAlmostEqual(widths[1] / 3.780414319372745e-14, 1.)
+        for ei, width in zip(eis[1:], widths[1:]):
+            self.assertAlmostEqual(width / Chop.tchop(400., ei, 1.087e-3, 49e-3, 1.3), 1.)
+
+    # Tests that the chopper properties of an instrument are not taken from the last instrument created
+    def test_pychop_properties_of_own_instrument(self):
+        merlin = PyChop2('MERLIN', 'G', 200)
+        mari = PyChop2('MARI', 'G', 400)
+        self.assertEqual(merlin.frequency[0], 200)
+        merlin.frequency = 300
+        self.assertEqual(merlin.getFrequency()[0], 300)
+        self.assertEqual(mari.frequency[0], 400)
+
+    # Tests that a scan gives the same maps as calculating each point on its own
+    def test_pychop_scan(self):
+        instruments = [('MERLIN', 'G', [200, 450], None, [15, 30, 60]),
+                       ('LET', 'High flux', [[160, 80], [240, 120]], [5, '2'], [2, 3.7])]
+        for instname, chopper, freqs, phases, eis in instruments:
+            chopobj = PyChop2(instname, chopper)
+            for nprocesses in [1, 2]:
+                chopobj.setFrequency(freqs[0])
+                scan = chopobj.scan(eis, freqs, phases, np.linspace(0, 0.8, 5), nprocesses=nprocesses)
+                # The preset frequency is kept
+                self.assertEqual(chopobj.getFrequency()[0], np.atleast_1d(freqs[0])[0])
+                for ifreq, freq in enumerate(freqs):
+                    for iphase, phase in enumerate(scan['phase']):
+                        chopobj.setFrequency(freq)
+                        chopobj.phase = phase
+                        for iei, ei in enumerate(eis):
+                            res = chopobj.getResolution(np.linspace(0, 0.8, 5) * ei, ei)
+                            np.testing.assert_allclose(scan['resolution'][ifreq, iphase, iei], res, rtol=1e-10)
+                            self.assertAlmostEqual(scan['flux'][ifreq, iphase, iei] / chopobj.getFlux(ei)[0], 1.)
+                            self.assertEqual(scan['reps'][ifreq, iphase, iei], len(chopobj.getAllowedEi(ei)))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -7,7 +7,11 @@
 from __future__ import (absolute_import, division, print_function)
 import unittest
 import sys
-from sans.algorithm_detail.batch_execution import get_all_names_to_save, ReductionPackage
+from sans.algorithm_detail.batch_execution import (get_all_names_to_save, ReductionPackage,
+                                                   group_states_by_shared_inputs,
+                                                   get_number_of_parallel_reductions,
+                                                   parallel_reduction_for_batch)
+from sans.common.enums import OutputMode
 from mantid.simpleapi import CreateSampleWorkspace
 if sys.version_info.major > 2:
     from unittest import mock
@@ -81,5 +85,80 @@ class GetAllNamesToSaveTest(unittest.TestCase):
                                          'reduced_lab_sample', 'reduced_hab_sample'})
 
 
+class ParallelReductionTest(unittest.TestCase):
+    @staticmethod
+    def _create_state(sample_scatter, can_scatter=None, can_transmission=None, can_direct=None,
+                      sample_transmission=None, sample_direct=None):
+        state = mock.MagicMock()
+        state.data.sample_scatter = sample_scatter
+        state.data.sample_transmission = sample_transmission
+        state.data.sample_direct = sample_direct
+        state.data.can_scatter = can_scatter
+        state.data.can_transmission = can_transmission
+        state.data.can_direct = can_direct
+        return state
+
+    def test_that_states_with_shared_inputs_are_grouped(self):
+        states = [self._create_state('SANS2D1', can_scatter='SANS2D10', can_transmission='SANS2D11'),
+                  self._create_state('SANS2D2', can_scatter='SANS2D20'),
+                  self._create_state('SANS2D3', can_scatter='SANS2D10', can_transmission='SANS2D11'),
+                  self._create_state('SANS2D4', can_scatter='SANS2D30', sample_direct='SANS2D40'),
+                  self._create_state('SANS2D5', can_scatter='SANS2D20', sample_direct='SANS2D40')]
+
+        groups = group_states_by_shared_inputs(states)
+
+        self.assertEqual(groups, [[0, 2], [1, 3, 4]])
+
+    def test_that_independent_states_are_not_grouped(self):
+        states = [self._create_state('SANS2D1'), self._create_state('SANS2D2'), self._create_state('SANS2D3')]
+
+        groups = group_states_by_shared_inputs(states)
+
+        self.assertEqual(groups, [[0], [1], [2]])
+
+    @mock.patch('sans.algorithm_detail.batch_execution._get_file_size')
+    def test_that_number_of_parallel_reductions_is_limited_by_threads_groups_and_memory(self, file_size_mock):
+        file_size_mock.return_value = 1000
+        groups = [[self._create_state('SANS2D{}'.format(index))] for index in range(4)]
+
+        self.assertEqual(get_number_of_parallel_reductions(groups, 2, available_memory=100000), 2)
+        self.assertEqual(get_number_of_parallel_reductions(groups, 8, available_memory=100000), 4)
+        self.assertEqual(get_number_of_parallel_reductions(groups, 8, available_memory=10000), 2)
+        self.assertEqual(get_number_of_parallel_reductions(groups, 8, available_memory=100), 1)
+
+    @mock.patch('sans.algorithm_detail.batch_execution._get_file_size')
+    @mock.patch('sans.algorithm_detail.batch_execution.single_reduction_for_batch')
+    def test_that_parallel_reduction_returns_results_in_order_of_states(self, reduction_mock, file_size_mock):
+        file_size_mock.return_value = 0
+        reduction_mock.side_effect = lambda state, *args, **kwargs: ([state.data.sample_scatter],
+                                                                     [state.data.can_scatter])
+        states = [self._create_state('SANS2D1', can_scatter='SANS2D10'),
+                  self._create_state('SANS2D2', can_scatter='SANS2D20'),
+                  self._create_state('SANS2D3', can_scatter='SANS2D10')]
+
+        scale_factors, shift_factors = parallel_reduction_for_batch(states, True, OutputMode.PublishToADS, 2)
+
+        self.assertEqual(reduction_mock.call_count, 3)
+        self.assertEqual(scale_factors, [['SANS2D1'], ['SANS2D2'], ['SANS2D3']])
+        self.assertEqual(shift_factors, [['SANS2D10'], ['SANS2D20'], ['SANS2D10']])
+
+    @mock.patch('sans.algorithm_detail.batch_execution._get_file_size')
+    @mock.patch('sans.algorithm_detail.batch_execution.single_reduction_for_batch')
+    def test_that_parallel_reduction_raises_error_of_first_failed_state(self, reduction_mock, file_size_mock):
+        file_size_mock.return_value = 0
+
+        def _reduce(state, *args, **kwargs):
+            if state.data.sample_scatter != 'SANS2D1':
+                raise RuntimeError(state.data.sample_scatter)
+            return [1.], [0.]
+        reduction_mock.side_effect = _reduce
+        states = [self._create_state('SANS2D1'), self._create_state('SANS2D2'), self._create_state('SANS2D3')]
+
+        with self.assertRaises(RuntimeError) as context:
+            parallel_reduction_for_batch(states, True, OutputMode.PublishToADS, 3)
+        self.assertEqual(str(context.exception), 'SANS2D2')
+        self.assertEqual(reduction_mock.call_count, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
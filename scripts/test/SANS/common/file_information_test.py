@@ -5,11 +5,14 @@
 #     & Institut Laue - Langevin
 # SPDX - License - Identifier: GPL - 3.0 +
 from __future__ import (absolute_import, division, print_function)
+import os
+import shutil
+import tempfile
 import unittest
 import mantid
 
 from sans.common.file_information import (SANSFileInformationFactory, SANSFileInformation, FileType,
-                                          SANSInstrument, get_instrument_paths_for_sans_file)
+                                          SANSInstrument, SANSRunIndex, get_instrument_paths_for_sans_file)
 from sans.common.enums import SampleShape
 from mantid.kernel import DateAndTime
 
@@ -137,6 +140,68 @@ class SANSFileInformationTest(unittest.TestCase):
         # Assert
         self.assertTrue(file_information)
 
+    def test_that_nexus_information_is_taken_from_run_index_when_file_was_indexed(self):
+        # Arrange
+        index_dir = tempfile.mkdtemp()
+        try:
+            run_index = SANSRunIndex(os.path.join(index_dir, "run_index.jsonl"))
+            first_information = SANSFileInformationFactory(run_index).create_sans_file_information("SANS2D00022024")
+
+            # Act
+            # A new index reads the entry written for the first file information
+            reloaded_index = SANSRunIndex(os.path.join(index_dir, "run_index.jsonl"))
+            metadata = reloaded_index.get(first_information.get_file_name())
+            file_information = SANSFileInformationFactory(reloaded_index).create_sans_file_information(
+                "SANS2D00022024")
+
+            # Assert
+            self.assertTrue(metadata is not None)
+            self.assertEqual(metadata["run_number"], 22024)
+            self.assertTrue(file_information.get_type() == FileType.ISISNexus)
+            self.assertTrue(file_information.get_date() == DateAndTime("2013-10-25T14:21:19"))
+            self.assertTrue(file_information.get_instrument() == SANSInstrument.SANS2D)
+            self.assertEqual(file_information.get_number_of_periods(), 1)
+            self.assertEqual(file_information.get_run_number(), 22024)
+            self.assertFalse(file_information.is_event_mode())
+            self.assertTrue(file_information.get_shape() is SampleShape.Disc)
+        finally:
+            shutil.rmtree(index_dir)
+
+
+class SANSRunIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._index_dir = tempfile.mkdtemp()
+        self._run_file = os.path.join(self._index_dir, "run.nxs")
+        with open(self._run_file, "w") as run_file:
+            run_file.write("data")
+
+    def tearDown(self):
+        shutil.rmtree(self._index_dir)
+
+    def test_that_entry_is_found_by_new_index(self):
+        run_index = SANSRunIndex(os.path.join(self._index_dir, "index.jsonl"))
+        run_index.add(self._run_file, {"run_number": 1})
+        self.assertEqual(run_index.get(self._run_file), {"run_number": 1})
+
+        reloaded_index = SANSRunIndex(os.path.join(self._index_dir, "index.jsonl"))
+        self.assertEqual(reloaded_index.get(self._run_file), {"run_number": 1})
+
+    def test_that_entry_is_not_used_when_file_changed(self):
+        run_index = SANSRunIndex(os.path.join(self._index_dir, "index.jsonl"))
+        run_index.add(self._run_file, {"run_number": 1})
+        with open(self._run_file, "a") as run_file:
+            run_file.write("more data")
+        self.assertTrue(run_index.get(self._run_file) is None)
+
+    def test_that_damaged_index_is_ignored(self):
+        index_file = os.path.join(self._index_dir, "index.jsonl")
+        with open(index_file, "w") as index:
+            index.write("{not json\n")
+        run_index = SANSRunIndex(index_file)
+        self.assertTrue(run_index.get(self._run_file) is None)
+        run_index.add(self._run_file, {"run_number": 2})
+        self.assertEqual(SANSRunIndex(index_file).get(self._run_file), {"run_number": 2})
+
 
 class SANSFileInformationGeneralFunctionsTest(unittest.TestCase):
     def test_that_finds_idf_and_ipf_paths(self):
@@ -14,6 +14,7 @@ from isis_powder.routines.param_map_entry import ParamMapEntry
 from isis_powder.routines import  common, run_details, yaml_parser
 
 import os
+import pickle
 import random
 import string
 import tempfile
@@ -114,6 +115,21 @@ class ISISPowderAbstractInstrumentTest(unittest.TestCase):
         self.assertRaises(ValueError, mock_inst.set_beam_parameters, height='height', width=-2)
         self.assertRaises(ValueError, mock_inst.set_beam_parameters, height=-1.234, width=True)
 
+    def test_instrument_can_be_passed_to_focus_processes(self):
+        cal_dir = self._create_temp_dir()
+        out_dir = self._create_temp_dir()
+        mock_inst = self._setup_mock_inst(suffix="-suf", yaml_file_path="ISISPowderRunDetailsTest.yaml",
+                                          calibration_dir=cal_dir, output_dir=out_dir)
+        # Runs are focused one by one unless the instrument overrides this
+        self.assertIsNone(mock_inst._get_focus_processes())
+
+        # Parallel focusing pickles the instrument with its settings to send it to the focusing processes
+        copied_inst = pickle.loads(pickle.dumps(mock_inst, 2))
+        self.assertEqual(copied_inst._inst_settings.suffix, "-suf")
+        self.assertEqual(copied_inst._inst_settings.output_dir, out_dir)
+        self.assertIsNone(copied_inst._inst_settings.file_extension)
+        self.assertEqual(copied_inst.get_instrument_prefix(), "MOCK")
+
 
 def _gen_random_string():
     return ''.join(random.choice(string.ascii_lowercase) for _ in range(10))
@@ -0,0 +1,85 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+from __future__ import (absolute_import, division, print_function)
+import mantid.simpleapi as mantid
+from isis_powder.routines import focus
+import numpy
+import unittest
+
+
+class _MockInst(object):
+    def __init__(self, prefix):
+        self._prefix = prefix
+
+    def get_instrument_prefix(self):
+        return self._prefix
+
+
+class ISISPowderFocusSplineTest(unittest.TestCase):
+    def setUp(self):
+        focus._rebinned_splines_cache.clear()
+
+    def tearDown(self):
+        focus._rebinned_splines_cache.clear()
+        mantid.mtd.clear()
+
+    def _create_spectrum(self, name):
+        x = numpy.arange(0., 110., 10.)
+        # The zero counts of bins 0 and 7 are under zeros of the spline, the zero counts of bin 2 are not
+        y = numpy.array([0, 5, 0, 30, 200, 80, 50, 0, 30, 25])
+        return mantid.CreateWorkspace(DataX=x, DataY=y, DataE=numpy.sqrt(y) + 1., OutputWorkspace=name)
+
+    def _create_spline(self):
+        x = numpy.arange(0., 105., 5.)
+        y = numpy.array([0, 0, 2, 2, 4, 4, 6, 6, 8, 8, 8, 8, 6, 6, 0, 0, 3, 3, 2, 2])
+        return mantid.CreateWorkspace(DataX=x, DataY=y, DataE=0.1 * y, OutputWorkspace="van_spline")
+
+    def test_divide_by_spline_matches_divide(self):
+        spline = self._create_spline()
+        spectrum = self._create_spectrum("bank_1")
+        rebinned = mantid.RebinToWorkspace(WorkspaceToRebin=spline, WorkspaceToMatch=spectrum, StoreInADS=False)
+        divided = mantid.Divide(LHSWorkspace=spectrum, RHSWorkspace=rebinned, StoreInADS=False)
+        expected = mantid.ReplaceSpecialValues(InputWorkspace=divided, NaNValue=0, StoreInADS=False)
+
+        result = focus._divide_one_spectrum_by_spline(spectrum, spline, _MockInst("POL"))
+
+        numpy.testing.assert_allclose(result.readY(0), expected.readY(0), rtol=1e-12)
+        numpy.testing.assert_allclose(result.readE(0), expected.readE(0), rtol=1e-12)
+        # The error of zero counts is divided by the spline
+        self.assertEqual(result.readY(0)[2], 0.)
+        self.assertGreater(result.readE(0)[2], 0.)
+
+    def test_divide_event_spectrum_by_spline_matches_divide(self):
+        spline = self._create_spline()
+        events = mantid.CreateSampleWorkspace(WorkspaceType="Event", NumBanks=1, BankPixelWidth=1, NumEvents=1000,
+                                              XMin=0., XMax=100., BinWidth=10.)
+        spectrum = mantid.ExtractSingleSpectrum(InputWorkspace=events, WorkspaceIndex=0, OutputWorkspace="bank_1")
+        rebinned = mantid.RebinToWorkspace(WorkspaceToRebin=spline, WorkspaceToMatch=spectrum, StoreInADS=False)
+        divided = mantid.Divide(LHSWorkspace=spectrum, RHSWorkspace=rebinned, StoreInADS=False)
+        expected = mantid.ReplaceSpecialValues(InputWorkspace=divided, NaNValue=0, StoreInADS=False)
+
+        result = focus._divide_one_spectrum_by_spline(spectrum, spline, _MockInst("POL"))
+
+        self.assertNotEqual(numpy.count_nonzero(expected.readY(0)), 0)
+        numpy.testing.assert_allclose(result.readY(0), expected.readY(0), rtol=1e-12)
+        numpy.testing.assert_allclose(result.readE(0), expected.readE(0), rtol=1e-12)
+
+    def test_rebinned_spline_is_reused_for_same_binning(self):
+        spline = self._create_spline()
+        first = focus._get_rebinned_spline(self._create_spectrum("run_1"), spline)
+        second = focus._get_rebinned_spline(self._create_spectrum("run_2"), spline)
+        self.assertIs(first, second)
+        self.assertEqual(len(focus._rebinned_splines_cache), 1)
+
+        rebinned_spectrum = mantid.Rebin(InputWorkspace=self._create_spectrum("run_3"), Params="0,20,100")
+        third = focus._get_rebinned_spline(rebinned_spectrum, spline)
+        self.assertIsNot(first, third)
+        self.assertEqual(len(focus._rebinned_splines_cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Usage matrixworkspacedisplay_scroll_speed.py [--spectra N] [--bins N] [--pages N] [--repeat N]
+
+Measures the cost of scrolling through the Y table of the MatrixWorkspaceDisplay.
+Mantid and mantidqt must be importable, e.g. by running it from the bin directory
+of a build. The default workspace of 1,000,000 spectra of 1000 bins needs about
+16 GB of memory, use --spectra to make it smaller.
+
+A viewport of 40 rows and 12 columns is scrolled down one page at a time from the
+top, then moved to pages spread over the whole workspace as when dragging the
+scroll bar. For every visible cell the text and the background are requested,
+as the view does when it paints. This is done with the table model, which reads
+blocks of cells, and with a subclass of it that reads the workspace for every cell.
+
+The minimum and mean over the repeats are printed in seconds.
+"""
+from __future__ import (absolute_import, division, print_function)
+import argparse
+import timeit
+
+import numpy as np
+
+VISIBLE_ROWS = 40
+VISIBLE_COLUMNS = 12
+
+
+def per_cell_model_type():
+    from mantidqt.widgets.matrixworkspacedisplay.table_view_model import MatrixWorkspaceTableViewModel
+
+    class PerCellTableViewModel(MatrixWorkspaceTableViewModel):
+        """
+        Reads the workspace for every cell, as the table model did before it read blocks of cells.
+        """
+
+        def get_value(self, row, column):
+            return self.relevant_data(row)[column]
+
+        def load_row_flags(self, row):
+            if self.ws_spectrum_info.hasDetectors(row):
+                self.masked_rows[row] = self.ws_spectrum_info.isMasked(row)
+                self.monitor_rows[row] = self.ws_spectrum_info.isMonitor(row)
+            self.masked_bins.pop(row, None)
+            if self.ws.hasMaskedBins(row):
+                masked_bins = np.zeros(self.column_count, dtype=bool)
+                masked_bins[list(self.ws.maskedBinsIndices(row))] = True
+                self.masked_bins[row] = masked_bins
+
+    return PerCellTableViewModel
+
+
+def block_model_type():
+    from mantidqt.widgets.matrixworkspacedisplay.table_view_model import MatrixWorkspaceTableViewModel
+
+    return MatrixWorkspaceTableViewModel
+
+
+def report(name, times):
+    print("{0:<40} min {1:8.4f}  mean {2:8.4f}".format(name, min(times), sum(times) / len(times)))
+
+
+def create_workspace(spectra, bins):
+    from mantid.api import WorkspaceFactory
+
+    return WorkspaceFactory.create("Workspace2D", NVectors=spectra, XLength=bins + 1, YLength=bins)
+
+
+def viewport_rows(spectra, pages):
+    """
+    First rows shown when paging down from the top, then when jumping through the workspace
+    """
+    last = max(spectra - VISIBLE_ROWS, 0)
+    paging = [min(page * VISIBLE_ROWS, last) for page in range(pages)]
+    jumping = [last * page // max(pages - 1, 1) for page in range(pages)]
+    return paging, jumping
+
+
+def scroll(model_type, ws, first_rows):
+    from qtpy.QtCore import Qt
+    from mantidqt.widgets.matrixworkspacedisplay.table_view_model import MatrixWorkspaceTableViewModelType
+
+    model = model_type(ws, MatrixWorkspaceTableViewModelType.y)
+    columns = range(min(VISIBLE_COLUMNS, ws.blocksize()))
+    for first_row in first_rows:
+        for row in range(first_row, min(first_row + VISIBLE_ROWS, ws.getNumberHistograms())):
+            for column in columns:
+                # the view creates the indices in C++, this avoids the range checks of index()
+                index = model.createIndex(row, column)
+                model.data(index, Qt.DisplayRole)
+                model.data(index, Qt.BackgroundRole)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures scrolling through the MatrixWorkspaceDisplay")
+    parser.add_argument("--spectra", type=int, default=1000000, help="Number of spectra in the workspace")
+    parser.add_argument("--bins", type=int, default=1000, help="Number of bins in each spectrum")
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages scrolled")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repeats of each measurement")
+    args = parser.parse_args()
+
+    ws = create_workspace(args.spectra, args.bins)
+    paging, jumping = viewport_rows(args.spectra, args.pages)
+    print("Scrolling {0} pages of {1}x{2} cells of a {3}x{4} workspace".format(
+        args.pages, VISIBLE_ROWS, VISIBLE_COLUMNS, args.spectra, args.bins))
+    for name, first_rows in [("page down", paging), ("jump", jumping)]:
+        for model_name, model_type in [("per cell reads", per_cell_model_type()), ("blocks", block_model_type())]:
+            report("{0}, {1}".format(name, model_name),
+                   timeit.repeat(lambda: scroll(model_type, ws, first_rows), number=1, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Usage pychop_scan_speed.py [--energies N] [--frequencies N] [--processes N] [--repeat N]
+
+Measures the cost of mapping the resolution, flux and number of reps of MERLIN and
+LET over a grid of incident energies and chopper frequencies (and phases for LET).
+The scripts directory of the source tree must be on the PYTHONPATH so that PyChop
+can be imported, e.g. PYTHONPATH=scripts python tools/pychop_scan_speed.py
+
+The grid is computed by calling getResolution, getFlux and getAllowedEi for each point,
+as the PyChop GUI does, and with Instrument.scan, in one process and shared out to
+--processes processes. The cache of chopper opening times is cleared before each repeat.
+
+The minimum and mean over the repeats are printed in seconds.
+"""
+from __future__ import (absolute_import, division, print_function)
+import argparse
+import timeit
+import warnings
+
+import numpy as np
+
+
+def instruments(energies, frequencies):
+    """
+    Instrument name, chopper, Ei, frequency and phase settings of each grid
+    """
+    merlin_frequencies = np.linspace(100, 600, frequencies)
+    let_frequencies = [[freq, freq / 2] for freq in np.linspace(120, 300, frequencies)]
+    return [("MERLIN", "G", np.linspace(5, 150, energies), merlin_frequencies, None),
+            ("LET", "High flux", np.linspace(1, 20, energies), let_frequencies, [5, "2"])]
+
+
+def clear_cache(instrument):
+    instrument.chopper_system._saved_states = {}
+
+
+def per_point(instrument, energies, frequencies, phases):
+    clear_cache(instrument)
+    for frequency in frequencies:
+        for phase in (phases if phases else [instrument.phase]):
+            instrument.frequency = frequency
+            instrument.phase = phase
+            for ei in energies:
+                instrument.getResolution(0., ei)
+                instrument.getFlux(ei)
+                instrument.getAllowedEi(ei)
+
+
+def scan(instrument, energies, frequencies, phases, processes):
+    clear_cache(instrument)
+    instrument.scan(energies, frequencies, phases, nprocesses=processes)
+
+
+def report(name, times):
+    print("{0:<40} min {1:8.4f}  mean {2:8.4f}".format(name, min(times), sum(times) / len(times)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures resolution and flux maps with PyChop")
+    parser.add_argument("--energies", type=int, default=60, help="Number of incident energies")
+    parser.add_argument("--frequencies", type=int, default=10, help="Number of chopper frequencies")
+    parser.add_argument("--processes", type=int, default=4, help="Number of processes of the parallel scan")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repeats of each measurement")
+    args = parser.parse_args()
+
+    from PyChop.Instruments import Instrument
+
+    # Frequencies where no neutrons are transmitted are part of the maps
+    warnings.simplefilter("ignore")
+    for name, chopper, energies, frequencies, phases in instruments(args.energies, args.frequencies):
+        instrument = Instrument(name, chopper)
+        print("{0}: {1} Ei x {2} frequencies x {3} phases".format(
+            name, len(energies), len(frequencies), len(phases) if phases else 1))
+        report("{0}, per point".format(name),
+               timeit.repeat(lambda: per_point(instrument, energies, frequencies, phases),
+                             number=1, repeat=args.repeat))
+        report("{0}, scan".format(name),
+               timeit.repeat(lambda: scan(instrument, energies, frequencies, phases, 1),
+                             number=1, repeat=args.repeat))
+        report("{0}, scan with {1} processes".format(name, args.processes),
+               timeit.repeat(lambda: scan(instrument, energies, frequencies, phases, args.processes),
+                             number=1, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2018 ISIS Rutherford Appleton Laboratory UKRI,
+#     NScD Oak Ridge National Laboratory, European Spallation Source
+#     & Institut Laue - Langevin
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Usage simpleapi_import_speed.py [--repeat N] [--python PYTHON]
+
+Measures the start-up cost of the Python API. Mantid must be importable by the
+given Python interpreter, e.g. by running it from the bin directory of a build.
+
+Two measurements are reported:
+
+ - plugin discovery: the time to find the plugin files registering algorithms in
+   python.plugins.directories, with the original full-file scan, with the tail read
+   done by kernel.plugins.contains_algorithm and with a warm index
+ - import: the wall time of 'import mantid.simpleapi' in a fresh interpreter with a
+   cold index, with a warm index and in lazy mode
+
+The minimum and mean over the repeats are printed in seconds.
+"""
+from __future__ import (absolute_import, division, print_function)
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+IMPORT_SCRIPT = """
+import time
+start = time.time()
+from mantid.kernel import config
+config['python.plugins.lazy'] = '{lazy}'
+import mantid.simpleapi
+print(time.time() - start)
+"""
+
+
+def full_scan_contains_algorithm(filename):
+    """
+    The check used before the index: reads the whole file and searches its lines from the end.
+    """
+    import io
+    with io.open(filename, 'r', encoding='UTF-8') as plugin_file:
+        for line in reversed(list(plugin_file.readlines())):
+            if 'AlgorithmFactory.subscribe' in line:
+                return True
+    return False
+
+
+def report(name, times):
+    print("{0:<40} min {1:8.4f}  mean {2:8.4f}".format(name, min(times), sum(times) / len(times)))
+
+
+def time_discovery(repeat):
+    from mantid.kernel import plugins
+
+    directories = plugins.get_plugin_paths_as_set('python.plugins.directories')
+    files = []
+    for directory in directories:
+        files += plugins.find_plugin_files(directory)
+
+    def full_scan():
+        return [filename for filename in files if full_scan_contains_algorithm(filename)]
+
+    def tail_read():
+        return [filename for filename in files if plugins.contains_algorithm(filename)]
+
+    index = {}
+
+    def tail_read_indexed():
+        return [filename for filename in files if plugins.contains_algorithm_indexed(filename, index)]
+
+    tail_read_indexed()
+
+    print("Plugin discovery over {0} files".format(len(files)))
+    report("full scan", timeit.repeat(full_scan, number=1, repeat=repeat))
+    report("tail read", timeit.repeat(tail_read, number=1, repeat=repeat))
+    report("warm index", timeit.repeat(tail_read_indexed, number=1, repeat=repeat))
+
+
+def time_import(python, repeat, lazy=False, cold=False):
+    from mantid.kernel import plugins
+
+    times = []
+    for _ in range(repeat):
+        if cold and os.path.exists(plugins.get_index_path()):
+            os.remove(plugins.get_index_path())
+        output = subprocess.check_output([python, "-c", IMPORT_SCRIPT.format(lazy=1 if lazy else 0)])
+        times.append(float(output.decode().strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the start-up time of mantid.simpleapi")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats of each measurement")
+    parser.add_argument("--python", default=sys.executable, help="Python interpreter used for the imports")
+    args = parser.parse_args()
+
+    time_discovery(args.repeat)
+    print("import mantid.simpleapi")
+    report("cold index", time_import(args.python, args.repeat, cold=True))
+    report("warm index", time_import(args.python, args.repeat))
+    report("lazy mode", time_import(args.python, args.repeat, lazy=True))
+
+
+if __name__ == "__main__":
+    main()